@@ -0,0 +1,179 @@
+"""
+Operational commands for the backend.
+
+Usage:
+    python -m app.admin index status
+    python -m app.admin index build [--force] [--background]
+    python -m app.admin partitions status
+    python -m app.admin partitions migrate [--partitions 16] [--batch-rows 20000]
+    python -m app.admin partitions drop-old
+    python -m app.admin retention status
+    python -m app.admin retention sweep
+    python -m app.admin retention rehydrate <video_id>
+    python -m app.admin embeddings status --to <model>
+    python -m app.admin embeddings migrate --to <model> [--from <model>] [--batch 256] [--rate 200] [--max-videos N]
+    python -m app.admin memory <master pid>
+"""
+import argparse
+import json
+import sys
+
+
+def _index(args) -> int:
+    from app.services.index_service import get_index_manager
+
+    manager = get_index_manager()
+
+    if args.action == "status":
+        print(json.dumps(manager.status(), indent=2, default=str))
+        return 0
+
+    if args.background:
+        started = manager.build_async(force=args.force)
+        print("Index build started" if started else "Index build already running")
+        return 0
+
+    print(json.dumps(manager.build(force=args.force), indent=2))
+    return 0
+
+
+def _partitions(args) -> int:
+    from app.database import engine
+    from app.services.partition_service import ChunkPartitionMigration
+
+    migration = ChunkPartitionMigration(engine, **{
+        key: value for key, value in (("modulus", args.partitions), ("batch_rows", args.batch_rows))
+        if value is not None
+    })
+
+    if args.action == "status":
+        print(json.dumps(migration.status(), indent=2, default=str))
+        return 0
+
+    if args.action == "drop-old":
+        migration.drop_old()
+        print("Dropped the unpartitioned copy of chunks")
+        return 0
+
+    def progress(upto, max_id):
+        print(f"copied up to id {upto} / {max_id}", flush=True)
+
+    try:
+        print(json.dumps(migration.migrate(progress), indent=2))
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+    print("Next: python -m app.admin index build  (vector index per partition)")
+    return 0
+
+
+def _retention(args) -> int:
+    from app.database import SessionLocal
+    from app.services.retention_service import RetentionService, RetentionWorker
+
+    if args.action == "sweep":
+        print(json.dumps(RetentionWorker(SessionLocal).sweep(), indent=2))
+        return 0
+
+    db = SessionLocal()
+    try:
+        service = RetentionService(db)
+        if args.action == "status":
+            print(json.dumps(service.stats(), indent=2, default=str))
+            return 0
+        if not args.video_id:
+            print("✗ rehydrate needs a video_id")
+            return 1
+        restored = service.rehydrate(args.video_id)
+        print(f"Rehydrated {args.video_id}" if restored else f"{args.video_id} is not archived")
+        return 0
+    finally:
+        db.close()
+
+
+def _embeddings(args) -> int:
+    from app.database import SessionLocal
+    from app.services.embedding_migration_service import EmbeddingMigration
+
+    db = SessionLocal()
+    try:
+        migration = EmbeddingMigration(db, args.to, **{
+            key: value for key, value in (("source", args.source), ("batch", args.batch), ("rate", args.rate))
+            if value is not None
+        })
+        if args.action == "status":
+            print(json.dumps(migration.status(), indent=2, default=str))
+            return 0
+
+        def progress(video_id, done):
+            print(f"{'✓' if done else '✗'} {video_id}", flush=True)
+
+        try:
+            print(json.dumps(migration.run(max_videos=args.max_videos, progress=progress), indent=2))
+        except ValueError as e:
+            print(f"✗ {e}")
+            return 1
+        print(f"When nothing remains: set EMBEDDING_MODEL={args.to} so new videos are ingested with it")
+        return 0
+    finally:
+        db.close()
+
+
+def _memory(args) -> int:
+    from app.utils.process_memory import memory_report
+
+    report = memory_report(args.pid)
+    if report["master"] is None:
+        print(f"No process {args.pid} (or /proc is not available)")
+        return 1
+
+    mib = 2 ** 20
+    print(f"{'pid':>8} {'rss MiB':>9} {'pss MiB':>9} {'unique MiB':>11} {'shared MiB':>11}")
+    for row in [report["master"]] + report["workers"]:
+        print(f"{row['pid']:>8} {row['rss'] / mib:>9.1f} {row['pss'] / mib:>9.1f} "
+              f"{row['uss'] / mib:>11.1f} {row['shared'] / mib:>11.1f}")
+    print(f"workers: rss {report['total_rss'] / mib:.1f} MiB, pss {report['total_pss'] / mib:.1f} MiB, "
+          f"shared copy-on-write {report['saved'] / mib:.1f} MiB")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.admin")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    index = commands.add_parser("index", help="Vector index status and rebuilds")
+    index.add_argument("action", choices=["status", "build"])
+    index.add_argument("--force", action="store_true", help="Rebuild even if the index exists")
+    index.add_argument("--background", action="store_true", help="Return immediately")
+    index.set_defaults(handler=_index)
+
+    partitions = commands.add_parser("partitions", help="Hash partitioning of the chunks table")
+    partitions.add_argument("action", choices=["status", "migrate", "drop-old"])
+    partitions.add_argument("--partitions", type=int, help="Number of hash partitions (CHUNK_PARTITIONS)")
+    partitions.add_argument("--batch-rows", type=int, help="Rows copied per transaction")
+    partitions.set_defaults(handler=_partitions)
+
+    retention = commands.add_parser("retention", help="Cold-video archive status and sweeps")
+    retention.add_argument("action", choices=["status", "sweep", "rehydrate"])
+    retention.add_argument("video_id", nargs="?", help="Video to rehydrate")
+    retention.set_defaults(handler=_retention)
+
+    embeddings = commands.add_parser("embeddings", help="Re-embed stored chunks with another model")
+    embeddings.add_argument("action", choices=["status", "migrate"])
+    embeddings.add_argument("--to", required=True, help="Target embedding model")
+    embeddings.add_argument("--from", dest="source", help="Model of videos with none recorded (EMBEDDING_MODEL)")
+    embeddings.add_argument("--batch", type=int, help="Chunks embedded per commit")
+    embeddings.add_argument("--rate", type=float, help="Chunks per second; 0 = unthrottled")
+    embeddings.add_argument("--max-videos", type=int, help="Stop after this many videos")
+    embeddings.set_defaults(handler=_embeddings)
+
+    memory = commands.add_parser("memory", help="Per-worker unique vs shared memory of a server")
+    memory.add_argument("pid", type=int, help="Master pid of python -m app.server")
+    memory.set_defaults(handler=_memory)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+
+from app.services.embedding_service import model_states, models_ready
+from app.utils.responses import APIResponse
+
+router = APIRouter(tags=["Health"])
+
+
+@router.get("/health")
+def health():
+    """Liveness: the process is up and serving. Never touches models or the database."""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+def ready():
+    """Readiness: 200 once the embedding models are loaded, 503 while they are not."""
+    is_ready = models_ready()
+    return APIResponse(
+        status_code=200 if is_ready else 503,
+        content={"ready": is_ready, "models": model_states()},
+    )
@@ -0,0 +1,29 @@
+import os
+
+from fastapi import APIRouter
+
+from app.database import engine, pool_stats as db_pool_stats, replica_router
+from app.services.embedding_pool import pool_stats
+from app.services.embedding_scheduler import scheduler_stats
+from app.services.prefetch_service import video_prefetcher
+from app.services.query_cache_service import query_cache
+from app.services.retention_service import retention_stats
+from app.utils.admission import admission_stats
+from app.utils.process_memory import process_memory
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/")
+def get_metrics():
+    return {
+        "query_cache": query_cache.stats(),
+        "process": process_memory(os.getpid()),
+        "embedding": scheduler_stats(),
+        "embedding_workers": pool_stats(),
+        "admission": admission_stats(),
+        "db_pool": db_pool_stats(engine),
+        "db_replicas": replica_router.stats(),
+        "retention": retention_stats(),
+        "prefetch": video_prefetcher.stats(),
+    }
@@ -1,10 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.database import get_db
-from app.schemas.process_video import ProcessVideoRequest, ProcessVideoResponse
+from app.schemas.process_video import (
+    ProcessVideoRequest,
+    ProcessVideoResponse,
+    BulkProcessVideoRequest,
+)
 from app.services.video_service import VideoService
+from app.utils.responses import dumps
 
 router = APIRouter(prefix="/process_video", tags=["Video"])
 
@@ -30,4 +36,30 @@ def process_video(request: ProcessVideoRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=503, detail="Database error")
 
     except Exception as e:
-        raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/bulk")
+def process_videos_bulk(request: BulkProcessVideoRequest, db: Session = Depends(get_db)):
+    """
+    Ingest a list of videos (e.g. a pasted playlist). Progress is streamed
+    back as NDJSON, one line per video, as soon as each video is committed.
+    """
+    service = VideoService(db)
+
+    try:
+        events = service.process_videos(request.videos)
+
+    except HTTPException:
+        raise
+
+    except SQLAlchemyError:
+        raise HTTPException(status_code=503, detail="Database error")
+
+    except Exception:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    return StreamingResponse(
+        (dumps(event) + b"\n" for event in events),
+        media_type="application/x-ndjson"
+    )
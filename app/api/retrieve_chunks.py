@@ -1,9 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
 
 from app.database import get_db
-from app.schemas import RetrieveChunksRequest, RetrieveChunksResponse
-from app.services.rag_service import retrieve_relevant_chunks
+from app.services.embedding_pool import EmbeddingPoolBusy
+from app.schemas import RetrieveChunksRequest, RetrieveChunksResponse, RetrieveChunksStreamRequest
+from app.services.rag_service import retrieve_relevant_chunks, stream_relevant_chunks
+from app.utils import http_cache
+from app.utils.responses import dumps
 
 router = APIRouter(prefix="/retrieve_chunks", tags=["Retrieval"])
 
@@ -11,13 +18,13 @@ router = APIRouter(prefix="/retrieve_chunks", tags=["Retrieval"])
 @router.post("/", response_model=RetrieveChunksResponse)
 def retrieve_chunks(request: RetrieveChunksRequest, db: Session = Depends(get_db)):
 
-    service = retrieve_relevant_chunks(db)
-
     try:
-        chunks = service.retrieve(
+        chunks = retrieve_relevant_chunks(
             video_id=request.video_id,
             question=request.question,
-            top_k=request.top_k
+            db=db,
+            top_k=request.top_k,
+            recall=request.recall
         )
 
         return RetrieveChunksResponse(
@@ -27,5 +34,81 @@ def retrieve_chunks(request: RetrieveChunksRequest, db: Session = Depends(get_db
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except EmbeddingPoolBusy:
+        raise HTTPException(status_code=503, detail="Embedding workers are saturated", headers={"Retry-After": "1"})
+    except Exception:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/stream")
+def retrieve_chunks_stream(request: RetrieveChunksStreamRequest, db: Session = Depends(get_db)):
+    """
+    The same retrieval as NDJSON: one line per chunk ({rank, chunk_index,
+    score, content}), written as soon as the chunk is ranked, so the client
+    can start building its prompt before the last one arrives.
+    """
+    try:
+        events = stream_relevant_chunks(
+            video_id=request.video_id,
+            question=request.question,
+            db=db,
+            top_k=request.top_k,
+            recall=request.recall
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except EmbeddingPoolBusy:
+        raise HTTPException(status_code=503, detail="Embedding workers are saturated", headers={"Retry-After": "1"})
+    except SQLAlchemyError:
+        raise HTTPException(status_code=503, detail="Database error")
     except Exception:
-        raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    return StreamingResponse(
+        (dumps(event) + b"\n" for event in events),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.get("/{video_id}", response_model=RetrieveChunksResponse)
+def retrieve_chunks_cacheable(
+    video_id: str,
+    request: Request,
+    response: Response,
+    question: str = Query(..., min_length=1),
+    top_k: int = Query(default=5, ge=1, le=20),
+    recall: Optional[float] = Query(default=None, ge=0.5, le=1.0),
+    db: Session = Depends(get_db)
+):
+    """
+    POST / as a GET, so a reverse proxy can cache it. Results change only
+    when the video is re-ingested: they carry the video's ETag /
+    Last-Modified, and a revalidation answers 304 without embedding or
+    searching anything.
+    """
+    try:
+        validators = http_cache.validators_for(db, video_id)
+        if validators is not None and http_cache.is_not_modified(request.headers, validators):
+            return http_cache.not_modified(validators)
+
+        chunks = retrieve_relevant_chunks(
+            video_id=video_id,
+            question=question,
+            db=db,
+            top_k=top_k,
+            recall=recall
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except EmbeddingPoolBusy:
+        raise HTTPException(status_code=503, detail="Embedding workers are saturated", headers={"Retry-After": "1"})
+    except SQLAlchemyError:
+        raise HTTPException(status_code=503, detail="Database error")
+    except Exception:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    if validators is not None:
+        response.headers.update(validators.headers())
+    return RetrieveChunksResponse(video_id=video_id, chunks=chunks)
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.database import get_db
+from app.services.embedding_pool import EmbeddingPoolBusy
+from app.schemas import SearchCorpusRequest, SearchCorpusResponse
+from app.services.search_service import search_corpus
+
+router = APIRouter(prefix="/search", tags=["Retrieval"])
+
+
+@router.post("/", response_model=SearchCorpusResponse)
+def search(request: SearchCorpusRequest, db: Session = Depends(get_db)):
+    """Which video talked about X? Top chunks across every processed video."""
+
+    try:
+        return search_corpus(
+            question=request.question,
+            db=db,
+            page=request.page,
+            page_size=request.page_size,
+            language=request.language,
+            video_ids=request.video_ids,
+            group=request.group_by_video
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except EmbeddingPoolBusy:
+        raise HTTPException(status_code=503, detail="Embedding workers are saturated", headers={"Retry-After": "1"})
+    except SQLAlchemyError:
+        raise HTTPException(status_code=503, detail="Database error")
+    except Exception:
+        raise HTTPException(status_code=500, detail="Internal server error")
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.database import get_db
+from app.schemas import SummaryResponse
+from app.services.summary_service import SummaryService
+from app.utils import http_cache
+
+router = APIRouter(prefix="/summary", tags=["Summary"])
+
+
+@router.get("/{video_id}", response_model=SummaryResponse)
+def get_summary(video_id: str, request: Request, response: Response, db: Session = Depends(get_db)):
+    """Key points of a video. Carries ETag / Last-Modified; revalidation answers 304."""
+
+    service = SummaryService(db)
+
+    try:
+        validators = http_cache.validators_for(db, video_id)
+        if validators is not None and http_cache.is_not_modified(request.headers, validators):
+            return http_cache.not_modified(validators)
+
+        key_points = service.get_summary(video_id)
+
+    except SQLAlchemyError:
+        raise HTTPException(status_code=503, detail="Database error")
+    except Exception:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    if key_points is None:
+        raise HTTPException(status_code=404, detail="Summary not available for this video")
+
+    if validators is not None:
+        response.headers.update(validators.headers())
+    return SummaryResponse(video_id=video_id, key_points=key_points)
@@ -1,9 +1,141 @@
 import os
 
+from dotenv import load_dotenv
+
+load_dotenv()
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set")
 
 FERNET_KEY = os.getenv("FERNET_KEY")
 if not FERNET_KEY:
-    raise ValueError("FERNET_KEY environment variable is not set")
\ No newline at end of file
+    raise ValueError("FERNET_KEY environment variable is not set")
+
+# Connection pool (app/database/pool.py)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds to wait for a connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # replace connections older than this; -1 = never
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() == "true"  # ping on every checkout
+DB_POOL_VALIDATE_INTERVAL = float(os.getenv("DB_POOL_VALIDATE_INTERVAL", "30"))  # background ping of idle connections; 0 = off
+
+# Read replicas (app/database/replicas.py)
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))  # replicas further behind are skipped
+REPLICA_RECENT_WRITE_SECONDS = float(os.getenv("REPLICA_RECENT_WRITE_SECONDS", "30"))  # reads of videos written here stay on the primary
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", "5"))  # seconds between lag probes per replica
+
+# Bulk ingestion
+BULK_MAX_VIDEOS = int(os.getenv("BULK_MAX_VIDEOS", "200"))
+BULK_TRANSCRIPT_WORKERS = int(os.getenv("BULK_TRANSCRIPT_WORKERS", "8"))
+BULK_EMBED_BATCH_SIZE = int(os.getenv("BULK_EMBED_BATCH_SIZE", "256"))
+
+# Extractive summaries
+SUMMARY_KEY_POINTS = int(os.getenv("SUMMARY_KEY_POINTS", "5"))
+SUMMARY_MAX_WORDS = int(os.getenv("SUMMARY_MAX_WORDS", "40"))
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "1024"))
+
+# Query-result cache
+QUERY_CACHE_MAX_VIDEOS = int(os.getenv("QUERY_CACHE_MAX_VIDEOS", "512"))
+QUERY_CACHE_ENTRIES_PER_VIDEO = int(os.getenv("QUERY_CACHE_ENTRIES_PER_VIDEO", "64"))
+QUERY_CACHE_SIMILARITY = float(os.getenv("QUERY_CACHE_SIMILARITY", "0.95"))
+
+# Vector index lifecycle
+INDEX_MIN_ROWS = int(os.getenv("INDEX_MIN_ROWS", "10000"))
+INDEX_HNSW_MAX_ROWS = int(os.getenv("INDEX_HNSW_MAX_ROWS", "5000000"))
+INDEX_DEFAULT_RECALL = float(os.getenv("INDEX_DEFAULT_RECALL", "0.95"))
+INDEX_AUTO_BUILD = os.getenv("INDEX_AUTO_BUILD", "true").lower() == "true"
+INDEX_REFRESH_SECONDS = float(os.getenv("INDEX_REFRESH_SECONDS", "60"))  # how long a process trusts its look at the index
+
+# Retention: cold videos' chunks move to the chunk_archive table (app/services/retention_service.py)
+RETENTION_HOT_DAYS = float(os.getenv("RETENTION_HOT_DAYS", "90"))  # archive videos not retrieved for this long; 0 = never
+RETENTION_MAX_HOT_VIDEOS = int(os.getenv("RETENTION_MAX_HOT_VIDEOS", "0"))  # archive least recently used beyond this; 0 = no cap
+RETENTION_ARCHIVE_DAYS = float(os.getenv("RETENTION_ARCHIVE_DAYS", "0"))  # delete archived videos idle this long; 0 = keep
+RETENTION_ARCHIVE_PRECISION = os.getenv("RETENTION_ARCHIVE_PRECISION", "float16")  # float32 = lossless
+RETENTION_SWEEP_INTERVAL = float(os.getenv("RETENTION_SWEEP_INTERVAL", "3600"))  # seconds between sweeps; 0 = off
+RETENTION_SWEEP_BATCH = int(os.getenv("RETENTION_SWEEP_BATCH", "100"))  # videos archived / deleted per sweep
+RETENTION_ACCESS_FLUSH_SECONDS = float(os.getenv("RETENTION_ACCESS_FLUSH_SECONDS", "60"))  # batch last-access writes
+
+# Prefetch of a video when a user switches to it (app/services/prefetch_service.py)
+PREFETCH_ON_ACTIVATE = os.getenv("PREFETCH_ON_ACTIVATE", "true").lower() == "true"  # set_active_video warms the video
+PREFETCH_ON_SEARCH = os.getenv("PREFETCH_ON_SEARCH", "true").lower() == "true"  # a search of a cold video warms it in that worker
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "2"))  # loader threads; 0 = off
+PREFETCH_MAX_VIDEOS = int(os.getenv("PREFETCH_MAX_VIDEOS", "128"))  # warm videos kept, least recently used dropped
+PREFETCH_TTL_SECONDS = float(os.getenv("PREFETCH_TTL_SECONDS", "900"))  # a warm video is reloaded after this
+
+# Hash partitioning of chunks on video_id (app/repositories/chunk_partitions.py)
+CHUNK_PARTITIONS = int(os.getenv("CHUNK_PARTITIONS", "16"))  # partitions created by `app.admin partitions migrate`
+CHUNK_MIGRATION_BATCH_ROWS = int(os.getenv("CHUNK_MIGRATION_BATCH_ROWS", "20000"))  # rows copied per transaction
+
+# Embeddings
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "paraphrase-multilingual-MiniLM-L12-v2")
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "384"))
+EMBEDDING_PRELOAD = os.getenv("EMBEDDING_PRELOAD", "true").lower() == "true"  # load at startup, off the request path
+# float32 -> pgvector `vector`; float16 -> `halfvec`. pgvector has no int8
+# type, so int8 is stored as halfvec in Postgres and applies to in-process stores.
+EMBEDDING_PRECISION = os.getenv("EMBEDDING_PRECISION", "float32")
+VECTOR_SQL_TYPE = "vector" if EMBEDDING_PRECISION == "float32" else "halfvec"
+
+# Re-embedding with another model (app/services/embedding_migration_service.py)
+EMBEDDING_MIGRATION_BATCH = int(os.getenv("EMBEDDING_MIGRATION_BATCH", "256"))  # chunks embedded and staged per commit
+EMBEDDING_MIGRATION_RATE = float(os.getenv("EMBEDDING_MIGRATION_RATE", "200"))  # chunks per second; 0 = unthrottled
+EMBEDDING_MODEL_CACHE_SECONDS = float(os.getenv("EMBEDDING_MODEL_CACHE_SECONDS", "30"))  # trust a video's model this long
+
+# Binary-quantised corpus search
+BINARY_RERANK_CANDIDATES = int(os.getenv("BINARY_RERANK_CANDIDATES", "300"))
+BINARY_INDEX_SYNC_SECONDS = float(os.getenv("BINARY_INDEX_SYNC_SECONDS", "30"))  # how often the index looks for other processes' writes
+
+# Corpus-wide search
+CORPUS_SEARCH_BACKEND = os.getenv("CORPUS_SEARCH_BACKEND", "pgvector")  # pgvector | binary
+CORPUS_SEARCH_MAX_RESULTS = int(os.getenv("CORPUS_SEARCH_MAX_RESULTS", "200"))
+
+# Vector storage backend: pgvector | sqlite | memory | segments (see app/repositories/vector_backend.py)
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "pgvector")
+SQLITE_VECTOR_PATH = os.getenv("SQLITE_VECTOR_PATH", "./data/vectors.sqlite3")
+SEGMENT_STORE_PATH = os.getenv("SEGMENT_STORE_PATH", "./data/segments")
+SEGMENT_COMPACT_INTERVAL = float(os.getenv("SEGMENT_COMPACT_INTERVAL", "300"))
+SEGMENT_RETIRE_GRACE = float(os.getenv("SEGMENT_RETIRE_GRACE", "600"))  # seconds replaced segment files are kept for readers of the old manifest
+
+# Embedding CPU budget (app/services/embedding_scheduler.py)
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))  # intra-op threads for all lanes; 0 = leave torch's setting
+EMBEDDING_LANES = int(os.getenv("EMBEDDING_LANES", "1"))  # concurrent encode() calls
+EMBEDDING_QUERY_LANES = int(os.getenv("EMBEDDING_QUERY_LANES", "0"))  # lanes reserved for query embedding
+EMBEDDING_BULK_SLICE = int(os.getenv("EMBEDDING_BULK_SLICE", "64"))  # texts per bulk job
+
+# Embedding worker processes (app/services/embedding_pool.py); 0 = embed in the API process
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "0"))
+EMBEDDING_POOL_MAX_PENDING = int(os.getenv("EMBEDDING_POOL_MAX_PENDING", "0"))  # result slots; 0 = 4 per worker
+EMBEDDING_POOL_TIMEOUT = float(os.getenv("EMBEDDING_POOL_TIMEOUT", "30"))  # seconds to wait for a free slot
+
+# Pre-fork server (python -m app.server)
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "2"))
+TORCH_THREADS_PER_WORKER = int(os.getenv("TORCH_THREADS_PER_WORKER", "0"))  # 0 = cores / workers
+
+# Response compression (app/utils/compression.py)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1400"))  # bytes; smaller bodies fit one TCP segment anyway
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "1"))  # gzip level; 0 = off
+COMPRESSION_MIN_SAVING = float(os.getenv("COMPRESSION_MIN_SAVING", "0.1"))  # send uncompressed unless gzip saves this fraction
+
+# Streaming retrieval (POST /retrieve_chunks/stream)
+RETRIEVAL_STREAM_MAX_TOP_K = int(os.getenv("RETRIEVAL_STREAM_MAX_TOP_K", "100"))
+RETRIEVAL_STREAM_BATCH = int(os.getenv("RETRIEVAL_STREAM_BATCH", "8"))  # rows fetched from the cursor at a time
+
+# HTTP caching of per-video resources (app/utils/http_cache.py)
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))  # seconds a proxy may serve without revalidating
+HTTP_CACHE_STALE_WHILE_REVALIDATE = int(os.getenv("HTTP_CACHE_STALE_WHILE_REVALIDATE", "300"))
+
+# Admission control (app/utils/admission.py)
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+ADMISSION_BACKEND = os.getenv("ADMISSION_BACKEND", "memory")  # memory (per process) | sqlite (shared by a host's workers)
+ADMISSION_STORE_PATH = os.getenv("ADMISSION_STORE_PATH", "./data/admission.sqlite3")
+ADMISSION_INGEST_RATE = float(os.getenv("ADMISSION_INGEST_RATE", "0.2"))  # requests / second per client; 0 = unlimited
+ADMISSION_INGEST_BURST = int(os.getenv("ADMISSION_INGEST_BURST", "5"))
+ADMISSION_INGEST_CONCURRENCY = int(os.getenv("ADMISSION_INGEST_CONCURRENCY", "2"))  # in flight; 0 = unlimited
+ADMISSION_INGEST_QUEUE = int(os.getenv("ADMISSION_INGEST_QUEUE", "8"))
+ADMISSION_RETRIEVE_RATE = float(os.getenv("ADMISSION_RETRIEVE_RATE", "2"))
+ADMISSION_RETRIEVE_BURST = int(os.getenv("ADMISSION_RETRIEVE_BURST", "20"))
+ADMISSION_RETRIEVE_CONCURRENCY = int(os.getenv("ADMISSION_RETRIEVE_CONCURRENCY", "16"))
+ADMISSION_RETRIEVE_QUEUE = int(os.getenv("ADMISSION_RETRIEVE_QUEUE", "64"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5"))  # seconds a request may wait for a slot
+ADMISSION_SLOT_TTL = float(os.getenv("ADMISSION_SLOT_TTL", "600"))  # shared-store slot lease, renewed every ttl / 3 while its request runs
@@ -1,5 +1,6 @@
 from .base import Base
-from .session import engine, SessionLocal, get_db
+from .session import engine, SessionLocal, get_db, pool_validator, replica_router
+from .pool import pool_stats
 
 # Ensure models are registered
 from app import models
@@ -9,4 +10,7 @@ __all__ = [
     "engine",
     "SessionLocal",
     "get_db",
+    "pool_validator",
+    "pool_stats",
+    "replica_router",
 ]
\ No newline at end of file
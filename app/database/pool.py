@@ -0,0 +1,236 @@
+"""
+Connection pool configuration and telemetry for the app's engine.
+
+- Pool sizing comes from DB_POOL_* settings instead of being hard-coded.
+- No pre-ping by default: a ping is a round trip on every checkout. Instead
+  connections older than DB_POOL_RECYCLE are replaced at checkout and a
+  PoolValidator thread pings the idle connections every
+  DB_POOL_VALIDATE_INTERVAL seconds, invalidating dead ones off the
+  request path.
+- InstrumentedQueuePool and PoolTelemetry record checkout wait, hold time,
+  new / invalidated connections and peak overflow for /metrics.
+"""
+import logging
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from app.config import (
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_POOL_VALIDATE_INTERVAL,
+)
+
+logger = logging.getLogger(__name__)
+
+SLOW_CHECKOUT_SECONDS = 0.1
+
+
+class PoolTelemetry:
+    """Counters for one pool; updated from pool events and InstrumentedQueuePool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+            self.slow_checkouts = 0
+            self.timeouts = 0
+            self.hold_seconds = 0.0
+            self.checkins = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.peak_checked_out = 0
+            self.peak_overflow = 0
+
+    def record_wait(self, seconds: float, pool: QueuePool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            if seconds >= SLOW_CHECKOUT_SECONDS:
+                self.slow_checkouts += 1
+            self.peak_checked_out = max(self.peak_checked_out, pool.checkedout())
+            self.peak_overflow = max(self.peak_overflow, pool.overflow())
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def record_checkin(self, held_seconds: float) -> None:
+        with self._lock:
+            self.checkins += 1
+            self.hold_seconds += held_seconds
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidate(self) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self, pool) -> dict:
+        with self._lock:
+            stats = {
+                "checkouts": self.checkouts,
+                "avg_wait_ms": round(1000 * self.wait_seconds / self.checkouts, 3) if self.checkouts else None,
+                "max_wait_ms": round(1000 * self.max_wait_seconds, 3),
+                "slow_checkouts": self.slow_checkouts,
+                "timeouts": self.timeouts,
+                "avg_hold_ms": round(1000 * self.hold_seconds / self.checkins, 3) if self.checkins else None,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "peak_checked_out": self.peak_checked_out,
+                "peak_overflow": max(0, self.peak_overflow),
+            }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "size": pool.size(),
+                "active": pool.checkedout(),
+                "idle": pool.checkedin(),
+                # negative while the pool has not opened `size` connections yet
+                "overflow": max(0, pool.overflow()),
+                "max_overflow": pool._max_overflow,
+            })
+        return stats
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long each checkout waits for a connection."""
+
+    telemetry: PoolTelemetry
+
+    def __init__(self, *args, telemetry: Optional[PoolTelemetry] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.telemetry = telemetry or PoolTelemetry()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.telemetry.record_timeout()
+            raise
+        self.telemetry.record_wait(time.perf_counter() - started, self)
+        return connection
+
+    def recreate(self):
+        # dispose() builds a new pool: keep counting into the same telemetry
+        pool = super().recreate()
+        pool.telemetry = self.telemetry
+        return pool
+
+
+def engine_options(url: str) -> dict:
+    """create_engine() pool arguments for a database URL."""
+    if url.startswith("sqlite"):
+        # SQLite picks its own pool class; sizing does not apply
+        return {"pool_pre_ping": DB_POOL_PRE_PING}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def instrument(engine: Engine) -> PoolTelemetry:
+    """Attach pool event listeners to an engine; returns its telemetry."""
+    pool = engine.pool
+    telemetry = getattr(pool, "telemetry", None) or PoolTelemetry()
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, record):
+        telemetry.record_connect()
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, record, proxy):
+        record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, record):
+        checked_out_at = record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            telemetry.record_checkin(time.perf_counter() - checked_out_at)
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, record, exception):
+        telemetry.record_invalidate()
+
+    engine.pool_telemetry = telemetry
+    return telemetry
+
+
+def pool_stats(engine: Engine) -> Optional[dict]:
+    telemetry = getattr(engine, "pool_telemetry", None)
+    return telemetry.stats(engine.pool) if telemetry is not None else None
+
+
+class PoolValidator:
+    """
+    Pings every idle connection of an engine's pool each `interval`
+    seconds, one at a time, and invalidates those that fail, so requests
+    do not pay for a pre-ping and rarely meet a dead connection.
+    """
+
+    def __init__(self, engine: Engine, interval: float = DB_POOL_VALIDATE_INTERVAL):
+        self.engine = engine
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.validated = 0
+        self.invalidated = 0
+
+    def validate_once(self) -> int:
+        """Ping the connections idle right now; returns how many were dead."""
+        pool = self.engine.pool
+        dead = 0
+        # the queue is FIFO, so each checkout / checkin cycles to the next idle one
+        for _ in range(pool.checkedin()):
+            if pool.checkedin() == 0:
+                break  # requests took the rest; they are in use, not idle
+            connection = pool.connect()
+            try:
+                cursor = connection.cursor()
+                cursor.execute("SELECT 1")
+                cursor.close()
+                self.validated += 1
+            except Exception as e:
+                logger.warning(f"Idle database connection failed validation: {e}")
+                connection.invalidate(e)
+                self.invalidated += 1
+                dead += 1
+            finally:
+                connection.close()
+        return dead
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.validate_once()
+            except Exception as e:
+                logger.warning(f"Pool validation failed: {e}")
+
+    def start(self) -> bool:
+        if self.interval <= 0 or self._thread is not None:
+            return False
+        self._thread = threading.Thread(target=self._run, name="db-pool-validator", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -0,0 +1,246 @@
+"""
+Read-replica routing.
+
+Writes and everything not marked otherwise use the primary engine. Reads
+that tolerate replication lag (video lookups, similarity search) ask for a
+replica through `replica_bind(db, video_id)`, which RoutingSession.get_bind
+resolves to one of the DATABASE_REPLICA_URLS engines. The primary is used
+instead when:
+
+- no replica is configured or healthy, or every replica lags by more than
+  REPLICA_MAX_LAG_SECONDS (measured at most every REPLICA_LAG_CHECK_INTERVAL);
+- this process wrote the video within the last REPLICA_RECENT_WRITE_SECONDS,
+  so a user reads their own ingestion;
+- `read_with_fallback` finds the video missing on the replica (just
+  ingested by another worker) or the replica fails mid-query. A search
+  the replica answers with no hits for a video it has is not re-run.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.config import REPLICA_LAG_CHECK_INTERVAL, REPLICA_MAX_LAG_SECONDS, REPLICA_RECENT_WRITE_SECONDS
+
+from .pool import engine_options, instrument, pool_stats
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Replayed everything received is only "in sync" while WAL is still streaming in: a replica
+# cut off from its primary shows the same. Otherwise the age of the last replayed transaction
+# counts, which an idle primary overstates (the replica is then skipped, never wrongly used).
+_PG_LAG = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+             AND EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())::float8, 'Infinity'::float8)
+    END
+""")
+
+
+def measure_lag(engine: Engine) -> float:
+    """Replication lag of a replica in seconds; 0 for databases without replication (SQLite)."""
+    if engine.dialect.name != "postgresql":
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return 0.0
+    with engine.connect() as conn:
+        return float(conn.execute(_PG_LAG).scalar() or 0.0)
+
+
+class Replica:
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.lag: Optional[float] = None
+        self.healthy = True
+        self.checked_at = float("-inf")
+        self.reads = 0
+        self.errors = 0
+
+
+class ReplicaRouter:
+
+    def __init__(
+        self,
+        replicas: List[Engine],
+        max_lag: float = REPLICA_MAX_LAG_SECONDS,
+        recent_write_window: float = REPLICA_RECENT_WRITE_SECONDS,
+        check_interval: float = REPLICA_LAG_CHECK_INTERVAL,
+        lag_probe: Callable[[Engine], float] = measure_lag,
+        clock=time.monotonic
+    ):
+        self.replicas = [Replica(engine) for engine in replicas]
+        self.max_lag = max_lag
+        self.recent_write_window = recent_write_window
+        self.check_interval = check_interval
+        self.lag_probe = lag_probe
+        self.clock = clock
+        self._recent_writes: "OrderedDict[str, float]" = OrderedDict()
+        self._writes_lock = threading.Lock()
+        self._next = 0
+        self._check_lock = threading.Lock()
+        self.primary_reads = 0
+        self.fallbacks = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    # -----------------------------
+    # WRITES
+    # -----------------------------
+    def mark_written(self, video_id: str) -> None:
+        now = self.clock()
+        with self._writes_lock:
+            self._recent_writes[video_id] = now
+            self._recent_writes.move_to_end(video_id)
+            # oldest first: drop the writes every replica has caught up with
+            while next(iter(self._recent_writes.values())) <= now - self.recent_write_window:
+                self._recent_writes.popitem(last=False)
+
+    def recently_written(self, video_id: str) -> bool:
+        with self._writes_lock:
+            written_at = self._recent_writes.get(video_id)
+        return written_at is not None and self.clock() - written_at < self.recent_write_window
+
+    # -----------------------------
+    # READS
+    # -----------------------------
+    def _refresh(self, replica: Replica) -> None:
+        try:
+            replica.lag = self.lag_probe(replica.engine)
+            replica.healthy = True
+        except Exception as e:
+            if replica.healthy:
+                logger.warning(f"Read replica {replica.engine.url.render_as_string()} unavailable: {e}")
+            replica.healthy = False
+            replica.lag = None
+        replica.checked_at = self.clock()
+
+    def _usable(self, replica: Replica) -> bool:
+        if self.clock() - replica.checked_at >= self.check_interval and self._check_lock.acquire(blocking=False):
+            try:
+                self._refresh(replica)
+            finally:
+                self._check_lock.release()
+        return replica.healthy and replica.lag is not None and replica.lag <= self.max_lag
+
+    def replica_for(self, video_id: Optional[str] = None) -> Optional[Replica]:
+        """A replica fit to serve a read of `video_id`, or None for the primary."""
+        if not self.replicas or (video_id is not None and self.recently_written(video_id)):
+            self.primary_reads += 1
+            return None
+
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(self._next + offset) % len(self.replicas)]
+            if self._usable(replica):
+                self._next = (self._next + offset + 1) % len(self.replicas)
+                replica.reads += 1
+                return replica
+
+        self.primary_reads += 1
+        return None
+
+    def mark_failed(self, engine: Engine) -> None:
+        for replica in self.replicas:
+            if replica.engine is engine:
+                replica.errors += 1
+                replica.healthy = False
+                replica.checked_at = self.clock()
+
+    def stats(self) -> dict:
+        return {
+            "replicas": [
+                {
+                    "url": replica.engine.url.render_as_string(hide_password=True),
+                    "healthy": replica.healthy,
+                    "lag_seconds": replica.lag,
+                    "reads": replica.reads,
+                    "errors": replica.errors,
+                    "pool": pool_stats(replica.engine),
+                }
+                for replica in self.replicas
+            ],
+            "primary_reads": self.primary_reads,
+            "fallbacks": self.fallbacks,
+        }
+
+
+def build_router(urls: List[str]) -> ReplicaRouter:
+    engines = []
+    for url in urls:
+        engine = create_engine(url, **engine_options(url))
+        instrument(engine)
+        engines.append(engine)
+    return ReplicaRouter(engines)
+
+
+class RoutingSession(Session):
+    """Session whose reads go to a replica when the statement asks for one."""
+
+    def __init__(self, *args, router: Optional[ReplicaRouter] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.router = router
+
+    def get_bind(self, mapper=None, *, clause=None, replica_engine: Optional[Engine] = None, **kw):
+        if replica_engine is not None:
+            return replica_engine
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+def replica_bind(db, video_id: Optional[str] = None) -> Dict[str, Engine]:
+    """bind_arguments routing a read to a replica; empty (the primary) when none fits."""
+    router = getattr(db, "router", None)
+    if not isinstance(db, RoutingSession) or router is None or not router.enabled:
+        return {}
+    replica = router.replica_for(video_id)
+    return {"replica_engine": replica.engine} if replica is not None else {}
+
+
+def read_with_fallback(
+    db,
+    video_id: Optional[str],
+    read: Callable[[dict], T],
+    missing: Callable[[T], bool] = lambda result: not result
+) -> T:
+    """
+    Run `read(bind_arguments)` on a replica and again on the primary when
+    the replica fails or returns a `missing` result (it has not replayed
+    the video's ingestion yet). `missing` should test for the video, not
+    for an empty result, so that reads with nothing to find stay on the
+    replica.
+    """
+    bind_arguments = replica_bind(db, video_id)
+    if not bind_arguments:
+        return read({})
+
+    try:
+        result = read(bind_arguments)
+    except DBAPIError as e:
+        logger.warning(f"Replica read failed, using the primary: {e}")
+        db.router.mark_failed(bind_arguments["replica_engine"])
+        db.rollback()
+        db.router.fallbacks += 1
+        return read({})
+
+    if missing(result):
+        db.router.fallbacks += 1
+        return read({})
+    return result
+
+
+def note_write(db, video_id: str) -> None:
+    """Record that this process just wrote a video, so its reads stay on the primary."""
+    router = getattr(db, "router", None)
+    if isinstance(db, RoutingSession) and router is not None:
+        router.mark_written(video_id)
@@ -3,21 +3,30 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
+from app.config import DATABASE_REPLICA_URLS
+
+from .pool import PoolValidator, engine_options, instrument
+from .replicas import RoutingSession, build_router
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10,
-)
+# pool sizing, recycle and pre-ping come from DB_POOL_* (see pool.py)
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+instrument(engine)
+
+pool_validator = PoolValidator(engine)
+
+# lag-tolerant reads go to DATABASE_REPLICA_URLS when set (see replicas.py)
+replica_router = build_router(DATABASE_REPLICA_URLS)
 
 SessionLocal = sessionmaker(
+    class_=RoutingSession,
     autocommit=False,
     autoflush=False,
-    bind=engine
+    bind=engine,
+    router=replica_router
 )
 
 
@@ -26,4 +35,4 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
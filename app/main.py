@@ -1,21 +1,64 @@
 from fastapi import FastAPI
-from fastapi.middleware.gzip import GZipMiddleware
 
 from app.api.process_video import router as process_video
 from app.api.retrieve_chunks import router as retrieve_chunks_router
+from app.api.summary import router as summary_router
+from app.api.search import router as search_router
+from app.api.metrics import router as metrics_router
+from app.api.health import router as health_router
+from app.config import INDEX_AUTO_BUILD, EMBEDDING_PRELOAD
+from app.database import pool_validator
+from app.services.embedding_service import preload_model
+from app.services.index_service import get_index_manager
+from app.services.retention_service import retention_worker
+from app.utils.admission import AdmissionMiddleware
+from app.utils.compression import CompressionMiddleware
+from app.utils.responses import APIResponse, ContentNegotiationMiddleware
 
 app = FastAPI(
     title="YouTube Summarizer RAG Backend",
     version="3.0.0",
-    description="YouTube transcript processing, summarization and Q&A retrieval layer for OpenClaw"
+    description="YouTube transcript processing, summarization and Q&A retrieval layer for OpenClaw",
+    default_response_class=APIResponse,  # orjson, or MessagePack via Accept
 )
 
 # Middleware
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(ContentNegotiationMiddleware)
+app.add_middleware(CompressionMiddleware)
 
 # Routers
 app.include_router(process_video)
 app.include_router(retrieve_chunks_router)
+app.include_router(summary_router)
+app.include_router(search_router)
+app.include_router(metrics_router)
+app.include_router(health_router)
+
+# Embedding model — loaded in the background; /ready reports when it is in
+@app.on_event("startup")
+async def load_embedding_model():
+    if EMBEDDING_PRELOAD:
+        preload_model()
+
+# Vector index — checked once per boot, built off the request path
+@app.on_event("startup")
+async def ensure_vector_index():
+    if INDEX_AUTO_BUILD:
+        get_index_manager().build_async()
+
+
+# Idle database connections — validated in the background instead of pre-pinged per checkout
+@app.on_event("startup")
+async def start_pool_validator():
+    pool_validator.start()
+
+
+# Retention — last-access flushes and cold-video archiving in the background
+@app.on_event("startup")
+async def start_retention_worker():
+    retention_worker.start()
+
 
 # Startup banner
 @app.on_event("startup")
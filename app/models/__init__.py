@@ -1,4 +1,6 @@
 from .video import video
 from .chunk import Chunk
+from .chunk_archive import ChunkArchive
+from .chunk_reembedding import ChunkReembedding
 
-__all__ = ["video", "Chunk"]
\ No newline at end of file
+__all__ = ["video", "Chunk", "ChunkArchive", "ChunkReembedding"]
\ No newline at end of file
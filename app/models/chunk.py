@@ -1,9 +1,12 @@
 from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
 from sqlalchemy.sql import func
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import Vector, HALFVEC
 
+from app.config import EMBEDDING_DIM, VECTOR_SQL_TYPE
 from app.database.base import Base
 
+EmbeddingType = Vector if VECTOR_SQL_TYPE == "vector" else HALFVEC
+
 
 class Chunk(Base):
     __tablename__ = "chunks"
@@ -12,5 +15,5 @@ class Chunk(Base):
     video_id = Column(String(50), ForeignKey("videos.video_id"), index=True)
     chunk_index = Column(Integer, nullable=False)
     content = Column(Text, nullable=False)
-    embedding = Column(Vector(1536))  # adjust dimension if using different model
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    embedding = Column(EmbeddingType(EMBEDDING_DIM))  # dimension follows EMBEDDING_MODEL
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime, ForeignKey
+from sqlalchemy.sql import func
+
+from app.database.base import Base
+
+
+class ChunkArchive(Base):
+    """A cold video's chunks, moved out of the vector store by the retention sweeper."""
+    __tablename__ = "chunk_archive"
+
+    video_id = Column(String(50), ForeignKey("videos.video_id"), primary_key=True)
+    chunk_count = Column(Integer, nullable=False)
+    dim = Column(Integer, nullable=False)
+    precision = Column(String(16), nullable=False)  # dtype of the archived vectors
+    contents = Column(LargeBinary, nullable=False)  # zlib-compressed JSON list, chunk order
+    embeddings = Column(LargeBinary, nullable=False)  # zlib-compressed row-major matrix
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime
+from sqlalchemy.sql import func
+
+from app.database.base import Base
+
+
+class ChunkReembedding(Base):
+    """A chunk's vector from the model a migration is moving to, staged until its video switches."""
+    __tablename__ = "chunk_reembeddings"
+
+    video_id = Column(String(50), primary_key=True)
+    chunk_index = Column(Integer, primary_key=True)
+    model = Column(String(200), nullable=False)
+    embedding = Column(LargeBinary, nullable=False)  # float32 bytes
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -11,4 +11,12 @@ class video(Base):
     video_id = Column(String(50), unique=True, nullable=False, index=True)
     encrypted_transcript = Column(Text, nullable=False)
     language = Column(String(50), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    summary = Column(Text, nullable=True)  # JSON list of extractive key points
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # bumped whenever the video's chunks are written or deleted; drives ETag / Last-Modified
+    content_version = Column(Integer, nullable=False, default=0, server_default="0")
+    content_updated_at = Column(DateTime(timezone=True), nullable=True)
+    # last retrieval; flushed in batches by the retention AccessTracker
+    last_accessed_at = Column(DateTime(timezone=True), nullable=True)
+    # model that embedded the video's chunks; NULL = written before it was recorded (EMBEDDING_MODEL)
+    embedding_model = Column(String(200), nullable=True)
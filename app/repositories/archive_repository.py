@@ -0,0 +1,49 @@
+from typing import Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.models.chunk_archive import ChunkArchive
+
+
+class ChunkArchiveRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, video_id: str, lock: bool = False) -> Optional[ChunkArchive]:
+        """The archive of a video; with lock=True the row stays locked (Postgres) until commit."""
+        stmt = select(ChunkArchive).where(ChunkArchive.video_id == video_id)
+        if lock:
+            stmt = stmt.with_for_update()
+        return self.db.execute(stmt).scalar_one_or_none()
+
+    def exists(self, video_id: str) -> bool:
+        stmt = select(ChunkArchive.video_id).where(ChunkArchive.video_id == video_id)
+        return self.db.execute(stmt).first() is not None
+
+    def save(self, record: ChunkArchive) -> None:
+        """Insert or replace a video's archive."""
+        self.db.merge(record)
+        self.db.commit()
+
+    def insert(self, record: ChunkArchive) -> None:
+        """Add an archive, uncommitted. A plain INSERT: an archive already there fails it rather than being replaced."""
+        self.db.add(record)
+        self.db.flush()
+
+    def delete(self, video_id: str, commit: bool = True) -> None:
+        self.db.execute(delete(ChunkArchive).where(ChunkArchive.video_id == video_id))
+        if commit:
+            self.db.commit()
+
+    def stats(self) -> dict:
+        count, chunks, size = self.db.execute(
+            select(
+                func.count(),
+                func.coalesce(func.sum(ChunkArchive.chunk_count), 0),
+                func.coalesce(
+                    func.sum(func.length(ChunkArchive.contents) + func.length(ChunkArchive.embeddings)), 0
+                ),
+            )
+        ).one()
+        return {"videos": count, "chunks": chunks, "bytes": size}
@@ -0,0 +1,283 @@
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import BINARY_INDEX_SYNC_SECONDS, BINARY_RERANK_CANDIDATES, EMBEDDING_PRECISION
+from app.repositories.memory_chunk_repository import normalize_rows, top_k_above
+from app.repositories.video_repository import VideoRepository
+from app.utils.binary_quantization import hamming_distances, pack_signs
+from app.utils.quantization import QuantizedMatrix, quantize
+
+logger = logging.getLogger(__name__)
+
+
+class BinaryChunkIndex:
+    """
+    Corpus-wide two-stage search over every chunk embedding.
+
+    Stage 1: sign-bit codes packed into uint64 words, Hamming distance via
+             popcount over the whole corpus, keep the closest `candidates`.
+    Stage 2: exact cosine on the stored vectors of those candidates only.
+
+    Rows are appended in batches and consolidated lazily on the next search;
+    deleted videos are masked out until the next consolidation drops them.
+    Writes made through this process update the index directly; sync()
+    picks up videos other processes rewrote (a re-ingest, a model switch).
+    """
+
+    def __init__(self, precision: str = EMBEDDING_PRECISION, sync_interval: float = BINARY_INDEX_SYNC_SECONDS,
+                 clock=time.monotonic):
+        self.precision = precision
+        self.sync_interval = sync_interval
+        self.clock = clock
+        self._synced_at: Optional[datetime] = None  # changes made before this are in the index
+        self._checked_at = 0.0
+        self._lock = Lock()
+        self._pending: List[tuple] = []
+        self._video_lookup: Dict[str, int] = {}
+        self._video_names: List[str] = []
+        self._reset_arrays()
+
+    def _reset_arrays(self) -> None:
+        self._codes = np.zeros((0, 0), dtype=np.uint64)
+        self._vectors: QuantizedMatrix = quantize(np.zeros((0, 0), dtype=np.float32), self.precision)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._video_codes = np.zeros(0, dtype=np.int32)
+        self._chunk_indexes = np.zeros(0, dtype=np.int32)
+        self._alive = np.zeros(0, dtype=bool)
+
+    # -----------------------------
+    # WRITE
+    # -----------------------------
+    def _video_code(self, video_id: str) -> int:
+        code = self._video_lookup.get(video_id)
+        if code is None:
+            code = len(self._video_names)
+            self._video_lookup[video_id] = code
+            self._video_names.append(video_id)
+        return code
+
+    def add(
+        self,
+        ids: Sequence[int],
+        video_ids: Sequence[str],
+        chunk_indexes: Sequence[int],
+        embeddings
+    ) -> None:
+        matrix = normalize_rows(embeddings)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if not (len(ids) == len(video_ids) == len(chunk_indexes) == len(matrix)):
+            raise ValueError("ids, video_ids, chunk_indexes and embeddings count mismatch.")
+
+        with self._lock:
+            codes = np.array([self._video_code(v) for v in video_ids], dtype=np.int32)
+            self._pending.append((
+                pack_signs(matrix),
+                quantize(matrix, self.precision),
+                np.asarray(ids, dtype=np.int64),
+                codes,
+                np.asarray(chunk_indexes, dtype=np.int32),
+            ))
+
+    def delete_video(self, video_id: str) -> None:
+        with self._lock:
+            code = self._video_lookup.get(video_id)
+            if code is None:
+                return
+            self._alive[self._video_codes == code] = False
+            self._pending = [
+                part for part in (self._drop_from(p, code) for p in self._pending) if part is not None
+            ]
+
+    def discard(self, ids: Iterable[int]) -> None:
+        """Drop rows by chunk id, e.g. ones the chunks table no longer has."""
+        ids = np.asarray(list(ids), dtype=np.int64)
+        with self._lock:
+            self._consolidate()
+            self._alive[np.isin(self._ids, ids)] = False
+
+    @staticmethod
+    def _drop_from(part: tuple, code: int) -> Optional[tuple]:
+        keep = part[3] != code
+        if keep.all():
+            return part
+        if not keep.any():
+            return None
+        codes, vectors, ids, videos, chunk_indexes = part
+        scales = vectors.scales[keep] if vectors.scales is not None else None
+        return (codes[keep], QuantizedMatrix(vectors.precision, vectors.codes[keep], scales),
+                ids[keep], videos[keep], chunk_indexes[keep])
+
+    def _consolidate(self) -> None:
+        """Merge pending batches and drop dead rows. Caller holds the lock."""
+        if not self._pending and self._alive.all():
+            return
+
+        keep = self._alive
+        parts = [(self._codes[keep], QuantizedMatrix(
+            self._vectors.precision,
+            self._vectors.codes[keep],
+            self._vectors.scales[keep] if self._vectors.scales is not None else None,
+        ), self._ids[keep], self._video_codes[keep], self._chunk_indexes[keep])] if len(keep) else []
+        parts += self._pending
+        parts = [p for p in parts if len(p[2])]
+        self._pending = []
+
+        if not parts:
+            self._reset_arrays()
+            return
+
+        scales = [p[1].scales for p in parts]
+        self._codes = np.concatenate([p[0] for p in parts])
+        self._vectors = QuantizedMatrix(
+            self.precision,
+            np.concatenate([p[1].codes for p in parts]),
+            np.concatenate(scales) if scales[0] is not None else None,
+        )
+        self._ids = np.concatenate([p[2] for p in parts])
+        self._video_codes = np.concatenate([p[3] for p in parts])
+        self._chunk_indexes = np.concatenate([p[4] for p in parts])
+        self._alive = np.ones(len(self._ids), dtype=bool)
+
+    # -----------------------------
+    # READ
+    # -----------------------------
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._alive.sum()) + sum(len(p[2]) for p in self._pending)
+
+    def search(
+        self,
+        query_embedding,
+        top_k: int = 5,
+        candidates: int = BINARY_RERANK_CANDIDATES,
+        video_ids: Optional[Iterable[str]] = None,
+        threshold: float = -1.0
+    ) -> List[dict]:
+        """Returns up to top_k rows (id, video_id, chunk_index, score), best first."""
+        query = normalize_rows(np.asarray(query_embedding, dtype=np.float32).ravel())
+
+        with self._lock:
+            self._consolidate()
+            codes, vectors = self._codes, self._vectors
+            ids, video_codes, chunk_indexes = self._ids, self._video_codes, self._chunk_indexes
+            names = list(self._video_names)
+            allowed = None
+            if video_ids is not None:
+                wanted = [self._video_lookup[v] for v in video_ids if v in self._video_lookup]
+                allowed = np.isin(video_codes, np.asarray(wanted, dtype=np.int32))
+
+        if len(ids) == 0:
+            return []
+
+        distances = hamming_distances(codes, pack_signs(query)[0])
+        available = len(ids)
+        if allowed is not None:
+            distances = np.where(allowed, distances, np.iinfo(np.uint32).max)
+            available = int(allowed.sum())
+
+        n_candidates = min(max(candidates, top_k), available)
+        if n_candidates == 0:
+            return []
+        shortlist = np.argpartition(distances, n_candidates - 1)[:n_candidates]
+
+        scores = vectors.rows(shortlist) @ query
+        order = top_k_above(scores, top_k, threshold)
+
+        return [
+            {
+                "id": int(ids[shortlist[i]]),
+                "video_id": names[video_codes[shortlist[i]]],
+                "chunk_index": int(chunk_indexes[shortlist[i]]),
+                "score": float(scores[i]),
+            }
+            for i in order
+        ]
+
+    # -----------------------------
+    # LOAD FROM CHUNK STORAGE
+    # -----------------------------
+    def load(self, db: Session, batch_size: int = 10_000) -> int:
+        """Stream every stored chunk embedding into the index. Returns rows loaded."""
+        from app.models.chunk import Chunk
+
+        self._synced_at = datetime.now(timezone.utc)
+        self._checked_at = self.clock()
+        stmt = (
+            select(Chunk.id, Chunk.video_id, Chunk.chunk_index, Chunk.embedding)
+            .where(Chunk.embedding.isnot(None))
+            .execution_options(yield_per=batch_size)
+        )
+
+        loaded = 0
+        for partition in db.execute(stmt).partitions(batch_size):
+            ids, video_ids, chunk_indexes, embeddings = zip(*partition)
+            self.add(ids, video_ids, chunk_indexes, np.asarray([np.asarray(e, dtype=np.float32) for e in embeddings]))
+            loaded += len(ids)
+
+        logger.info(f"Binary index loaded {loaded} chunks")
+        return loaded
+
+    def reload_video(self, db: Session, video_id: str) -> int:
+        """Replace one video's rows with what the chunks table holds now."""
+        from app.models.chunk import Chunk
+
+        rows = db.execute(
+            select(Chunk.id, Chunk.chunk_index, Chunk.embedding)
+            .where(Chunk.video_id == video_id, Chunk.embedding.isnot(None))
+        ).all()
+        self.delete_video(video_id)
+        if rows:
+            ids, chunk_indexes, embeddings = zip(*rows)
+            self.add(ids, [video_id] * len(ids), chunk_indexes,
+                     np.asarray([np.asarray(e, dtype=np.float32) for e in embeddings]))
+        return len(rows)
+
+    def sync(self, db: Session) -> int:
+        """
+        Reload the videos whose content changed since the last sync, in
+        any process (videos.content_updated_at). Checks at most once per
+        sync_interval; returns the number of videos reloaded.
+        """
+        with self._lock:
+            if self._synced_at is None or self.clock() - self._checked_at < self.sync_interval:
+                return 0
+            self._checked_at = self.clock()
+            # overlap the previous check a little: the timestamps come from other hosts' clocks
+            since = self._synced_at - timedelta(seconds=5)
+        checked = datetime.now(timezone.utc)
+        changed = VideoRepository(db).ids_changed_since(since)
+        for video_id in changed:
+            self.reload_video(db, video_id)
+        self._synced_at = checked
+        if changed:
+            logger.info(f"Binary index reloaded {len(changed)} changed videos")
+        return len(changed)
+
+
+_index: Optional[BinaryChunkIndex] = None
+_index_lock = Lock()
+
+
+def get_binary_index(db: Session) -> BinaryChunkIndex:
+    """Process-wide index, loaded from the chunks table on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            index = BinaryChunkIndex()
+            index.load(db)
+            _index = index
+    return _index
+
+
+def peek_binary_index() -> Optional[BinaryChunkIndex]:
+    """The process-wide index if it has been loaded, without triggering a load."""
+    return _index
+
@@ -0,0 +1,128 @@
+"""
+Hash partitioning of the chunks table on video_id.
+
+After `python -m app.admin partitions migrate` the chunks table is a
+PARTITION BY HASH (video_id) parent over CHUNK_PARTITIONS partitions named
+chunks_p00, chunks_p01, ... each with its own (video_id, chunk_index) btree
+and vector index. Per-video statements in ChunkRepository name the video's
+partition directly (`chunk_table(db, video_id)`), so they touch one
+partition and one small index whatever plan Postgres picks; corpus-wide
+search still goes through the parent. Unpartitioned databases (and SQLite)
+keep using `chunks`.
+
+The layout is read from the catalog once per engine and a video's
+partition is asked of Postgres (satisfies_hash_partition) once per process,
+so routing needs no reimplementation of Postgres' hash function.
+"""
+import re
+import threading
+from typing import Dict, List, NamedTuple, Optional
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.config import CHUNK_PARTITIONS
+
+PARENT_TABLE = "chunks"
+PARTITION_PREFIX = f"{PARENT_TABLE}_p"
+
+_BOUND = re.compile(r"modulus (\d+), remainder (\d+)", re.IGNORECASE)
+
+
+class PartitionLayout(NamedTuple):
+    modulus: int  # 0 = not partitioned
+    tables: Dict[int, str]  # remainder -> partition name
+
+    @property
+    def partitioned(self) -> bool:
+        return self.modulus > 0
+
+
+UNPARTITIONED = PartitionLayout(0, {})
+
+
+def partition_name(remainder: int, modulus: int = CHUNK_PARTITIONS) -> str:
+    return f"{PARTITION_PREFIX}{remainder:0{max(2, len(str(modulus - 1)))}d}"
+
+
+def read_layout(conn, parent: str = PARENT_TABLE) -> PartitionLayout:
+    """Hash partitions of `parent` from the catalog; UNPARTITIONED if it has none."""
+    if conn.dialect.name != "postgresql":
+        return UNPARTITIONED
+    rows = conn.execute(
+        text("""
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(:parent)
+        """),
+        {"parent": parent},
+    ).fetchall()
+
+    tables, modulus = {}, 0
+    for name, bound in rows:
+        match = _BOUND.search(bound or "")
+        if match:
+            modulus = int(match.group(1))
+            tables[int(match.group(2))] = name
+    if not modulus or len(tables) != modulus:
+        return UNPARTITIONED  # not (fully) hash partitioned: let the parent route
+    return PartitionLayout(modulus, tables)
+
+
+class PartitionRouter:
+    """Per-engine layout plus a video_id -> partition cache."""
+
+    def __init__(self, max_videos: int = 100_000):
+        self.layout: Optional[PartitionLayout] = None
+        self.max_videos = max_videos
+        self._videos: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def table_for(self, db, video_id: str) -> str:
+        if self.layout is None:
+            self.layout = read_layout(db.connection())
+        if not self.layout.partitioned:
+            return PARENT_TABLE
+
+        table = self._videos.get(video_id)
+        if table is None:
+            remainder = db.execute(
+                text("""
+                    SELECT r FROM generate_series(0, :modulus - 1) AS r
+                    WHERE satisfies_hash_partition(to_regclass(:parent)::oid, :modulus, r, CAST(:video_id AS varchar))
+                """),
+                {"parent": PARENT_TABLE, "modulus": self.layout.modulus, "video_id": video_id},
+            ).scalar_one()
+            table = self.layout.tables[remainder]
+            with self._lock:
+                if len(self._videos) >= self.max_videos:
+                    self._videos.clear()
+                self._videos[video_id] = table
+        return table
+
+    def reset(self) -> None:
+        self.layout = None
+        self._videos.clear()
+
+
+_routers: "WeakKeyDictionary[Engine, PartitionRouter]" = WeakKeyDictionary()
+
+
+def router_for(engine: Engine) -> PartitionRouter:
+    return _routers.setdefault(engine, PartitionRouter())
+
+
+def chunk_table(db, video_id: str) -> str:
+    """Table holding a video's chunks: its partition, or `chunks` when unpartitioned."""
+    bind = db.get_bind()
+    if getattr(getattr(bind, "dialect", None), "name", None) != "postgresql":
+        return PARENT_TABLE
+    return router_for(bind).table_for(db, video_id)
+
+
+def partition_tables(conn) -> List[str]:
+    """Tables that hold chunk rows: the partitions, or just `chunks`."""
+    layout = read_layout(conn)
+    return [layout.tables[r] for r in sorted(layout.tables)] if layout.partitioned else [PARENT_TABLE]
@@ -1,6 +1,92 @@
+import io
+import itertools
+import struct
+
+import numpy as np
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from typing import List
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from app.config import RETRIEVAL_STREAM_BATCH, VECTOR_SQL_TYPE
+from app.database.replicas import read_with_fallback, replica_bind
+from app.repositories.chunk_partitions import PARENT_TABLE, chunk_table
+from app.repositories.video_repository import EmbeddingState, check_embedding_state
+
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+PGCOPY_TRAILER = struct.pack(">h", -1)
+
+HIT_COLUMNS = ("id", "chunk_index", "score", "content")
+
+
+def to_vector_literal(embedding: Sequence[float]) -> str:
+    """Render an embedding in pgvector's text input format: '[x1,x2,...]'."""
+    return "[" + ",".join(map(repr, np.asarray(embedding, dtype=np.float64).ravel().tolist())) + "]"
+
+
+def pgcopy_chunk_rows(
+    video_id: str,
+    chunks: List[str],
+    embeddings: np.ndarray,
+    sql_type: str = VECTOR_SQL_TYPE
+) -> bytes:
+    """
+    COPY ... (FORMAT BINARY) payload for (video_id, chunk_index, content,
+    embedding) rows. The whole (n, dim) matrix is converted to big-endian
+    float4 / float2 once and each row's vector is taken straight from that
+    buffer in pgvector's binary format (int16 dim, int16 unused, floats),
+    so no Python float or text form of any value is ever created.
+    """
+    matrix = np.asarray(embeddings)
+    if matrix.ndim != 2 or len(matrix) != len(chunks):
+        raise ValueError("Chunks and embeddings count mismatch.")
+
+    dim = matrix.shape[1]
+    wire = np.ascontiguousarray(matrix, dtype=">f2" if sql_type == "halfvec" else ">f4")
+    vector_prefix = struct.pack(">ihh", 4 + wire.itemsize * dim, dim, 0)
+
+    video = video_id.encode("utf-8")
+    row_prefix = struct.pack(">hi", 4, len(video)) + video
+
+    parts = [PGCOPY_HEADER]
+    for idx, chunk in enumerate(chunks):
+        content = chunk.encode("utf-8")
+        parts += (
+            row_prefix,
+            struct.pack(">iii", 4, idx, len(content)),
+            content,
+            vector_prefix,
+            wire[idx].data,
+        )
+    parts.append(PGCOPY_TRAILER)
+    return b"".join(parts)
+
+
+def _hit(row) -> dict:
+    return {column: row[column] for column in HIT_COLUMNS}
+
+
+def _hits(rows: List[dict]) -> List[dict]:
+    """The chunk rows of a per-video search, without the video's own columns."""
+    return [_hit(row) for row in rows if row["id"] is not None]
+
+
+def _found_state(rows: List[dict]) -> Optional[EmbeddingState]:
+    if not rows:
+        return None  # the video is unknown here
+    return EmbeddingState(rows[0]["embedding_model"], rows[0]["content_version"] or 0)
+
+
+def _behind(rows: List[dict], state: Optional[EmbeddingState]) -> bool:
+    """A replica that has not replayed the version the query was embedded for."""
+    found = _found_state(rows)
+    return (state is not None and found is not None and state.content_version is not None
+            and found.content_version < state.content_version)
+
+
+def _check(video_id: str, rows: List[dict], state: Optional[EmbeddingState]) -> None:
+    found = _found_state(rows)
+    if found is not None:
+        check_embedding_state(video_id, state, found)
 
 
 class ChunkRepository:
@@ -14,25 +100,40 @@ class ChunkRepository:
         self,
         video_id: str,
         chunks: List[str],
-        embeddings: List[List[float]]
+        embeddings: np.ndarray
     ) -> None:
 
         if len(chunks) != len(embeddings):
             raise ValueError("Chunks and embeddings count mismatch.")
 
+        table = chunk_table(self.db, video_id)
+        driver = self.db.get_bind().dialect.driver
+        if driver in ("psycopg", "psycopg2"):
+            # binary COPY straight from the embedding matrix, in the session's transaction
+            payload = pgcopy_chunk_rows(video_id, chunks, embeddings)
+            sql = f"COPY {table} (video_id, chunk_index, content, embedding) FROM STDIN (FORMAT BINARY)"
+            with self.db.connection().connection.driver_connection.cursor() as cursor:
+                if driver == "psycopg":
+                    with cursor.copy(sql) as copy:
+                        copy.write(payload)
+                else:
+                    cursor.copy_expert(sql, io.BytesIO(payload))
+            self.db.commit()
+            return
+
         values = [
             {
                 "video_id": video_id,
                 "chunk_index": idx,
                 "content": chunk,
-                "embedding": embedding,
+                "embedding": to_vector_literal(embedding),
             }
             for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings))
         ]
 
         self.db.execute(
-            text("""
-                INSERT INTO chunks (
+            text(f"""
+                INSERT INTO {table} (
                     video_id,
                     chunk_index,
                     content,
@@ -42,7 +143,7 @@ class ChunkRepository:
                     :video_id,
                     :chunk_index,
                     :content,
-                    :embedding
+                    CAST(:embedding AS {VECTOR_SQL_TYPE})
                 )
             """),
             values
@@ -61,9 +162,9 @@ class ChunkRepository:
     ) -> List[str]:
 
         result = self.db.execute(
-            text("""
+            text(f"""
                 SELECT content
-                FROM chunks
+                FROM {chunk_table(self.db, video_id)}
                 WHERE video_id = :video_id
                 ORDER BY embedding <-> :embedding
                 LIMIT :top_k
@@ -78,14 +179,241 @@ class ChunkRepository:
         rows = result.fetchall()
         return [row[0] for row in rows]
 
+    # ----------------------------------
+    # COSINE SEARCH WITH THRESHOLD (single round trip)
+    # ----------------------------------
+    def search_similar(
+        self,
+        video_id: str,
+        query_embedding: Sequence[float],
+        top_k: int = 5,
+        threshold: float = 0.0,
+        settings: Optional[dict] = None,
+        state: Optional[EmbeddingState] = None
+    ) -> List[dict]:
+        """
+        Returns up to top_k chunks with cosine similarity >= threshold,
+        best first, as dicts with id, chunk_index, score and content.
+        The threshold is applied on the distance so the ORDER BY / WHERE
+        share one expression the vector index can serve. `settings` are
+        index GUCs (e.g. hnsw.ef_search) scoped to this transaction.
+        Runs on a read replica when one is in sync, and again on the
+        primary if the replica lacks the video or the version the query
+        was embedded for (it may lag an ingestion); no hits for a video
+        the replica has is an answer.
+
+        The same statement reads the video's embedding model and content
+        version: given the `state` the query was embedded for, a video
+        switched since raises EmbeddingStateChanged instead of scoring the
+        query against another model's vectors.
+        """
+        table = chunk_table(self.db, video_id)
+
+        def read(bind_arguments):
+            self._apply_settings(settings, bind_arguments)
+            result = self.db.execute(
+                *self._similar_query(video_id, query_embedding, top_k, threshold, table),
+                bind_arguments=bind_arguments
+            )
+            return [dict(row._mapping) for row in result.fetchall()]
+
+        rows = read_with_fallback(
+            self.db, video_id, read, missing=lambda rows: not rows or _behind(rows[:1], state)
+        )
+        _check(video_id, rows[:1], state)
+        return _hits(rows)
+
+    def iter_similar(
+        self,
+        video_id: str,
+        query_embedding: Sequence[float],
+        top_k: int = 5,
+        threshold: float = 0.0,
+        settings: Optional[dict] = None,
+        batch_rows: int = RETRIEVAL_STREAM_BATCH,
+        state: Optional[EmbeddingState] = None
+    ) -> Iterator[dict]:
+        """
+        search_similar() as an iterator. The query runs now (so errors,
+        and a changed `state`, surface before a response starts); rows are
+        then read from a server-side cursor `batch_rows` at a time as the
+        iterator is consumed, so the best hits can be sent while the rest
+        are ranked. Replica routing is as in search_similar(), decided on
+        the first row.
+        """
+        table = chunk_table(self.db, video_id)
+
+        def read(bind_arguments):
+            self._apply_settings(settings, bind_arguments)
+            result = self.db.execute(
+                *self._similar_query(video_id, query_embedding, top_k, threshold, table),
+                execution_options={"stream_results": True, "yield_per": batch_rows},
+                bind_arguments=bind_arguments
+            )
+            first = next(result, None)
+            return (dict(first._mapping) if first is not None else None), result
+
+        def missing(peeked):
+            first = peeked[0]
+            return first is None or _behind([first], state)
+
+        first, rest = read_with_fallback(self.db, video_id, read, missing=missing)
+        if first is None:
+            return iter(())
+        _check(video_id, [first], state)
+        if first["id"] is None:
+            return iter(())
+        return itertools.chain(_hits([first]), (_hit(row._mapping) for row in rest))
+
+    def _apply_settings(self, settings: Optional[dict], bind_arguments: Optional[dict] = None) -> None:
+        # set_config(..., true) is per connection: run it where the search will
+        for name, value in (settings or {}).items():
+            self.db.execute(
+                text("SELECT set_config(:name, :value, true)"),
+                {"name": name, "value": str(value)},
+                bind_arguments=bind_arguments
+            )
+
+    @staticmethod
+    def _similar_query(video_id, query_embedding, top_k, threshold, table=PARENT_TABLE):
+        # an iterative index scan (relaxed_order) may return the rows slightly
+        # out of order: rank the top_k again once they are all in. Every row
+        # carries the video's model and content version, read in the same
+        # snapshot as the vectors; a video without hits still yields one row.
+        return (
+            text(f"""
+                WITH nearest AS MATERIALIZED (
+                    SELECT id,
+                           chunk_index,
+                           1 - (embedding <=> CAST(:embedding AS {VECTOR_SQL_TYPE})) AS score,
+                           content
+                    FROM {table}
+                    WHERE video_id = :video_id
+                      AND embedding <=> CAST(:embedding AS {VECTOR_SQL_TYPE}) <= :max_distance
+                    ORDER BY embedding <=> CAST(:embedding AS {VECTOR_SQL_TYPE})
+                    LIMIT :top_k
+                )
+                SELECT n.id, n.chunk_index, n.score, n.content, v.embedding_model, v.content_version
+                FROM videos v
+                LEFT JOIN nearest n ON TRUE
+                WHERE v.video_id = :video_id
+                ORDER BY n.score DESC NULLS LAST
+            """),
+            {
+                "video_id": video_id,
+                "embedding": to_vector_literal(query_embedding),
+                "max_distance": 1 - threshold,
+                "top_k": top_k
+            }
+        )
+
+    # ----------------------------------
+    # CORPUS-WIDE SEARCH (all videos)
+    # ----------------------------------
+    def search_corpus(
+        self,
+        query_embedding: Sequence[float],
+        limit: int = 10,
+        language: Optional[str] = None,
+        video_ids: Optional[Sequence[str]] = None,
+        settings: Optional[dict] = None
+    ) -> List[dict]:
+        """
+        Nearest chunks across every video (optionally restricted to a
+        language or a set of videos), best first, as dicts with id,
+        video_id, chunk_index, score and content. Runs on a read replica
+        when one is in sync (no primary retry: an empty corpus hit is normal).
+        """
+        bind_arguments = replica_bind(self.db)
+        self._apply_settings(settings, bind_arguments)
+
+        joins, filters = "", []
+        params = {"embedding": to_vector_literal(query_embedding), "limit": limit}
+        if language is not None:
+            joins = "JOIN videos v ON v.video_id = c.video_id"
+            filters.append("v.language = :language")
+            params["language"] = language
+        if video_ids is not None:
+            filters.append("c.video_id = ANY(:video_ids)")
+            params["video_ids"] = list(video_ids)
+        where = f"WHERE {' AND '.join(filters)}" if filters else ""
+
+        result = self.db.execute(
+            text(f"""
+                SELECT c.id,
+                       c.video_id,
+                       c.chunk_index,
+                       1 - (c.embedding <=> CAST(:embedding AS {VECTOR_SQL_TYPE})) AS score,
+                       c.content
+                FROM chunks c
+                {joins}
+                {where}
+                ORDER BY c.embedding <=> CAST(:embedding AS {VECTOR_SQL_TYPE})
+                LIMIT :limit
+            """),
+            params,
+            bind_arguments=bind_arguments
+        )
+
+        return [dict(row._mapping) for row in result.fetchall()]
+
+    # ----------------------------------
+    # LOOKUPS
+    # ----------------------------------
+    def get_chunk_ids(self, video_id: str) -> List[tuple]:
+        """(id, chunk_index) pairs for a video, in chunk order."""
+        result = self.db.execute(
+            text(f"""
+                SELECT id, chunk_index
+                FROM {chunk_table(self.db, video_id)}
+                WHERE video_id = :video_id
+                ORDER BY chunk_index
+            """),
+            {"video_id": video_id}
+        )
+        return [tuple(row) for row in result.fetchall()]
+
+    def get_video_chunks(self, video_id: str) -> Optional[Tuple[List[str], np.ndarray]]:
+        """A video's contents and float32 vectors in chunk order (None if unknown)."""
+        result = self.db.execute(
+            text(f"""
+                SELECT content, embedding::text
+                FROM {chunk_table(self.db, video_id)}
+                WHERE video_id = :video_id
+                ORDER BY chunk_index
+            """),
+            {"video_id": video_id}
+        )
+        rows = result.fetchall()
+        if not rows:
+            return None
+        # pgvector's text form: '[x1,x2,...]'
+        matrix = np.array([np.array(row[1][1:-1].split(","), dtype=np.float32) for row in rows])
+        return [row[0] for row in rows], matrix
+
+    def get_contents(self, chunk_ids: Sequence[int]) -> dict:
+        """Map of chunk id -> content for the given ids."""
+        if not chunk_ids:
+            return {}
+
+        result = self.db.execute(
+            text("""
+                SELECT id, content
+                FROM chunks
+                WHERE id = ANY(:ids)
+            """),
+            {"ids": list(chunk_ids)}
+        )
+        return {row[0]: row[1] for row in result.fetchall()}
+
     # ----------------------------------
     # DELETE BY VIDEO (optional cleanup)
     # ----------------------------------
     def delete_by_video(self, video_id: str) -> None:
 
         self.db.execute(
-            text("""
-                DELETE FROM chunks
+            text(f"""
+                DELETE FROM {chunk_table(self.db, video_id)}
                 WHERE video_id = :video_id
             """),
             {"video_id": video_id}
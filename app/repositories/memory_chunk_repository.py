@@ -0,0 +1,151 @@
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import EMBEDDING_PRECISION
+from app.utils.quantization import QuantizedMatrix, quantize
+
+
+class _VideoChunks:
+    __slots__ = ("ids", "chunk_indexes", "contents", "matrix")
+
+    def __init__(self, ids: np.ndarray, chunk_indexes: np.ndarray, contents: List[str], matrix: QuantizedMatrix):
+        self.ids = ids
+        self.chunk_indexes = chunk_indexes
+        self.contents = contents
+        self.matrix = matrix  # (n, dim) rows L2-normalised, stored in the configured precision
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k_above(scores: np.ndarray, top_k: int, threshold: float) -> np.ndarray:
+    """Indexes of the best top_k scores that are >= threshold, best first."""
+    candidates = np.flatnonzero(scores >= threshold)
+    if candidates.size > top_k:
+        part = np.argpartition(-scores[candidates], top_k - 1)[:top_k]
+        candidates = candidates[part]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class InMemoryChunkRepository:
+    """
+    Process-local mirror of ChunkRepository. Each video is kept as one
+    contiguous normalised matrix (float32, float16 or int8 codes) so cosine
+    search is a single blocked matrix-vector product over the compact form.
+    """
+
+    def __init__(self, precision: str = EMBEDDING_PRECISION):
+        self.precision = precision
+        self._videos: Dict[str, _VideoChunks] = {}
+        self._next_id = 1
+        self._lock = Lock()
+
+    def bulk_insert(
+        self,
+        video_id: str,
+        chunks: List[str],
+        embeddings: Sequence[Sequence[float]]
+    ) -> None:
+
+        if len(chunks) != len(embeddings):
+            raise ValueError("Chunks and embeddings count mismatch.")
+
+        matrix = quantize(normalize_rows(embeddings), self.precision)
+
+        with self._lock:
+            start = self._next_id
+            self._next_id += len(chunks)
+            self._videos[video_id] = _VideoChunks(
+                ids=np.arange(start, start + len(chunks), dtype=np.int64),
+                chunk_indexes=np.arange(len(chunks), dtype=np.int32),
+                contents=list(chunks),
+                matrix=matrix,
+            )
+
+    def search_similar(
+        self,
+        video_id: str,
+        query_embedding: Sequence[float],
+        top_k: int = 5,
+        threshold: float = 0.0
+    ) -> List[dict]:
+
+        video = self._videos.get(video_id)
+        if video is None or not video.contents:
+            return []
+
+        query = normalize_rows(np.asarray(query_embedding, dtype=np.float32).ravel())
+        scores = video.matrix.scores(query)
+        order = top_k_above(scores, top_k, threshold)
+
+        return [
+            {
+                "id": int(video.ids[i]),
+                "chunk_index": int(video.chunk_indexes[i]),
+                "score": float(scores[i]),
+                "content": video.contents[i],
+            }
+            for i in order
+        ]
+
+    def search_many(
+        self,
+        query_embedding: Sequence[float],
+        top_k: int = 5,
+        video_ids: Optional[Iterable[str]] = None,
+        threshold: float = -1.0
+    ) -> List[dict]:
+        """Best top_k chunks across videos (all, or only video_ids), with video_id."""
+        query = normalize_rows(np.asarray(query_embedding, dtype=np.float32).ravel())
+        videos = self._videos
+        names = list(videos) if video_ids is None else [v for v in video_ids if v in videos]
+
+        # each video's own top_k is a superset of its share of the global top_k
+        hits = []
+        for name in names:
+            video = videos[name]
+            if not video.contents:
+                continue
+            scores = video.matrix.scores(query)
+            for i in top_k_above(scores, top_k, threshold):
+                hits.append((float(scores[i]), name, video, int(i)))
+
+        hits.sort(key=lambda hit: -hit[0])
+        return [
+            {
+                "id": int(video.ids[i]),
+                "video_id": name,
+                "chunk_index": int(video.chunk_indexes[i]),
+                "score": score,
+                "content": video.contents[i],
+            }
+            for score, name, video, i in hits[:top_k]
+        ]
+
+    def delete_by_video(self, video_id: str) -> None:
+        with self._lock:
+            self._videos.pop(video_id, None)
+
+    def get_video_chunks(self, video_id: str) -> Optional[Tuple[List[str], np.ndarray]]:
+        """A video's contents and float32 vectors in chunk order (None if unknown)."""
+        video = self._videos.get(video_id)
+        if video is None:
+            return None
+        return list(video.contents), video.matrix.rows(slice(None))
+
+    def memory_bytes(self) -> int:
+        return sum(video.matrix.nbytes for video in self._videos.values())
+
+    def stats(self) -> dict:
+        return {
+            "videos": len(self._videos),
+            "rows": sum(len(video.contents) for video in self._videos.values()),
+            "bytes": self.memory_bytes(),
+        }
+
@@ -0,0 +1,52 @@
+from typing import Optional, Sequence, Set
+
+import numpy as np
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.models.chunk_reembedding import ChunkReembedding
+
+
+class ChunkReembeddingRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def staged(self, video_id: str, model: str) -> Set[int]:
+        """Chunk indexes of the video already embedded with `model`."""
+        stmt = select(ChunkReembedding.chunk_index).where(
+            ChunkReembedding.video_id == video_id, ChunkReembedding.model == model
+        )
+        return set(self.db.execute(stmt).scalars().all())
+
+    def save(self, video_id: str, model: str, chunk_indexes: Sequence[int], embeddings: np.ndarray) -> None:
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.db.add_all([
+            ChunkReembedding(video_id=video_id, chunk_index=int(i), model=model, embedding=row.tobytes())
+            for i, row in zip(chunk_indexes, embeddings)
+        ])
+        self.db.commit()
+
+    def load(self, video_id: str, model: str, count: int) -> Optional[np.ndarray]:
+        """The staged (count, dim) matrix in chunk order, or None unless exactly chunks 0..count-1 are staged."""
+        stmt = select(ChunkReembedding.chunk_index, ChunkReembedding.embedding).where(
+            ChunkReembedding.video_id == video_id, ChunkReembedding.model == model
+        ).order_by(ChunkReembedding.chunk_index)
+        rows = self.db.execute(stmt).all()
+        if [row[0] for row in rows] != list(range(count)):
+            return None
+        return np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+
+    def discard(self, video_id: str, keep_model: Optional[str] = None, commit: bool = True) -> None:
+        """Drop a video's staged vectors (except those of `keep_model`)."""
+        stmt = delete(ChunkReembedding).where(ChunkReembedding.video_id == video_id)
+        if keep_model is not None:
+            stmt = stmt.where(ChunkReembedding.model != keep_model)
+        self.db.execute(stmt)
+        if commit:
+            self.db.commit()
+
+    def stats(self) -> dict:
+        videos, chunks = self.db.execute(
+            select(func.count(func.distinct(ChunkReembedding.video_id)), func.count())
+        ).one()
+        return {"videos": videos, "chunks": chunks}
@@ -0,0 +1,456 @@
+"""
+Append-only, memory-mapped vector segment store.
+
+Layout of the store directory:
+
+    manifest.json          {"version", "next_segment", "segments": [...], "tombstones": {...},
+                            "retired": [[segment, retired_at], ...]}
+    LOCK                   flock()ed by writers (ingestion, compaction)
+    COMPACTOR              flock()ed for as long as it lives by the one process that compacts
+    seg-000001.json        {"dtype", "dim", "rows", "videos": {video_id: [start, end]}}
+    seg-000001.vec         rows x dim matrix (float32 / float16), L2-normalised, row-major
+    seg-000001.idx         int32 chunk_index per row
+    seg-000001.txt         UTF-8 chunk contents, concatenated
+    seg-000001.off         int64 byte offsets into .txt (rows + 1)
+
+Segments are immutable once written. Every file is opened with np.memmap so
+worker processes on the same host share the page cache. Each video occupies
+one contiguous row range of one segment, so a per-video search is an O(1)
+slice. Deletes and re-ingestion write tombstones into the manifest; the
+compactor rewrites live rows into fresh segments and drops dead ones.
+
+Compaction is size-tiered: only segments of similar size are merged, so a
+row is rewritten a logarithmic number of times rather than on every
+compaction. Replaced segments stay on disk for a grace period, as another
+process may have read the manifest that still lists them.
+"""
+import fcntl
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.repositories.memory_chunk_repository import normalize_rows, top_k_above
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+RETIRE_GRACE_SECONDS = 600.0
+ROW_ID_SHIFT = 32  # synthetic chunk id = segment number << 32 | row
+
+
+class _Segment:
+    """Read-only view over one segment's files."""
+
+    def __init__(self, directory: str, name: str):
+        self.name = name
+        self.number = int(name.split("-")[1])
+        base = os.path.join(directory, name)
+
+        with open(base + ".json") as f:
+            meta = json.load(f)
+        self.dim = meta["dim"]
+        self.rows = meta["rows"]
+        self.videos: Dict[str, Tuple[int, int]] = {k: tuple(v) for k, v in meta["videos"].items()}
+
+        if self.rows:
+            self.vectors = np.memmap(base + ".vec", dtype=meta["dtype"], mode="r", shape=(self.rows, self.dim))
+            self.chunk_indexes = np.memmap(base + ".idx", dtype=np.int32, mode="r", shape=(self.rows,))
+            self.offsets = np.memmap(base + ".off", dtype=np.int64, mode="r", shape=(self.rows + 1,))
+            self.text = np.memmap(base + ".txt", dtype=np.uint8, mode="r") if self.offsets[-1] else b""
+        else:
+            self.vectors = np.zeros((0, self.dim), dtype=meta["dtype"])
+            self.chunk_indexes = np.zeros(0, dtype=np.int32)
+            self.offsets = np.zeros(1, dtype=np.int64)
+            self.text = b""
+
+    def content(self, row: int) -> str:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return bytes(self.text[start:end]).decode("utf-8")
+
+
+class SegmentStore:
+
+    def __init__(self, directory: str, dtype: str = "float32"):
+        if dtype not in ("float32", "float16"):
+            raise ValueError("Segment store supports float32 or float16 vectors")
+
+        self.directory = directory
+        self.dtype = dtype
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._manifest_stamp = None
+        self._segments: Dict[str, _Segment] = {}
+        self._locations: Dict[str, Tuple[_Segment, int, int]] = {}
+        self._compactor: Optional[threading.Thread] = None
+        self._lease = None  # (pid, open COMPACTOR file) while this process may hold the compactor lease
+
+        if not os.path.exists(self._path(MANIFEST)):
+            with self._writer():
+                if not os.path.exists(self._path(MANIFEST)):
+                    self._write_manifest({"version": 0, "next_segment": 1, "segments": [], "tombstones": {}})
+        self.refresh()
+
+    # -----------------------------
+    # FILES
+    # -----------------------------
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @contextmanager
+    def _writer(self):
+        """Cross-process writer lock; readers never take it."""
+        with open(self._path("LOCK"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_manifest(self) -> dict:
+        with open(self._path(MANIFEST)) as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest: dict) -> None:
+        manifest["version"] = manifest.get("version", 0) + 1
+        tmp = self._path(MANIFEST + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._path(MANIFEST))
+
+    def _write_segment(self, number: int, entries: List[Tuple[str, Sequence[int], Sequence[str], np.ndarray]]) -> str:
+        """Write an immutable segment holding one contiguous range per video."""
+        name = f"seg-{number:06d}"
+        base = self._path(name)
+
+        videos, vectors, chunk_indexes, blobs = {}, [], [], []
+        row = 0
+        for video_id, indexes, contents, matrix in entries:
+            videos[video_id] = [row, row + len(contents)]
+            row += len(contents)
+            vectors.append(np.asarray(matrix, dtype=self.dtype))
+            chunk_indexes.append(np.asarray(indexes, dtype=np.int32))
+            blobs.extend(content.encode("utf-8") for content in contents)
+
+        dim = vectors[0].shape[1] if vectors else 0
+        offsets = np.zeros(row + 1, dtype=np.int64)
+        if blobs:
+            np.cumsum([len(b) for b in blobs], out=offsets[1:])
+
+        if row:
+            np.concatenate(vectors).tofile(base + ".vec")
+            np.concatenate(chunk_indexes).tofile(base + ".idx")
+            offsets.tofile(base + ".off")
+            with open(base + ".txt", "wb") as f:
+                f.write(b"".join(blobs))
+
+        # metadata last: a segment without its .json is never referenced
+        with open(base + ".json", "w") as f:
+            json.dump({"dtype": self.dtype, "dim": int(dim), "rows": row, "videos": videos}, f)
+        return name
+
+    def _remove_segment_files(self, name: str) -> None:
+        for ext in (".json", ".vec", ".idx", ".txt", ".off"):
+            try:
+                os.remove(self._path(name + ext))
+            except FileNotFoundError:
+                pass
+
+    # -----------------------------
+    # READER STATE
+    # -----------------------------
+    def refresh(self) -> None:
+        """Pick up segments/tombstones written by other processes (one stat when unchanged)."""
+        # os.replace() gives the manifest a new inode on every write, so
+        # (inode, mtime, size) changes even when writes share an mtime tick
+        st = os.stat(self._path(MANIFEST))
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if stamp == self._manifest_stamp:
+            return
+
+        with self._lock:
+            for attempt in range(3):
+                manifest = self._read_manifest()
+                try:
+                    segments = {
+                        name: self._segments.get(name) or _Segment(self.directory, name)
+                        for name in manifest["segments"]
+                    }
+                    break
+                except FileNotFoundError:
+                    # compacted away since the manifest was read: the new one lists its replacement
+                    if attempt == 2:
+                        raise
+
+            locations = {}
+            for name in manifest["segments"]:  # oldest first; later segments win
+                segment = segments[name]
+                for video_id, (start, end) in segment.videos.items():
+                    if segment.number > manifest["tombstones"].get(video_id, 0):
+                        locations[video_id] = (segment, start, end)
+                    else:
+                        locations.pop(video_id, None)
+
+            self._segments, self._locations = segments, locations
+            self._manifest_stamp = stamp
+
+    # -----------------------------
+    # WRITE
+    # -----------------------------
+    def bulk_insert(self, video_id: str, chunks: List[str], embeddings) -> None:
+        if len(chunks) != len(embeddings):
+            raise ValueError("Chunks and embeddings count mismatch.")
+
+        matrix = normalize_rows(embeddings)
+        with self._writer():
+            manifest = self._read_manifest()
+            number = manifest["next_segment"]
+            name = self._write_segment(number, [(video_id, range(len(chunks)), chunks, matrix)])
+            manifest["next_segment"] = number + 1
+            manifest["segments"].append(name)
+            # everything older for this video is now dead
+            manifest["tombstones"][video_id] = number - 1
+            self._write_manifest(manifest)
+        self.refresh()
+
+    def delete_by_video(self, video_id: str) -> None:
+        with self._writer():
+            manifest = self._read_manifest()
+            manifest["tombstones"][video_id] = manifest["next_segment"] - 1
+            self._write_manifest(manifest)
+        self.refresh()
+
+    # -----------------------------
+    # READ
+    # -----------------------------
+    def video_matrix(self, video_id: str) -> Optional[np.ndarray]:
+        """Zero-copy mmap slice of a video's vectors (None if unknown)."""
+        self.refresh()
+        location = self._locations.get(video_id)
+        if location is None:
+            return None
+        segment, start, end = location
+        return segment.vectors[start:end]
+
+    def get_video_chunks(self, video_id: str) -> Optional[Tuple[List[str], np.ndarray]]:
+        """A video's contents and float32 vectors in chunk order (None if unknown)."""
+        self.refresh()
+        location = self._locations.get(video_id)
+        if location is None:
+            return None
+        segment, start, end = location
+        return [segment.content(row) for row in range(start, end)], np.array(segment.vectors[start:end], dtype=np.float32)
+
+    def search_similar(
+        self,
+        video_id: str,
+        query_embedding,
+        top_k: int = 5,
+        threshold: float = 0.0
+    ) -> List[dict]:
+
+        self.refresh()
+        location = self._locations.get(video_id)
+        if location is None:
+            return []
+
+        segment, start, end = location
+        query = normalize_rows(np.asarray(query_embedding, dtype=np.float32).ravel())
+        scores = np.asarray(segment.vectors[start:end], dtype=np.float32) @ query
+        order = top_k_above(scores, top_k, threshold)
+
+        return [
+            {
+                "id": (segment.number << ROW_ID_SHIFT) | (start + int(i)),
+                "chunk_index": int(segment.chunk_indexes[start + i]),
+                "score": float(scores[i]),
+                "content": segment.content(start + int(i)),
+            }
+            for i in order
+        ]
+
+    def search_many(
+        self,
+        query_embedding,
+        top_k: int = 5,
+        video_ids: Optional[Iterable[str]] = None,
+        threshold: float = -1.0
+    ) -> List[dict]:
+        """Best top_k chunks across videos (all, or only video_ids), with video_id."""
+        self.refresh()
+        locations = self._locations
+        names = list(locations) if video_ids is None else [v for v in video_ids if v in locations]
+        query = normalize_rows(np.asarray(query_embedding, dtype=np.float32).ravel())
+
+        hits = []
+        for name in names:
+            segment, start, end = locations[name]
+            scores = np.asarray(segment.vectors[start:end], dtype=np.float32) @ query
+            for i in top_k_above(scores, top_k, threshold):
+                hits.append((float(scores[i]), name, segment, start + int(i)))
+
+        hits.sort(key=lambda hit: -hit[0])
+        return [
+            {
+                "id": (segment.number << ROW_ID_SHIFT) | row,
+                "video_id": name,
+                "chunk_index": int(segment.chunk_indexes[row]),
+                "score": score,
+                "content": segment.content(row),
+            }
+            for score, name, segment, row in hits[:top_k]
+        ]
+
+    def stats(self) -> dict:
+        self.refresh()
+        total_rows = sum(s.rows for s in self._segments.values())
+        live_rows = sum(end - start for _, start, end in self._locations.values())
+        return {
+            "segments": len(self._segments),
+            "videos": len(self._locations),
+            "rows": total_rows,
+            "dead_rows": total_rows - live_rows,
+        }
+
+    # -----------------------------
+    # COMPACTION
+    # -----------------------------
+    def _compaction_plan(self, min_segments: int, max_dead_fraction: float) -> List[str]:
+        """
+        Segments to rewrite: those with more than max_dead_fraction dead
+        rows, plus the smallest size tier (live rows, in powers of
+        min_segments) that has gathered min_segments segments.
+        """
+        live = {name: 0 for name in self._segments}
+        for segment, start, end in self._locations.values():
+            live[segment.name] += end - start
+
+        plan = {
+            name for name, segment in self._segments.items()
+            if segment.rows and (segment.rows - live[name]) / segment.rows > max_dead_fraction
+        }
+        tiers: Dict[int, List[str]] = {}
+        for name in self._segments:
+            if name not in plan:
+                tier = int(math.log(max(live[name], 1), max(min_segments, 2)))
+                tiers.setdefault(tier, []).append(name)
+        for tier in sorted(tiers):
+            if len(tiers[tier]) >= min_segments:
+                plan.update(tiers[tier])
+                break
+        return sorted(plan)
+
+    def _remove_retired(self, manifest: dict, grace_seconds: float) -> int:
+        """Delete the files of segments retired more than grace_seconds ago. Caller holds the writer lock."""
+        now = time.time()
+        expired = [name for name, retired_at in manifest.get("retired", []) if now - retired_at >= grace_seconds]
+        for name in expired:
+            self._remove_segment_files(name)
+        manifest["retired"] = [entry for entry in manifest.get("retired", []) if entry[0] not in expired]
+        return len(expired)
+
+    def compact(self, min_segments: int = 8, max_dead_fraction: float = 0.3,
+                grace_seconds: float = RETIRE_GRACE_SECONDS) -> bool:
+        """
+        Merge a tier of small segments, and rewrite segments with too many
+        dead rows (see _compaction_plan). Readers keep their mmaps of old
+        files, so compaction never blocks search; the files of replaced
+        segments are deleted by a later compaction once grace_seconds have
+        passed. Returns whether anything was rewritten.
+        """
+        with self._writer():
+            self._manifest_stamp = None
+            self.refresh()
+            manifest = self._read_manifest()
+            removed = self._remove_retired(manifest, grace_seconds)  # none of these is listed any more
+
+            merge = self._compaction_plan(min_segments, max_dead_fraction)
+            if not merge:
+                if removed:
+                    self._write_manifest(manifest)
+                return False
+
+            entries = []
+            for video_id, (segment, start, end) in sorted(self._locations.items()):
+                if segment.name in merge:
+                    contents = [segment.content(row) for row in range(start, end)]
+                    entries.append((video_id, segment.chunk_indexes[start:end], contents, segment.vectors[start:end]))
+
+            kept = [name for name in manifest["segments"] if name not in merge]
+            if entries:
+                number = manifest["next_segment"]
+                kept.append(self._write_segment(number, entries))
+                manifest["next_segment"] = number + 1
+            manifest["segments"] = kept
+            manifest["retired"] = manifest.get("retired", []) + [[name, time.time()] for name in merge]
+            # a tombstone only matters while a segment it covers is listed
+            oldest = min((int(name.split("-")[1]) for name in kept), default=manifest["next_segment"])
+            manifest["tombstones"] = {v: t for v, t in manifest["tombstones"].items() if t >= oldest}
+            self._write_manifest(manifest)
+
+        self.refresh()
+        logger.info(f"Compacted {len(merge)} segments ({len(entries)} videos)")
+        return True
+
+    def _holds_compactor_lease(self) -> bool:
+        """
+        Whether this process is the compacting one: it holds a flock on
+        COMPACTOR, which the kernel releases when the process dies, so
+        another worker takes over at its next attempt.
+        """
+        if self._lease is None or self._lease[0] != os.getpid():
+            # a descriptor inherited through fork() would share the parent's lock
+            self._lease = (os.getpid(), open(self._path("COMPACTOR"), "a"))
+        try:
+            fcntl.flock(self._lease[1], fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    def start_compactor(self, interval_seconds: float = 300.0,
+                        grace_seconds: float = RETIRE_GRACE_SECONDS) -> None:
+        """
+        Run compact() periodically on a daemon thread. Every worker starts
+        one; only the process holding the compactor lease compacts.
+        """
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+
+        def loop():
+            stop = threading.Event()
+            while not stop.wait(interval_seconds):
+                try:
+                    if self._holds_compactor_lease():
+                        self.compact(grace_seconds=grace_seconds)
+                except Exception as e:
+                    logger.error(f"Segment compaction failed: {e}")
+
+        self._compactor = threading.Thread(target=loop, name="segment-compactor", daemon=True)
+        self._compactor.start()
+
+
+_store: Optional[SegmentStore] = None
+_store_lock = threading.Lock()
+
+
+def get_segment_store() -> SegmentStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            from app.config import (
+                SEGMENT_STORE_PATH, SEGMENT_COMPACT_INTERVAL, SEGMENT_RETIRE_GRACE, EMBEDDING_PRECISION,
+            )
+
+            dtype = "float32" if EMBEDDING_PRECISION == "float32" else "float16"
+            _store = SegmentStore(SEGMENT_STORE_PATH, dtype=dtype)
+            _store.start_compactor(SEGMENT_COMPACT_INTERVAL, SEGMENT_RETIRE_GRACE)
+    return _store
@@ -0,0 +1,182 @@
+import os
+from threading import Lock
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, create_engine, text
+
+from app.repositories.memory_chunk_repository import normalize_rows, top_k_above
+
+
+class SqliteVectorStore:
+    """
+    Chunk vectors in a single SQLite file, searched by brute force in NumPy.
+
+    Embeddings are stored as L2-normalised float32 BLOBs next to their
+    content. A search reads only (id, chunk_index, embedding) for the
+    candidate rows, scores them with one matrix-vector product and fetches
+    content for the winners alone. Suited to single-host deployments and
+    tests that want real persistence without Postgres.
+    """
+
+    def __init__(self, path: str, batch_size: int = 20_000):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.batch_size = batch_size
+        self._lock = Lock()
+        self.engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+
+        with self.engine.begin() as conn:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS chunks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    video_id TEXT NOT NULL,
+                    chunk_index INTEGER NOT NULL,
+                    content TEXT NOT NULL,
+                    embedding BLOB NOT NULL
+                )
+            """))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_chunks_video_id ON chunks (video_id)"))
+
+    # -----------------------------
+    # WRITE
+    # -----------------------------
+    def bulk_insert(self, video_id: str, chunks: List[str], embeddings) -> None:
+        """Replace a video's chunks in one transaction."""
+        if len(chunks) != len(embeddings):
+            raise ValueError("Chunks and embeddings count mismatch.")
+
+        matrix = normalize_rows(embeddings)
+        values = [
+            {
+                "video_id": video_id,
+                "chunk_index": idx,
+                "content": chunk,
+                "embedding": matrix[idx].tobytes(),
+            }
+            for idx, chunk in enumerate(chunks)
+        ]
+
+        with self._lock, self.engine.begin() as conn:
+            conn.execute(text("DELETE FROM chunks WHERE video_id = :video_id"), {"video_id": video_id})
+            if values:
+                conn.execute(
+                    text("""
+                        INSERT INTO chunks (video_id, chunk_index, content, embedding)
+                        VALUES (:video_id, :chunk_index, :content, :embedding)
+                    """),
+                    values
+                )
+
+    def delete_by_video(self, video_id: str) -> None:
+        with self._lock, self.engine.begin() as conn:
+            conn.execute(text("DELETE FROM chunks WHERE video_id = :video_id"), {"video_id": video_id})
+
+    # -----------------------------
+    # READ
+    # -----------------------------
+    def get_video_chunks(self, video_id: str) -> Optional[Tuple[List[str], np.ndarray]]:
+        """A video's contents and float32 vectors in chunk order (None if unknown)."""
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                text("SELECT content, embedding FROM chunks WHERE video_id = :video_id ORDER BY chunk_index"),
+                {"video_id": video_id}
+            ).fetchall()
+        if not rows:
+            return None
+        return [row[0] for row in rows], self._matrix([row[1] for row in rows])
+
+    @staticmethod
+    def _matrix(blobs: Sequence[bytes]) -> np.ndarray:
+        return np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(len(blobs), -1)
+
+    def _contents(self, conn, ids: Sequence[int]) -> dict:
+        if not ids:
+            return {}
+        result = conn.execute(
+            text("SELECT id, content FROM chunks WHERE id IN :ids").bindparams(bindparam("ids", expanding=True)),
+            {"ids": list(ids)}
+        )
+        return {row[0]: row[1] for row in result}
+
+    def search_similar(
+        self,
+        video_id: str,
+        query_embedding,
+        top_k: int = 5,
+        threshold: float = 0.0
+    ) -> List[dict]:
+
+        query = normalize_rows(np.asarray(query_embedding, dtype=np.float32).ravel())
+
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                text("SELECT id, chunk_index, embedding FROM chunks WHERE video_id = :video_id"),
+                {"video_id": video_id}
+            ).fetchall()
+            if not rows:
+                return []
+
+            scores = self._matrix([row[2] for row in rows]) @ query
+            order = top_k_above(scores, top_k, threshold)
+            contents = self._contents(conn, [rows[i][0] for i in order])
+
+        return [
+            {
+                "id": rows[i][0],
+                "chunk_index": rows[i][1],
+                "score": float(scores[i]),
+                "content": contents[rows[i][0]],
+            }
+            for i in order
+        ]
+
+    def search_many(
+        self,
+        query_embedding,
+        top_k: int = 5,
+        video_ids: Optional[Iterable[str]] = None,
+        threshold: float = -1.0
+    ) -> List[dict]:
+        """Best top_k chunks across videos (all, or only video_ids), scanned in batches."""
+        query = normalize_rows(np.asarray(query_embedding, dtype=np.float32).ravel())
+
+        stmt = text("SELECT id, video_id, chunk_index, embedding FROM chunks")
+        params = {}
+        if video_ids is not None:
+            params["video_ids"] = list(video_ids)
+            if not params["video_ids"]:
+                return []
+            stmt = text("SELECT id, video_id, chunk_index, embedding FROM chunks WHERE video_id IN :video_ids") \
+                .bindparams(bindparam("video_ids", expanding=True))
+
+        best: List[tuple] = []  # (score, id, video_id, chunk_index), running top_k
+        with self.engine.connect() as conn:
+            result = conn.execution_options(yield_per=self.batch_size).execute(stmt, params)
+            for batch in result.partitions(self.batch_size):
+                scores = self._matrix([row[3] for row in batch]) @ query
+                best.extend(
+                    (float(scores[i]), batch[i][0], batch[i][1], batch[i][2])
+                    for i in top_k_above(scores, top_k, threshold)
+                )
+                best = sorted(best, key=lambda hit: -hit[0])[:top_k]
+
+            contents = self._contents(conn, [hit[1] for hit in best])
+
+        return [
+            {
+                "id": chunk_id,
+                "video_id": video_id,
+                "chunk_index": chunk_index,
+                "score": score,
+                "content": contents[chunk_id],
+            }
+            for score, chunk_id, video_id, chunk_index in best
+        ]
+
+    def stats(self) -> dict:
+        with self.engine.connect() as conn:
+            rows, videos = conn.execute(
+                text("SELECT COUNT(*), COUNT(DISTINCT video_id) FROM chunks")
+            ).one()
+        return {"videos": videos, "rows": rows}
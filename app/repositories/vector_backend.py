@@ -0,0 +1,225 @@
+"""
+Vector storage backends behind VectorStoreService.
+
+Every backend implements the VectorBackend protocol; which one serves a
+process is chosen with VECTOR_STORE_BACKEND. The shared conformance and
+performance suite in tests/test_vector_backends.py runs against each.
+
+    pgvector   chunks table in Postgres, ANN index managed by IndexManager
+    sqlite     SQLite file, brute-force cosine in NumPy
+    memory     process-local matrices (float32 / float16 / int8)
+    segments   memory-mapped segment files shared by workers on a host
+"""
+import logging
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Optional, Protocol, Tuple, runtime_checkable
+
+import numpy as np
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import CORPUS_SEARCH_BACKEND, SQLITE_VECTOR_PATH, VECTOR_STORE_BACKEND
+from app.repositories.binary_chunk_index import get_binary_index, peek_binary_index
+from app.repositories.chunk_repository import ChunkRepository
+from app.repositories.memory_chunk_repository import InMemoryChunkRepository
+from app.repositories.segment_store import get_segment_store
+from app.repositories.sqlite_vector_store import SqliteVectorStore
+from app.repositories.video_repository import VideoRepository
+from app.services.index_service import get_index_manager
+from app.utils.vector_store_utils import bulk_insert_chunks
+
+logger = logging.getLogger(__name__)
+
+
+@runtime_checkable
+class VectorBackend(Protocol):
+    """
+    Result rows are dicts with id, chunk_index, score and content (plus
+    video_id from search_many), best first. Scores are cosine similarity.
+    insert_batch replaces whatever the backend held for that video.
+    """
+
+    name: str
+    supports_language: bool  # search_many can filter on videos.language itself
+
+    def insert_batch(self, video_id: str, chunks: List[str], embeddings) -> None: ...
+
+    def delete_video(self, video_id: str) -> None: ...
+
+    def export_video(self, video_id: str) -> Optional[Tuple[List[str], np.ndarray]]:
+        """Contents and float32 vectors in chunk order, as insert_batch takes them; None if absent."""
+        ...
+
+    def search(
+        self,
+        video_id: str,
+        query_embedding,
+        top_k: int = 5,
+        threshold: float = 0.0,
+        recall: Optional[float] = None
+    ) -> List[dict]: ...
+
+    def search_many(
+        self,
+        query_embedding,
+        top_k: int = 5,
+        video_ids: Optional[Iterable[str]] = None,
+        language: Optional[str] = None,
+        recall: Optional[float] = None
+    ) -> List[dict]: ...
+
+    def stats(self) -> dict: ...
+
+
+class PgVectorBackend:
+    name = "pgvector"
+    supports_language = True
+    checks_state = True  # search() verifies the query's EmbeddingState itself
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def insert_batch(self, video_id, chunks, embeddings):
+        # the old rows go in the same transaction bulk_insert_chunks commits
+        self.db.execute(text("DELETE FROM chunks WHERE video_id = :video_id"), {"video_id": video_id})
+        bulk_insert_chunks(self.db, video_id, chunks, embeddings)
+
+        # keep an already-loaded corpus index in step with the table
+        binary_index = peek_binary_index()
+        if binary_index is not None:
+            rows = ChunkRepository(self.db).get_chunk_ids(video_id)
+            binary_index.delete_video(video_id)
+            binary_index.add(
+                [row[0] for row in rows],
+                [video_id] * len(rows),
+                [row[1] for row in rows],
+                embeddings
+            )
+
+    def delete_video(self, video_id):
+        ChunkRepository(self.db).delete_by_video(video_id)
+        binary_index = peek_binary_index()
+        if binary_index is not None:
+            binary_index.delete_video(video_id)
+
+    def export_video(self, video_id):
+        return ChunkRepository(self.db).get_video_chunks(video_id)
+
+    def search(self, video_id, query_embedding, top_k=5, threshold=0.0, recall=None, state=None):
+        """`state`: see ChunkRepository.search_similar, which checks it in the search's own statement."""
+        # the index covers every video: without an iterative scan the video_id
+        # filter would leave few or none of the ef_search / probes candidates
+        settings = get_index_manager().settings_for(recall, filtered=True)
+        return ChunkRepository(self.db).search_similar(
+            video_id, query_embedding, top_k, threshold, settings=settings, state=state
+        )
+
+    def iter_search(self, video_id, query_embedding, top_k=5, threshold=0.0, recall=None, state=None):
+        """search() with rows streamed from a server-side cursor."""
+        settings = get_index_manager().settings_for(recall, filtered=True)
+        return ChunkRepository(self.db).iter_similar(
+            video_id, query_embedding, top_k, threshold, settings=settings, state=state
+        )
+
+    def search_many(self, query_embedding, top_k=5, video_ids=None, language=None, recall=None):
+        """
+        With CORPUS_SEARCH_BACKEND=pgvector the ANN index answers in one
+        query; with "binary" a Hamming shortlist over packed sign codes is
+        reranked by exact cosine in process and the winners' content
+        fetched in one query.
+        """
+        if CORPUS_SEARCH_BACKEND == "pgvector":
+            settings = get_index_manager().settings_for(
+                recall, filtered=language is not None or video_ids is not None
+            )
+            return ChunkRepository(self.db).search_corpus(
+                query_embedding, top_k, language=language, video_ids=video_ids, settings=settings
+            )
+
+        if language is not None:
+            language_ids = set(VideoRepository(self.db).get_ids_by_language(language))
+            video_ids = language_ids if video_ids is None else language_ids & set(video_ids)
+
+        index = get_binary_index(self.db)
+        index.sync(self.db)  # videos rewritten by other processes since
+        for attempt in range(3):
+            rows = index.search(query_embedding, top_k, video_ids=video_ids)
+            contents = ChunkRepository(self.db).get_contents([row["id"] for row in rows])
+            stale = [row["id"] for row in rows if row["id"] not in contents]
+            if not stale or attempt == 2:
+                break
+            # chunks deleted under the index (an archive, another process): forget them and search again
+            index.discard(stale)
+        rows = [row for row in rows if row["id"] in contents]
+        for row in rows:
+            row["content"] = contents[row["id"]]
+        return rows
+
+    def stats(self):
+        rows, videos = self.db.execute(
+            text("SELECT COUNT(*), COUNT(DISTINCT video_id) FROM chunks")
+        ).one()
+        return {"videos": videos, "rows": rows}
+
+    def build_index(self):
+        """Schedule a background (CONCURRENTLY) build of the recommended index."""
+        return get_index_manager().build_async()
+
+
+class _StoreBackend:
+    """Adapter for the process-local stores, which share one method shape."""
+
+    supports_language = False
+
+    def __init__(self, name: str, store):
+        self.name = name
+        self.store = store
+
+    def insert_batch(self, video_id, chunks, embeddings):
+        self.store.bulk_insert(video_id, chunks, embeddings)
+
+    def delete_video(self, video_id):
+        self.store.delete_by_video(video_id)
+
+    def export_video(self, video_id):
+        return self.store.get_video_chunks(video_id)
+
+    def search(self, video_id, query_embedding, top_k=5, threshold=0.0, recall=None):
+        return self.store.search_similar(video_id, query_embedding, top_k, threshold)
+
+    def search_many(self, query_embedding, top_k=5, video_ids=None, language=None, recall=None):
+        if language is not None:
+            raise ValueError(f"The {self.name} backend cannot filter by language")
+        return self.store.search_many(query_embedding, top_k, video_ids=video_ids)
+
+    def stats(self):
+        return self.store.stats()
+
+
+# process-wide stores for the backends that do not live in the request's session
+_STORE_FACTORIES: Dict[str, Callable[[], object]] = {
+    "memory": InMemoryChunkRepository,
+    "sqlite": lambda: SqliteVectorStore(SQLITE_VECTOR_PATH),
+    "segments": get_segment_store,
+}
+BACKENDS = ("pgvector",) + tuple(_STORE_FACTORIES)
+
+_stores: Dict[str, object] = {}
+_stores_lock = Lock()
+
+
+def get_vector_backend(db: Optional[Session] = None, name: str = VECTOR_STORE_BACKEND) -> VectorBackend:
+    if name == "pgvector":
+        if db is None:
+            raise ValueError("The pgvector backend needs a database session")
+        return PgVectorBackend(db)
+
+    if name not in _STORE_FACTORIES:
+        raise ValueError(f"Unknown VECTOR_STORE_BACKEND {name!r}; expected one of {', '.join(BACKENDS)}")
+
+    with _stores_lock:
+        if name not in _stores:
+            _stores[name] = _STORE_FACTORIES[name]()
+            logger.info(f"Vector store backend: {name}")
+    return _StoreBackend(name, _stores[name])
@@ -1,10 +1,44 @@
+from datetime import datetime, timezone
 from sqlalchemy.orm import Session
-from sqlalchemy import select
-from typing import Optional
+from sqlalchemy import bindparam, delete, exists, func, or_, select, update
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
 
+from app.database.replicas import note_write, read_with_fallback
+from app.models.chunk_archive import ChunkArchive
 from app.models.video import video
 
 
+class ContentVersion(NamedTuple):
+    version: int
+    updated_at: Optional[datetime]
+
+
+class EmbeddingState(NamedTuple):
+    model: Optional[str]
+    content_version: Optional[int]  # None for unknown videos
+
+
+class EmbeddingStateChanged(Exception):
+    """A video's model or content moved on from the state a query was embedded for."""
+
+    def __init__(self, video_id: str, found: EmbeddingState):
+        super().__init__(f"{video_id} is at {found}")
+        self.video_id = video_id
+        self.found = found
+
+
+def check_embedding_state(video_id: str, expected: Optional[EmbeddingState], found: EmbeddingState) -> None:
+    """
+    Raise EmbeddingStateChanged when `found` (as stored: model None for
+    videos never stamped, which no switch has touched) is not `expected`.
+    """
+    if expected is None:
+        return
+    if found.content_version != expected.content_version or (
+            found.model is not None and found.model != expected.model):
+        raise EmbeddingStateChanged(video_id, found)
+
+
 class VideoRepository:
     def __init__(self, db: Session):
         self.db = db
@@ -16,29 +50,181 @@ class VideoRepository:
         self,
         video_id: str,
         encrypted_transcript: str,
-        language: str
+        language: str,
+        summary: Optional[str] = None,
+        commit: bool = True
     ) -> video:
-
-        video = video(
+        """
+        With commit=False the row is only flushed, to be committed with the
+        video's chunks: a failed chunk write then leaves no video behind.
+        """
+        record = video(
             video_id=video_id,
             encrypted_transcript=encrypted_transcript,
-            language=language
+            language=language,
+            summary=summary
         )
 
-        self.db.add(video)
+        self.db.add(record)
+        if not commit:
+            self.db.flush()
+            return record
         self.db.commit()
-        self.db.refresh(video)
+        note_write(self.db, video_id)
+        self.db.refresh(record)
 
-        return video
+        return record
 
     # -----------------------------
     # READ
     # -----------------------------
     def get_by_video_id(self, video_id: str) -> Optional[video]:
-
+        """Served by a read replica when one is in sync; the primary if it misses."""
         stmt = select(video).where(video.video_id == video_id)
-        result = self.db.execute(stmt)
-        return result.scalar_one_or_none()
+        return read_with_fallback(
+            self.db, video_id,
+            lambda bind_arguments: self.db.execute(stmt, bind_arguments=bind_arguments).scalar_one_or_none(),
+            missing=lambda record: record is None
+        )
+
+    def get_summary(self, video_id: str) -> Optional[str]:
+
+        stmt = select(video.summary).where(video.video_id == video_id)
+        return self.db.execute(stmt).scalar_one_or_none()
+
+    def get_content_version(self, video_id: str, lock: bool = False) -> Optional[ContentVersion]:
+        """
+        Version and last change time of a video's chunks; None for unknown
+        videos. With lock=True the row stays locked (Postgres) until commit.
+        """
+        stmt = select(
+            video.content_version, video.content_updated_at, video.created_at
+        ).where(video.video_id == video_id)
+        if lock:
+            stmt = stmt.with_for_update()
+        row = self.db.execute(stmt).first()
+        if row is None:
+            return None
+        return ContentVersion(row[0] or 0, row[1] or row[2])
+
+    def get_ids_by_language(self, language: str) -> List[str]:
+
+        stmt = select(video.video_id).where(video.language == language)
+        return list(self.db.execute(stmt).scalars().all())
+
+    # -----------------------------
+    # UPDATE
+    # -----------------------------
+    def save_summary(self, video_id: str, summary: str) -> None:
+
+        stmt = update(video).where(video.video_id == video_id).values(summary=summary)
+        self.db.execute(stmt)
+        self.db.commit()
+        note_write(self.db, video_id)
+
+    def bump_content_version(self, video_id: str) -> None:
+
+        stmt = update(video).where(video.video_id == video_id).values(
+            content_version=video.content_version + 1,
+            content_updated_at=datetime.now(timezone.utc)
+        )
+        self.db.execute(stmt)
+        self.db.commit()
+        note_write(self.db, video_id)
+
+    def touch_many(self, accessed: Dict[str, datetime]) -> None:
+        """Record last access times (only ever moving them forward)."""
+        if not accessed:
+            return
+
+        table = video.__table__
+        stmt = update(table).where(
+            table.c.video_id == bindparam("b_video_id"),
+            or_(table.c.last_accessed_at.is_(None), table.c.last_accessed_at < bindparam("b_accessed_at"))
+        ).values(last_accessed_at=bindparam("b_accessed_at"))
+        self.db.execute(stmt, [{"b_video_id": k, "b_accessed_at": v} for k, v in accessed.items()])
+        self.db.commit()
+
+    # -----------------------------
+    # RETENTION
+    # -----------------------------
+    def _idle_since(self, archived: bool):
+        last_used = func.coalesce(video.last_accessed_at, video.created_at)
+        is_archived = exists().where(ChunkArchive.video_id == video.video_id)
+        return last_used, (is_archived if archived else ~is_archived)
+
+    def idle_video_ids(self, before: Optional[datetime], limit: int, archived: bool = False) -> List[str]:
+        """Hot (or archived) videos least recently used first, optionally only those idle since `before`."""
+        last_used, state = self._idle_since(archived)
+        stmt = select(video.video_id).where(state)
+        if before is not None:
+            stmt = stmt.where(last_used < before)
+        stmt = stmt.order_by(last_used).limit(limit)
+        return list(self.db.execute(stmt).scalars().all())
+
+    def count_hot(self) -> int:
+        _, hot = self._idle_since(archived=False)
+        return self.db.execute(select(func.count()).select_from(video).where(hot)).scalar_one()
+
+    # -----------------------------
+    # EMBEDDING MODEL
+    # -----------------------------
+    def get_embedding_model(self, video_id: str) -> Optional[str]:
+
+        stmt = select(video.embedding_model).where(video.video_id == video_id)
+        return self.db.execute(stmt).scalar_one_or_none()
+
+    def get_embedding_state(self, video_id: str) -> EmbeddingState:
+        """The model a video's vectors come from and the content version they belong to, read together."""
+        stmt = select(video.embedding_model, video.content_version).where(video.video_id == video_id)
+        row = self.db.execute(stmt).first()
+        if row is None:
+            return EmbeddingState(None, None)
+        return EmbeddingState(row[0], row[1] or 0)
+
+    def set_embedding_model(self, video_id: str, model: str) -> None:
+        """Not committed: it goes in with the chunk write it describes."""
+        self.db.execute(update(video).where(video.video_id == video_id).values(embedding_model=model))
+
+    def stamp_embedding_model(self, model: str) -> int:
+        """Record `model` on videos written before the model was recorded."""
+        result = self.db.execute(update(video).where(video.embedding_model.is_(None)).values(embedding_model=model))
+        self.db.commit()
+        return result.rowcount
+
+    def count_by_embedding_model(self) -> Dict[Optional[str], int]:
+
+        stmt = select(video.embedding_model, func.count()).group_by(video.embedding_model)
+        return {model: count for model, count in self.db.execute(stmt).all()}
+
+    def get_ids_by_embedding_model(self, model: str, include_unrecorded: bool = False) -> List[str]:
+
+        matches = video.embedding_model == model
+        if include_unrecorded:
+            matches = or_(matches, video.embedding_model.is_(None))
+        return list(self.db.execute(select(video.video_id).where(matches)).scalars().all())
+
+    def ids_changed_since(self, since: datetime) -> List[str]:
+        """Videos whose chunks were rewritten after `since`, by any process."""
+        stmt = select(video.video_id).where(video.content_updated_at > since)
+        return list(self.db.execute(stmt).scalars().all())
+
+    def ids_not_on_model(self, model: str, limit: int, after: Optional[str] = None) -> List[str]:
+        """Videos embedded with another model, in video_id order from after `after`."""
+        stmt = select(video.video_id).where(
+            or_(video.embedding_model.is_(None), video.embedding_model != model)
+        )
+        if after is not None:
+            stmt = stmt.where(video.video_id > after)
+        return list(self.db.execute(stmt.order_by(video.video_id).limit(limit)).scalars().all())
+
+    # -----------------------------
+    # DELETE
+    # -----------------------------
+    def delete_video(self, video_id: str) -> None:
+
+        self.db.execute(delete(video).where(video.video_id == video_id))
+        self.db.commit()
 
     # -----------------------------
     # EXISTS CHECK
@@ -47,4 +233,16 @@ class VideoRepository:
 
         stmt = select(video.id).where(video.video_id == video_id)
         result = self.db.execute(stmt).first()
-        return result is not None
\ No newline at end of file
+        return result is not None
+
+    # -----------------------------
+    # BULK EXISTS CHECK
+    # -----------------------------
+    def get_existing_ids(self, video_ids: Iterable[str]) -> Set[str]:
+
+        video_ids = list(video_ids)
+        if not video_ids:
+            return set()
+
+        stmt = select(video.video_id).where(video.video_id.in_(video_ids))
+        return set(self.db.execute(stmt).scalars().all())
@@ -1,11 +1,33 @@
 
-from .process_video import ProcessVideoRequest, ProcessVideoResponse
-from .retrive_chunks import RetrieveChunksRequest, RetrieveChunksResponse
+from .process_video import (
+    ProcessVideoRequest,
+    ProcessVideoResponse,
+    BulkProcessVideoRequest,
+    BulkProcessVideoEvent,
+)
+from .retrive_chunks import (
+    RetrieveChunksRequest,
+    RetrieveChunksResponse,
+    RetrieveChunksStreamRequest,
+    RetrievedChunkEvent,
+)
+from .summary import KeyPoint, SummaryResponse
+from .search import SearchCorpusRequest, SearchCorpusResponse, CorpusChunk, VideoGroup
 
 __all__ = [
     
     "ProcessVideoRequest",
     "ProcessVideoResponse",
+    "BulkProcessVideoRequest",
+    "BulkProcessVideoEvent",
     "RetrieveChunksRequest",
     "RetrieveChunksResponse",
+    "RetrieveChunksStreamRequest",
+    "RetrievedChunkEvent",
+    "KeyPoint",
+    "SummaryResponse",
+    "SearchCorpusRequest",
+    "SearchCorpusResponse",
+    "CorpusChunk",
+    "VideoGroup",
 ]
\ No newline at end of file
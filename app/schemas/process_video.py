@@ -1,4 +1,7 @@
 from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from app.config import BULK_MAX_VIDEOS
 
 class ProcessVideoRequest(BaseModel):
     video_id: str = Field(..., min_length=1, description="YouTube video ID")  # ← add min_length=1
@@ -7,4 +10,19 @@ class ProcessVideoResponse(BaseModel):
     video_id: str
     cached: bool
     chunk_count: int
-    message: str
\ No newline at end of file
+    message: str
+
+class BulkProcessVideoRequest(BaseModel):
+    videos: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=BULK_MAX_VIDEOS,
+        description="YouTube video IDs or URLs"
+    )
+
+class BulkProcessVideoEvent(BaseModel):
+    """One NDJSON line of the bulk ingestion stream."""
+    video_id: Optional[str]
+    status: str  # processed | skipped | failed | invalid
+    chunk_count: int
+    detail: str
@@ -1,13 +1,27 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
+
+from app.config import RETRIEVAL_STREAM_MAX_TOP_K
 
 
 class RetrieveChunksRequest(BaseModel):
     video_id: str
     question: str
     top_k: int = Field(default=5, ge=1, le=20)
+    recall: Optional[float] = Field(default=None, ge=0.5, le=1.0, description="Target ANN recall")
 
 
 class RetrieveChunksResponse(BaseModel):
     video_id: str
-    chunks: List[str]
\ No newline at end of file
+    chunks: List[str]
+
+class RetrieveChunksStreamRequest(RetrieveChunksRequest):
+    top_k: int = Field(default=5, ge=1, le=RETRIEVAL_STREAM_MAX_TOP_K)
+
+
+class RetrievedChunkEvent(BaseModel):
+    """One NDJSON line of /retrieve_chunks/stream."""
+    rank: int
+    chunk_index: int
+    score: float
+    content: str
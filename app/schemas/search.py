@@ -0,0 +1,32 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class SearchCorpusRequest(BaseModel):
+    question: str = Field(..., min_length=1)
+    page: int = Field(default=1, ge=1)
+    page_size: int = Field(default=10, ge=1, le=50)
+    language: Optional[str] = None
+    video_ids: Optional[List[str]] = Field(default=None, min_length=1)
+    group_by_video: bool = False
+
+
+class CorpusChunk(BaseModel):
+    video_id: str
+    chunk_index: int
+    score: float
+    content: str
+
+
+class VideoGroup(BaseModel):
+    video_id: str
+    best_score: float
+    chunks: List[CorpusChunk]
+
+
+class SearchCorpusResponse(BaseModel):
+    page: int
+    page_size: int
+    has_more: bool
+    results: List[CorpusChunk]
+    groups: Optional[List[VideoGroup]] = None
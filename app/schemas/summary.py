@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class KeyPoint(BaseModel):
+    chunk_index: int
+    text: str
+
+
+class SummaryResponse(BaseModel):
+    video_id: str
+    key_points: List[KeyPoint]
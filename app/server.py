@@ -0,0 +1,199 @@
+"""
+Pre-fork server entry point.
+
+Usage:
+    python -m app.server [--host 0.0.0.0] [--port 8000] [--workers 4]
+
+The master imports the app, loads the embedding model (and optionally the
+read-only corpus index) and only then forks the workers, so model weights
+are shared copy-on-write instead of being loaded once per worker. The
+master keeps no request state: it supervises workers, restarts any that
+die and stops them all on SIGTERM / SIGINT.
+
+Check the sharing with `python -m app.admin memory <master pid>`.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Callable, Dict, Optional
+
+from app.config import EMBEDDING_WORKERS, SERVER_WORKERS, TORCH_THREADS_PER_WORKER
+
+logger = logging.getLogger(__name__)
+
+RESTART_BACKOFF_SECONDS = 1.0
+
+
+def threads_per_worker(workers: int, configured: int = TORCH_THREADS_PER_WORKER) -> int:
+    """Intra-op threads each worker may use: configured, or an even split of the cores."""
+    if configured > 0:
+        return configured
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def configure_torch_threads(threads: int) -> None:
+    """
+    Pin torch / OpenMP / MKL intra-op threads so N workers do not each spin
+    up one thread per core. The env vars cover libraries not yet imported.
+    """
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:  # only settable before the first inter-op work
+            pass
+
+
+def preload(load_index: bool = False) -> None:
+    """Load everything workers only read, then freeze it out of the GC."""
+    from app.services.embedding_service import get_model
+
+    if EMBEDDING_WORKERS == 0:  # otherwise the model lives in the embedding worker processes
+        get_model()
+
+    if load_index:
+        from app.database import SessionLocal
+        from app.repositories.binary_chunk_index import get_binary_index
+
+        db = SessionLocal()
+        try:
+            get_binary_index(db)
+        finally:
+            db.close()
+
+    # objects moved to the permanent generation are never traversed by the
+    # collector, so workers do not dirty (and copy) their pages
+    gc.collect()
+    gc.freeze()
+
+
+class Master:
+    """Forks `workers` children running `target(slot)` and keeps them alive."""
+
+    def __init__(self, workers: int, target: Callable[[int], None]):
+        self.workers = workers
+        self.target = target
+        self.children: Dict[int, int] = {}  # pid -> slot
+        self.stopping = False
+
+    def spawn(self, slot: int) -> int:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                self.target(slot)
+            except BaseException:
+                logger.exception(f"Worker {slot} crashed")
+                code = 1
+            finally:
+                os._exit(code)
+
+        self.children[pid] = slot
+        logger.info(f"Worker {slot} started (pid {pid})")
+        return pid
+
+    def start(self) -> None:
+        for slot in range(self.workers):
+            self.spawn(slot)
+
+    def supervise_once(self) -> Optional[int]:
+        """Wait for one worker to exit and restart it. Returns the new pid."""
+        try:
+            pid, status = os.waitpid(-1, 0)
+        except ChildProcessError:
+            return None
+
+        slot = self.children.pop(pid, None)
+        if slot is None or self.stopping:
+            return None
+
+        logger.warning(f"Worker {slot} (pid {pid}) exited with status {status}; restarting")
+        time.sleep(RESTART_BACKOFF_SECONDS)
+        return self.spawn(slot)
+
+    def stop(self, sig: int = signal.SIGTERM) -> None:
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+        for pid in list(self.children):
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+            self.children.pop(pid, None)
+
+    def run(self) -> None:
+        def shutdown(signum, frame):
+            logger.info("Stopping workers")
+            self.stop()
+            sys.exit(0)
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+
+        self.start()
+        while self.children:
+            self.supervise_once()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    parser.add_argument("--preload-index", action="store_true", help="Also load the corpus binary index in the master")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper())
+
+    threads = threads_per_worker(args.workers)
+    configure_torch_threads(threads)
+
+    # one listening socket, inherited by every worker
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    import uvicorn
+
+    from app.main import app
+
+    started = time.perf_counter()
+    preload(load_index=args.preload_index)
+    logger.info(
+        f"Preloaded in {time.perf_counter() - started:.1f}s; forking {args.workers} workers "
+        f"with {threads} torch threads each (master pid {os.getpid()})"
+    )
+
+    def serve(slot: int) -> None:
+        configure_torch_threads(threads)
+        # connections the master opened while preloading must not be shared across processes
+        from app.database import engine
+
+        engine.dispose(close=False)
+        config = uvicorn.Config(app, log_level=args.log_level)
+        uvicorn.Server(config).run(sockets=[sock])
+
+    Master(args.workers, serve).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,3 @@
-from cryptography.fernet import Fernet
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from app.repositories.video_repository import VideoRepository
@@ -9,6 +8,8 @@ from typing import Tuple
 
 class CacheService:
     def __init__(self, repo: VideoRepository, fernet_key: str):
+        from cryptography.fernet import Fernet  # deferred: keeps the crypto backend out of app startup
+
         self.repo = repo
         self.fernet = Fernet(fernet_key.encode())
 
@@ -6,4 +6,8 @@ class ChunkingService:
         chunks = chunk_transcript(text)  # delegates to util
         if not chunks:
             raise ValueError("No chunks produced")
-        return chunks
\ No newline at end of file
+        return chunks
+
+    @staticmethod
+    def chunk_text(text: str) -> list[str]:
+        return ChunkingService().chunk(text)
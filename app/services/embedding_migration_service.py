@@ -0,0 +1,175 @@
+"""
+Moving the corpus to another embedding model without re-ingesting.
+
+Every video records the model that embedded its chunks
+(videos.embedding_model) and its queries are embedded with that model
+(app/services/embedding_models.py), so the corpus can be served from two
+models at once. EmbeddingMigration re-embeds the chunk texts already
+stored, video by video:
+
+- chunks are embedded with the target model EMBEDDING_MIGRATION_BATCH at a
+  time (on the scheduler's bulk lane, behind queries) and staged in the
+  chunk_reembeddings table, one commit per batch, at no more than
+  EMBEDDING_MIGRATION_RATE chunks a second. A stopped run resumes from
+  what is staged.
+- once all of a video's chunks are staged, its vectors are replaced and
+  its model switched in one transaction. Until then its queries use the
+  old model and the old vectors.
+
+Archived videos are re-embedded inside their archive. The target model
+must produce EMBEDDING_DIM-dimensional vectors, as the vector column is
+typed. Once everything is migrated, set EMBEDDING_MODEL to the target so
+new videos are ingested with it; videos ingested meanwhile are left for the
+next run.
+"""
+import logging
+import threading
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from app.config import EMBEDDING_DIM, EMBEDDING_MIGRATION_BATCH, EMBEDDING_MIGRATION_RATE, EMBEDDING_MODEL
+from app.repositories.archive_repository import ChunkArchiveRepository
+from app.repositories.reembedding_repository import ChunkReembeddingRepository
+from app.repositories.vector_backend import VectorBackend, get_vector_backend
+from app.repositories.video_repository import VideoRepository
+from app.services.embedding_models import embedding_models
+from app.services.embedding_service import EmbeddingService
+from app.services.retention_service import pack, unpack
+from app.services.vector_store_service import VectorStoreService
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingMigration:
+
+    def __init__(
+        self,
+        db,
+        target: str,
+        source: str = EMBEDDING_MODEL,
+        backend: Optional[VectorBackend] = None,
+        batch: int = EMBEDDING_MIGRATION_BATCH,
+        rate: float = EMBEDDING_MIGRATION_RATE,
+        embed: Optional[Callable[[List[str]], np.ndarray]] = None,
+        sleep=time.sleep,
+        clock=time.monotonic
+    ):
+        self.db = db
+        self.target = target
+        self.source = source  # the model of videos that have none recorded
+        self.backend = backend or get_vector_backend(db)
+        self.batch = batch
+        self.rate = rate
+        self.embed = embed or EmbeddingService(target).batch_embed
+        self.sleep = sleep
+        self.clock = clock
+        self.videos = VideoRepository(db)
+        self.staging = ChunkReembeddingRepository(db)
+        self.archives = ChunkArchiveRepository(db)
+
+    def status(self) -> dict:
+        counts = self.videos.count_by_embedding_model()
+        return {
+            "target": self.target,
+            "videos": {model or f"{self.source} (unrecorded)": count for model, count in counts.items()},
+            "remaining": sum(count for model, count in counts.items() if model != self.target),
+            "staged": self.staging.stats(),
+        }
+
+    def check(self) -> None:
+        """Refuse targets the stored data cannot take."""
+        unrecorded = self.videos.count_by_embedding_model().get(None, 0)
+        if unrecorded and self.source == self.target:
+            raise ValueError(
+                f"{unrecorded} videos have no recorded model and would be taken as already on {self.target}; "
+                "pass the model they were embedded with as the source"
+            )
+        dim = np.asarray(self.embed(["dimension probe"])).shape[-1]
+        if dim != EMBEDDING_DIM:
+            raise ValueError(
+                f"{self.target} produces {dim}-dimensional vectors, the store holds {EMBEDDING_DIM}: "
+                "that needs a schema change and a re-ingest"
+            )
+
+    def _throttle(self, chunks: int, started: float) -> None:
+        if self.rate > 0:
+            remaining = chunks / self.rate - (self.clock() - started)
+            if remaining > 0:
+                self.sleep(remaining)
+
+    def migrate_video(self, video_id: str) -> bool:
+        """Re-embed and switch one video; False if it changed meanwhile (the next run retries it)."""
+        version = self.videos.get_content_version(video_id)
+        exported = self.backend.export_video(video_id)
+        archived = exported is None and self.archives.exists(video_id)
+        if archived:
+            exported = unpack(self.archives.get(video_id))
+        contents = exported[0] if exported is not None else []
+
+        # vectors staged for another target by an abandoned run are of no use
+        self.staging.discard(video_id, keep_model=self.target)
+        staged = self.staging.staged(video_id, self.target)
+        missing = [i for i in range(len(contents)) if i not in staged]
+        for start in range(0, len(missing), self.batch):
+            indexes = missing[start:start + self.batch]
+            started = self.clock()
+            self.staging.save(video_id, self.target, indexes, self.embed([contents[i] for i in indexes]))
+            self._throttle(len(indexes), started)
+
+        matrix = self.staging.load(video_id, self.target, len(contents)) if contents else None
+        if contents and matrix is None:
+            self.staging.discard(video_id)
+            return False
+
+        # the switch: one transaction, and only onto the content that was re-embedded
+        if self.videos.get_content_version(video_id, lock=True) != version:
+            self.db.rollback()
+            self.staging.discard(video_id)
+            return False
+        if archived:
+            self.videos.set_embedding_model(video_id, self.target)
+            self.staging.discard(video_id, commit=False)
+            self.archives.save(pack(video_id, contents, matrix))
+            embedding_models.invalidate(video_id)
+        elif contents:
+            self.staging.discard(video_id, commit=False)
+            store = VectorStoreService(self.db, self.backend)
+            store.bulk_insert_chunks(video_id, contents, matrix, model=self.target)
+        else:
+            self.videos.set_embedding_model(video_id, self.target)
+            self.db.commit()
+            embedding_models.invalidate(video_id)
+        logger.info(f"Re-embedded {len(contents)} chunks of {video_id} with {self.target}")
+        return True
+
+    def _pending(self):
+        """Videos not on the target yet, in video_id order; each is visited once per run."""
+        after = None
+        while True:
+            video_ids = self.videos.ids_not_on_model(self.target, limit=100, after=after)
+            if not video_ids:
+                return
+            yield from video_ids
+            after = video_ids[-1]
+
+    def run(self, max_videos: Optional[int] = None, progress: Optional[Callable[[str, bool], None]] = None,
+            stop: Optional[threading.Event] = None) -> dict:
+        self.check()
+        stamped = self.videos.stamp_embedding_model(self.source)
+        migrated = failed = 0
+        for video_id in self._pending():
+            if stop is not None and stop.is_set() or max_videos is not None and migrated + failed >= max_videos:
+                break
+            try:
+                done = self.migrate_video(video_id)
+            except Exception as e:
+                self.db.rollback()
+                logger.warning(f"Re-embedding {video_id} failed: {e}")
+                done = False
+            migrated += done
+            failed += not done
+            if progress is not None:
+                progress(video_id, done)
+        return {"stamped": stamped, "migrated": migrated, "failed": failed, **self.status()}
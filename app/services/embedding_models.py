@@ -0,0 +1,70 @@
+"""
+Which embedding model a video's vectors come from.
+
+A query against a video must be embedded with the model that embedded the
+video's chunks (videos.embedding_model), which during a model migration
+differs from video to video. Lookups are cached per process for
+EMBEDDING_MODEL_CACHE_SECONDS; a switch made in this process is seen at
+once, other processes see it when their entry expires.
+
+The model is looked up together with the video's content_version, as an
+EmbeddingState. The per-process copies of a video's search data (the
+prefetcher's matrix, the query cache) record the state they were built
+from and are only used while it is still the current one, so a switch
+made in another process retires them together with the model.
+
+A cached state is never trusted for a search: the search reads the
+video's model and version in its own statement (pgvector) or right after
+(the other backends) and raises EmbeddingStateChanged when they moved on;
+rag_service then refreshes the state here and embeds the question again.
+"""
+import time
+from typing import List, Optional, Tuple
+
+from app.config import EMBEDDING_MODEL, EMBEDDING_MODEL_CACHE_SECONDS
+from app.repositories.video_repository import EmbeddingState, VideoRepository
+from app.utils.lru_cache import LRUCache
+
+
+class EmbeddingModels:
+
+    def __init__(self, ttl: float = EMBEDDING_MODEL_CACHE_SECONDS, default: str = EMBEDDING_MODEL,
+                 maxsize: int = 4096, clock=time.monotonic):
+        self.ttl = ttl
+        self.default = default  # videos with no recorded model
+        self.clock = clock
+        self._videos = LRUCache(maxsize=maxsize)  # video_id -> (EmbeddingState, looked up at)
+        self._in_use: Optional[Tuple[List[str], float]] = None
+
+    def for_video(self, db, video_id: str) -> str:
+        return self.state(db, video_id).model
+
+    def state(self, db, video_id: str) -> EmbeddingState:
+        cached = self._videos.get(video_id)
+        if cached is not None and self.clock() - cached[1] <= self.ttl:
+            return cached[0]
+        return self.refresh(db, video_id)
+
+    def refresh(self, db, video_id: str) -> EmbeddingState:
+        """Look the video up now, whatever is cached."""
+        model, version = VideoRepository(db).get_embedding_state(video_id)
+        state = EmbeddingState(model or self.default, version)
+        self._videos.set(video_id, (state, self.clock()))
+        return state
+
+    def in_use(self, db) -> List[str]:
+        """Every model some video is embedded with; more than one only while a migration runs."""
+        cached = self._in_use
+        if cached is not None and self.clock() - cached[1] <= self.ttl:
+            return cached[0]
+        counts = VideoRepository(db).count_by_embedding_model()
+        models = sorted({model or self.default for model in counts}) or [self.default]
+        self._in_use = (models, self.clock())
+        return models
+
+    def invalidate(self, video_id: str) -> None:
+        self._videos.pop(video_id)
+        self._in_use = None
+
+
+embedding_models = EmbeddingModels()
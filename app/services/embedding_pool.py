@@ -0,0 +1,399 @@
+"""
+Embedding worker processes.
+
+With EMBEDDING_WORKERS > 0 the API process never loads the model: each
+worker process holds its own copy and the EmbeddingScheduler lanes hand
+texts to them. Vectors come back through one shared-memory block split
+into fixed slots (rows x dim float32), so only small control messages
+cross the pipes, never pickled lists of floats.
+
+    backpressure  a job needs a free slot; when all are taken submit()
+                  waits up to EMBEDDING_POOL_TIMEOUT, then raises
+                  EmbeddingPoolBusy (the API answers 503)
+    restarts      a worker that dies is replaced and its in-flight jobs are
+                  sent to the new one once; a second crash fails them
+"""
+import atexit
+import importlib
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.config import (
+    EMBEDDING_BULK_SLICE,
+    EMBEDDING_DIM,
+    EMBEDDING_POOL_MAX_PENDING,
+    EMBEDDING_POOL_TIMEOUT,
+    EMBEDDING_THREADS,
+    EMBEDDING_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOADER = "sentence_transformers:SentenceTransformer"
+MAX_ATTEMPTS = 2
+
+
+class EmbeddingPoolBusy(RuntimeError):
+    """Every result slot is in use: the pool is saturated."""
+
+
+class EmbeddingWorkerCrashed(RuntimeError):
+    """The worker running a job died, twice."""
+
+
+def _load(loader: str, model_name: str):
+    module, _, attr = loader.partition(":")
+    return getattr(importlib.import_module(module), attr)(model_name)
+
+
+def _worker_main(index: int, model_name: str, loader: str, shm_name: str, shape: tuple, conn, threads: int) -> None:
+    """Entry point of one worker process (spawned, so it starts clean)."""
+    if threads > 0:
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            os.environ[var] = str(threads)
+
+    shm = SharedMemory(name=shm_name)
+    slots = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+
+    try:
+        model = _load(loader, model_name)
+        torch = sys.modules.get("torch")
+        if threads > 0 and torch is not None:
+            torch.set_num_threads(threads)
+    except Exception as e:
+        conn.send(("failed", index, repr(e)))
+        return
+    conn.send(("ready", index, None))
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+
+        job_id, slot, texts = job
+        try:
+            vectors = np.asarray(model.encode(texts), dtype=np.float32)
+            if vectors.shape != (len(texts), shape[2]):
+                raise ValueError(f"Model returned {vectors.shape}, expected ({len(texts)}, {shape[2]})")
+            slots[slot, :len(texts)] = vectors
+            conn.send(("done", job_id, None))
+        except Exception as e:
+            conn.send(("error", job_id, repr(e)))
+
+    del slots
+    shm.close()
+
+
+class _Job:
+    __slots__ = ("id", "slot", "texts", "future", "worker", "attempts")
+
+    def __init__(self, job_id: int, slot: int, texts: List[str], future: Future):
+        self.id = job_id
+        self.slot = slot
+        self.texts = texts
+        self.future = future
+        self.worker: Optional[int] = None
+        self.attempts = 0
+
+
+class EmbeddingPool:
+
+    def __init__(
+        self,
+        model_name: str,
+        workers: int = EMBEDDING_WORKERS,
+        dim: int = EMBEDDING_DIM,
+        max_pending: int = EMBEDDING_POOL_MAX_PENDING,
+        slot_rows: int = EMBEDDING_BULK_SLICE,
+        timeout: float = EMBEDDING_POOL_TIMEOUT,
+        loader: str = DEFAULT_LOADER,
+        threads_per_worker: Optional[int] = None,
+        on_state=None
+    ):
+        if workers < 1:
+            raise ValueError("An embedding pool needs at least one worker")
+
+        self.model_name = model_name
+        self.loader = loader
+        self.dim = dim
+        self.slot_rows = slot_rows
+        self.timeout = timeout
+        self.max_pending = max_pending or workers * 4
+        if threads_per_worker is None:
+            budget = EMBEDDING_THREADS or os.cpu_count() or 1
+            threads_per_worker = max(1, budget // workers)
+        self.threads_per_worker = threads_per_worker
+        self.on_state = on_state  # callback(state) for readiness reporting
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._shape = (self.max_pending, slot_rows, dim)
+        self._shm = SharedMemory(create=True, size=int(np.prod(self._shape)) * 4)
+        self._slots = np.ndarray(self._shape, dtype=np.float32, buffer=self._shm.buf)
+
+        self._free: "queue.Queue[int]" = queue.Queue()
+        for slot in range(self.max_pending):
+            self._free.put(slot)
+
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._jobs: Dict[int, _Job] = {}
+        self._processes: List = [None] * workers
+        self._conns: List = [None] * workers
+        self._send_locks = [threading.Lock() for _ in range(workers)]
+        self._ready = [False] * workers
+        self._failed = set()  # workers that could not load the model; not restarted
+        self._restarts = 0
+        self._rejected = 0
+        self._closing = False
+
+        for index in range(workers):
+            self._start_worker(index)
+
+        self._collector = threading.Thread(target=self._collect, name="embedding-pool-collector", daemon=True)
+        self._collector.start()
+
+    # -----------------------------
+    # WORKERS
+    # -----------------------------
+    def _start_worker(self, index: int) -> None:
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(index, self.model_name, self.loader, self._shm.name, self._shape, child_conn,
+                  self.threads_per_worker),
+            name=f"embedding-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        self._processes[index] = process
+        self._conns[index] = parent_conn
+        self._ready[index] = False
+
+    def _restart_worker(self, index: int) -> None:
+        """Replace a dead worker and hand its jobs to the replacement (once)."""
+        process = self._processes[index]
+        logger.warning(f"Embedding worker {index} (pid {process.pid}) exited with {process.exitcode}; restarting")
+        self._conns[index].close()
+
+        with self._lock:
+            self._restarts += 1
+            orphans = [job for job in self._jobs.values() if job.worker == index]
+            self._start_worker(index)
+
+        for job in orphans:
+            if job.attempts >= MAX_ATTEMPTS:
+                self._finish(job, error=EmbeddingWorkerCrashed(f"Embedding worker {index} crashed"))
+            else:
+                self._dispatch(job)
+        self._report_state()
+
+    def _dispatch(self, job: _Job) -> None:
+        with self._lock:
+            loads = {i: 0 for i in range(len(self._processes)) if i not in self._failed}
+            for other in self._jobs.values():
+                if other.worker in loads and other is not job:
+                    loads[other.worker] += 1
+            if loads:
+                job.worker = min(loads, key=loads.__getitem__)
+                job.attempts += 1
+                self._jobs[job.id] = job
+            index = job.worker if loads else None
+
+        if index is None:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            self._free.put(job.slot)
+            job.future.set_exception(RuntimeError(f"No embedding worker could load {self.model_name}"))
+            return
+
+        try:
+            with self._send_locks[index]:
+                self._conns[index].send((job.id, job.slot, job.texts))
+        except (BrokenPipeError, OSError):
+            pass  # the collector sees the dead worker and re-dispatches
+
+    def _report_state(self) -> None:
+        if self.on_state is not None:
+            # one ready worker is enough to serve, if more slowly
+            self.on_state("ready" if any(self._ready) else "loading")
+
+    # -----------------------------
+    # RESULTS
+    # -----------------------------
+    def _finish(self, job: _Job, result: Optional[np.ndarray] = None, error: Optional[Exception] = None) -> None:
+        with self._lock:
+            if self._jobs.pop(job.id, None) is None:
+                return
+        self._free.put(job.slot)
+        if error is not None:
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(result)
+
+    def _handle(self, index: int, message: tuple) -> None:
+        kind, key, detail = message
+        if kind == "ready":
+            self._ready[index] = True
+            logger.info(f"Embedding worker {index} ready (pid {self._processes[index].pid})")
+            self._report_state()
+            return
+        if kind == "failed":
+            logger.error(f"Embedding worker {index} could not load {self.model_name}: {detail}")
+            with self._lock:
+                self._failed.add(index)
+                orphans = [job for job in self._jobs.values() if job.worker == index]
+            for job in orphans:
+                job.attempts -= 1  # not the job's fault
+                self._dispatch(job)
+            if self.on_state is not None and len(self._failed) == len(self._processes):
+                self.on_state("failed")
+            return
+
+        job = self._jobs.get(key)
+        if job is None:
+            return  # finished by an earlier attempt
+        if kind == "done":
+            # copy out before the slot can be reused
+            self._finish(job, result=self._slots[job.slot, :len(job.texts)].copy())
+        else:
+            self._finish(job, error=RuntimeError(f"Embedding failed: {detail}"))
+
+    def _collect(self) -> None:
+        while not self._closing:
+            conns = {conn: index for index, conn in enumerate(self._conns) if index not in self._failed}
+            sentinels = {
+                process.sentinel: index for index, process in enumerate(self._processes)
+                if index not in self._failed
+            }
+            if not conns:
+                return  # every worker failed to load; nothing left to watch
+
+            for ready in wait(list(conns) + list(sentinels), timeout=0.5):
+                if ready in conns:
+                    self._drain(conns[ready])
+                elif not self._closing:
+                    index = sentinels[ready]
+                    # whatever it sent before exiting (e.g. "failed") decides the restart
+                    self._drain(index)
+                    if index not in self._failed and self._processes[index].sentinel == ready:
+                        self._processes[index].join(0)
+                        self._restart_worker(index)
+
+    def _drain(self, index: int) -> None:
+        conn = self._conns[index]
+        try:
+            while conn.poll():
+                self._handle(index, conn.recv())
+        except (EOFError, OSError):
+            pass
+
+    # -----------------------------
+    # SUBMIT
+    # -----------------------------
+    def submit(self, texts: List[str]) -> Future:
+        if len(texts) > self.slot_rows:
+            raise ValueError(f"At most {self.slot_rows} texts per job")
+        if self._closing:
+            raise RuntimeError("Embedding pool is closed")
+
+        try:
+            slot = self._free.get(timeout=self.timeout)
+        except queue.Empty:
+            with self._lock:
+                self._rejected += 1
+            raise EmbeddingPoolBusy(f"All {self.max_pending} embedding slots busy for {self.timeout}s")
+
+        job = _Job(next(self._ids), slot, list(texts), Future())
+        self._dispatch(job)
+        return job.future
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Same contract as model.encode(list) -> (n, dim) float32."""
+        futures = [
+            self.submit(texts[start:start + self.slot_rows])
+            for start in range(0, len(texts), self.slot_rows)
+        ]
+        if not futures:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.concatenate([f.result() for f in futures])
+
+    # -----------------------------
+    # STATUS / SHUTDOWN
+    # -----------------------------
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = len(self._jobs)
+        return {
+            "workers": len(self._processes),
+            "ready": sum(self._ready),
+            "alive": sum(1 for p in self._processes if p.is_alive()),
+            "threads_per_worker": self.threads_per_worker,
+            "slots": self.max_pending,
+            "in_flight": in_flight,
+            "restarts": self._restarts,
+            "rejected": self._rejected,
+        }
+
+    def close(self) -> None:
+        self._closing = True
+        for index, conn in enumerate(self._conns):
+            try:
+                with self._send_locks[index]:
+                    conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._collector.join(2)
+
+        with self._lock:
+            jobs, self._jobs = list(self._jobs.values()), {}
+        for job in jobs:
+            job.future.set_exception(RuntimeError("Embedding pool closed"))
+
+        del self._slots
+        self._shm.close()
+        self._shm.unlink()
+
+
+_pools: Dict[str, EmbeddingPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_embedding_pool(model_name: str) -> EmbeddingPool:
+    """One pool per model and API process, started on first use."""
+    pool = _pools.get(model_name)
+    if pool is not None:
+        return pool
+
+    with _pools_lock:
+        if model_name not in _pools:
+            from app.services.embedding_service import set_model_state
+
+            set_model_state(model_name, "loading")
+            pool = EmbeddingPool(model_name, on_state=lambda state: set_model_state(model_name, state))
+            atexit.register(pool.close)
+            _pools[model_name] = pool
+    return _pools[model_name]
+
+
+def pool_stats() -> Dict[str, dict]:
+    return {name: pool.stats() for name, pool in _pools.items()}
@@ -0,0 +1,205 @@
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from app.config import (
+    EMBEDDING_BULK_SLICE,
+    EMBEDDING_LANES,
+    EMBEDDING_QUERY_LANES,
+    EMBEDDING_THREADS,
+    EMBEDDING_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+QUERY, BULK = "query", "bulk"
+
+
+class EmbeddingScheduler:
+    """
+    Runs every model.encode() of a process on a fixed set of lanes (threads)
+    with a fixed intra-op thread budget, instead of on whichever request or
+    ingestion thread asked.
+
+    - Query jobs always go ahead of bulk jobs; `query_lanes` of the lanes
+      never take bulk work at all, so a question is not queued behind an
+      ingestion spike.
+    - Bulk work is cut into slices of `bulk_slice` texts, so even with a
+      single lane a query waits for at most one slice.
+    - `threads` intra-op threads are split across the lanes (OpenMP teams
+      are per calling thread), keeping embedding inside its core budget and
+      leaving the rest for request handling.
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[List[str]], np.ndarray],
+        lanes: int = EMBEDDING_LANES,
+        query_lanes: int = EMBEDDING_QUERY_LANES,
+        threads: int = EMBEDDING_THREADS,
+        bulk_slice: int = EMBEDDING_BULK_SLICE,
+        name: str = "embedding"
+    ):
+        if lanes < 1:
+            raise ValueError("Embedding needs at least one lane")
+        if not 0 <= query_lanes < lanes:
+            raise ValueError("query_lanes must leave at least one lane for bulk work")
+
+        self.encode = encode
+        self.lanes = lanes
+        self.query_lanes = query_lanes
+        self.threads = threads
+        self.threads_per_lane = max(1, threads // lanes) if threads > 0 else None
+        self.bulk_slice = bulk_slice
+
+        self._queues = {QUERY: deque(), BULK: deque()}
+        self._ready = threading.Condition()
+        self._running = {QUERY: 0, BULK: 0}
+        self._completed = {QUERY: 0, BULK: 0}
+        self._wait_seconds = {QUERY: 0.0, BULK: 0.0}
+
+        self._workers = [
+            threading.Thread(
+                target=self._lane, args=(i < query_lanes,), name=f"{name}-lane-{i}", daemon=True
+            )
+            for i in range(lanes)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    # -----------------------------
+    # SUBMIT
+    # -----------------------------
+    def submit(self, texts: List[str], priority: str = BULK) -> Future:
+        future = Future()
+        with self._ready:
+            self._queues[priority].append((texts, future, time.perf_counter()))
+            self._ready.notify_all()
+        return future
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.submit([text], QUERY).result()[0]
+
+    def embed_bulk(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        futures = [
+            self.submit(texts[start:start + self.bulk_slice], BULK)
+            for start in range(0, len(texts), self.bulk_slice)
+        ]
+        return np.concatenate([f.result() for f in futures])
+
+    # -----------------------------
+    # LANES
+    # -----------------------------
+    def _next_job(self, query_only: bool):
+        """Caller holds the condition. Queries first; bulk only on general lanes."""
+        if self._queues[QUERY]:
+            return QUERY, self._queues[QUERY].popleft()
+        if not query_only and self._queues[BULK]:
+            return BULK, self._queues[BULK].popleft()
+        return None
+
+    def _apply_thread_budget(self) -> bool:
+        torch = sys.modules.get("torch")
+        if self.threads_per_lane is None or torch is None:
+            return False
+        torch.set_num_threads(self.threads_per_lane)
+        return True
+
+    def _lane(self, query_only: bool) -> None:
+        budget_applied = False
+        while True:
+            with self._ready:
+                job = self._next_job(query_only)
+                while job is None:
+                    self._ready.wait()
+                    job = self._next_job(query_only)
+                priority, (texts, future, queued_at) = job
+                self._running[priority] += 1
+                self._wait_seconds[priority] += time.perf_counter() - queued_at
+
+            result, error = None, None
+            if future.set_running_or_notify_cancel():
+                try:
+                    # the model (and torch) may only be imported by the first job
+                    budget_applied = budget_applied or self._apply_thread_budget()
+                    result = np.asarray(self.encode(texts), dtype=np.float32)
+                    budget_applied = budget_applied or self._apply_thread_budget()
+                except BaseException as e:
+                    error = e
+
+            # counters first, so a caller woken by the result sees them
+            with self._ready:
+                self._running[priority] -= 1
+                self._completed[priority] += 1
+
+            if error is not None:
+                future.set_exception(error)
+            elif future.running():
+                future.set_result(result)
+
+    # -----------------------------
+    # METRICS
+    # -----------------------------
+    def stats(self) -> dict:
+        with self._ready:
+            return {
+                "lanes": self.lanes,
+                "query_only_lanes": self.query_lanes,
+                "thread_budget": self.threads or None,
+                "threads_per_lane": self.threads_per_lane,
+                "bulk_slice": self.bulk_slice,
+                **{
+                    priority: {
+                        "queued": len(self._queues[priority]),
+                        "running": self._running[priority],
+                        "completed": self._completed[priority],
+                        "avg_wait_ms": round(
+                            1000 * self._wait_seconds[priority] / self._completed[priority], 3
+                        ) if self._completed[priority] else None,
+                    }
+                    for priority in (QUERY, BULK)
+                },
+            }
+
+
+_schedulers: Dict[str, EmbeddingScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(model_name: str) -> EmbeddingScheduler:
+    """One scheduler per model and process, created on first use."""
+    scheduler = _schedulers.get(model_name)
+    if scheduler is not None:
+        return scheduler
+
+    with _schedulers_lock:
+        if model_name not in _schedulers:
+            if EMBEDDING_WORKERS > 0:
+                # lanes just wait on worker processes: one per worker keeps them all busy
+                from app.services.embedding_pool import get_embedding_pool
+
+                encode = get_embedding_pool(model_name).encode
+                lanes = max(EMBEDDING_LANES, EMBEDDING_WORKERS + EMBEDDING_QUERY_LANES)
+            else:
+                from app.services.embedding_service import get_model
+
+                encode = lambda texts: get_model(model_name).encode(texts)  # noqa: E731
+                lanes = EMBEDDING_LANES
+
+            _schedulers[model_name] = EmbeddingScheduler(
+                encode, lanes=lanes, name=f"embedding-{model_name.rsplit('/', 1)[-1]}",
+            )
+            logger.info(f"Embedding scheduler for {model_name}: {_schedulers[model_name].stats()}")
+    return _schedulers[model_name]
+
+
+def scheduler_stats() -> Dict[str, dict]:
+    return {name: scheduler.stats() for name, scheduler in _schedulers.items()}
@@ -1,14 +1,98 @@
-from typing import List
-from sentence_transformers import SentenceTransformer
+import logging
+import threading
+from typing import Dict, List
+
+import numpy as np
+
+from app.config import EMBEDDING_MODEL, EMBEDDING_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Models are shared by every EmbeddingService in the process and loaded on
+# first use. sentence_transformers (and torch under it) is imported there
+# too, so importing the app costs nothing until an embedding is needed.
+_models: Dict[str, object] = {}
+_model_states: Dict[str, str] = {}  # not_loaded | loading | ready | failed
+_models_lock = threading.Lock()
+
+
+def get_model(model_name: str = EMBEDDING_MODEL):
+    model = _models.get(model_name)
+    if model is not None:
+        return model
+
+    with _models_lock:
+        if model_name not in _models:
+            _model_states[model_name] = "loading"
+            try:
+                from sentence_transformers import SentenceTransformer
+
+                _models[model_name] = SentenceTransformer(model_name)
+            except Exception:
+                _model_states[model_name] = "failed"
+                raise
+            _model_states[model_name] = "ready"
+            logger.info(f"Embedding model {model_name} loaded")
+    return _models[model_name]
+
+
+def set_model_state(model_name: str, state: str) -> None:
+    """For loaders outside this module (the worker pool) to report readiness."""
+    _model_states[model_name] = state
+
+
+def preload_model(model_name: str = EMBEDDING_MODEL) -> threading.Thread:
+    """
+    Load a model on a background thread so startup is not blocked by it.
+    With EMBEDDING_WORKERS the worker pool is started instead; the workers
+    load the model and this process never does.
+    """
+
+    def run():
+        if EMBEDDING_WORKERS > 0:
+            from app.services.embedding_pool import get_embedding_pool
+
+            get_embedding_pool(model_name)
+            return
+        try:
+            get_model(model_name)
+        except Exception as e:
+            logger.error(f"Embedding model {model_name} failed to load: {e}")
+
+    thread = threading.Thread(target=run, name="embedding-model-load", daemon=True)
+    thread.start()
+    return thread
+
+
+def model_states() -> Dict[str, str]:
+    """Load state per model; the configured model is listed even before first use."""
+    return {EMBEDDING_MODEL: "not_loaded", **_model_states}
+
+
+def models_ready() -> bool:
+    return all(state == "ready" for state in model_states().values())
 
 
 class EmbeddingService:
 
-    def __init__(self, model_name: str = "paraphrase-multilingual-MiniLM-L12-v2"):
-        self.model = SentenceTransformer(model_name)
+    def __init__(self, model_name: str = EMBEDDING_MODEL):
+        self.model_name = model_name
+
+    @property
+    def model(self):
+        return get_model(self.model_name)
+
+    def embed(self, text: str) -> np.ndarray:
+        """Query embedding (dim,) float32: scheduled ahead of any bulk work."""
+        from app.services.embedding_scheduler import get_scheduler
+
+        return get_scheduler(self.model_name).embed_query(text)
 
-    def embed(self, text: str) -> List[float]:
-        return self.model.encode(text).tolist()
+    def batch_embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Bulk (ingestion) embeddings as one (n, dim) float32 matrix, sliced
+        and run behind queries. Kept as an array all the way to storage.
+        """
+        from app.services.embedding_scheduler import get_scheduler
 
-    def batch_embed(self, texts: List[str]) -> List[List[float]]:
-        return self.model.encode(texts).tolist()
\ No newline at end of file
+        return get_scheduler(self.model_name).embed_bulk(texts)
@@ -1,8 +1,7 @@
-from cryptography.fernet import Fernet
-
-
 class EncryptionService:
     def __init__(self, key: str):
+        from cryptography.fernet import Fernet  # deferred: keeps the crypto backend out of app startup
+
         self.fernet = Fernet(key)
 
     def encrypt(self, text: str) -> str:
@@ -0,0 +1,356 @@
+import logging
+import math
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.repositories.chunk_partitions import partition_tables
+from app.config import (
+    VECTOR_SQL_TYPE,
+    INDEX_MIN_ROWS,
+    INDEX_HNSW_MAX_ROWS,
+    INDEX_DEFAULT_RECALL,
+    INDEX_REFRESH_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+TABLE_NAME = "chunks"
+VECTOR_COLUMN = "embedding"
+OPCLASS = f"{VECTOR_SQL_TYPE}_cosine_ops"  # retrieval uses the cosine operator <=>
+
+# (recall, hnsw.ef_search, fraction of ivfflat lists probed)
+RECALL_PROFILES = [
+    (0.80, 20, 0.01),
+    (0.90, 40, 0.03),
+    (0.95, 100, 0.06),
+    (0.99, 200, 0.15),
+    (1.00, 400, 1.00),
+]
+
+
+class IndexPlan:
+    def __init__(self, method: Optional[str], params: dict, row_count: int, table: str = TABLE_NAME):
+        self.method = method  # "hnsw" | "ivfflat" | None (sequential scan is fine)
+        self.params = params
+        self.row_count = row_count
+        self.table = table  # chunks, or one of its partitions
+
+    @property
+    def index_name(self) -> Optional[str]:
+        if self.method is None:
+            return None
+        return f"{self.table}_{VECTOR_COLUMN}_{self.method}_idx"
+
+    @property
+    def build_name(self) -> Optional[str]:
+        """Name a replacement is built under while the current index keeps serving."""
+        return None if self.method is None else f"{self.index_name}_new"
+
+    def for_table(self, table: str) -> "IndexPlan":
+        return IndexPlan(self.method, self.params, self.row_count, table)
+
+    def create_sql(self, concurrently: bool = True, name: Optional[str] = None) -> str:
+        with_params = ", ".join(f"{k} = {v}" for k, v in self.params.items())
+        return (
+            f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {name or self.index_name} "
+            f"ON {self.table} USING {self.method} ({VECTOR_COLUMN} {OPCLASS}) "
+            f"WITH ({with_params})"
+        )
+
+    def as_dict(self) -> dict:
+        return {"method": self.method, "params": self.params, "row_count": self.row_count,
+                "table": self.table, "index_name": self.index_name}
+
+
+def plan_index(row_count: int) -> IndexPlan:
+    """
+    Small tables are served by an exact scan. HNSW is preferred up to a
+    few million rows; beyond that IVFFlat builds faster and uses less memory.
+    """
+    if row_count < INDEX_MIN_ROWS:
+        return IndexPlan(None, {}, row_count)
+
+    if row_count <= INDEX_HNSW_MAX_ROWS:
+        if row_count <= 1_000_000:
+            params = {"m": 16, "ef_construction": 64}
+        else:
+            params = {"m": 24, "ef_construction": 128}
+        return IndexPlan("hnsw", params, row_count)
+
+    # pgvector guidance: rows / 1000 up to 1M rows, sqrt(rows) above
+    lists = row_count // 1000 if row_count <= 1_000_000 else int(math.sqrt(row_count))
+    return IndexPlan("ivfflat", {"lists": max(lists, 1)}, row_count)
+
+
+def query_settings(method: Optional[str], recall: Optional[float], lists: Optional[int] = None) -> dict:
+    """GUCs to SET LOCAL for one query so the index meets the requested recall."""
+    if method is None:
+        return {}
+
+    recall = INDEX_DEFAULT_RECALL if recall is None else recall
+    _, ef_search, probe_fraction = next(
+        (profile for profile in RECALL_PROFILES if recall <= profile[0]), RECALL_PROFILES[-1]
+    )
+
+    if method == "hnsw":
+        return {"hnsw.ef_search": ef_search}
+    if method == "ivfflat":
+        lists = lists or 100
+        return {"ivfflat.probes": max(1, min(lists, math.ceil(lists * probe_fraction)))}
+    return {}
+
+
+class IndexManager:
+    """
+    Owns the vector index on the chunks table, or one per partition when
+    chunks is hash partitioned (all of the same shape, planned from the
+    largest partition). Builds run CONCURRENTLY on a dedicated autocommit
+    connection and never on the request path.
+
+    Which index serves (`current`) is looked up again at most every
+    `refresh_interval` seconds by the searches themselves, so processes
+    that never build (INDEX_AUTO_BUILD=false, a lost build race, an index
+    built by `python -m app.admin index build`) tune their queries too.
+    """
+
+    def __init__(self, engine: Engine, refresh_interval: float = INDEX_REFRESH_SECONDS, clock=time.monotonic):
+        self.engine = engine
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self._build_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._building: Optional[threading.Thread] = None
+        self._refreshed_at: Optional[float] = None
+        self.current: Optional[dict] = None  # {"name", "method", "params"}
+        self.pgvector_version: Optional[tuple] = None  # e.g. (0, 8, 0), read by refresh()
+
+    # -----------------------------
+    # STATUS
+    # -----------------------------
+    def table_rows(self) -> dict:
+        """Estimated rows of each table holding chunks (the partitions, or chunks)."""
+        rows = {}
+        with self.engine.connect() as conn:
+            for table in partition_tables(conn):
+                # reltuples is maintained by ANALYZE/autovacuum; avoids a full COUNT(*)
+                estimate = conn.execute(
+                    text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table"),
+                    {"table": table},
+                ).scalar()
+                if estimate is None or estimate < 0:
+                    estimate = conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+                rows[table] = int(estimate or 0)
+        return rows
+
+    def row_count(self) -> int:
+        return sum(self.table_rows().values())
+
+    def plans(self) -> list:
+        """One plan per table, sized for the largest so every index has the same shape."""
+        rows = self.table_rows()
+        plan = plan_index(max(rows.values()))
+        return [plan.for_table(table) for table in rows]
+
+    def existing_indexes(self) -> list:
+        with self.engine.connect() as conn:
+            tables = partition_tables(conn)
+            rows = conn.execute(
+                text("""
+                    SELECT c.relname AS name,
+                           t.relname AS table,
+                           am.amname AS method,
+                           i.indisvalid AS valid,
+                           c.reloptions AS options,
+                           pg_relation_size(c.oid) AS size_bytes
+                    FROM pg_index i
+                    JOIN pg_class c ON c.oid = i.indexrelid
+                    JOIN pg_class t ON t.oid = i.indrelid
+                    JOIN pg_am am ON am.oid = c.relam
+                    WHERE t.relname = ANY(:tables)
+                      AND am.amname IN ('hnsw', 'ivfflat')
+                """),
+                {"tables": tables},
+            ).fetchall()
+        return [dict(row._mapping) for row in rows]
+
+    def extension_version(self) -> Optional[tuple]:
+        """The installed pgvector version as a tuple of ints; None without the extension."""
+        with self.engine.connect() as conn:
+            version = conn.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")).scalar()
+        if not isinstance(version, str):
+            return None
+        return tuple(int(part) for part in version.split(".") if part.isdigit())
+
+    def refresh(self) -> Optional[dict]:
+        self._refreshed_at = self.clock()
+        if self.pgvector_version is None:
+            self.pgvector_version = self.extension_version()
+        valid = [idx for idx in self.existing_indexes() if idx["valid"]]
+        if not valid:
+            self.current = None
+            return None
+
+        idx = valid[0]
+        params = {}
+        for option in idx.get("options") or []:
+            key, _, value = option.partition("=")
+            params[key] = int(value) if value.isdigit() else value
+        self.current = {"name": idx["name"], "method": idx["method"], "params": params}
+        return self.current
+
+    def status(self) -> dict:
+        plans = self.plans()
+        return {
+            "row_count": self.row_count(),
+            "tables": len(plans),
+            "indexes": self.existing_indexes(),
+            "recommended": plans[0].as_dict(),
+            "building": self.is_building(),
+        }
+
+    # -----------------------------
+    # PER-QUERY TUNING
+    # -----------------------------
+    def _refresh_if_stale(self) -> None:
+        stale = self._refreshed_at is None or self.clock() - self._refreshed_at >= self.refresh_interval
+        # one search refreshes; the others go on with what is known
+        if stale and self._refresh_lock.acquire(blocking=False):
+            try:
+                self.refresh()
+            except Exception as e:
+                self._refreshed_at = self.clock()  # not again on every query
+                logger.warning(f"Looking up the vector index failed: {e}")
+            finally:
+                self._refresh_lock.release()
+
+    def settings_for(self, recall: Optional[float], filtered: bool = False) -> dict:
+        self._refresh_if_stale()
+        if self.current is None:
+            return {}
+        settings = query_settings(self.current["method"], recall, self.current["params"].get("lists"))
+        if filtered and self.pgvector_version is not None and self.pgvector_version >= (0, 8):
+            # keep scanning the index until enough rows survive the WHERE clause. Older
+            # pgvector has no such setting and rejects the name under its reserved prefix
+            settings[f"{self.current['method']}.iterative_scan"] = "relaxed_order"
+        return settings
+
+    # -----------------------------
+    # BUILD / REBUILD
+    # -----------------------------
+    def build(self, force: bool = False) -> dict:
+        """
+        Create the recommended index (CONCURRENTLY) on chunks or on each of
+        its partitions, one partition at a time. With force=True an
+        existing index is replaced: the new one is built under a temporary
+        name, then the old one dropped and the new one renamed, so searches
+        keep an index throughout. Builds are serialised across processes
+        by an advisory lock; every worker asks for one at startup.
+        """
+        with self._build_lock:
+            plans = self.plans()
+            plan = plans[0]
+            if plan.method is None:
+                logger.info(f"Skipping vector index: {plan.row_count} rows < {INDEX_MIN_ROWS}")
+                self.refresh()
+                return plan.as_dict()
+
+            existing = {idx["name"]: idx for idx in self.existing_indexes()}
+            todo = [p for p in plans if force or not existing.get(p.index_name, {}).get("valid")]
+            if not todo:
+                self.refresh()
+                return plan.as_dict()
+
+            wanted = {p.index_name for p in plans}
+            with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                if not conn.execute(text("SELECT pg_try_advisory_lock(hashtext('vector_index_build'))")).scalar():
+                    logger.info("Vector index build skipped: another process is building")
+                    self.refresh()  # serve with whatever index there is meanwhile
+                    return plan.as_dict()
+                try:
+                    for table_plan in todo:
+                        self._build_table(conn, table_plan, existing)
+
+                    for name in existing:
+                        if name not in wanted and not self._being_built(conn, name):
+                            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                finally:
+                    conn.execute(text("SELECT pg_advisory_unlock(hashtext('vector_index_build'))"))
+
+            self.refresh()
+            return plan.as_dict()
+
+    @staticmethod
+    def _being_built(conn, name: str) -> bool:
+        """Whether some backend is still running the CREATE INDEX of `name`."""
+        return bool(conn.execute(
+            text("""
+                SELECT EXISTS (
+                    SELECT 1 FROM pg_stat_progress_create_index
+                    WHERE index_relid = to_regclass(:name)
+                )
+            """),
+            {"name": name},
+        ).scalar())
+
+    def _drop_leftover(self, conn, idx: Optional[dict]) -> bool:
+        """Drop an invalid index a failed CONCURRENTLY build left behind; False while it is still being built."""
+        if idx is None:
+            return True
+        if self._being_built(conn, idx["name"]):
+            logger.info(f"Vector index {idx['name']} is still being built elsewhere")
+            return False
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {idx['name']}"))
+        return True
+
+    def _build_table(self, conn, plan: IndexPlan, existing: dict) -> None:
+        current = existing.get(plan.index_name)
+        if current is not None and not current["valid"]:
+            if not self._drop_leftover(conn, current):
+                return
+            current = None
+
+        if current is None:
+            logger.info(f"Building vector index: {plan.create_sql()}")
+            conn.execute(text(plan.create_sql(concurrently=True)))
+            return
+
+        # replacement: build beside the serving index, then swap it in
+        if not self._drop_leftover(conn, existing.get(plan.build_name)):
+            return
+        logger.info(f"Rebuilding vector index: {plan.create_sql(name=plan.build_name)}")
+        conn.execute(text(plan.create_sql(concurrently=True, name=plan.build_name)))
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {plan.index_name}"))
+        conn.execute(text(f"ALTER INDEX {plan.build_name} RENAME TO {plan.index_name}"))
+
+    def build_async(self, force: bool = False) -> bool:
+        """Start a background build; returns False if one is already running."""
+        if self.is_building():
+            return False
+
+        def run():
+            try:
+                self.build(force=force)
+            except Exception as e:
+                logger.error(f"Vector index build failed: {e}")
+
+        self._building = threading.Thread(target=run, name="vector-index-build", daemon=True)
+        self._building.start()
+        return True
+
+    def is_building(self) -> bool:
+        return self._building is not None and self._building.is_alive()
+
+
+_manager: Optional[IndexManager] = None
+
+
+def get_index_manager() -> IndexManager:
+    global _manager
+    if _manager is None:
+        from app.database import engine
+        _manager = IndexManager(engine)
+    return _manager
@@ -0,0 +1,199 @@
+"""
+Online migration of the chunks table to hash partitions on video_id.
+
+    prepare  create chunks_partitioned (PARTITION BY HASH (video_id)) with
+             its partitions and (video_id, chunk_index) index, and a trigger
+             mirroring every insert / update / delete on chunks into it
+    copy     copy existing rows in id order, CHUNK_MIGRATION_BATCH_ROWS per
+             transaction; the watermark is stored, so an interrupted copy
+             resumes where it stopped
+    swap     in one short transaction: drop the trigger, rename chunks to
+             chunks_unpartitioned and chunks_partitioned to chunks
+
+Reads and writes keep working throughout; only the swap takes a lock.
+Vector indexes are built afterwards, per partition, by
+`python -m app.admin index build`. The old table is kept for rollback until
+`partitions drop-old`. Running servers need no restart: until they notice
+the new layout their per-video queries go through the parent, which Postgres
+prunes to the same single partition.
+"""
+import logging
+import time
+from typing import Callable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.config import CHUNK_MIGRATION_BATCH_ROWS, CHUNK_PARTITIONS
+from app.repositories.chunk_partitions import PARENT_TABLE, partition_name, read_layout, router_for
+
+logger = logging.getLogger(__name__)
+
+NEW_TABLE = f"{PARENT_TABLE}_partitioned"
+OLD_TABLE = f"{PARENT_TABLE}_unpartitioned"
+STATE_TABLE = f"{PARENT_TABLE}_partition_migration"
+MIRROR = f"{PARENT_TABLE}_partition_mirror"
+
+
+def partitioned_schema(modulus: int = CHUNK_PARTITIONS, table: str = NEW_TABLE) -> List[str]:
+    """DDL for a hash-partitioned copy of chunks (same columns, defaults and id sequence)."""
+    if modulus < 2:
+        raise ValueError("A partitioned chunks table needs at least 2 partitions.")
+    statements = [
+        f"CREATE TABLE IF NOT EXISTS {table} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS) "
+        f"PARTITION BY HASH (video_id)",
+        # the partition key must be part of the primary key
+        f"ALTER TABLE {table} ADD PRIMARY KEY (id, video_id)",
+        f"ALTER TABLE {table} ADD FOREIGN KEY (video_id) REFERENCES videos(video_id)",
+    ]
+    statements += [
+        f"CREATE TABLE IF NOT EXISTS {partition_name(r, modulus)} PARTITION OF {table} "
+        f"FOR VALUES WITH (MODULUS {modulus}, REMAINDER {r})"
+        for r in range(modulus)
+    ]
+    statements.append(f"CREATE INDEX IF NOT EXISTS {table}_video_id_idx ON {table} (video_id, chunk_index)")
+    return statements
+
+
+MIRROR_SQL = [
+    f"""
+    CREATE OR REPLACE FUNCTION {MIRROR}() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            DELETE FROM {NEW_TABLE} WHERE id = OLD.id AND video_id = OLD.video_id;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO {NEW_TABLE} SELECT NEW.* ON CONFLICT DO NOTHING;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    f"DROP TRIGGER IF EXISTS {MIRROR} ON {PARENT_TABLE}",
+    f"CREATE TRIGGER {MIRROR} AFTER INSERT OR UPDATE OR DELETE ON {PARENT_TABLE} "
+    f"FOR EACH ROW EXECUTE FUNCTION {MIRROR}()",
+]
+
+
+class ChunkPartitionMigration:
+
+    def __init__(
+        self,
+        engine: Engine,
+        modulus: int = CHUNK_PARTITIONS,
+        batch_rows: int = CHUNK_MIGRATION_BATCH_ROWS
+    ):
+        self.engine = engine
+        self.modulus = modulus
+        self.batch_rows = batch_rows
+
+    # -----------------------------
+    # STATUS
+    # -----------------------------
+    def _exists(self, conn, table: str) -> bool:
+        return conn.execute(text("SELECT to_regclass(:table) IS NOT NULL"), {"table": table}).scalar()
+
+    def status(self) -> dict:
+        with self.engine.connect() as conn:
+            layout = read_layout(conn)
+            status = {
+                "partitioned": layout.partitioned,
+                "partitions": layout.modulus,
+                "migrating": self._exists(conn, NEW_TABLE),
+                "old_table": self._exists(conn, OLD_TABLE),
+            }
+            if status["migrating"] and self._exists(conn, STATE_TABLE):
+                status["copied_up_to_id"] = conn.execute(text(f"SELECT last_id FROM {STATE_TABLE}")).scalar()
+                status["max_id"] = conn.execute(text(f"SELECT max(id) FROM {PARENT_TABLE}")).scalar()
+            if layout.partitioned:
+                status["rows"] = {
+                    name: conn.execute(
+                        text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table"), {"table": name}
+                    ).scalar()
+                    for name in sorted(layout.tables.values())
+                }
+        return status
+
+    # -----------------------------
+    # STEPS
+    # -----------------------------
+    def prepare(self) -> None:
+        with self.engine.begin() as conn:
+            if read_layout(conn).partitioned:
+                raise ValueError(f"{PARENT_TABLE} is already partitioned.")
+            if conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {PARENT_TABLE} WHERE video_id IS NULL)")).scalar():
+                raise ValueError(f"{PARENT_TABLE} has rows without video_id; they cannot be hash partitioned.")
+            if self._exists(conn, NEW_TABLE):
+                return  # resuming
+
+            for statement in partitioned_schema(self.modulus):
+                conn.execute(text(statement))
+            conn.execute(text(f"CREATE TABLE {STATE_TABLE} (last_id BIGINT NOT NULL)"))
+            conn.execute(text(f"INSERT INTO {STATE_TABLE} VALUES (0)"))
+            for statement in MIRROR_SQL:
+                conn.execute(text(statement))
+        logger.info(f"Created {NEW_TABLE} with {self.modulus} partitions; mirroring writes")
+
+    def copy(self, progress: Optional[Callable[[int, int], None]] = None) -> int:
+        """Copy rows not copied yet; returns how many were copied."""
+        with self.engine.connect() as conn:
+            # rows written after prepare() are mirrored by the trigger
+            max_id = conn.execute(text(f"SELECT coalesce(max(id), 0) FROM {PARENT_TABLE}")).scalar()
+
+        copied = 0
+        while True:
+            with self.engine.begin() as conn:
+                last_id = conn.execute(text(f"SELECT last_id FROM {STATE_TABLE} FOR UPDATE")).scalar()
+                if last_id >= max_id:
+                    return copied
+                upto = min(last_id + self.batch_rows, max_id)
+                # FOR SHARE: a concurrent delete waits for this batch, then its trigger removes the copy
+                result = conn.execute(
+                    text(f"""
+                        INSERT INTO {NEW_TABLE}
+                        SELECT * FROM {PARENT_TABLE}
+                        WHERE id > :last_id AND id <= :upto
+                        FOR SHARE
+                        ON CONFLICT DO NOTHING
+                    """),
+                    {"last_id": last_id, "upto": upto},
+                )
+                conn.execute(text(f"UPDATE {STATE_TABLE} SET last_id = :upto"), {"upto": upto})
+            copied += result.rowcount
+            if progress is not None:
+                progress(upto, max_id)
+
+    def swap(self) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(text(f"LOCK TABLE {PARENT_TABLE} IN ACCESS EXCLUSIVE MODE"))
+            last_id = conn.execute(text(f"SELECT last_id FROM {STATE_TABLE}")).scalar()
+            pending = conn.execute(
+                text(f"SELECT EXISTS (SELECT 1 FROM {PARENT_TABLE} WHERE id > :last_id "
+                     f"AND NOT EXISTS (SELECT 1 FROM {NEW_TABLE} n WHERE n.id = {PARENT_TABLE}.id))"),
+                {"last_id": last_id},
+            ).scalar()
+            if pending:
+                raise ValueError("Copy is not complete; run `partitions migrate` again.")
+
+            sequence = conn.execute(text(f"SELECT pg_get_serial_sequence('{PARENT_TABLE}', 'id')")).scalar()
+            conn.execute(text(f"DROP TRIGGER {MIRROR} ON {PARENT_TABLE}"))
+            conn.execute(text(f"DROP FUNCTION {MIRROR}()"))
+            conn.execute(text(f"ALTER TABLE {PARENT_TABLE} RENAME TO {OLD_TABLE}"))
+            conn.execute(text(f"ALTER TABLE {NEW_TABLE} RENAME TO {PARENT_TABLE}"))
+            conn.execute(text(f"ALTER INDEX {NEW_TABLE}_video_id_idx RENAME TO {PARENT_TABLE}_video_id_chunk_idx"))
+            if sequence:
+                conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {PARENT_TABLE}.id"))
+            conn.execute(text(f"DROP TABLE {STATE_TABLE}"))
+        router_for(self.engine).reset()
+        logger.info(f"{PARENT_TABLE} is now hash partitioned; old rows kept in {OLD_TABLE}")
+
+    def migrate(self, progress: Optional[Callable[[int, int], None]] = None) -> dict:
+        started = time.perf_counter()
+        self.prepare()
+        copied = self.copy(progress)
+        self.swap()
+        return {"copied": copied, "partitions": self.modulus, "seconds": round(time.perf_counter() - started, 1)}
+
+    def drop_old(self) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {OLD_TABLE}"))
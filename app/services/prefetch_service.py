@@ -0,0 +1,261 @@
+"""
+Warm-up of a video when a user switches to it.
+
+set_active_video() hands the video to the prefetcher, which loads on a
+small thread pool, off the request path:
+
+- the chunk contents and the normalised embedding matrix (rehydrating the
+  video first if retention archived it), so VectorStoreService.search for
+  that video is a matrix-vector product in memory
+- the decoded transcript
+- the summary key points (into SummaryService's cache)
+
+Warm entries live in the memory of one process. Under the pre-forking
+server (app/server.py) the worker that ran set_active_video is rarely the
+one that serves the next question, so VectorStoreService also schedules a
+load whenever it searches a video that is cold in its own worker: the
+first question there goes to the backend, the follow-ups are answered
+from memory.
+
+A video that is already warm or being loaded is not loaded again, however
+many users open it. Entries expire after PREFETCH_TTL_SECONDS, the least
+recently used beyond PREFETCH_MAX_VIDEOS are dropped, and any write to a
+video's chunks drops its entry. Writes made by other processes are caught
+on read: an entry records the EmbeddingState (model and content version)
+its matrix was exported at and is only searched for queries embedded at
+that same state.
+"""
+import logging
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.config import FERNET_KEY, PREFETCH_MAX_VIDEOS, PREFETCH_TTL_SECONDS, PREFETCH_WORKERS
+from app.repositories.memory_chunk_repository import normalize_rows, top_k_above
+from app.repositories.vector_backend import get_vector_backend
+from app.repositories.video_repository import EmbeddingState, VideoRepository
+from app.services.embedding_models import embedding_models
+from app.utils.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# backends that already search from process memory; warming their matrix would only copy it
+IN_PROCESS_BACKENDS = ("memory", "segments")
+
+_fernet = None
+
+
+def _cipher():
+    """Fernet for FERNET_KEY, or None when the key cannot decrypt anything."""
+    global _fernet
+    from cryptography.fernet import Fernet  # deferred: keeps the crypto backend out of app startup
+
+    if _fernet is None:
+        try:
+            _fernet = Fernet(FERNET_KEY.encode())
+        except ValueError as e:
+            logger.warning(f"FERNET_KEY unusable, transcripts read as plain text: {e}")
+            _fernet = False
+    return _fernet or None
+
+
+def decode_transcript(stored: str) -> str:
+    """Fernet-encrypted (optionally zlib-compressed) transcripts are decoded; plain text is returned as is."""
+    from cryptography.fernet import InvalidToken
+
+    cipher = _cipher()
+    if cipher is None:
+        return stored
+    try:
+        decrypted = cipher.decrypt(stored.encode())
+    except InvalidToken:
+        return stored
+    try:
+        return zlib.decompress(decrypted).decode()
+    except zlib.error:
+        return decrypted.decode()
+
+
+class WarmVideo:
+    __slots__ = ("contents", "matrix", "transcript", "summary", "loaded_at", "state")
+
+    def __init__(self, contents: List[str], matrix: Optional[np.ndarray], transcript: Optional[str],
+                 summary: Optional[List[dict]], loaded_at: float, state: Optional[EmbeddingState] = None):
+        self.contents = contents
+        self.matrix = matrix  # (n, dim) float32, rows L2-normalised; None when the backend is in-process
+        self.transcript = transcript
+        self.summary = summary
+        self.loaded_at = loaded_at
+        self.state = state  # the model and content version `matrix` was exported at
+
+    def search(self, query_embedding, top_k: int, threshold: float) -> List[dict]:
+        query = normalize_rows(query_embedding).reshape(-1)
+        scores = self.matrix @ query
+        return [
+            {"id": None, "chunk_index": int(i), "score": float(scores[i]), "content": self.contents[i]}
+            for i in top_k_above(scores, top_k, threshold)
+        ]
+
+
+class VideoPrefetcher:
+
+    def __init__(
+        self,
+        session_factory=None,
+        backend_factory: Callable = get_vector_backend,
+        max_videos: int = PREFETCH_MAX_VIDEOS,
+        ttl: float = PREFETCH_TTL_SECONDS,
+        workers: int = PREFETCH_WORKERS,
+        clock=time.monotonic
+    ):
+        self.session_factory = session_factory
+        self.backend_factory = backend_factory
+        self.ttl = ttl
+        self.workers = workers
+        self.clock = clock
+        self._warm = LRUCache(maxsize=max_videos)
+        self._inflight: Dict[str, Future] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.hits = 0
+        self.misses = 0
+        self.loaded = 0
+        self.deduplicated = 0
+        self.failed = 0
+
+    def _session(self):
+        if self.session_factory is None:
+            from app.database import SessionLocal
+            self.session_factory = SessionLocal
+        return self.session_factory()
+
+    def get(self, video_id: str, state: Optional[EmbeddingState] = None) -> Optional[WarmVideo]:
+        """
+        The warm entry, if any. Given the current EmbeddingState, an entry
+        exported at another one is not returned, and dropped if it is older.
+        """
+        entry = self._warm.get(video_id)
+        if entry is None:
+            return None
+        if self.clock() - entry.loaded_at > self.ttl:
+            self._warm.pop(video_id)
+            return None
+        if state is not None and entry.state != state:
+            if (entry.state.content_version or 0) < (state.content_version or 0):
+                self._warm.pop(video_id)  # rewritten since, here or in another process
+            return None
+        return entry
+
+    def prefetch(self, video_id: str) -> Optional[Future]:
+        """
+        Schedule a load of the video. Returns the pending load (shared with
+        any other caller asking meanwhile), or None when it is already warm
+        or prefetching is off.
+        """
+        if self.workers <= 0:
+            return None
+        with self._lock:
+            pending = self._inflight.get(video_id)
+            if pending is not None or self.get(video_id) is not None:
+                self.deduplicated += 1
+                return pending
+            if self._executor is None:
+                # created on first use, so pre-forked workers each start their own threads
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="prefetch")
+            future = self._executor.submit(self._load, video_id, self._generations.get(video_id, 0))
+            self._inflight[video_id] = future
+        future.add_done_callback(lambda done: self._done(video_id, done))
+        return future
+
+    def _done(self, video_id: str, future: Future) -> None:
+        with self._lock:
+            if self._inflight.get(video_id) is future:
+                del self._inflight[video_id]
+
+    def _load(self, video_id: str, generation: int) -> Optional[WarmVideo]:
+        from app.services.retention_service import RetentionService
+        from app.services.summary_service import SummaryService
+
+        db = self._session()
+        try:
+            backend = self.backend_factory(db)
+            # read first and again after the export: the matrix is only kept if nothing changed in between
+            state = embedding_models.refresh(db, video_id)  # also spares the question's embedding a lookup
+            exported = backend.export_video(video_id)
+            if exported is None and RetentionService(db, backend).rehydrate(video_id):
+                exported = backend.export_video(video_id)
+            record = VideoRepository(db).get_by_video_id(video_id)
+            if record is None and exported is None:
+                return None
+            transcript = decode_transcript(record.encrypted_transcript) if record is not None else None
+            summary = SummaryService(db).get_summary(video_id)  # also fills the summary cache
+            matrix = None
+            contents: List[str] = []
+            if exported is not None and backend.name not in IN_PROCESS_BACKENDS:
+                if embedding_models.refresh(db, video_id) != state:
+                    logger.info(f"{video_id} changed while prefetching; not kept")
+                    return None
+                contents, matrix = exported[0], normalize_rows(exported[1])
+        except Exception as e:
+            self.failed += 1
+            logger.warning(f"Prefetching {video_id} failed: {e}")
+            return None
+        finally:
+            db.close()
+
+        entry = WarmVideo(contents, matrix, transcript, summary, self.clock(), state)
+        with self._lock:
+            # a write while loading makes what was read stale
+            if self._generations.get(video_id, 0) != generation:
+                return None
+            self._warm.set(video_id, entry)
+        self.loaded += 1
+        return entry
+
+    def search(self, video_id: str, query_embedding, top_k: int, threshold: float,
+               state: Optional[EmbeddingState] = None) -> Optional[List[dict]]:
+        """
+        Rows from the warm matrix, or None when the video is not warm (at
+        `state`, the EmbeddingState the query was embedded for).
+        """
+        entry = self.get(video_id, state)
+        if entry is None or entry.matrix is None or not len(entry.contents):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry.search(query_embedding, top_k, threshold)
+
+    def transcript(self, db, video_id: str) -> Optional[str]:
+        """The decoded transcript, from memory when the video is warm."""
+        entry = self.get(video_id)
+        if entry is not None and entry.transcript is not None:
+            return entry.transcript
+        record = VideoRepository(db).get_by_video_id(video_id)
+        return decode_transcript(record.encrypted_transcript) if record is not None else None
+
+    def invalidate(self, video_id: str) -> None:
+        with self._lock:
+            if video_id in self._inflight:
+                self._generations[video_id] = self._generations.get(video_id, 0) + 1
+            else:
+                self._generations.pop(video_id, None)  # nothing loading that could be stale
+            self._warm.pop(video_id)
+
+    def stats(self) -> dict:
+        return {
+            "videos": len(self._warm),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "loaded": self.loaded,
+            "deduplicated": self.deduplicated,
+            "failed": self.failed,
+        }
+
+
+video_prefetcher = VideoPrefetcher()
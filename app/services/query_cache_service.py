@@ -0,0 +1,165 @@
+import hashlib
+import re
+from collections import OrderedDict
+from threading import Lock
+from typing import Hashable, List, Optional
+
+import numpy as np
+
+from app.config import (
+    QUERY_CACHE_MAX_VIDEOS,
+    QUERY_CACHE_ENTRIES_PER_VIDEO,
+    QUERY_CACHE_SIMILARITY,
+)
+from app.utils.lru_cache import LRUCache
+
+
+def normalize_question(question: str) -> str:
+    text = re.sub(r"\s+", " ", question.strip().lower())
+    return text.rstrip("?!. ")
+
+
+def question_key(question: str) -> str:
+    return hashlib.sha1(normalize_question(question).encode()).hexdigest()
+
+
+class _Entry:
+    __slots__ = ("vector", "top_k", "results")
+
+    def __init__(self, vector: Optional[np.ndarray], top_k: int, results: list):
+        self.vector = vector
+        self.top_k = top_k
+        self.results = results
+
+
+class _VideoQueryCache:
+    """Recent questions for one video: exact hash map + small NN table."""
+
+    def __init__(self, max_entries: int, state: Optional[Hashable] = None):
+        self.max_entries = max_entries
+        self.state = state  # what the video's results were computed at
+        self.entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.lock = Lock()
+
+    def exact(self, key: str, top_k: int) -> Optional[list]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry.top_k < top_k:
+                return None
+            self.entries.move_to_end(key)
+            return entry.results[:top_k]
+
+    def nearest(self, vector: np.ndarray, top_k: int, threshold: float) -> Optional[list]:
+        with self.lock:
+            keys = [k for k, e in self.entries.items() if e.vector is not None and e.top_k >= top_k]
+            if not keys:
+                return None
+            matrix = np.vstack([self.entries[k].vector for k in keys])
+            scores = matrix @ vector
+            best = int(np.argmax(scores))
+            if scores[best] < threshold:
+                return None
+            self.entries.move_to_end(keys[best])
+            return self.entries[keys[best]].results[:top_k]
+
+    def store(self, key: str, entry: _Entry) -> None:
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+class QueryCache:
+    """
+    Per-video cache of retrieval results. Lookups try the normalised
+    question text first, then cosine similarity against recent question
+    embeddings. Whole videos are evicted LRU; entries within a video too.
+
+    Callers pass the video's current EmbeddingState (model and content
+    version): a video's entries are only used at the state they were
+    stored at, so results and question vectors from before a re-ingest or
+    a model switch in another process are dropped rather than served.
+    """
+
+    def __init__(
+        self,
+        max_videos: int = QUERY_CACHE_MAX_VIDEOS,
+        max_entries: int = QUERY_CACHE_ENTRIES_PER_VIDEO,
+        similarity: float = QUERY_CACHE_SIMILARITY,
+    ):
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self._videos = LRUCache(maxsize=max_videos)
+        self._lock = Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def _video(self, video_id: str, state: Optional[Hashable], create: bool = False) -> Optional[_VideoQueryCache]:
+        cache = self._videos.get(video_id)
+        if cache is not None and cache.state != state:
+            self._videos.pop(video_id)
+            cache = None
+        if cache is None and create:
+            cache = _VideoQueryCache(self.max_entries, state)
+            self._videos.set(video_id, cache)
+        return cache
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup_exact(self, video_id: str, question: str, top_k: int,
+                     state: Optional[Hashable] = None) -> Optional[list]:
+        cache = self._video(video_id, state)
+        results = cache.exact(question_key(question), top_k) if cache else None
+        if results is not None:
+            with self._lock:
+                self.exact_hits += 1
+        return results
+
+    def lookup_similar(self, video_id: str, query_vector, top_k: int,
+                       state: Optional[Hashable] = None) -> Optional[list]:
+        cache = self._video(video_id, state)
+        results = None
+        if cache is not None:
+            results = cache.nearest(self._unit(query_vector), top_k, self.similarity)
+        with self._lock:
+            if results is None:
+                self.misses += 1
+            else:
+                self.semantic_hits += 1
+        return results
+
+    def store(self, video_id: str, question: str, query_vector, top_k: int, results: List,
+              state: Optional[Hashable] = None) -> None:
+        vector = self._unit(query_vector) if query_vector is not None else None
+        self._video(video_id, state, create=True).store(
+            question_key(question), _Entry(vector, top_k, list(results))
+        )
+
+    def invalidate(self, video_id: str) -> None:
+        self._videos.pop(video_id)
+
+    def clear(self) -> None:
+        self._videos.clear()
+        with self._lock:
+            self.exact_hits = self.semantic_hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            hits = self.exact_hits + self.semantic_hits
+            return {
+                "videos": len(self._videos),
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+
+query_cache = QueryCache()
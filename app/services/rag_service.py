@@ -1,56 +1,135 @@
 import logging
-from typing import List
-from sqlalchemy import select
+from typing import Callable, Iterator, List, Optional, Tuple, TypeVar
 from sqlalchemy.orm import Session
+from app.repositories.video_repository import EmbeddingState, EmbeddingStateChanged
+from app.services.embedding_models import embedding_models
 from app.services.embedding_service import EmbeddingService
 from app.services.vector_store_service import  VectorStoreService
-from app.models.chunk import Chunk
+from app.services.query_cache_service import query_cache
+from app.services.retention_service import access_tracker
 
 
 logger = logging.getLogger(__name__)
 
 SIMILARITY_THRESHOLD = 0.75
 
+T = TypeVar("T")
+
+
+def _search_current(
+    video_id: str,
+    question: str,
+    db: Session,
+    state: EmbeddingState,
+    query_vector,
+    search: Callable[[object, EmbeddingState], T]
+) -> Tuple[EmbeddingState, object, T]:
+    """
+    `search(query_vector, state)`, where the search verifies the video is
+    still at `state`. When another process switched its model (or rewrote
+    it) and this process's cached state has not caught up, the state is
+    read again and the question embedded with the video's current model.
+    Returns the state, query vector and result that went together.
+    """
+    try:
+        return state, query_vector, search(query_vector, state)
+    except EmbeddingStateChanged as e:
+        logger.info(f"Embedding state of {video_id} changed to {e.found}; embedding the question again")
+    state = embedding_models.refresh(db, video_id)
+    query_vector = EmbeddingService(state.model).embed(question)
+    return state, query_vector, search(query_vector, state)
+
 
 def retrieve_relevant_chunks(
     video_id: str,
     question: str,
     db: Session,
-    top_k: int = 5
+    top_k: int = 5,
+    recall: Optional[float] = None
 ) -> List[str]:
 
     if not question.strip():
         raise ValueError("Question cannot be empty")
 
-    # Ensure index exists
-    vector_store_service = VectorStoreService(db)
-    vector_store_service.build_index(video_id)
+    # the model the video's chunks were embedded with (which a model migration may not have
+    # switched yet) and the content version: cached results are only good for the same pair
+    state = embedding_models.state(db, video_id)
 
-    embedding_service = EmbeddingService()
-    query_vector = embedding_service.batch_embed(question)
+    cached = query_cache.lookup_exact(video_id, question, top_k, state)
+    if cached is not None:
+        access_tracker.touch(video_id)  # a cache hit is still a use of the video
+        return cached
 
-    search_results = vector_store_service.search(video_id, query_vector, top_k)
+    vector_store_service = VectorStoreService(db)
 
-    if not search_results:
-        logger.info("No similar chunks found")
-        return []
+    embedding_service = EmbeddingService(state.model)
+    query_vector = embedding_service.embed(question)
 
-    filtered_ids = [
-        chunk_id
-        for chunk_id, score in search_results
-        if score >= SIMILARITY_THRESHOLD
-    ]
+    cached = query_cache.lookup_similar(video_id, query_vector, top_k, state)
+    if cached is not None:
+        access_tracker.touch(video_id)  # a cache hit is still a use of the video
+        return cached
 
-    if not filtered_ids:
+    state, query_vector, results = _search_current(
+        video_id, question, db, state, query_vector,
+        lambda vector, at: vector_store_service.search(
+            video_id, vector, top_k, threshold=SIMILARITY_THRESHOLD, recall=recall, state=at
+        )
+    )
+
+    if not results:
         logger.info("No chunks above similarity threshold")
-        return []
 
-    stmt = select(Chunk.chunk_text).where(
-        Chunk.id.in_(filtered_ids)
-    )
+    chunks = [row["content"] for row in results]
 
-    rows = db.execute(stmt).scalars().all()
+    logger.info(f"Retrieved {len(chunks)} relevant chunks")
 
-    logger.info(f"Retrieved {len(rows)} relevant chunks")
+    query_cache.store(video_id, question, query_vector, top_k, chunks, state)
+
+    return chunks
+
+
+def stream_relevant_chunks(
+    video_id: str,
+    question: str,
+    db: Session,
+    top_k: int = 5,
+    recall: Optional[float] = None
+) -> Iterator[dict]:
+    """
+    retrieve_relevant_chunks() for streaming: validation, the query
+    embedding and the search itself run eagerly (so their errors surface
+    before streaming starts); the returned iterator yields one event per
+    chunk, with its rank, chunk_index and score, as each row is read.
+
+    The query cache holds contents only, so it is not consulted here; a
+    fully consumed stream is stored in it for the non-streaming endpoint.
+    """
+    if not question.strip():
+        raise ValueError("Question cannot be empty")
+
+    state = embedding_models.state(db, video_id)
+    query_vector = EmbeddingService(state.model).embed(question)
+    store = VectorStoreService(db)
+    state, query_vector, rows = _search_current(
+        video_id, question, db, state, query_vector,
+        lambda vector, at: store.iter_search(
+            video_id, vector, top_k, threshold=SIMILARITY_THRESHOLD, recall=recall, state=at
+        )
+    )
 
-    return rows
\ No newline at end of file
+    def events():
+        chunks = []
+        for rank, row in enumerate(rows):
+            chunks.append(row["content"])
+            yield {
+                "rank": rank,
+                "chunk_index": row["chunk_index"],
+                "score": float(row["score"]),
+                "content": row["content"],
+            }
+
+        logger.info(f"Streamed {len(chunks)} relevant chunks")
+        query_cache.store(video_id, question, query_vector, top_k, chunks, state)
+
+    return events()
@@ -0,0 +1,325 @@
+"""
+Retention and tiered storage of chunk vectors.
+
+- AccessTracker notes every per-video retrieval in memory and writes
+  videos.last_accessed_at in one batched UPDATE every
+  RETENTION_ACCESS_FLUSH_SECONDS, off the request path.
+- The sweeper archives the chunks of videos idle for RETENTION_HOT_DAYS, and
+  the least recently used beyond RETENTION_MAX_HOT_VIDEOS. It writes them
+  to chunk_archive (zlib, vectors in RETENTION_ARCHIVE_PRECISION) and then
+  deletes them from the vector store, which also drops them from the ANN
+  index and the corpus search. Archived videos idle for
+  RETENTION_ARCHIVE_DAYS are deleted outright.
+- A per-video search that finds nothing checks for an archive. If one
+  exists, the video is rehydrated into the vector store and searched again,
+  so callers never see the tier.
+
+The archive row is what marks a video cold. Each step commits on its own
+and can be repeated, so a sweep that dies halfway leaves nothing to repair.
+Only one process sweeps at a time (an advisory lock on Postgres), each
+video is claimed before it is archived, and an archive row is only ever
+inserted, never overwritten.
+"""
+import logging
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import orjson
+from sqlalchemy import text
+
+from app.config import (
+    RETENTION_ACCESS_FLUSH_SECONDS,
+    RETENTION_ARCHIVE_DAYS,
+    RETENTION_ARCHIVE_PRECISION,
+    RETENTION_HOT_DAYS,
+    RETENTION_MAX_HOT_VIDEOS,
+    RETENTION_SWEEP_BATCH,
+    RETENTION_SWEEP_INTERVAL,
+)
+from app.models.chunk_archive import ChunkArchive
+from app.repositories.archive_repository import ChunkArchiveRepository
+from app.repositories.vector_backend import VectorBackend, get_vector_backend
+from app.repositories.video_repository import VideoRepository
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_PRECISIONS = ("float32", "float16")
+
+
+# -----------------------------
+# ARCHIVE FORMAT
+# -----------------------------
+def pack(video_id: str, contents: List[str], matrix: np.ndarray,
+         precision: str = RETENTION_ARCHIVE_PRECISION) -> ChunkArchive:
+    if precision not in ARCHIVE_PRECISIONS:
+        raise ValueError(f"Unknown archive precision: {precision}")
+    matrix = np.ascontiguousarray(matrix, dtype=precision)
+    return ChunkArchive(
+        video_id=video_id,
+        chunk_count=len(contents),
+        dim=matrix.shape[1] if matrix.ndim == 2 else 0,
+        precision=precision,
+        contents=zlib.compress(orjson.dumps(contents)),
+        embeddings=zlib.compress(matrix.tobytes()),
+    )
+
+
+def unpack(record: ChunkArchive) -> Tuple[List[str], np.ndarray]:
+    contents = orjson.loads(zlib.decompress(record.contents))
+    matrix = np.frombuffer(zlib.decompress(record.embeddings), dtype=record.precision)
+    return contents, matrix.reshape(record.chunk_count, record.dim).astype(np.float32)
+
+
+# -----------------------------
+# ACCESS TRACKING
+# -----------------------------
+class AccessTracker:
+    """Last access per video, kept in memory until flushed."""
+
+    def __init__(self, clock=lambda: datetime.now(timezone.utc)):
+        self.clock = clock
+        self._pending: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self.flushed = 0
+
+    def touch(self, video_id: str) -> None:
+        self._pending[video_id] = self.clock()  # a dict store: atomic under the GIL
+
+    def flush(self, db) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            VideoRepository(db).touch_many(pending)
+        except Exception:
+            with self._lock:
+                for video_id, accessed_at in pending.items():
+                    self._pending.setdefault(video_id, accessed_at)
+            raise
+        self.flushed += len(pending)
+        return len(pending)
+
+    def stats(self) -> dict:
+        return {"pending": len(self._pending), "flushed": self.flushed}
+
+
+access_tracker = AccessTracker()
+
+
+# -----------------------------
+# ARCHIVE / REHYDRATE / SWEEP
+# -----------------------------
+class RetentionService:
+
+    def __init__(
+        self,
+        db,
+        backend: Optional[VectorBackend] = None,
+        hot_days: float = RETENTION_HOT_DAYS,
+        max_hot_videos: int = RETENTION_MAX_HOT_VIDEOS,
+        archive_days: float = RETENTION_ARCHIVE_DAYS,
+        batch: int = RETENTION_SWEEP_BATCH
+    ):
+        self.db = db
+        self.backend = backend or get_vector_backend(db)
+        self.hot_days = hot_days
+        self.max_hot_videos = max_hot_videos
+        self.archive_days = archive_days
+        self.batch = batch
+        self.archives = ChunkArchiveRepository(db)
+        self.videos = VideoRepository(db)
+
+    def _claim(self, video_id: str) -> bool:
+        """Take the video for this transaction; False if another sweeper holds it (Postgres only)."""
+        if self.db.get_bind().dialect.name != "postgresql":
+            return True
+        return bool(self.db.execute(
+            text("SELECT pg_try_advisory_xact_lock(hashtext(:video_id))"), {"video_id": video_id}
+        ).scalar())
+
+    def archive(self, video_id: str) -> bool:
+        """
+        Move a video's chunks to the archive; False if another sweeper has
+        the video or it is archived already. A video with nothing in the
+        store gets an empty archive, which keeps it off the hot list.
+        """
+        if not self._claim(video_id) or self.archives.exists(video_id):
+            self.db.rollback()
+            return False
+        exported = self.backend.export_video(video_id)
+        contents, matrix = exported if exported is not None else ([], np.zeros((0, 0), dtype=np.float32))
+        # never a merge: an archive written by anyone else must not be overwritten
+        self.archives.insert(pack(video_id, contents, matrix))
+        if contents:
+            # pgvector commits the archive row and the chunk delete together
+            self.backend.delete_video(video_id)
+        self.db.commit()
+        logger.info(f"Archived {len(contents)} chunks of {video_id}")
+        return True
+
+    def rehydrate(self, video_id: str) -> bool:
+        """Restore an archived video's chunks; False if it has no archive."""
+        if not self.archives.exists(video_id):
+            return False
+
+        # the row lock makes concurrent requests for the same video wait for one restore
+        record = self.archives.get(video_id, lock=True)
+        if record is None:
+            self.db.commit()
+            return True  # restored by another request meanwhile
+
+        contents, matrix = unpack(record)
+        self.archives.delete(video_id, commit=False)
+        if contents:
+            # pgvector commits the restored rows and the archive delete together
+            self.backend.insert_batch(video_id, contents, matrix)
+        self.db.commit()
+        access_tracker.touch(video_id)
+        logger.info(f"Rehydrated {len(contents)} chunks of {video_id}")
+        return True
+
+    def discard_archive(self, video_id: str) -> None:
+        """Forget an archive that new content has replaced."""
+        if self.archives.exists(video_id):
+            self.archives.delete(video_id)
+
+    def sweep(self, now: Optional[datetime] = None) -> dict:
+        now = now or datetime.now(timezone.utc)
+        archived = deleted = 0
+
+        candidates = []
+        if self.hot_days > 0:
+            candidates = self.videos.idle_video_ids(now - timedelta(days=self.hot_days), self.batch)
+        if self.max_hot_videos > 0:
+            excess = self.videos.count_hot() - len(candidates) - self.max_hot_videos
+            if excess > 0:
+                # least recently used first, so the idle ones above come back first
+                lru = self.videos.idle_video_ids(None, len(candidates) + excess)
+                candidates += [video_id for video_id in lru if video_id not in candidates][:excess]
+
+        for video_id in candidates[:self.batch]:
+            try:
+                if self.archive(video_id):
+                    archived += 1
+            except Exception as e:
+                self.db.rollback()
+                logger.warning(f"Archiving {video_id} failed: {e}")
+
+        if self.archive_days > 0:
+            for video_id in self.videos.idle_video_ids(
+                now - timedelta(days=self.archive_days), self.batch, archived=True
+            ):
+                self.archives.delete(video_id, commit=False)
+                self.videos.delete_video(video_id)
+                deleted += 1
+
+        return {"archived": archived, "deleted": deleted}
+
+    def stats(self) -> dict:
+        return {"hot_videos": self.videos.count_hot(), "archive": self.archives.stats()}
+
+
+# -----------------------------
+# BACKGROUND WORKER
+# -----------------------------
+@contextmanager
+def sweep_leader(db):
+    """
+    Yields whether this process may sweep. Every pre-fork worker runs a
+    RetentionWorker; on Postgres a session advisory lock lets one of them
+    sweep at a time and the others skip the round.
+    """
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        yield True
+        return
+    with bind.connect() as conn:
+        leader = bool(conn.execute(text("SELECT pg_try_advisory_lock(hashtext('retention_sweep'))")).scalar())
+        try:
+            yield leader
+        finally:
+            if leader:
+                conn.execute(text("SELECT pg_advisory_unlock(hashtext('retention_sweep'))"))
+            conn.commit()
+
+
+class RetentionWorker:
+    """Flushes access times every `flush_interval` and sweeps every `sweep_interval` seconds."""
+
+    def __init__(
+        self,
+        session_factory=None,
+        sweep_interval: float = RETENTION_SWEEP_INTERVAL,
+        flush_interval: float = RETENTION_ACCESS_FLUSH_SECONDS
+    ):
+        self.session_factory = session_factory
+        self.sweep_interval = sweep_interval
+        self.flush_interval = flush_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.sweeps = 0
+        self.last_sweep: Optional[dict] = None
+
+    def _session(self):
+        if self.session_factory is None:
+            from app.database import SessionLocal
+            self.session_factory = SessionLocal
+        return self.session_factory()
+
+    def flush(self) -> int:
+        db = self._session()
+        try:
+            return access_tracker.flush(db)
+        finally:
+            db.close()
+
+    def sweep(self) -> dict:
+        db = self._session()
+        try:
+            access_tracker.flush(db)  # sweep on up-to-date access times
+            with sweep_leader(db) as leader:
+                if not leader:
+                    return {"skipped": "another process is sweeping"}
+                self.last_sweep = {**RetentionService(db).sweep(), "at": datetime.now(timezone.utc).isoformat()}
+            self.sweeps += 1
+            return self.last_sweep
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        waited = 0.0
+        while not self._stop.wait(self.flush_interval):
+            waited += self.flush_interval
+            try:
+                if self.sweep_interval > 0 and waited >= self.sweep_interval:
+                    waited = 0.0
+                    self.sweep()
+                else:
+                    self.flush()
+            except Exception as e:
+                logger.warning(f"Retention worker failed: {e}")
+
+    def start(self) -> bool:
+        if self.flush_interval <= 0 or self._thread is not None:
+            return False
+        self._thread = threading.Thread(target=self._run, name="retention-worker", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> dict:
+        return {"access": access_tracker.stats(), "sweeps": self.sweeps, "last_sweep": self.last_sweep}
+
+
+retention_worker = RetentionWorker()
+
+
+def retention_stats() -> dict:
+    return retention_worker.stats()
@@ -0,0 +1,88 @@
+import logging
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import CORPUS_SEARCH_MAX_RESULTS
+from app.repositories.video_repository import VideoRepository
+from app.services.embedding_models import embedding_models
+from app.services.embedding_service import EmbeddingService
+from app.services.vector_store_service import VectorStoreService
+
+logger = logging.getLogger(__name__)
+
+
+def group_by_video(rows: List[dict]) -> List[dict]:
+    """Group ranked rows per video, keeping rank order of each video's best hit."""
+    groups = {}
+    for row in rows:
+        group = groups.setdefault(row["video_id"], {
+            "video_id": row["video_id"],
+            "best_score": row["score"],
+            "chunks": [],
+        })
+        group["chunks"].append(row)
+    return list(groups.values())
+
+
+def search_across_models(
+    question: str,
+    db: Session,
+    top_k: int,
+    video_ids: Optional[List[str]] = None,
+    language: Optional[str] = None
+) -> List[dict]:
+    """
+    search_all() with the question embedded by the model of the videos
+    searched. While a model migration runs the corpus holds two models:
+    each searches its own videos and the rankings are merged by score.
+    """
+    store = VectorStoreService(db)
+    models = embedding_models.in_use(db)
+    if len(models) == 1:
+        return store.search_all(EmbeddingService(models[0]).embed(question), top_k,
+                                video_ids=video_ids, language=language)
+
+    repo = VideoRepository(db)
+    rows = []
+    for model in models:
+        model_ids = set(repo.get_ids_by_embedding_model(model, include_unrecorded=model == embedding_models.default))
+        if video_ids is not None:
+            model_ids &= set(video_ids)
+        if model_ids:
+            rows += store.search_all(EmbeddingService(model).embed(question), top_k,
+                                     video_ids=model_ids, language=language)
+    rows.sort(key=lambda row: row["score"], reverse=True)
+    return rows[:top_k]
+
+
+def search_corpus(
+    question: str,
+    db: Session,
+    page: int = 1,
+    page_size: int = 10,
+    language: Optional[str] = None,
+    video_ids: Optional[List[str]] = None,
+    group: bool = False
+) -> dict:
+
+    if not question.strip():
+        raise ValueError("Question cannot be empty")
+
+    offset = (page - 1) * page_size
+    if offset + page_size > CORPUS_SEARCH_MAX_RESULTS:
+        raise ValueError(f"Only the first {CORPUS_SEARCH_MAX_RESULTS} results can be paged through")
+
+    # one extra row tells us whether another page exists
+    rows = search_across_models(question, db, offset + page_size + 1, video_ids=video_ids, language=language)
+
+    page_rows = rows[offset:offset + page_size]
+    logger.info(f"Corpus search returned {len(page_rows)} chunks (page {page})")
+
+    return {
+        "page": page,
+        "page_size": page_size,
+        "has_more": len(rows) > offset + page_size,
+        "results": page_rows,
+        "groups": group_by_video(page_rows) if group else None,
+    }
@@ -0,0 +1,122 @@
+import json
+import logging
+import re
+from typing import List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.config import SUMMARY_CACHE_SIZE, SUMMARY_KEY_POINTS, SUMMARY_MAX_WORDS
+from app.repositories.video_repository import VideoRepository
+from app.utils.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# video_id -> list of key points; shared by every request in the process
+_summary_cache = LRUCache(maxsize=SUMMARY_CACHE_SIZE)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def textrank_scores(embeddings: np.ndarray, damping: float = 0.85, iterations: int = 50) -> np.ndarray:
+    """
+    Centroid-weighted TextRank over L2-normalised embeddings.
+    Returns one score per row; everything is matrix math, no Python loops over rows.
+    """
+    n = embeddings.shape[0]
+    if n == 1:
+        return np.ones(1, dtype=np.float32)
+
+    sim = embeddings @ embeddings.T
+    np.clip(sim, 0.0, None, out=sim)
+    np.fill_diagonal(sim, 0.0)
+
+    row_sums = sim.sum(axis=1, keepdims=True)
+    row_sums[row_sums == 0] = 1.0
+    transition = sim / row_sums
+
+    # Personalise the random jump towards chunks close to the centroid
+    centroid = embeddings.mean(axis=0)
+    centroid_scores = np.clip(embeddings @ centroid, 0.0, None)
+    total = centroid_scores.sum()
+    jump = centroid_scores / total if total > 0 else np.full(n, 1.0 / n, dtype=np.float32)
+
+    ranks = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(iterations):
+        updated = (1 - damping) * jump + damping * (transition.T @ ranks)
+        if np.abs(updated - ranks).sum() < 1e-6:
+            ranks = updated
+            break
+        ranks = updated
+
+    return ranks
+
+
+def _key_point_text(chunk: str, max_words: int) -> str:
+    sentence = _SENTENCE_END.split(chunk.strip(), maxsplit=1)[0]
+    words = sentence.split()
+    if len(words) > max_words:
+        return " ".join(words[:max_words]) + "…"
+    return " ".join(words)
+
+
+class SummaryService:
+
+    def __init__(self, db: Session):
+        self.repo = VideoRepository(db)
+
+    @staticmethod
+    def extract_key_points(
+        chunks: Sequence[str],
+        embeddings,
+        max_points: int = SUMMARY_KEY_POINTS,
+        max_words: int = SUMMARY_MAX_WORDS,
+        redundancy_threshold: float = 0.9,
+    ) -> List[dict]:
+        """
+        Pick the most central, mutually non-redundant chunks and return them
+        in transcript order as [{"chunk_index": int, "text": str}, ...].
+        """
+        if not chunks:
+            return []
+
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix = matrix / norms
+
+        scores = textrank_scores(matrix)
+
+        selected: List[int] = []
+        for idx in np.argsort(-scores):
+            if len(selected) >= max_points:
+                break
+            if selected and float(np.max(matrix[selected] @ matrix[idx])) >= redundancy_threshold:
+                continue
+            selected.append(int(idx))
+
+        return [
+            {"chunk_index": idx, "text": _key_point_text(chunks[idx], max_words)}
+            for idx in sorted(selected)
+        ]
+
+    @staticmethod
+    def serialize(key_points: List[dict]) -> str:
+        return json.dumps(key_points, ensure_ascii=False)
+
+    @staticmethod
+    def invalidate(video_id: str) -> None:
+        _summary_cache.pop(video_id)
+
+    def get_summary(self, video_id: str) -> Optional[List[dict]]:
+        cached = _summary_cache.get(video_id)
+        if cached is not None:
+            return cached
+
+        raw = self.repo.get_summary(video_id)
+        if raw is None:
+            return None
+
+        key_points = json.loads(raw)
+        _summary_cache.set(video_id, key_points)
+        return key_points
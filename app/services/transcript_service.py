@@ -1,14 +1,14 @@
-from youtube_transcript_api import (
-    YouTubeTranscriptApi,
-    TranscriptsDisabled,
-    NoTranscriptFound,
-)
-
-
 class TranscriptService:
 
     @staticmethod
     def fetch(video_id: str) -> tuple[str, str]:
+        # deferred: the HTTP client stack is only needed once a transcript is fetched
+        from youtube_transcript_api import (
+            YouTubeTranscriptApi,
+            TranscriptsDisabled,
+            NoTranscriptFound,
+        )
+
         try:
             transcript_data = YouTubeTranscriptApi.get_transcript(video_id)
             transcript_text = " ".join(
@@ -1,25 +1,153 @@
 from fastapi.params import Depends
 
-from app.utils.vector_store_utils import bulk_insert_chunks, build_index
-from app.utils.similaritysearch import similarity_search
+from app.config import EMBEDDING_MODEL, PREFETCH_ON_SEARCH
 from app.database import get_db
+from app.repositories.reembedding_repository import ChunkReembeddingRepository
+from app.repositories.vector_backend import VectorBackend, get_vector_backend
+from app.repositories.video_repository import VideoRepository, check_embedding_state
+from app.services.embedding_models import embedding_models
+from app.services.prefetch_service import video_prefetcher
+from app.services.query_cache_service import query_cache
+from app.services.retention_service import RetentionService, access_tracker
+
+
 class VectorStoreService:
-    def __init__(self, db: Depends(get_db)):
+    """
+    Chunk vector storage and search for the services. The engine behind it
+    is a VectorBackend chosen by VECTOR_STORE_BACKEND; this layer keeps the
+    query cache and the per-video content version (HTTP validators) in step
+    with writes, resolves filters a backend cannot apply itself, brings
+    back videos the retention sweeper archived when they are searched again,
+    and answers from memory for videos the prefetcher has warmed (warming
+    the ones it searches cold).
+    """
+
+    def __init__(self, db: Depends(get_db), backend: VectorBackend = None):
         self.db = db
-        self.index = None  # Initialize the index attribute
+        self.backend = backend or get_vector_backend(db)
+
+    def bulk_insert_chunks(self, video_id, chunks, embeddings, model=EMBEDDING_MODEL):
+        """Replace a video's chunks; `model` is the embedding model that produced `embeddings`."""
+        # uncommitted: pgvector commits it with the rows, the other backends right after
+        VideoRepository(self.db).set_embedding_model(video_id, model)
+        self.backend.insert_batch(video_id, chunks, embeddings)
+        self._content_changed(video_id)
+
+    def delete_video(self, video_id):
+        self.backend.delete_video(video_id)
+        self._content_changed(video_id)
+
+    def _content_changed(self, video_id):
+        query_cache.invalidate(video_id)
+        video_prefetcher.invalidate(video_id)
+        embedding_models.invalidate(video_id)
+        # new content supersedes an archived copy and vectors staged by a model migration
+        RetentionService(self.db, self.backend).discard_archive(video_id)
+        ChunkReembeddingRepository(self.db).discard(video_id)
+        # after the write, so a version is never seen ahead of its content
+        VideoRepository(self.db).bump_content_version(video_id)
+
+    def build_index(self):
+        """
+        Schedule a background build of the backend's ANN index. Returns
+        False when the backend has none or a build is already running.
+        """
+        build = getattr(self.backend, "build_index", None)
+        return build() if build is not None else False
+
+    def search(self, video_id, query_embedding, top_k=5, threshold=0.0, recall=None, state=None):
+        """
+        Cosine search within one video.
+        Returns dicts with id, chunk_index, score and content, best first.
+        `state` is the EmbeddingState the query was embedded for: a warm
+        copy from another state is not used, and when the video has moved
+        on (a model switch in another process, which this one's cached
+        state has not seen yet) EmbeddingStateChanged is raised so the
+        caller can embed the query again. Without it the state is looked
+        up and nothing is verified.
+        """
+        access_tracker.touch(video_id)
+        verify = state is not None
+        if state is None:
+            state = embedding_models.state(self.db, video_id)
+        rows = video_prefetcher.search(video_id, query_embedding, top_k, threshold, state)
+        if rows is not None:
+            return rows
+        self._warm(video_id)
+        rows = self._backend_search(video_id, query_embedding, top_k, threshold, recall, state if verify else None)
+        if not rows and self._rehydrate(video_id):
+            rows = self._backend_search(video_id, query_embedding, top_k, threshold, recall, state if verify else None)
+        return rows
 
-    def bulk_insert_chunks(self, video_id, chunks, embeddings):
-        bulk_insert_chunks(self.db, video_id, chunks, embeddings)
+    def _backend_search(self, video_id, query_embedding, top_k, threshold, recall, state):
+        if getattr(self.backend, "checks_state", False):
+            return self.backend.search(video_id, query_embedding, top_k, threshold, recall=recall, state=state)
+        rows = self.backend.search(video_id, query_embedding, top_k, threshold, recall=recall)
+        if state is not None:
+            # vectors outside the database: the best is a check right after the read
+            check_embedding_state(video_id, state, VideoRepository(self.db).get_embedding_state(video_id))
+        return rows
 
-    def build_index(self, embeddings):
+    def iter_search(self, video_id, query_embedding, top_k=5, threshold=0.0, recall=None, state=None):
         """
-        Build or update the index with the provided embeddings.
+        search() as an iterator of rows in rank order. Backends that can
+        stream (pgvector) hand rows over as the database produces them;
+        the in-process ones rank everything up front anyway. A changed
+        `state` raises here, before anything is streamed.
         """
-        self.index = build_index(embeddings)
+        verify = state is not None
+        if state is None:
+            state = embedding_models.state(self.db, video_id)
+        iterate = getattr(self.backend, "iter_search", None)
+        if iterate is None or video_prefetcher.get(video_id, state) is not None:
+            return iter(self.search(
+                video_id, query_embedding, top_k, threshold, recall=recall, state=state if verify else None
+            ))
+
+        access_tracker.touch(video_id)
+        self._warm(video_id)
+        checked = {"state": state} if verify and getattr(self.backend, "checks_state", False) else {}
+        rows = iterate(video_id, query_embedding, top_k, threshold, recall=recall, **checked)
+
+        def with_rehydration():
+            # checked when the stream is read, so nothing is consumed up front
+            first = next(rows, None)
+            if first is not None:
+                yield first
+                yield from rows
+            elif self._rehydrate(video_id):
+                yield from iterate(video_id, query_embedding, top_k, threshold, recall=recall, **checked)
+
+        return with_rehydration()
+
+    @staticmethod
+    def _warm(video_id):
+        """Cold in this worker: load it in the background for the follow-up questions."""
+        if PREFETCH_ON_SEARCH:
+            video_prefetcher.prefetch(video_id)
+
+    def _rehydrate(self, video_id):
+        """An empty per-video search may mean the video is archived: restore it if so."""
+        return RetentionService(self.db, self.backend).rehydrate(video_id)
+
+    def search_all(self, query_embedding, top_k=5, video_ids=None, language=None, recall=None):
+        """
+        Corpus-wide search over every video (optionally one language or a
+        set of videos). Rows also carry video_id.
+        """
+        if language is not None and not self.backend.supports_language:
+            language_ids = set(VideoRepository(self.db).get_ids_by_language(language))
+            video_ids = language_ids if video_ids is None else language_ids & set(video_ids)
+            language = None
+
+        return self.backend.search_many(
+            query_embedding, top_k, video_ids=video_ids, language=language, recall=recall
+        )
+
+    def stats(self):
+        return {"backend": self.backend.name, **self.backend.stats()}
 
     def similarity_search(self, video_id, query_embedding, top_k=5):
-        if self.index is None:
-            # Optionally, build the index here if not built yet
-            # Or handle the case where index is not available
-            raise ValueError("Index is not built yet. Please build the index before searching.")
-        return similarity_search(self.db, video_id, query_embedding, top_k)
\ No newline at end of file
+        """Nearest chunk contents for a video, without a similarity floor."""
+        rows = self.search(video_id, query_embedding, top_k, threshold=-1.0)
+        return [row["content"] for row in rows]
@@ -1,15 +1,23 @@
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import HTTPException
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, List, Optional
 import logging
 
+from app.config import BULK_TRANSCRIPT_WORKERS, BULK_EMBED_BATCH_SIZE
+
 from app.services.transcript_service import TranscriptService
 from app.services.chunking_service import ChunkingService
 from app.services.embedding_service import EmbeddingService
 from app.services.vector_store_service import VectorStoreService
+from app.services.summary_service import SummaryService
 from app.repositories.video_repository import VideoRepository
+from app.utils.youtube_parser import parse_video_ref
 
 logger = logging.getLogger(__name__)
+
+
 class VideoService:
 
     def __init__(self, db: Session):
@@ -44,13 +52,6 @@ class VideoService:
             logger.error(f"Failed to fetch transcript for {video_id}: {e}")
             raise HTTPException(status_code=502, detail="Failed to fetch transcript from YouTube")
 
-        # Save video record
-        try:
-            self.repo.create_video(video_id, transcript_text, language)
-        except SQLAlchemyError as e:
-            logger.error(f"Failed to save video {video_id}: {e}")
-            raise HTTPException(status_code=503, detail="Failed to save video to database")
-
         # Chunk transcript
         try:
             chunks = ChunkingService.chunk_text(transcript_text)
@@ -66,7 +67,7 @@ class VideoService:
         # Generate embeddings
         try:
             embeddings = self.embedding.batch_embed(chunks)
-            if not embeddings:
+            if len(embeddings) == 0:
                 raise ValueError("Embedding returned empty result")
         except ValueError as e:
             logger.warning(f"Embedding failed for {video_id}: {e}")
@@ -75,16 +76,35 @@ class VideoService:
             logger.error(f"Embedding service error for {video_id}: {e}")
             raise HTTPException(status_code=502, detail="Embedding service unavailable")
 
+        # Save video record, committed with its vectors: a failure leaves neither behind
+        try:
+            self.repo.create_video(video_id, transcript_text, language, commit=False)
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error(f"Failed to save video {video_id}: {e}")
+            raise HTTPException(status_code=503, detail="Failed to save video to database")
+
         # Store vectors
         try:
-            self.vector_store.bulk_insert_chunks(video_id, chunks, embeddings)
+            self.vector_store.bulk_insert_chunks(video_id, chunks, embeddings, model=self.embedding.model_name)
         except SQLAlchemyError as e:
+            self.db.rollback()
             logger.error(f"Vector store insert failed for {video_id}: {e}")
             raise HTTPException(status_code=503, detail="Failed to store embeddings")
         except Exception as e:
+            self.db.rollback()
             logger.error(f"Unexpected vector store error for {video_id}: {e}")
             raise HTTPException(status_code=500, detail="Vector store error")
 
+        # Precompute extractive summary (best effort — never fails ingestion)
+        summary = self._build_summary(video_id, chunks, embeddings)
+        if summary is not None:
+            try:
+                self.repo.save_summary(video_id, summary)
+            except SQLAlchemyError as e:
+                self.db.rollback()
+                logger.warning(f"Failed to save summary for {video_id}: {e}")
+
         logger.info(f"Video {video_id} processed successfully — {len(chunks)} chunks")
 
         return {
@@ -92,4 +112,130 @@ class VideoService:
             "cached": False,
             "chunk_count": len(chunks),
             "message": "Video processed successfully."
-        }
\ No newline at end of file
+        }
+
+    # -----------------------------
+    # BULK INGESTION
+    # -----------------------------
+    def process_videos(self, video_refs: List[str]) -> Iterator[dict]:
+        """
+        Ingest many videos at once. Parsing and the existence check run
+        eagerly (so database failures surface before streaming starts); the
+        returned iterator yields one progress event per input video.
+        """
+        events: List[dict] = []
+        video_ids: List[str] = []
+
+        for ref in video_refs:
+            try:
+                video_id = parse_video_ref(ref)
+            except ValueError:
+                events.append({"video_id": None, "status": "invalid", "chunk_count": 0,
+                               "detail": f"Invalid YouTube URL or video ID: {ref}"})
+                continue
+            if video_id not in video_ids:
+                video_ids.append(video_id)
+
+        try:
+            existing = self.repo.get_existing_ids(video_ids)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error checking videos {video_ids}: {e}")
+            raise HTTPException(status_code=503, detail="Database unavailable")
+
+        for video_id in video_ids:
+            if video_id in existing:
+                events.append({"video_id": video_id, "status": "skipped",
+                               "chunk_count": 0, "detail": "Video already processed."})
+
+        pending = [video_id for video_id in video_ids if video_id not in existing]
+        return self._stream_bulk(events, pending)
+
+    def _stream_bulk(self, events: List[dict], pending: List[str]) -> Iterator[dict]:
+        yield from events
+
+        if not pending:
+            return
+
+        batch: List[tuple] = []  # (video_id, transcript, language, chunks)
+        batch_size = 0
+
+        workers = max(1, min(BULK_TRANSCRIPT_WORKERS, len(pending)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(TranscriptService.fetch, vid): vid for vid in pending}
+
+            for future in as_completed(futures):
+                video_id = futures[future]
+
+                try:
+                    transcript_text, language = future.result()
+                    chunks = ChunkingService.chunk_text(transcript_text)
+                except ValueError as e:
+                    logger.warning(f"Bulk ingestion skipped {video_id}: {e}")
+                    yield {"video_id": video_id, "status": "failed",
+                           "chunk_count": 0, "detail": str(e)}
+                    continue
+                except Exception as e:
+                    logger.error(f"Failed to fetch transcript for {video_id}: {e}")
+                    yield {"video_id": video_id, "status": "failed", "chunk_count": 0,
+                           "detail": "Failed to fetch transcript from YouTube"}
+                    continue
+
+                batch.append((video_id, transcript_text, language, chunks))
+                batch_size += len(chunks)
+
+                if batch_size >= BULK_EMBED_BATCH_SIZE:
+                    yield from self._flush_bulk(batch)
+                    batch, batch_size = [], 0
+
+        if batch:
+            yield from self._flush_bulk(batch)
+
+    def _flush_bulk(self, batch: List[tuple]) -> Iterator[dict]:
+        """Embed every chunk of the batch in one call, then commit video by video."""
+        texts = [chunk for _, _, _, chunks in batch for chunk in chunks]
+
+        try:
+            embeddings = self.embedding.batch_embed(texts)
+            if len(embeddings) != len(texts):
+                raise ValueError("Embedding count mismatch")
+        except Exception as e:
+            logger.error(f"Bulk embedding failed for {[item[0] for item in batch]}: {e}")
+            for video_id, _, _, _ in batch:
+                yield {"video_id": video_id, "status": "failed", "chunk_count": 0,
+                       "detail": "Embedding service unavailable"}
+            return
+
+        offset = 0
+        for video_id, transcript_text, language, chunks in batch:
+            video_embeddings = embeddings[offset:offset + len(chunks)]
+            offset += len(chunks)
+
+            summary = self._build_summary(video_id, chunks, video_embeddings)
+
+            try:
+                # committed with the chunks, so a failed insert leaves no video to be skipped later
+                self.repo.create_video(video_id, transcript_text, language, summary, commit=False)
+                self.vector_store.bulk_insert_chunks(
+                    video_id, chunks, video_embeddings, model=self.embedding.model_name
+                )
+            except SQLAlchemyError as e:
+                self.db.rollback()
+                logger.error(f"Failed to store video {video_id}: {e}")
+                yield {"video_id": video_id, "status": "failed", "chunk_count": 0,
+                       "detail": "Failed to store video"}
+                continue
+
+            logger.info(f"Video {video_id} processed successfully — {len(chunks)} chunks")
+            yield {"video_id": video_id, "status": "processed",
+                   "chunk_count": len(chunks), "detail": "Video processed successfully."}
+
+    def _build_summary(self, video_id: str, chunks: List[str], embeddings) -> Optional[str]:
+        try:
+            key_points = SummaryService.extract_key_points(chunks, embeddings)
+        except Exception as e:
+            logger.warning(f"Summary extraction failed for {video_id}: {e}")
+            return None
+
+        SummaryService.invalidate(video_id)
+        return SummaryService.serialize(key_points)
+
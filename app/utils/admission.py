@@ -0,0 +1,472 @@
+"""
+Admission control in front of the routers.
+
+Every ingestion and retrieval request is admitted in two steps before it
+reaches its endpoint:
+
+1. Rate: a token bucket per client (X-Telegram-Id, else X-API-Key, else
+   the peer address) and lane. An empty bucket answers 429 with the
+   seconds until the next token in Retry-After.
+2. Concurrency: each lane has its own in-flight limit, so a playlist being
+   ingested can never take the slots Q&A needs. Requests over the limit
+   wait in a bounded queue; a full queue, or a wait longer than the queue
+   timeout, answers 503 with Retry-After.
+
+The buckets and in-flight slots live in an AdmissionStore: per process by
+default (`memory`), or in one SQLite file shared by every worker on the
+host (`sqlite`), so limits hold for the whole pre-fork server. A shared
+slot is a lease, renewed while its request is in flight, so only a dead
+worker's slots ever expire. The queue itself is per process. /metrics reports admitted and rejected counts.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+import weakref
+from dataclasses import dataclass
+from typing import Dict, Optional, Protocol, Tuple
+
+import anyio.to_thread
+from sqlalchemy import create_engine, text
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import (
+    ADMISSION_BACKEND,
+    ADMISSION_ENABLED,
+    ADMISSION_INGEST_BURST,
+    ADMISSION_INGEST_CONCURRENCY,
+    ADMISSION_INGEST_QUEUE,
+    ADMISSION_INGEST_RATE,
+    ADMISSION_QUEUE_TIMEOUT,
+    ADMISSION_RETRIEVE_BURST,
+    ADMISSION_RETRIEVE_CONCURRENCY,
+    ADMISSION_RETRIEVE_QUEUE,
+    ADMISSION_RETRIEVE_RATE,
+    ADMISSION_SLOT_TTL,
+    ADMISSION_STORE_PATH,
+)
+from app.utils.lru_cache import LRUCache
+from app.utils.responses import APIResponse
+
+logger = logging.getLogger(__name__)
+
+INGEST, RETRIEVE = "ingest", "retrieve"
+
+# path prefix -> lane; anything else (health, metrics, docs) is not admitted
+LANE_PREFIXES = (
+    ("/process_video", INGEST),
+    ("/retrieve_chunks", RETRIEVE),
+    ("/search", RETRIEVE),
+    ("/summary", RETRIEVE),
+)
+
+# how often a waiting request re-checks a shared store for a freed slot
+_POLL_SECONDS = 0.025
+
+
+@dataclass(frozen=True)
+class Lane:
+    name: str
+    rate: float  # tokens per second per client; 0 = unlimited
+    burst: int
+    concurrency: int  # in-flight requests; 0 = unlimited
+    queue: int  # requests allowed to wait for a slot (per process)
+
+
+def default_lanes() -> Dict[str, Lane]:
+    return {
+        INGEST: Lane(INGEST, ADMISSION_INGEST_RATE, ADMISSION_INGEST_BURST,
+                     ADMISSION_INGEST_CONCURRENCY, ADMISSION_INGEST_QUEUE),
+        RETRIEVE: Lane(RETRIEVE, ADMISSION_RETRIEVE_RATE, ADMISSION_RETRIEVE_BURST,
+                       ADMISSION_RETRIEVE_CONCURRENCY, ADMISSION_RETRIEVE_QUEUE),
+    }
+
+
+def lane_for(path: str) -> Optional[str]:
+    for prefix, lane in LANE_PREFIXES:
+        if path == prefix or path.startswith(prefix + "/"):
+            return lane
+    return None
+
+
+def client_key(scope: Scope) -> str:
+    headers = Headers(scope=scope)
+    telegram_id = headers.get("x-telegram-id")
+    if telegram_id:
+        return f"tg:{telegram_id}"
+    api_key = headers.get("x-api-key")
+    if api_key:
+        # never keep the key itself around
+        return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:16]
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "ip:unknown"
+
+
+# -----------------------------
+# STORES
+# -----------------------------
+class AdmissionStore(Protocol):
+
+    def take_token(self, key: str, rate: float, burst: int, now: float) -> float:
+        """Take one token; 0.0 when taken, else seconds until one is available."""
+
+    def acquire_slot(self, lane: str, limit: int, now: float) -> Optional[str]:
+        """An in-flight slot id, or None when `limit` are already held."""
+
+    def release_slot(self, lane: str, slot: str) -> None: ...
+
+    def renew_slot(self, lane: str, slot: str, now: float) -> None:
+        """Extend the lease on a slot still in use (stores whose slots expire)."""
+
+    def in_flight(self, lane: str, now: float) -> int: ...
+
+    def clear(self) -> None: ...
+
+
+def _refill(tokens: float, updated: float, rate: float, burst: int, now: float) -> float:
+    return min(float(burst), tokens + max(0.0, now - updated) * rate)
+
+
+class MemoryAdmissionStore:
+    """Buckets and slots of this process only."""
+
+    def __init__(self, max_clients: int = 100_000):
+        self._lock = threading.Lock()
+        # an evicted (long idle) bucket simply starts full again
+        self._buckets = LRUCache(maxsize=max_clients)
+        self._slots: Dict[str, set] = {}
+
+    def take_token(self, key, rate, burst, now):
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(burst), now))
+            tokens = _refill(tokens, updated, rate, burst, now)
+            if tokens >= 1.0:
+                self._buckets.set(key, (tokens - 1.0, now))
+                return 0.0
+            self._buckets.set(key, (tokens, now))
+            return (1.0 - tokens) / rate
+
+    def acquire_slot(self, lane, limit, now):
+        with self._lock:
+            held = self._slots.setdefault(lane, set())
+            if len(held) >= limit:
+                return None
+            slot = uuid.uuid4().hex
+            held.add(slot)
+            return slot
+
+    def release_slot(self, lane, slot):
+        with self._lock:
+            self._slots.get(lane, set()).discard(slot)
+
+    def renew_slot(self, lane, slot, now):
+        pass  # held until released: a dead process takes its slots with it
+
+    def in_flight(self, lane, now):
+        with self._lock:
+            return len(self._slots.get(lane, ()))
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self._slots.clear()
+
+
+class SqliteAdmissionStore:
+    """
+    Buckets and slots in one SQLite file shared by every worker on a host.
+    Each decision is a single statement, so it is atomic across processes.
+    Slots are leases of `slot_ttl` seconds, renewed by the request holding
+    one, so a worker that dies holding a slot frees it within slot_ttl.
+    """
+
+    def __init__(self, path: str, slot_ttl: float = ADMISSION_SLOT_TTL):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.slot_ttl = slot_ttl
+        self.engine = create_engine(
+            f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 5}
+        )
+        self._last_prune = 0.0
+
+        with self.engine.begin() as conn:
+            conn.execute(text("PRAGMA journal_mode=WAL"))
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS admission_buckets (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL
+                )
+            """))
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS admission_slots (
+                    id TEXT PRIMARY KEY,
+                    lane TEXT NOT NULL,
+                    expires REAL NOT NULL
+                )
+            """))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_admission_slots_lane ON admission_slots (lane, expires)"))
+
+    def take_token(self, key, rate, burst, now):
+        refilled = "MIN(:burst, tokens + MAX(0, :now - updated) * :rate)"
+        params = {"key": key, "rate": rate, "burst": float(burst), "now": now}
+        with self.engine.begin() as conn:
+            taken = conn.execute(text(f"""
+                INSERT INTO admission_buckets (key, tokens, updated) VALUES (:key, :burst - 1, :now)
+                ON CONFLICT (key) DO UPDATE SET tokens = {refilled} - 1, updated = :now
+                WHERE {refilled} >= 1
+                RETURNING tokens
+            """), params).first()
+            if taken is not None:
+                return 0.0
+            tokens = conn.execute(
+                text(f"SELECT {refilled} FROM admission_buckets WHERE key = :key"), params
+            ).scalar()
+        return (1.0 - (tokens or 0.0)) / rate
+
+    def acquire_slot(self, lane, limit, now):
+        slot = uuid.uuid4().hex
+        with self.engine.begin() as conn:
+            if now - self._last_prune > self.slot_ttl / 10:
+                conn.execute(text("DELETE FROM admission_slots WHERE expires <= :now"), {"now": now})
+                self._last_prune = now
+            acquired = conn.execute(text("""
+                INSERT INTO admission_slots (id, lane, expires)
+                SELECT :id, :lane, :expires
+                WHERE (SELECT COUNT(*) FROM admission_slots WHERE lane = :lane AND expires > :now) < :limit
+            """), {"id": slot, "lane": lane, "expires": now + self.slot_ttl, "now": now, "limit": limit}).rowcount
+        return slot if acquired else None
+
+    def release_slot(self, lane, slot):
+        with self.engine.begin() as conn:
+            conn.execute(text("DELETE FROM admission_slots WHERE id = :id"), {"id": slot})
+
+    def renew_slot(self, lane, slot, now):
+        with self.engine.begin() as conn:
+            conn.execute(
+                text("UPDATE admission_slots SET expires = :expires WHERE id = :id"),
+                {"id": slot, "expires": now + self.slot_ttl}
+            )
+
+    def in_flight(self, lane, now):
+        with self.engine.connect() as conn:
+            return conn.execute(
+                text("SELECT COUNT(*) FROM admission_slots WHERE lane = :lane AND expires > :now"),
+                {"lane": lane, "now": now}
+            ).scalar()
+
+    def clear(self):
+        with self.engine.begin() as conn:
+            conn.execute(text("DELETE FROM admission_buckets"))
+            conn.execute(text("DELETE FROM admission_slots"))
+
+
+# -----------------------------
+# CONTROLLER
+# -----------------------------
+class Rejected(Exception):
+
+    def __init__(self, status_code: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+
+    def __init__(
+        self,
+        store: AdmissionStore,
+        lanes: Optional[Dict[str, Lane]] = None,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+        clock=time.time
+    ):
+        self.store = store
+        self.lanes = lanes or default_lanes()
+        self.queue_timeout = queue_timeout
+        self.clock = clock
+        # the memory store is only touched in-process: no need for a thread hop
+        self._blocking = not isinstance(store, MemoryAdmissionStore)
+        self._waiting = {name: 0 for name in self.lanes}
+        # event loop -> lane -> set when a slot of this process is released
+        self._released = weakref.WeakKeyDictionary()
+        self._admitted = {name: 0 for name in self.lanes}
+        self._rejected: Dict[Tuple[str, str], int] = {}
+
+    async def _call(self, fn, *args):
+        if self._blocking:
+            return await anyio.to_thread.run_sync(fn, *args)
+        return fn(*args)
+
+    def _reject(self, lane: str, status_code: int, reason: str, retry_after: float) -> Rejected:
+        self._rejected[(lane, reason)] = self._rejected.get((lane, reason), 0) + 1
+        return Rejected(status_code, reason, retry_after)
+
+    async def acquire(self, lane_name: str, client: str) -> Optional[str]:
+        """The slot to release after the request, or raises Rejected."""
+        lane = self.lanes[lane_name]
+
+        if lane.rate > 0:
+            wait = await self._call(self.store.take_token, f"{lane_name}:{client}", lane.rate, lane.burst, self.clock())
+            if wait > 0:
+                raise self._reject(lane_name, 429, "rate_limited", wait)
+
+        if lane.concurrency <= 0:
+            self._admitted[lane_name] += 1
+            return None
+
+        slot = await self._call(self.store.acquire_slot, lane_name, lane.concurrency, self.clock())
+        if slot is None:
+            if self._waiting[lane_name] >= lane.queue:
+                raise self._reject(lane_name, 503, "queue_full", self.queue_timeout)
+            slot = await self._wait_for_slot(lane)
+            if slot is None:
+                raise self._reject(lane_name, 503, "queue_timeout", self.queue_timeout)
+
+        self._admitted[lane_name] += 1
+        return slot
+
+    def _release_event(self, lane: str) -> asyncio.Event:
+        events = self._released.setdefault(asyncio.get_running_loop(), {})
+        return events.setdefault(lane, asyncio.Event())
+
+    async def _wait_for_slot(self, lane: Lane) -> Optional[str]:
+        released = self._release_event(lane.name)
+        deadline = time.monotonic() + self.queue_timeout
+        self._waiting[lane.name] += 1
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                released.clear()
+                try:
+                    # local releases wake us at once; a shared store is also polled
+                    timeout = remaining if not self._blocking else min(remaining, _POLL_SECONDS)
+                    await asyncio.wait_for(released.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                slot = await self._call(self.store.acquire_slot, lane.name, lane.concurrency, self.clock())
+                if slot is not None:
+                    return slot
+        finally:
+            self._waiting[lane.name] -= 1
+
+    def keep_alive(self, lane_name: str, slot: Optional[str]) -> Optional[asyncio.Task]:
+        """
+        Renew the slot's lease every third of the store's slot_ttl until the
+        returned task is cancelled, so a long request (a playlist streaming
+        in for longer than the TTL) keeps its slot. None for stores whose
+        slots never expire.
+        """
+        ttl = getattr(self.store, "slot_ttl", None)
+        if slot is None or not ttl:
+            return None
+
+        async def renew():
+            while True:
+                await asyncio.sleep(ttl / 3)
+                try:
+                    await self._call(self.store.renew_slot, lane_name, slot, self.clock())
+                except Exception as e:
+                    logger.warning(f"Renewing {lane_name} slot failed: {e}")
+
+        return asyncio.get_running_loop().create_task(renew())
+
+    async def release(self, lane_name: str, slot: Optional[str]) -> None:
+        if slot is None:
+            return
+        await self._call(self.store.release_slot, lane_name, slot)
+        self._release_event(lane_name).set()
+
+    def stats(self) -> dict:
+        now = self.clock()
+        return {
+            "backend": type(self.store).__name__,
+            **{
+                name: {
+                    "in_flight": self.store.in_flight(name, now),
+                    "queued": self._waiting[name],
+                    "concurrency": lane.concurrency,
+                    "admitted": self._admitted[name],
+                    "rejected": {
+                        reason: count for (lane_name, reason), count in self._rejected.items() if lane_name == name
+                    },
+                }
+                for name, lane in self.lanes.items()
+            },
+        }
+
+    def reset(self) -> None:
+        self.store.clear()
+        self._admitted = {name: 0 for name in self.lanes}
+        self._rejected.clear()
+
+
+_STORES = {
+    "memory": MemoryAdmissionStore,
+    "sqlite": lambda: SqliteAdmissionStore(ADMISSION_STORE_PATH),
+}
+
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                if ADMISSION_BACKEND not in _STORES:
+                    raise ValueError(f"Unknown ADMISSION_BACKEND {ADMISSION_BACKEND!r}; expected one of {', '.join(_STORES)}")
+                _controller = AdmissionController(_STORES[ADMISSION_BACKEND]())
+    return _controller
+
+
+def admission_stats() -> Optional[dict]:
+    return _controller.stats() if _controller is not None else None
+
+
+# -----------------------------
+# MIDDLEWARE
+# -----------------------------
+class AdmissionMiddleware:
+
+    def __init__(self, app: ASGIApp, controller: Optional[AdmissionController] = None, enabled: bool = ADMISSION_ENABLED):
+        self.app = app
+        self.controller = controller
+        self.enabled = enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        lane = lane_for(scope["path"]) if scope["type"] == "http" and self.enabled else None
+        if lane is None:
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.controller or get_admission_controller()
+        try:
+            slot = await controller.acquire(lane, client_key(scope))
+        except Rejected as rejected:
+            logger.info(f"Rejected {scope['path']} ({lane}): {rejected.reason}")
+            response = APIResponse(
+                {"detail": "Too many requests" if rejected.status_code == 429 else "Server busy"},
+                status_code=rejected.status_code,
+                headers={"Retry-After": str(max(1, math.ceil(rejected.retry_after)))},
+            )
+            await response(scope, receive, send)
+            return
+
+        heartbeat = controller.keep_alive(lane, slot)
+        try:
+            # the slot is held until the body is sent, streamed responses included
+            await self.app(scope, receive, send)
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+            await controller.release(lane, slot)
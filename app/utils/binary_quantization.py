@@ -0,0 +1,34 @@
+import numpy as np
+
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def pack_signs(matrix) -> np.ndarray:
+    """
+    Sign-bit codes: one bit per dimension (1 where the value is > 0), packed
+    little-endian into uint64 words. Returns shape (n, ceil(dim / 64)).
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+
+    n, dim = matrix.shape
+    words = (dim + 63) // 64
+    bits = np.zeros((n, words * 64), dtype=bool)
+    bits[:, :dim] = matrix > 0
+
+    packed = np.packbits(bits, axis=1, bitorder="little")
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """Per-element set-bit count of a uint64 array."""
+    if hasattr(np, "bitwise_count"):  # NumPy >= 2.0, uses the CPU popcount instruction
+        return np.bitwise_count(words)
+    as_bytes = words.view(np.uint8).reshape(words.shape + (8,))
+    return _POPCOUNT_TABLE[as_bytes].sum(axis=-1, dtype=np.uint32)
+
+
+def hamming_distances(codes: np.ndarray, query_code: np.ndarray) -> np.ndarray:
+    """Hamming distance from one packed query code (words,) to every row of codes (n, words)."""
+    return popcount(np.bitwise_xor(codes, query_code.reshape(1, -1))).sum(axis=1, dtype=np.uint32)
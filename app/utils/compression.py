@@ -0,0 +1,161 @@
+"""
+Content-aware gzip for API responses.
+
+Starlette's GZipMiddleware compresses everything over the size threshold
+at level 9. Here:
+- bodies below `minimum_size` (default about one TCP segment) go out as
+  they are: gzip saves no round trip there and costs CPU on every request;
+- already-compressed media types and responses with a Content-Encoding are
+  passed through;
+- a fast level (1 by default) is used: on JSON chunk text it gets most of
+  level 9's ratio for a fraction of the CPU;
+- a complete body whose gzip does not save at least `min_saving` of it is
+  sent uncompressed.
+
+It is a plain ASGI `send` wrapper rather than a subclass of Starlette's
+GZipMiddleware, whose responders are internals that change between
+releases.
+"""
+import zlib
+from typing import Optional
+
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import COMPRESSION_LEVEL, COMPRESSION_MIN_SAVING, COMPRESSION_MIN_SIZE
+
+ALREADY_COMPRESSED_CONTENT_TYPES = (
+    "application/grpc",
+    "application/gzip",
+    "application/x-gzip",
+    "application/zip",
+    "application/x-bzip2",
+    "application/x-xz",
+    "application/zstd",
+    "application/x-7z-compressed",
+    "application/vnd.rar",
+    "application/pdf",
+    "audio/*",
+    "font/*",
+    "image/avif",
+    "image/gif",
+    "image/jpeg",
+    "image/png",
+    "image/webp",
+    "text/event-stream",
+    "video/*",
+)
+
+# bodies this large are compressed on a worker thread, off the event loop
+THREAD_MINIMUM_SIZE = 128 * 1024
+
+
+def excluded(content_type: str, exclude_content_types: tuple) -> bool:
+    media_type = content_type.partition(";")[0].strip().lower()
+    return media_type in exclude_content_types or media_type.partition("/")[0] + "/*" in exclude_content_types
+
+
+class _CompressingSend:
+    """
+    The `send` of one response. The start message is held back until the
+    first body shows whether the response is worth compressing.
+    """
+
+    def __init__(self, send: Send, gzip: bool, minimum_size: int, compresslevel: int,
+                 min_saving: float, exclude_content_types: tuple):
+        self.send = send
+        self.gzip = gzip
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.min_saving = min_saving
+        self.exclude_content_types = exclude_content_types
+        self.start: Optional[Message] = None
+        self.passthrough = False
+        self.compressor = None  # set once the response is being gzipped
+
+    async def __call__(self, message: Message) -> None:
+        kind = message["type"]
+        if kind == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] == 206
+                or excluded(headers.get("content-type", ""), self.exclude_content_types)
+            )
+            if self.passthrough:
+                await self.send(message)
+            else:
+                self.start = message
+        elif kind != "http.response.body" or self.passthrough:
+            if self.start is not None:  # e.g. http.response.pathsend: sent as is
+                start, self.start = self.start, None
+                await self.send(start)
+            await self.send(message)
+        elif self.start is not None:
+            await self._first_body(message)
+        else:
+            if self.compressor is not None:
+                message["body"] = await self._compress(message.get("body", b""), message.get("more_body", False))
+            await self.send(message)
+
+    async def _first_body(self, message: Message) -> None:
+        start, self.start = self.start, None
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if more_body or len(body) >= self.minimum_size:
+            headers = MutableHeaders(raw=start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if self.gzip:
+                self.compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+                compressed = await self._compress(body, more_body)
+                # a stream is committed to gzip; a complete body only if gzip pays
+                if more_body or len(compressed) <= len(body) * (1 - self.min_saving):
+                    headers["Content-Encoding"] = "gzip"
+                    if more_body or start.get("trailers", False):
+                        del headers["Content-Length"]
+                    else:
+                        headers["Content-Length"] = str(len(compressed))
+                    message["body"] = compressed
+                else:
+                    self.compressor = None
+
+        await self.send(start)
+        await self.send(message)
+
+    async def _compress(self, body: bytes, more_body: bool) -> bytes:
+        if len(body) >= THREAD_MINIMUM_SIZE:
+            return await anyio.to_thread.run_sync(self._deflate, body, more_body)
+        return self._deflate(body, more_body)
+
+    def _deflate(self, body: bytes, more_body: bool) -> bytes:
+        # a sync flush per message, so a streamed chunk can be decoded as soon as it arrives
+        return self.compressor.compress(body) + self.compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        compresslevel: int = COMPRESSION_LEVEL,
+        min_saving: float = COMPRESSION_MIN_SAVING,
+        exclude_content_types: tuple = ALREADY_COMPRESSED_CONTENT_TYPES,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.min_saving = min_saving
+        self.exclude_content_types = tuple(t.partition(";")[0].strip().lower() for t in exclude_content_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.compresslevel <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        gzip = "gzip" in Headers(scope=scope).get("Accept-Encoding", "")
+        await self.app(scope, receive, _CompressingSend(
+            send, gzip, self.minimum_size, self.compresslevel, self.min_saving, self.exclude_content_types
+        ))
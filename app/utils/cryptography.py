@@ -1,8 +1,11 @@
 
-from cryptography.fernet import Fernet
+from typing import TYPE_CHECKING
 
-def encrypt_text(fernet: Fernet, text: str) -> str:
+if TYPE_CHECKING:  # the cryptography backend is only loaded by whoever builds the Fernet
+    from cryptography.fernet import Fernet
+
+def encrypt_text(fernet: "Fernet", text: str) -> str:
     return fernet.encrypt(text.encode()).decode()
 
-def decrypt_text(fernet: Fernet, encrypted_text: str) -> str:
+def decrypt_text(fernet: "Fernet", encrypted_text: str) -> str:
     return fernet.decrypt(encrypted_text.encode()).decode()
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""
+HTTP validators for per-video resources.
+
+A video's chunks (and so its summary and retrieval results) only change
+when it is re-ingested or deleted, which bumps videos.content_version. The
+ETag is derived from that version and Last-Modified from the time of the
+bump, so a client or a reverse proxy in front of the workers can revalidate
+with one indexed lookup instead of a search, and get 304 Not Modified.
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+from starlette.responses import Response
+
+from app.config import HTTP_CACHE_MAX_AGE, HTTP_CACHE_STALE_WHILE_REVALIDATE
+from app.repositories.video_repository import VideoRepository
+from app.utils.responses import response_format
+
+
+class Validators(NamedTuple):
+    etag: str
+    last_modified: Optional[datetime]
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "ETag": self.etag,
+            "Cache-Control": (
+                f"public, max-age={HTTP_CACHE_MAX_AGE}, "
+                f"stale-while-revalidate={HTTP_CACHE_STALE_WHILE_REVALIDATE}"
+            ),
+        }
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        return headers
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything here is stored in UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def validators_for(db: Session, video_id: str) -> Optional[Validators]:
+    """Validators for a video's current content; None for videos not processed yet."""
+    content = VideoRepository(db).get_content_version(video_id)
+    if content is None:
+        return None
+
+    # weak: gzip and identity bodies of one representation share it; JSON
+    # and MessagePack are different representations
+    etag = f'W/"{video_id}-{content.version}-{response_format().rsplit("/", 1)[-1]}"'
+    last_modified = _utc(content.updated_at).replace(microsecond=0) if content.updated_at else None
+    return Validators(etag, last_modified)
+
+
+def is_not_modified(headers: Headers, validators: Validators) -> bool:
+    """
+    RFC 9110 evaluation for GET: If-None-Match (weak comparison) decides
+    when present, otherwise If-Modified-Since.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        ours = validators.etag.removeprefix("W/")
+        return any(tag.strip().removeprefix("W/") == ours for tag in if_none_match.split(","))
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and validators.last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return validators.last_modified <= _utc(since)
+
+    return False
+
+
+def not_modified(validators: Validators) -> Response:
+    return Response(status_code=304, headers={**validators.headers(), "Vary": "Accept"})
@@ -0,0 +1,63 @@
+import os
+from typing import Dict, List, Optional
+
+# smaps_rollup fields (kB) that make up the unique / shared split
+_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def parse_smaps_rollup(text: str) -> Dict[str, int]:
+    """Bytes per field from the contents of /proc/<pid>/smaps_rollup."""
+    values = {}
+    for line in text.splitlines():
+        name, _, rest = line.partition(":")
+        if name in _FIELDS:
+            values[name] = int(rest.split()[0]) * 1024
+    return values
+
+
+def process_memory(pid: int) -> Optional[Dict[str, int]]:
+    """
+    Memory of one process split into what only it holds (uss: private pages)
+    and what it shares with others (shared: pages also mapped elsewhere, e.g.
+    model weights inherited copy-on-write from a pre-fork master). pss
+    charges each shared page 1/n to each of its n users, so summing pss over
+    workers gives their real combined footprint. None where /proc is absent.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = parse_smaps_rollup(f.read())
+    except (FileNotFoundError, PermissionError):
+        return None
+
+    return {
+        "pid": pid,
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+    }
+
+
+def child_pids(pid: int) -> List[int]:
+    """Direct children of a process (e.g. the workers of a server master)."""
+    children = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children.extend(int(child) for child in f.read().split())
+    except FileNotFoundError:
+        pass
+    return sorted(children)
+
+
+def memory_report(master_pid: int) -> dict:
+    """Per-worker unique vs shared memory for a master and its workers."""
+    workers = [m for m in (process_memory(pid) for pid in child_pids(master_pid)) if m is not None]
+    return {
+        "master": process_memory(master_pid),
+        "workers": workers,
+        "total_rss": sum(w["rss"] for w in workers),
+        "total_pss": sum(w["pss"] for w in workers),
+        # what N independently loaded workers would need versus what they use now
+        "saved": sum(w["rss"] for w in workers) - sum(w["pss"] for w in workers),
+    }
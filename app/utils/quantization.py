@@ -0,0 +1,82 @@
+from typing import Optional
+
+import numpy as np
+
+PRECISIONS = ("float32", "float16", "int8")
+
+# rows converted back to float32 at a time while scoring; bounds the
+# temporary working set so the compact matrix is never expanded whole
+SCORE_BLOCK_ROWS = 4096
+
+
+class QuantizedMatrix:
+    """
+    Row-major embedding matrix in a compact encoding.
+
+    float32 / float16: `codes` hold the values directly.
+    int8: symmetric per-row scalar quantisation, value ≈ codes * scales[:, None].
+    """
+    __slots__ = ("precision", "codes", "scales")
+
+    def __init__(self, precision: str, codes: np.ndarray, scales: Optional[np.ndarray] = None):
+        self.precision = precision
+        self.codes = codes
+        self.scales = scales
+
+    def __len__(self) -> int:
+        return self.codes.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def rows(self, indexes) -> np.ndarray:
+        """Dequantised float32 copy of the selected rows."""
+        block = self.codes[indexes].astype(np.float32)
+        if self.scales is not None:
+            block *= self.scales[indexes, None] if block.ndim == 2 else self.scales[indexes]
+        return block
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Dot product of every row with a float32 query vector."""
+        query = np.asarray(query, dtype=np.float32).ravel()
+        n = self.codes.shape[0]
+
+        if self.precision == "float32":
+            return self.codes @ query
+
+        out = np.empty(n, dtype=np.float32)
+        for start in range(0, n, SCORE_BLOCK_ROWS):
+            end = min(start + SCORE_BLOCK_ROWS, n)
+            np.dot(self.codes[start:end].astype(np.float32), query, out=out[start:end])
+
+        if self.scales is not None:
+            out *= self.scales
+        return out
+
+
+def quantize(matrix, precision: str = "float32") -> QuantizedMatrix:
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown embedding precision: {precision}")
+
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+
+    if precision == "float32":
+        return QuantizedMatrix("float32", np.ascontiguousarray(matrix))
+
+    if precision == "float16":
+        return QuantizedMatrix("float16", matrix.astype(np.float16))
+
+    max_abs = np.abs(matrix).max(axis=1) if matrix.size else np.zeros(0, dtype=np.float32)
+    scales = (max_abs / 127.0).astype(np.float32)
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return QuantizedMatrix("int8", codes, scales)
+
+
+def recall_at_k(exact: np.ndarray, approx: np.ndarray, k: int) -> float:
+    """Mean fraction of the exact top-k ids that appear in the approximate top-k (per query row)."""
+    hits = [len(set(e[:k]) & set(a[:k])) for e, a in zip(exact, approx)]
+    return float(np.mean(hits)) / k if hits else 0.0
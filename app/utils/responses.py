@@ -0,0 +1,120 @@
+"""
+Response serialization for every router.
+
+APIResponse is the app's default response class: orjson instead of stdlib
+json, and MessagePack for clients that ask for it with
+`Accept: application/msgpack` (the OpenClaw skill client). The format is
+picked once per request by ContentNegotiationMiddleware and read back by
+the response class, so endpoints and their response_models stay as they are.
+
+MessagePack is optional: without the `msgpack` package installed every
+client gets JSON.
+"""
+from contextvars import ContextVar
+from typing import Any
+
+import numpy as np
+import orjson
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import msgpack
+except ImportError:  # optional
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK, "application/x-msgpack", "application/vnd.msgpack")
+
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+_response_format: ContextVar[str] = ContextVar("response_format", default=JSON)
+
+
+def msgpack_available() -> bool:
+    return msgpack is not None
+
+
+def response_format() -> str:
+    """The format negotiated for the current request (JSON outside a request)."""
+    return _response_format.get()
+
+
+def negotiate(accept: str) -> str:
+    """
+    JSON or MessagePack for an Accept header. MessagePack only when the
+    client names it explicitly and weighs it at least as high as JSON;
+    wildcards never select it.
+    """
+    if msgpack is None or not accept:
+        return JSON
+
+    json_q = msgpack_q = 0.0
+    for part in accept.split(","):
+        media_type, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        media_type = media_type.lower()
+        if media_type in MSGPACK_MEDIA_TYPES:
+            msgpack_q = max(msgpack_q, q)
+        elif media_type in (JSON, "application/*", "*/*"):
+            json_q = max(json_q, q)
+
+    return MSGPACK if msgpack_q > 0 and msgpack_q >= json_q else JSON
+
+
+def dumps(content: Any) -> bytes:
+    """orjson with NumPy arrays/scalars and non-str dict keys allowed."""
+    return orjson.dumps(content, option=_ORJSON_OPTIONS)
+
+
+def _msgpack_default(obj: Any) -> Any:
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not MessagePack serializable")
+
+
+def packb(content: Any) -> bytes:
+    return msgpack.packb(content, default=_msgpack_default)
+
+
+class APIResponse(JSONResponse):
+    """orjson-rendered JSON, or MessagePack when the request negotiated it."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if msgpack is not None:
+            # the same URL has two representations
+            self.headers.add_vary_header("Accept")
+
+    def render(self, content: Any) -> bytes:
+        if _response_format.get() == MSGPACK:
+            self.media_type = MSGPACK
+            return packb(content)
+        return dumps(content)
+
+
+class ContentNegotiationMiddleware:
+    """Records the response format the client accepts for APIResponse to use."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _response_format.set(negotiate(Headers(scope=scope).get("accept", "")))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _response_format.reset(token)
@@ -5,6 +5,8 @@ from collections import Counter
 # ── module under test (inline) ─────────────────────────────────────────────────
 from threading import Lock
 
+from app.config import PREFETCH_ON_ACTIVATE
+
 _user_video_map = {}
 _lock = Lock()
 
@@ -12,6 +14,11 @@ _lock = Lock()
 def set_active_video(telegram_id: str, video_id: str):
     with _lock:
         _user_video_map[telegram_id] = video_id
+    if video_id and PREFETCH_ON_ACTIVATE:
+        # the next question is about this video: load it before it is asked
+        from app.services.prefetch_service import video_prefetcher  # deferred: app.utils loads before the services
+
+        video_prefetcher.prefetch(video_id)
 
 
 def get_active_video(telegram_id: str):
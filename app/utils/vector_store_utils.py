@@ -1,44 +1,31 @@
 # vector_store_utils.py
 
-from sqlalchemy import text
 from sqlalchemy.orm import Session
 from typing import List
 
+import numpy as np
+
+from app.repositories.chunk_repository import ChunkRepository
+
 def bulk_insert_chunks(
     db: Session,
     video_id: str,
     chunks: List[str],
-    embeddings: List[List[float]],
+    embeddings: np.ndarray,
 ):
-    values = [
-        {
-            "video_id": video_id,
-            "chunk_index": idx,
-            "content": chunk,
-            "embedding": embedding,
-        }
-        for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings))
-    ]
-
-    db.execute(
-        text("""
-            INSERT INTO chunks (video_id, chunk_index, content, embedding)
-            VALUES (:video_id, :chunk_index, :content, :embedding)
-        """),
-        values
-    )
-
-    db.commit()
+    """Insert a video's chunks; binary COPY from the embedding matrix on the psycopg drivers."""
+    ChunkRepository(db).bulk_insert(video_id, chunks, embeddings)
 
 def build_index(db: Session, table_name='chunks', vector_column='embedding'):
     """
-    Create a vector index on the specified table and column using pgvector.
+    Create the recommended vector index for the chunks table.
+    Kept for callers of the old helper; the index shape (HNSW / IVFFlat /
+    none) and its parameters are chosen by IndexManager from the row count,
+    and the build runs CONCURRENTLY in the background.
     """
-    index_name = f"{table_name}_{vector_column}_idx"
-    sql = f"""
-    CREATE INDEX IF NOT EXISTS {index_name}
-    ON {table_name}
-    USING ivfflat ( {vector_column} vector_l2_ops )
-    """
-    db.execute(text(sql))
-    db.commit()
\ No newline at end of file
+    from app.services.index_service import get_index_manager, TABLE_NAME, VECTOR_COLUMN
+
+    if (table_name, vector_column) != (TABLE_NAME, VECTOR_COLUMN):
+        raise ValueError(f"Only {TABLE_NAME}.{VECTOR_COLUMN} is managed")
+
+    return get_index_manager().build_async()
@@ -22,6 +22,14 @@ def extract_video_id(youtube_url: str) -> str:
     raise ValueError("Invalid YouTube URL")
 
 
+def parse_video_ref(video_ref: str) -> str:
+    """Accepts either a bare video ID or a YouTube URL and returns the video ID."""
+    video_ref = video_ref.strip()
+    if re.fullmatch(r"[0-9A-Za-z_-]{11}", video_ref):
+        return video_ref
+    return extract_video_id(video_ref)
+
+
 # ── test cases ─────────────────────────────────────────────────────────────────
 
 VIDEO_ID = "dQw4w9WgXcQ"  # canonical test video ID (11 chars)
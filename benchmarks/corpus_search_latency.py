@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Latency and recall of corpus-wide search on a synthetic corpus.
+
+Builds a BinaryChunkIndex over N synthetic chunk embeddings (clustered per
+video, generated in batches so the float32 corpus is never held whole) and
+reports p50/p95/p99 query latency plus recall@k against an exact scan of
+the same stored vectors. Exits non-zero if the p95 target is missed.
+
+The pgvector backend is measured against a live database with
+EXPLAIN ANALYZE; this script covers the in-process backend.
+
+Usage:
+    python benchmarks/corpus_search_latency.py [--chunks 1000000] [--p95-ms 150]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.repositories.binary_chunk_index import BinaryChunkIndex  # noqa: E402
+from app.utils.quantization import recall_at_k  # noqa: E402
+
+
+def build(n_chunks: int, dim: int, chunks_per_video: int, precision: str, batch: int = 100_000, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    n_videos = max(1, n_chunks // chunks_per_video)
+    centers = rng.standard_normal((n_videos, dim)).astype(np.float32)
+    index = BinaryChunkIndex(precision=precision)
+
+    for start in range(0, n_chunks, batch):
+        ids = np.arange(start, min(start + batch, n_chunks))
+        videos = ids // chunks_per_video
+        vectors = centers[videos % n_videos] + 0.6 * rng.standard_normal((len(ids), dim)).astype(np.float32)
+        index.add(ids, [f"v{v}" for v in videos], ids % chunks_per_video, vectors)
+
+    return index
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--chunks-per-video", type=int, default=40)
+    parser.add_argument("--precision", default="int8", choices=["float32", "float16", "int8"])
+    parser.add_argument("--candidates", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--p95-ms", type=float, default=150.0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = build(args.chunks, args.dim, args.chunks_per_video, args.precision)
+    index.search(np.ones(args.dim), top_k=1)  # consolidate batches outside the timed loop
+    print(f"built {len(index)} chunks in {time.perf_counter() - start:.1f}s")
+
+    rng = np.random.default_rng(1)
+    vectors = index._vectors
+    latencies, approx, exact = [], [], []
+
+    for _ in range(args.queries):
+        # a paraphrase of an existing chunk: small perturbation relative to the unit vector
+        query = vectors.rows(int(rng.integers(0, len(index)))) + (0.3 / np.sqrt(args.dim)) * rng.standard_normal(args.dim).astype(np.float32)
+        query /= np.linalg.norm(query)
+
+        t0 = time.perf_counter()
+        rows = index.search(query, top_k=args.k, candidates=args.candidates)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+        approx.append([row["id"] for row in rows])
+        scores = vectors.scores(query)
+        exact.append(index._ids[np.argsort(-scores)[:args.k]])
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"latency ms  p50={p50:.1f}  p95={p95:.1f}  p99={p99:.1f}")
+    print(f"recall@{args.k} = {recall_at_k(np.array(exact), np.array(approx), args.k):.4f}")
+
+    if p95 > args.p95_ms:
+        print(f"FAIL: p95 {p95:.1f}ms exceeds target {args.p95_ms}ms")
+        return 1
+    print(f"OK: p95 within {args.p95_ms}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
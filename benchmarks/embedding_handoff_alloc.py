@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Allocations of the chunk-insert handoff, per 1000 chunks, measured with
+tracemalloc from the model's output matrix up to the bytes/params handed
+to the database driver.
+
+    before   matrix.tolist() in EmbeddingService, then one '[x,...]' text
+             literal per chunk bound as an executemany parameter
+    after    the matrix stays a NumPy array; pgcopy_chunk_rows() writes a
+             binary COPY payload straight from its buffer
+
+Usage:
+    python benchmarks/embedding_handoff_alloc.py [--chunks 1000] [--dim 384]
+"""
+import argparse
+import sys
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.repositories.chunk_repository import pgcopy_chunk_rows, to_vector_literal  # noqa: E402
+
+
+def before(video_id, chunks, matrix):
+    embeddings = matrix.tolist()
+    return [
+        {"video_id": video_id, "chunk_index": idx, "content": chunk, "embedding": to_vector_literal(embedding)}
+        for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+    ]
+
+
+def after(video_id, chunks, matrix):
+    return pgcopy_chunk_rows(video_id, chunks, matrix, sql_type="vector")
+
+
+def measure(fn, *args) -> dict:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.take_snapshot()
+    result = fn(*args)
+    current, peak = tracemalloc.get_traced_memory()
+    blocks = sum(stat.count_diff for stat in tracemalloc.take_snapshot().compare_to(baseline, "filename"))
+    tracemalloc.stop()
+    del result
+    return {"peak": peak, "retained": current, "blocks": blocks}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=1000)
+    parser.add_argument("--dim", type=int, default=384)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((args.chunks, args.dim)).astype(np.float32)
+    chunks = [f"chunk {i} " + "transcript text " * 30 for i in range(args.chunks)]
+
+    print(f"{args.chunks} chunks x {args.dim} dims (raw float32 matrix {matrix.nbytes / 2**20:.2f} MiB)")
+    print(f"{'path':<8} {'peak MiB':>9} {'kept MiB':>9} {'live blocks':>12}")
+    results = {}
+    for name, fn in (("before", before), ("after", after)):
+        results[name] = measure(fn, "video", chunks, matrix)
+        row = results[name]
+        print(f"{name:<8} {row['peak'] / 2**20:>9.2f} {row['retained'] / 2**20:>9.2f} {row['blocks']:>12,}")
+
+    print(f"peak reduction: {results['before']['peak'] / results['after']['peak']:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+"""
+Per-video search and delete latency, flat vs hash-partitioned chunks, at
+several table sizes on synthetic data (Postgres + pgvector only).
+
+For each size a scratch schema gets two copies of the same rows:
+
+    flat         one heap, btree on (video_id, chunk_index)
+    partitioned  PARTITION BY HASH (video_id), --partitions partitions,
+                 created with the DDL `partitions migrate` uses
+
+and the script times, over random videos:
+
+    search   ChunkRepository's per-video cosine query, against the flat
+             table, the partitioned parent and the video's partition
+             (what ChunkRepository sends once the table is partitioned)
+    delete   DELETE of one video's chunks (rolled back)
+
+It also reports how many partitions each plan touches. With --ann an HNSW
+index is built on the flat table and on every partition first.
+
+Usage:
+    python benchmarks/partition_scaling.py [--url URL] [--sizes 100000 1000000 5000000]
+        [--partitions 16] [--chunks-per-video 40] [--dim 384] [--queries 200] [--ann]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+
+from app.repositories.chunk_partitions import partition_name  # noqa: E402
+from app.repositories.chunk_repository import to_vector_literal  # noqa: E402
+
+SCHEMA = "partition_bench"
+
+
+def load(conn, rows: int, partitions: int, per_video: int, dim: int) -> None:
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    conn.execute(text(f"SET search_path TO {SCHEMA}, public"))
+    columns = f"id bigint, video_id varchar(50) NOT NULL, chunk_index int, content text, embedding vector({dim})"
+    conn.execute(text(f"CREATE TABLE flat ({columns})"))
+    conn.execute(text(f"CREATE TABLE chunks ({columns}) PARTITION BY HASH (video_id)"))
+    for r in range(partitions):
+        conn.execute(text(
+            f"CREATE TABLE {partition_name(r, partitions)} PARTITION OF chunks "
+            f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {r})"
+        ))
+
+    # random unit-ish vectors generated server side; `WHERE g IS NOT NULL` makes the subquery per row
+    conn.execute(text(f"""
+        INSERT INTO flat
+        SELECT g, 'v' || (g / :per_video), g % :per_video, 'chunk ' || g,
+               (SELECT array_agg(random() - 0.5)::real[] FROM generate_series(1, :dim) WHERE g IS NOT NULL)::vector
+        FROM generate_series(0, :rows - 1) AS g
+    """), {"rows": rows, "per_video": per_video, "dim": dim})
+    conn.execute(text("INSERT INTO chunks SELECT * FROM flat"))
+    for table in ("flat", "chunks"):
+        conn.execute(text(f"CREATE INDEX ON {table} (video_id, chunk_index)"))
+        conn.execute(text(f"ANALYZE {table}"))
+
+
+def build_ann(conn, partitions: int) -> None:
+    for table in ["flat"] + [partition_name(r, partitions) for r in range(partitions)]:
+        conn.execute(text(f"CREATE INDEX ON {table} USING hnsw (embedding vector_cosine_ops)"))
+
+
+def partition_of(conn, video_id: str, partitions: int) -> str:
+    remainder = conn.execute(
+        text("""
+            SELECT r FROM generate_series(0, :modulus - 1) AS r
+            WHERE satisfies_hash_partition(to_regclass('chunks')::oid, :modulus, r, CAST(:video_id AS varchar))
+        """),
+        {"modulus": partitions, "video_id": video_id},
+    ).scalar_one()
+    return partition_name(remainder, partitions)
+
+
+def search_sql(table: str) -> str:
+    return f"""
+        SELECT id, chunk_index, 1 - (embedding <=> CAST(:q AS vector)) AS score, content
+        FROM {table}
+        WHERE video_id = :video_id
+        ORDER BY embedding <=> CAST(:q AS vector)
+        LIMIT 5
+    """
+
+
+def relations_scanned(conn, sql: str, params: dict) -> int:
+    plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()
+    plan = plan if isinstance(plan, list) else json.loads(plan)
+    names, stack = set(), [plan[0]["Plan"]]
+    while stack:
+        node = stack.pop()
+        if "Relation Name" in node:
+            names.add(node["Relation Name"])
+        stack.extend(node.get("Plans", []))
+    return len(names)
+
+
+def percentiles(samples) -> str:
+    ms = np.array(samples) * 1000
+    return f"{np.percentile(ms, 50):>8.2f} {np.percentile(ms, 95):>8.2f}"
+
+
+def measure(engine, rows: int, args) -> None:
+    n_videos = max(1, rows // args.chunks_per_video)
+    with engine.begin() as conn:
+        started = time.perf_counter()
+        load(conn, rows, args.partitions, args.chunks_per_video, args.dim)
+        if args.ann:
+            build_ann(conn, args.partitions)
+        print(f"\n{rows:,} rows, {n_videos:,} videos: loaded in {time.perf_counter() - started:.0f}s")
+
+    with engine.connect() as conn:
+        conn.execute(text(f"SET search_path TO {SCHEMA}, public"))
+        videos = [f"v{random.randrange(n_videos)}" for _ in range(args.queries)]
+        routes = {video: partition_of(conn, video, args.partitions) for video in set(videos)}
+
+        print(f"{'':<22} {'p50 ms':>8} {'p95 ms':>8} {'tables':>7}")
+        for label, table_for in (
+            ("search flat", lambda v: "flat"),
+            ("search parent", lambda v: "chunks"),
+            ("search partition", lambda v: routes[v]),
+        ):
+            samples, scanned = [], 0
+            for video in videos:
+                query = np.random.standard_normal(args.dim)
+                params = {"video_id": video, "q": to_vector_literal(query / np.linalg.norm(query))}
+                sql = search_sql(table_for(video))
+                started = time.perf_counter()
+                conn.execute(text(sql), params).fetchall()
+                samples.append(time.perf_counter() - started)
+                scanned = max(scanned, relations_scanned(conn, sql, params))
+            print(f"{label:<22} {percentiles(samples)} {scanned:>7}")
+
+        for label, table_for in (("delete flat", lambda v: "flat"), ("delete partition", lambda v: routes[v])):
+            samples = []
+            for video in videos[: max(1, args.queries // 4)]:
+                transaction = conn.begin()
+                started = time.perf_counter()
+                conn.execute(text(f"DELETE FROM {table_for(video)} WHERE video_id = :video_id"), {"video_id": video})
+                samples.append(time.perf_counter() - started)
+                transaction.rollback()
+            print(f"{label:<22} {percentiles(samples)} {1:>7}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--partitions", type=int, default=16)
+    parser.add_argument("--chunks-per-video", type=int, default=40)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--ann", action="store_true", help="Build HNSW indexes before measuring")
+    parser.add_argument("--keep", action="store_true", help=f"Keep the {SCHEMA} schema afterwards")
+    args = parser.parse_args()
+
+    if not (args.url or "").startswith("postgresql"):
+        raise SystemExit("Needs a Postgres database with pgvector (--url or DATABASE_URL)")
+
+    engine = create_engine(args.url)
+    try:
+        for rows in args.sizes:
+            measure(engine, rows, args)
+    finally:
+        if not args.keep:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
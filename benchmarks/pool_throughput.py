@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+"""
+Retrieval throughput and checkout wait across connection pool
+configurations, with N request threads hammering one engine.
+
+    retrieval  (default on Postgres) ChunkRepository.search_similar() on a
+               random processed video with a random unit query vector
+    synthetic  (any database, e.g. SQLite) SELECT 1 then hold the
+               connection for --hold-ms, standing in for query time
+
+Each configuration is "size/overflow[/ping]"; "/ping" turns pre-ping on, to
+compare it with the default background validation.
+
+Usage:
+    python benchmarks/pool_throughput.py [--url URL] [--mode retrieval|synthetic]
+        [--threads 32] [--seconds 5] [--hold-ms 5]
+        [--configs 5/10 5/10/ping 10/20 20/0]
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.database.pool import InstrumentedQueuePool, instrument, pool_stats  # noqa: E402
+
+
+def make_engine(url: str, size: int, overflow: int, pre_ping: bool):
+    engine = create_engine(
+        url, poolclass=InstrumentedQueuePool, pool_size=size, max_overflow=overflow,
+        pool_pre_ping=pre_ping, pool_timeout=60,
+    )
+    instrument(engine)
+    return engine
+
+
+def retrieval_request(url: str, dim: int):
+    from app.repositories.chunk_repository import ChunkRepository
+
+    probe = create_engine(url)
+    with probe.connect() as conn:
+        video_ids = [row[0] for row in conn.execute(text("SELECT DISTINCT video_id FROM chunks LIMIT 1000"))]
+    probe.dispose()
+    if not video_ids:
+        raise SystemExit("No processed videos in this database; use --mode synthetic")
+
+    def request(session):
+        query = np.random.standard_normal(dim).astype(np.float32)
+        ChunkRepository(session).search_similar(random.choice(video_ids), query / np.linalg.norm(query), 5, -1.0)
+
+    return request
+
+
+def synthetic_request(hold_ms: float):
+    def request(session):
+        session.execute(text("SELECT 1"))
+        time.sleep(hold_ms / 1000)
+
+    return request
+
+
+def run(engine, request, threads: int, seconds: float) -> dict:
+    Session = sessionmaker(bind=engine)
+    done = [0] * threads
+    latencies = [[] for _ in range(threads)]
+    deadline = time.perf_counter() + seconds
+
+    def worker(i):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            session = Session()
+            try:
+                request(session)
+            finally:
+                session.close()
+            latencies[i].append(time.perf_counter() - started)
+            done[i] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+
+    all_latencies = np.array([x for per_thread in latencies for x in per_thread]) * 1000
+    return {
+        "rps": sum(done) / elapsed,
+        "p50": float(np.percentile(all_latencies, 50)),
+        "p99": float(np.percentile(all_latencies, 99)),
+        **pool_stats(engine),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=os.getenv("DATABASE_URL", "sqlite:///./pool_bench.db"))
+    parser.add_argument("--mode", choices=("retrieval", "synthetic"), default=None)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--hold-ms", type=float, default=5)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--configs", nargs="+", default=["5/10", "5/10/ping", "10/20", "20/0", "32/0"])
+    args = parser.parse_args()
+
+    mode = args.mode or ("retrieval" if args.url.startswith("postgresql") else "synthetic")
+    request = retrieval_request(args.url, args.dim) if mode == "retrieval" else synthetic_request(args.hold_ms)
+
+    print(f"{mode} requests, {args.threads} threads, {args.seconds:.0f}s per config")
+    print(f"{'config':<12} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'wait ms':>8} {'max wait':>9} {'peak ovf':>9} {'conns':>6}")
+    for config in args.configs:
+        parts = config.split("/")
+        size, overflow, pre_ping = int(parts[0]), int(parts[1]), parts[2:] == ["ping"]
+        engine = make_engine(args.url, size, overflow, pre_ping)
+        try:
+            row = run(engine, request, args.threads, args.seconds)
+        finally:
+            engine.dispose()
+        print(
+            f"{config:<12} {row['rps']:>8.0f} {row['p50']:>8.2f} {row['p99']:>8.2f} "
+            f"{row['avg_wait_ms'] or 0:>8.2f} {row['max_wait_ms']:>9.2f} {row['peak_overflow']:>9} {row['connects']:>6}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Recall@k and memory of float16 / int8 embedding storage versus float32.
+
+By default a synthetic clustered corpus shaped like transcript chunk
+embeddings is generated (videos = clusters, chunks = noisy members).
+Pass --embeddings corpus.npy to evaluate a real (n, dim) embedding dump;
+queries are then sampled from the corpus with added noise.
+
+Usage:
+    python benchmarks/quantization_recall.py [--chunks 100000] [--k 10]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.quantization import PRECISIONS, quantize, recall_at_k  # noqa: E402
+
+
+def synthetic_corpus(n_chunks: int, dim: int, n_videos: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_videos, dim)).astype(np.float32)
+    labels = rng.integers(0, n_videos, n_chunks)
+    corpus = centers[labels] + 0.6 * rng.standard_normal((n_chunks, dim)).astype(np.float32)
+    return corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+
+
+def make_queries(corpus: np.ndarray, n_queries: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    picks = corpus[rng.integers(0, len(corpus), n_queries)]
+    queries = picks + (0.3 / np.sqrt(picks.shape[1])) * rng.standard_normal(picks.shape).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def top_k(matrix, queries: np.ndarray, k: int) -> np.ndarray:
+    results = []
+    for query in queries:
+        scores = matrix.scores(query)
+        part = np.argpartition(-scores, k - 1)[:k]
+        results.append(part[np.argsort(-scores[part])])
+    return np.array(results)
+
+
+def run(corpus: np.ndarray, queries: np.ndarray, k: int) -> list:
+    exact = top_k(quantize(corpus, "float32"), queries, k)
+    rows = []
+    for precision in PRECISIONS:
+        matrix = quantize(corpus, precision)
+        start = time.perf_counter()
+        approx = top_k(matrix, queries, k)
+        elapsed = (time.perf_counter() - start) / len(queries)
+        rows.append({
+            "precision": precision,
+            "bytes": matrix.nbytes,
+            "recall": recall_at_k(exact, approx, k),
+            "ms_per_query": elapsed * 1000,
+        })
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embeddings", type=Path, help="(n, dim) .npy embedding dump")
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--videos", type=int, default=2_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.embeddings:
+        corpus = np.load(args.embeddings).astype(np.float32)
+        corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+    else:
+        corpus = synthetic_corpus(args.chunks, args.dim, args.videos)
+    queries = make_queries(corpus, args.queries)
+
+    print(f"corpus: {corpus.shape[0]} x {corpus.shape[1]}, queries: {len(queries)}, k={args.k}")
+    print(f"{'precision':<10} {'MiB':>8} {'recall@k':>9} {'ms/query':>9}")
+    for row in run(corpus, queries, args.k):
+        print(f"{row['precision']:<10} {row['bytes'] / 2**20:>8.1f} {row['recall']:>9.4f} {row['ms_per_query']:>9.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+Encode cost and wire size of a typical /retrieve_chunks response (top-5
+chunks of ~1000 characters, as chunk_transcript() produces), per request.
+
+    before   stdlib json (Starlette JSONResponse) + GZipMiddleware at
+             level 9 for anything over 1000 bytes
+    after    orjson (APIResponse) + CompressionMiddleware at level 1
+    msgpack  the MessagePack representation, same compression
+
+Serialization of the response_model itself (Pydantic) is the same on both
+paths and measured once as its own row.
+
+Usage:
+    python benchmarks/response_encoding.py [--top-k 5] [--chunk-chars 1000] [--runs 2000]
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import zlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.schemas import RetrieveChunksResponse  # noqa: E402
+from app.utils import responses  # noqa: E402
+
+SAMPLE = (
+    "So the key idea in this part of the lecture is that attention lets every token look at "
+    "every other token, और इसी वजह से मॉडल लंबी दूरी के संबंध सीख पाता है. "
+)
+
+
+def gzip_body(body: bytes, level: int, minimum_size: int, min_saving: float = 0.0) -> bytes:
+    if level == 0 or len(body) < minimum_size:
+        return body
+    compressed = zlib.compress(body, level)
+    return body if len(compressed) > len(body) * (1 - min_saving) else compressed
+
+
+def stdlib_json(content) -> bytes:
+    # what starlette.responses.JSONResponse.render does
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def per_call_us(fn, runs: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return 1e6 * (time.perf_counter() - started) / runs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--chunk-chars", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=2000)
+    args = parser.parse_args()
+
+    # distinct chunks drawn from the sample's words, so gzip sees realistic redundancy
+    rng = random.Random(0)
+    words = SAMPLE.split()
+    chunks = []
+    for _ in range(args.top_k):
+        text = ""
+        while len(text) < args.chunk_chars:
+            text += rng.choice(words) + " "
+        chunks.append(text[:args.chunk_chars])
+    model = RetrieveChunksResponse(video_id="dQw4w9WgXcQ", chunks=chunks)
+    content = model.model_dump(mode="json")
+
+    paths = {
+        "before": lambda: gzip_body(stdlib_json(content), level=9, minimum_size=1000),
+        "after": lambda: gzip_body(responses.dumps(content), level=1, minimum_size=1400, min_saving=0.1),
+    }
+    if responses.msgpack_available():
+        paths["msgpack"] = lambda: gzip_body(responses.packb(content), level=1, minimum_size=1400, min_saving=0.1)
+
+    print(f"top-{args.top_k} response, {args.chunk_chars}-char chunks, {args.runs} runs")
+    print(f"{'path':<10} {'encode us':>10} {'raw B':>8} {'wire B':>8}")
+    print(f"{'pydantic':<10} {per_call_us(lambda: model.model_dump(mode='json'), args.runs):>10.1f}")
+
+    timings = {}
+    for name, fn in paths.items():
+        timings[name] = per_call_us(fn, args.runs)
+        raw = stdlib_json(content) if name == "before" else (
+            responses.packb(content) if name == "msgpack" else responses.dumps(content)
+        )
+        print(f"{name:<10} {timings[name]:>10.1f} {len(raw):>8,} {len(fn()):>8,}")
+
+    print(f"encode speedup: {timings['before'] / timings['after']:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,6 +15,71 @@ CREATE INDEX IF NOT EXISTS idx_videos_video_id ON videos(video_id);
 -- Index on created_at for time-based queries
 CREATE INDEX IF NOT EXISTS idx_videos_created_at ON videos(created_at);
 
+-- Precomputed extractive key points (JSON list), filled at ingestion time
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS summary TEXT;
+
+-- Per-video content version, bumped on every chunk write / delete (HTTP ETag / Last-Modified)
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS content_version INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS content_updated_at TIMESTAMP WITH TIME ZONE;
+
+-- Retention: last retrieval (batched by the AccessTracker) and the archive of cold videos' chunks
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS last_accessed_at TIMESTAMP WITH TIME ZONE;
+
+CREATE TABLE IF NOT EXISTS chunk_archive (
+    video_id VARCHAR(50) PRIMARY KEY REFERENCES videos(video_id),
+    chunk_count INTEGER NOT NULL,
+    dim INTEGER NOT NULL,
+    precision VARCHAR(16) NOT NULL,
+    contents BYTEA NOT NULL,     -- zlib-compressed JSON list of chunk texts
+    embeddings BYTEA NOT NULL,   -- zlib-compressed row-major float16 / float32 matrix
+    archived_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Embedding model of each video's chunks, and vectors staged by a model
+-- migration (`python -m app.admin embeddings migrate --to <model>`) until
+-- all of a video's chunks are re-embedded and it switches over
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS embedding_model VARCHAR(200);
+
+CREATE TABLE IF NOT EXISTS chunk_reembeddings (
+    video_id VARCHAR(50) NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    model VARCHAR(200) NOT NULL,
+    embedding BYTEA NOT NULL,    -- float32 row
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (video_id, chunk_index)
+);
+
+-- Transcript chunks with embeddings (pgvector). The dimension must match
+-- EMBEDDING_MODEL (384 for the default MiniLM model). With
+-- EMBEDDING_PRECISION=float16 (or int8) use halfvec(384) instead of vector(384).
+CREATE EXTENSION IF NOT EXISTS vector;
+
+CREATE TABLE IF NOT EXISTS chunks (
+    id SERIAL PRIMARY KEY,
+    video_id VARCHAR(50) REFERENCES videos(video_id),
+    chunk_index INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    embedding vector(384),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_chunks_video_id ON chunks(video_id);
+
+-- Migrating an existing vector(384) column to half precision:
+-- ALTER TABLE chunks ALTER COLUMN embedding TYPE halfvec(384) USING embedding::halfvec(384);
+
+-- Large deployments: hash partition chunks on video_id so per-video search
+-- and deletes touch one partition and its own vector index. Migrate an
+-- existing table online with `python -m app.admin partitions migrate`
+-- (CHUNK_PARTITIONS, default 16), then `python -m app.admin index build`.
+-- The resulting layout:
+-- CREATE TABLE chunks (LIKE chunks_unpartitioned INCLUDING DEFAULTS) PARTITION BY HASH (video_id);
+-- ALTER TABLE chunks ADD PRIMARY KEY (id, video_id);
+-- CREATE TABLE chunks_p00 PARTITION OF chunks FOR VALUES WITH (MODULUS 16, REMAINDER 0);
+-- ... chunks_p01 .. chunks_p15
+-- CREATE INDEX ON chunks (video_id, chunk_index);
+-- CREATE INDEX CONCURRENTLY chunks_p00_embedding_hnsw_idx ON chunks_p00 USING hnsw (embedding vector_cosine_ops);
+
 -- Table Description:
 -- 
 -- id: Auto-incrementing primary key
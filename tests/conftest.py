@@ -3,15 +3,32 @@ from sqlalchemy.exc import SQLAlchemyError
 from fastapi import HTTPException
 import logging
 
+import pytest
+
 from app.services.transcript_service import TranscriptService
 from app.services.chunking_service import ChunkingService
 from app.services.embedding_service import EmbeddingService
 from app.services.vector_store_service import VectorStoreService
 from app.repositories.video_repository import VideoRepository
+from app.services.prefetch_service import video_prefetcher
+from app.utils.admission import get_admission_controller
 
 logger = logging.getLogger(__name__)
 
 
+@pytest.fixture(autouse=True)
+def reset_admission():
+    """Rate-limit buckets are process-wide: every test starts with full ones."""
+    get_admission_controller().reset()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def no_background_prefetch(monkeypatch):
+    """Searches warm the process-wide prefetcher; tests that want it build their own."""
+    monkeypatch.setattr(video_prefetcher, "workers", 0)
+
+
 class VideoService:
 
     def __init__(self, db: Session):
@@ -0,0 +1,231 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils.admission import (
+    INGEST,
+    RETRIEVE,
+    AdmissionController,
+    AdmissionMiddleware,
+    Lane,
+    MemoryAdmissionStore,
+    Rejected,
+    SqliteAdmissionStore,
+    client_key,
+    lane_for,
+)
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryAdmissionStore()
+    return SqliteAdmissionStore(str(tmp_path / "admission.sqlite3"), slot_ttl=60)
+
+
+def lanes(rate=0.0, burst=1, concurrency=0, queue=0):
+    return {
+        INGEST: Lane(INGEST, rate, burst, concurrency, queue),
+        RETRIEVE: Lane(RETRIEVE, 0.0, 1, 0, 0),
+    }
+
+
+# ─── stores ───────────────────────────────────────────────────────────────────
+
+class TestStores:
+
+    def test_token_bucket(self, store):
+        assert [store.take_token("c", 0.5, 3, 0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert store.take_token("c", 0.5, 3, 0.0) == pytest.approx(2.0)
+
+        # one token back after 1 / rate seconds
+        assert store.take_token("c", 0.5, 3, 2.0) == 0.0
+        assert store.take_token("c", 0.5, 3, 2.0) > 0
+
+    def test_clients_have_separate_buckets(self, store):
+        assert store.take_token("a", 1.0, 1, 0.0) == 0.0
+        assert store.take_token("b", 1.0, 1, 0.0) == 0.0
+        assert store.take_token("a", 1.0, 1, 0.0) > 0
+
+    def test_slots(self, store):
+        first = store.acquire_slot(INGEST, 2, 0.0)
+        second = store.acquire_slot(INGEST, 2, 0.0)
+
+        assert first and second and first != second
+        assert store.acquire_slot(INGEST, 2, 0.0) is None
+        assert store.acquire_slot(RETRIEVE, 2, 0.0) is not None
+        assert store.in_flight(INGEST, 0.0) == 2
+
+        store.release_slot(INGEST, first)
+        assert store.acquire_slot(INGEST, 2, 0.0) is not None
+
+
+class TestSqliteStore:
+
+    def test_shared_by_workers(self, tmp_path):
+        path = str(tmp_path / "admission.sqlite3")
+        worker_a, worker_b = SqliteAdmissionStore(path), SqliteAdmissionStore(path)
+
+        assert worker_a.take_token("c", 1.0, 1, 0.0) == 0.0
+        assert worker_b.take_token("c", 1.0, 1, 0.0) > 0
+
+        assert worker_a.acquire_slot(INGEST, 1, 0.0) is not None
+        assert worker_b.acquire_slot(INGEST, 1, 0.0) is None
+
+    def test_slot_of_dead_worker_expires(self, tmp_path):
+        store = SqliteAdmissionStore(str(tmp_path / "admission.sqlite3"), slot_ttl=10)
+
+        assert store.acquire_slot(INGEST, 1, 0.0) is not None
+        assert store.acquire_slot(INGEST, 1, 5.0) is None
+        assert store.acquire_slot(INGEST, 1, 11.0) is not None
+
+    def test_renewed_slot_outlives_ttl(self, tmp_path):
+        store = SqliteAdmissionStore(str(tmp_path / "admission.sqlite3"), slot_ttl=10)
+
+        slot = store.acquire_slot(INGEST, 1, 0.0)
+        store.renew_slot(INGEST, slot, 8.0)
+        assert store.acquire_slot(INGEST, 1, 15.0) is None
+        assert store.in_flight(INGEST, 15.0) == 1
+
+
+# ─── controller ───────────────────────────────────────────────────────────────
+
+class TestController:
+
+    def test_rate_limited(self):
+        controller = AdmissionController(MemoryAdmissionStore(), lanes(rate=0.25, burst=1), clock=Clock())
+
+        asyncio.run(controller.acquire(INGEST, "c"))
+        with pytest.raises(Rejected) as rejected:
+            asyncio.run(controller.acquire(INGEST, "c"))
+
+        assert rejected.value.status_code == 429
+        assert rejected.value.retry_after == pytest.approx(4.0)
+        assert controller.stats()[INGEST]["rejected"] == {"rate_limited": 1}
+
+    def test_queue_full_sheds_load(self):
+        controller = AdmissionController(MemoryAdmissionStore(), lanes(concurrency=1, queue=0))
+
+        asyncio.run(controller.acquire(INGEST, "a"))
+        with pytest.raises(Rejected) as rejected:
+            asyncio.run(controller.acquire(INGEST, "b"))
+
+        assert rejected.value.status_code == 503
+        assert rejected.value.reason == "queue_full"
+
+    def test_queue_timeout(self):
+        controller = AdmissionController(MemoryAdmissionStore(), lanes(concurrency=1, queue=1), queue_timeout=0.05)
+
+        asyncio.run(controller.acquire(INGEST, "a"))
+        with pytest.raises(Rejected) as rejected:
+            asyncio.run(controller.acquire(INGEST, "b"))
+
+        assert rejected.value.reason == "queue_timeout"
+
+    def test_queued_request_gets_released_slot(self):
+        controller = AdmissionController(MemoryAdmissionStore(), lanes(concurrency=1, queue=1), queue_timeout=5)
+
+        async def scenario():
+            slot = await controller.acquire(INGEST, "a")
+            waiter = asyncio.create_task(controller.acquire(INGEST, "b"))
+            await asyncio.sleep(0.01)
+            assert controller.stats()[INGEST]["queued"] == 1
+            await controller.release(INGEST, slot)
+            return await asyncio.wait_for(waiter, 1)
+
+        assert asyncio.run(scenario()) is not None
+        assert controller.stats()[INGEST]["admitted"] == 2
+
+    def test_long_request_keeps_renewing_its_slot(self, tmp_path):
+        clock = Clock(0.0)
+        store = SqliteAdmissionStore(str(tmp_path / "admission.sqlite3"), slot_ttl=0.06)
+        controller = AdmissionController(store, lanes(concurrency=1), clock=clock)
+
+        async def scenario():
+            slot = await controller.acquire(INGEST, "a")
+            heartbeat = controller.keep_alive(INGEST, slot)
+            clock.now = 1.0  # long past the first lease
+            await asyncio.sleep(0.1)
+            heartbeat.cancel()
+            return store.in_flight(INGEST, clock.now)
+
+        assert asyncio.run(scenario()) == 1
+
+    def test_memory_slots_need_no_heartbeat(self):
+        controller = AdmissionController(MemoryAdmissionStore(), lanes(concurrency=1))
+        assert controller.keep_alive(INGEST, "slot") is None
+
+
+# ─── middleware ───────────────────────────────────────────────────────────────
+
+def make_client(controller) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, controller=controller, enabled=True)
+
+    @app.post("/process_video/")
+    def ingest():
+        return {"ok": True}
+
+    @app.post("/retrieve_chunks/")
+    def retrieve():
+        return {"ok": True}
+
+    @app.get("/health")
+    def health():
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+class TestMiddleware:
+
+    def test_lanes_by_path(self):
+        assert lane_for("/process_video/bulk") == INGEST
+        assert lane_for("/summary/abc") == RETRIEVE
+        assert lane_for("/search/") == RETRIEVE
+        assert lane_for("/health") is None
+        assert lane_for("/process_videos") is None
+
+    def test_client_identity(self):
+        assert client_key({"type": "http", "headers": [(b"x-telegram-id", b"42")]}) == "tg:42"
+        key = client_key({"type": "http", "headers": [(b"x-api-key", b"secret")]})
+        assert key.startswith("key:") and "secret" not in key
+        assert client_key({"type": "http", "headers": [], "client": ("1.2.3.4", 5)}) == "ip:1.2.3.4"
+
+    def test_429_with_retry_after(self):
+        client = make_client(AdmissionController(MemoryAdmissionStore(), lanes(rate=0.1, burst=1)))
+
+        assert client.post("/process_video/", headers={"X-Telegram-Id": "1"}).status_code == 200
+        response = client.post("/process_video/", headers={"X-Telegram-Id": "1"})
+
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "10"
+
+        # another user, the retrieval lane and unadmitted paths are unaffected
+        assert client.post("/process_video/", headers={"X-Telegram-Id": "2"}).status_code == 200
+        assert client.post("/retrieve_chunks/", headers={"X-Telegram-Id": "1"}).status_code == 200
+        assert client.get("/health").status_code == 200
+
+    def test_503_when_lane_saturated(self):
+        controller = AdmissionController(MemoryAdmissionStore(), lanes(concurrency=1, queue=0))
+        client = make_client(controller)
+        held = asyncio.run(controller.acquire(INGEST, "other"))
+
+        response = client.post("/process_video/")
+        assert response.status_code == 503
+        assert "retry-after" in response.headers
+        assert client.post("/retrieve_chunks/").status_code == 200
+
+        asyncio.run(controller.release(INGEST, held))
+        assert client.post("/process_video/").status_code == 200
+        assert controller.stats()[INGEST]["in_flight"] == 0
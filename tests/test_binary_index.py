@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.repositories.binary_chunk_index import BinaryChunkIndex
+from app.utils.binary_quantization import hamming_distances, pack_signs, popcount
+
+
+class TestPacking:
+
+    def test_pack_signs_layout(self):
+        vector = np.full(70, -1.0)
+        vector[[0, 3, 64]] = 1.0
+        codes = pack_signs(vector)
+        assert codes.dtype == np.uint64
+        assert codes.shape == (1, 2)
+        assert int(codes[0, 0]) == 0b1001
+        assert int(codes[0, 1]) == 1
+
+    def test_hamming_distance(self):
+        a = pack_signs([1, 1, -1, -1])
+        b = pack_signs([[1, 1, -1, -1], [-1, 1, 1, -1], [-1, -1, 1, 1]])
+        assert list(hamming_distances(b, a[0])) == [0, 2, 4]
+
+    def test_popcount(self):
+        words = np.array([0, 1, 2**64 - 1], dtype=np.uint64)
+        assert list(popcount(words)) == [0, 1, 64]
+
+
+@pytest.fixture
+def corpus():
+    # clustered like real chunk embeddings: one centre per video plus noise
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((50, 384)).astype(np.float32)
+    matrix = centers[np.arange(5000) % 50] + 0.6 * rng.standard_normal((5000, 384)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def index(corpus):
+    index = BinaryChunkIndex(precision="float32")
+    video_ids = [f"vid{i % 50}" for i in range(len(corpus))]
+    index.add(list(range(2500)), video_ids[:2500], [0] * 2500, corpus[:2500])
+    index.add(list(range(2500, 5000)), video_ids[2500:], [0] * 2500, corpus[2500:])
+    return index
+
+
+class TestTwoStageSearch:
+
+    def test_recall_against_exact(self, corpus, index):
+        rng = np.random.default_rng(1)
+        hits = 0
+        for q in rng.integers(0, len(corpus), 20):
+            query = corpus[q] + (0.3 / np.sqrt(384)) * rng.standard_normal(384).astype(np.float32)
+            exact = set(np.argsort(-(corpus @ query))[:10])
+            found = {row["id"] for row in index.search(query, top_k=10, candidates=500)}
+            hits += len(exact & found)
+        assert hits / 200 >= 0.9
+
+    def test_exact_match_ranks_first(self, corpus, index):
+        row = index.search(corpus[42], top_k=1)[0]
+        assert row["id"] == 42
+        assert row["video_id"] == "vid42"
+        assert row["score"] == pytest.approx(1.0, abs=1e-5)
+
+    def test_video_filter(self, corpus, index):
+        rows = index.search(corpus[42], top_k=5, video_ids=["vid7"])
+        assert rows and all(row["video_id"] == "vid7" for row in rows)
+
+    def test_delete_video(self, corpus, index):
+        index.delete_video("vid42")
+        assert all(row["video_id"] != "vid42" for row in index.search(corpus[42], top_k=20))
+        assert len(index) == 4900
+
+    def test_empty_index(self):
+        assert BinaryChunkIndex().search([1.0, 0.0]) == []
+
+
+class TestSync:
+
+    def test_reloads_videos_rewritten_by_other_processes(self):
+        clock = {"now": 0.0}
+        index = BinaryChunkIndex(sync_interval=30, clock=lambda: clock["now"])
+        db = MagicMock()
+        db.execute.return_value.partitions.return_value = []
+        index.load(db)
+
+        with patch("app.repositories.binary_chunk_index.VideoRepository") as repo, \
+                patch.object(index, "reload_video") as reload:
+            repo.return_value.ids_changed_since.return_value = ["vid7"]
+            assert index.sync(db) == 0  # just loaded
+            clock["now"] = 31.0
+            assert index.sync(db) == 1
+            assert index.sync(db) == 0
+
+        reload.assert_called_once_with(db, "vid7")
+
+    def test_reload_replaces_a_videos_rows(self, corpus, index):
+        db = MagicMock()
+        db.execute.return_value.all.return_value = [(9001, 0, corpus[0]), (9002, 1, corpus[1])]
+
+        index.reload_video(db, "vid42")
+
+        rows = index.search(corpus[0], top_k=50, video_ids=["vid42"])
+        assert {row["id"] for row in rows} == {9001, 9002}
@@ -0,0 +1,158 @@
+import json
+import pytest
+from unittest.mock import MagicMock, patch
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.database import get_db
+from app.models.video import video
+from app.repositories.video_repository import VideoRepository
+from app.services.video_service import VideoService
+
+
+# ─────────────────────────────────────────────
+# Fixtures
+# ─────────────────────────────────────────────
+
+@pytest.fixture
+def mock_db():
+    return MagicMock()
+
+
+@pytest.fixture
+def client(mock_db):
+    app.dependency_overrides[get_db] = lambda: mock_db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def service(mock_db):
+    with patch("app.services.video_service.EmbeddingService") as mock_embedding, \
+         patch("app.services.video_service.VectorStoreService"):
+        mock_embedding.return_value.batch_embed.side_effect = lambda texts: [[0.1, 0.2]] * len(texts)
+        svc = VideoService(mock_db)
+        svc.repo = MagicMock()
+        svc.repo.get_existing_ids.return_value = set()
+        yield svc
+
+
+def fake_fetch(video_id):
+    return f"transcript for {video_id}", "en"
+
+
+# ─────────────────────────────────────────────
+# Service
+# ─────────────────────────────────────────────
+
+class TestProcessVideos:
+
+    @patch("app.services.video_service.TranscriptService.fetch", side_effect=fake_fetch)
+    def test_processes_ids_and_urls(self, _fetch, service):
+        events = list(service.process_videos([
+            "jNQXAC9IVRw",
+            "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        ]))
+
+        assert {e["video_id"] for e in events} == {"jNQXAC9IVRw", "dQw4w9WgXcQ"}
+        assert all(e["status"] == "processed" for e in events)
+        assert service.repo.create_video.call_count == 2
+        assert service.vector_store.bulk_insert_chunks.call_count == 2
+
+    @patch("app.services.video_service.TranscriptService.fetch", side_effect=fake_fetch)
+    def test_existing_videos_skipped_with_single_query(self, mock_fetch, service):
+        service.repo.get_existing_ids.return_value = {"jNQXAC9IVRw"}
+
+        events = list(service.process_videos(["jNQXAC9IVRw", "dQw4w9WgXcQ"]))
+
+        service.repo.get_existing_ids.assert_called_once_with(["jNQXAC9IVRw", "dQw4w9WgXcQ"])
+        mock_fetch.assert_called_once_with("dQw4w9WgXcQ")
+        statuses = {e["video_id"]: e["status"] for e in events}
+        assert statuses == {"jNQXAC9IVRw": "skipped", "dQw4w9WgXcQ": "processed"}
+
+    @patch("app.services.video_service.TranscriptService.fetch", side_effect=fake_fetch)
+    def test_duplicates_and_invalid_refs(self, mock_fetch, service):
+        events = list(service.process_videos(["jNQXAC9IVRw", "jNQXAC9IVRw", "not a url"]))
+
+        assert mock_fetch.call_count == 1
+        assert [e["status"] for e in events] == ["invalid", "processed"]
+
+    @patch("app.services.video_service.TranscriptService.fetch", side_effect=fake_fetch)
+    def test_embeds_across_videos_in_shared_batch(self, _fetch, service):
+        list(service.process_videos(["jNQXAC9IVRw", "dQw4w9WgXcQ"]))
+
+        service.embedding.batch_embed.assert_called_once()
+        assert len(service.embedding.batch_embed.call_args.args[0]) == 2
+
+    @patch("app.services.video_service.TranscriptService.fetch")
+    def test_transcript_failure_does_not_stop_batch(self, mock_fetch, service):
+        def fetch(video_id):
+            if video_id == "jNQXAC9IVRw":
+                raise ValueError("No transcript found for this video.")
+            return fake_fetch(video_id)
+        mock_fetch.side_effect = fetch
+
+        events = list(service.process_videos(["jNQXAC9IVRw", "dQw4w9WgXcQ"]))
+
+        statuses = {e["video_id"]: e["status"] for e in events}
+        assert statuses == {"jNQXAC9IVRw": "failed", "dQw4w9WgXcQ": "processed"}
+
+
+class TestFailedChunkInsert:
+
+    @pytest.fixture
+    def stored(self):
+        engine = create_engine("sqlite://")
+        video.__table__.create(engine)
+        db = sessionmaker(bind=engine)()
+        with patch("app.services.video_service.EmbeddingService") as mock_embedding, \
+             patch("app.services.video_service.VectorStoreService"):
+            mock_embedding.return_value.batch_embed.side_effect = lambda texts: [[0.1, 0.2]] * len(texts)
+            svc = VideoService(db)
+            svc.vector_store.bulk_insert_chunks.side_effect = OperationalError("INSERT", {}, Exception("gone"))
+            yield svc
+        db.close()
+
+    @patch("app.services.video_service.TranscriptService.fetch", side_effect=fake_fetch)
+    def test_bulk_leaves_no_video_row(self, _fetch, stored):
+        events = list(stored.process_videos(["jNQXAC9IVRw"]))
+
+        assert [e["status"] for e in events] == ["failed"]
+        assert not VideoRepository(stored.db).exists("jNQXAC9IVRw")
+
+    @patch("app.services.video_service.TranscriptService.fetch", side_effect=fake_fetch)
+    def test_single_leaves_no_video_row(self, _fetch, stored):
+        with pytest.raises(HTTPException) as error:
+            stored.process_video("jNQXAC9IVRw")
+
+        assert error.value.status_code == 503
+        assert not VideoRepository(stored.db).exists("jNQXAC9IVRw")
+
+
+# ─────────────────────────────────────────────
+# Router
+# ─────────────────────────────────────────────
+
+class TestBulkEndpoint:
+
+    @patch("app.api.process_video.VideoService")
+    def test_streams_ndjson(self, mock_service_class, client):
+        mock_service_class.return_value.process_videos.return_value = iter([
+            {"video_id": "jNQXAC9IVRw", "status": "skipped", "chunk_count": 0, "detail": "Video already processed."},
+            {"video_id": "dQw4w9WgXcQ", "status": "processed", "chunk_count": 3, "detail": "Video processed successfully."},
+        ])
+
+        response = client.post("/process_video/bulk", json={"videos": ["jNQXAC9IVRw", "dQw4w9WgXcQ"]})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["status"] for line in lines] == ["skipped", "processed"]
+
+    def test_empty_list_rejected(self, client):
+        response = client.post("/process_video/bulk", json={"videos": []})
+        assert response.status_code == 422
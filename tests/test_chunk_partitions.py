@@ -0,0 +1,138 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.repositories.chunk_partitions import (
+    PartitionLayout,
+    PartitionRouter,
+    UNPARTITIONED,
+    chunk_table,
+    partition_name,
+    read_layout,
+    router_for,
+)
+from app.repositories.chunk_repository import ChunkRepository
+from app.services.index_service import IndexManager
+from app.services.partition_service import partitioned_schema
+
+
+def pg_conn(rows):
+    conn = MagicMock()
+    conn.dialect.name = "postgresql"
+    conn.execute.return_value.fetchall.return_value = rows
+    return conn
+
+
+def partitioned_db(video_table: str):
+    """Session mock whose chunks table is partitioned and whose video lives in `video_table`."""
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "postgresql"
+    db.execute.return_value.fetchall.return_value = []
+    router = router_for(db.get_bind.return_value)
+    router.layout = PartitionLayout(4, {r: partition_name(r, 4) for r in range(4)})
+    router._videos["vid"] = video_table
+    return db
+
+
+# ─── layout ───────────────────────────────────────────────────────────────────
+
+class TestLayout:
+
+    def test_partition_names_sort(self):
+        assert partition_name(3, 16) == "chunks_p03"
+        assert partition_name(7, 256) == "chunks_p007"
+
+    def test_read_from_catalog(self):
+        conn = pg_conn([
+            ("chunks_p01", "FOR VALUES WITH (modulus 2, remainder 1)"),
+            ("chunks_p00", "FOR VALUES WITH (modulus 2, remainder 0)"),
+        ])
+        assert read_layout(conn) == PartitionLayout(2, {0: "chunks_p00", 1: "chunks_p01"})
+
+    def test_plain_or_incomplete_table_is_unpartitioned(self):
+        assert read_layout(pg_conn([])) == UNPARTITIONED
+        assert read_layout(pg_conn([("chunks_p00", "FOR VALUES WITH (modulus 2, remainder 0)")])) == UNPARTITIONED
+
+    def test_sqlite_is_unpartitioned(self):
+        db = MagicMock()
+        db.get_bind.return_value.dialect.name = "sqlite"
+        assert chunk_table(db, "vid") == "chunks"
+        db.execute.assert_not_called()
+
+
+class TestRouter:
+
+    def test_partition_asked_once_per_video(self):
+        router = PartitionRouter()
+        router.layout = PartitionLayout(4, {r: partition_name(r, 4) for r in range(4)})
+        db = MagicMock()
+        db.execute.return_value.scalar_one.return_value = 2
+
+        assert router.table_for(db, "vid") == "chunks_p02"
+        assert router.table_for(db, "vid") == "chunks_p02"
+        assert db.execute.call_count == 1
+        assert "satisfies_hash_partition" in str(db.execute.call_args.args[0])
+
+    def test_unpartitioned_needs_no_lookup(self):
+        router = PartitionRouter()
+        db = MagicMock()
+        db.connection.return_value = pg_conn([])
+
+        assert router.table_for(db, "vid") == "chunks"
+        db.execute.assert_not_called()
+
+
+# ─── repository routing ───────────────────────────────────────────────────────
+
+class TestRepositoryRouting:
+
+    def test_search_reads_one_partition(self):
+        db = partitioned_db("chunks_p01")
+        ChunkRepository(db).search_similar("vid", [1.0, 0.0])
+
+        sql = str(db.execute.call_args.args[0])
+        assert "FROM chunks_p01" in sql and "FROM chunks\n" not in sql
+
+    def test_writes_and_deletes_target_the_partition(self):
+        db = partitioned_db("chunks_p03")
+        repo = ChunkRepository(db)
+
+        repo.bulk_insert("vid", ["a"], [[1.0, 0.0]])
+        assert "INSERT INTO chunks_p03" in str(db.execute.call_args.args[0])
+
+        repo.delete_by_video("vid")
+        assert "DELETE FROM chunks_p03" in str(db.execute.call_args.args[0])
+
+        repo.get_chunk_ids("vid")
+        assert "FROM chunks_p03" in str(db.execute.call_args.args[0])
+
+
+# ─── migration and indexes ────────────────────────────────────────────────────
+
+class TestMigrationSchema:
+
+    def test_hash_partitions_cover_every_remainder(self):
+        ddl = partitioned_schema(4)
+
+        assert "PARTITION BY HASH (video_id)" in ddl[0]
+        assert any("PRIMARY KEY (id, video_id)" in s for s in ddl)
+        bounds = [s for s in ddl if "PARTITION OF" in s]
+        assert [s.split()[5] for s in bounds] == ["chunks_p00", "chunks_p01", "chunks_p02", "chunks_p03"]
+        assert all(f"REMAINDER {r})" in s for r, s in enumerate(bounds))
+
+    def test_needs_two_partitions(self):
+        with pytest.raises(ValueError):
+            partitioned_schema(1)
+
+
+class TestPartitionIndexes:
+
+    def test_one_index_per_partition_sized_for_the_largest(self):
+        manager = IndexManager(MagicMock())
+        rows = {"chunks_p00": 40_000, "chunks_p01": 60_000}
+
+        with patch.object(IndexManager, "table_rows", return_value=rows):
+            plans = manager.plans()
+
+        assert [p.index_name for p in plans] == ["chunks_p00_embedding_hnsw_idx", "chunks_p01_embedding_hnsw_idx"]
+        assert {p.row_count for p in plans} == {60_000}
+        assert "ON chunks_p01 USING hnsw" in plans[1].create_sql()
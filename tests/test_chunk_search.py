@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.repositories.chunk_repository import ChunkRepository, to_vector_literal
+from app.repositories.memory_chunk_repository import InMemoryChunkRepository, top_k_above
+from app.repositories.video_repository import EmbeddingState, EmbeddingStateChanged
+
+
+@pytest.fixture
+def repo():
+    repo = InMemoryChunkRepository()
+    repo.bulk_insert(
+        "vid",
+        ["north", "north-east", "east", "south"],
+        [[0, 1], [1, 1], [1, 0], [0, -1]],
+    )
+    return repo
+
+
+class TestInMemorySearch:
+
+    def test_results_sorted_by_cosine(self, repo):
+        rows = repo.search_similar("vid", [0, 2], top_k=3)
+        assert [r["content"] for r in rows] == ["north", "north-east", "east"]
+        assert rows[0]["score"] == pytest.approx(1.0)
+        assert rows[1]["score"] == pytest.approx(np.sqrt(0.5))
+
+    def test_threshold_applied_before_limit(self, repo):
+        rows = repo.search_similar("vid", [0, 1], top_k=4, threshold=0.5)
+        assert [r["content"] for r in rows] == ["north", "north-east"]
+
+    def test_rows_carry_id_and_chunk_index(self, repo):
+        row = repo.search_similar("vid", [1, 0], top_k=1)[0]
+        assert set(row) == {"id", "chunk_index", "score", "content"}
+        assert row["chunk_index"] == 2
+
+    def test_unknown_video_and_delete(self, repo):
+        assert repo.search_similar("other", [1, 0]) == []
+        repo.delete_by_video("vid")
+        assert repo.search_similar("vid", [1, 0]) == []
+
+    def test_top_k_above_matches_full_sort(self):
+        scores = np.random.default_rng(0).random(1000).astype(np.float32)
+        expected = [i for i in np.argsort(-scores) if scores[i] >= 0.3][:10]
+        assert list(top_k_above(scores, 10, 0.3)) == expected
+
+
+class TestSqlSearch:
+
+    def test_single_query_with_cosine_threshold(self):
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = []
+
+        ChunkRepository(db).search_similar("vid", [0.5, 0.25], top_k=3, threshold=0.75)
+
+        db.execute.assert_called_once()
+        sql, params = str(db.execute.call_args.args[0]), db.execute.call_args.args[1]
+        assert "<=>" in sql and "<->" not in sql
+        assert "LIMIT :top_k" in sql
+        assert params["max_distance"] == pytest.approx(0.25)
+        assert params["embedding"] == "[0.5,0.25]"
+
+    def test_vector_literal(self):
+        assert to_vector_literal(np.array([1, 2.5], dtype=np.float32)) == "[1.0,2.5]"
+
+
+class TestEmbeddingStateCheck:
+
+    @staticmethod
+    def searched(*rows):
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = [MagicMock(_mapping=row) for row in rows]
+        return ChunkRepository(db)
+
+    @staticmethod
+    def row(id, model="m1", version=3):
+        return {"id": id, "chunk_index": id, "score": 0.9, "content": f"c{id}",
+                "embedding_model": model, "content_version": version}
+
+    def test_state_read_in_the_search_statement(self):
+        repo = self.searched(self.row(1), self.row(2))
+
+        rows = repo.search_similar("vid", [1.0, 0.0], state=EmbeddingState("m1", 3))
+
+        assert [set(r) for r in rows] == [{"id", "chunk_index", "score", "content"}] * 2
+        assert "JOIN nearest" in str(repo.db.execute.call_args.args[0])
+
+    def test_switched_video_raises_even_without_hits(self):
+        repo = self.searched({**self.row(None), "embedding_model": "m2", "content_version": 4})
+
+        with pytest.raises(EmbeddingStateChanged) as changed:
+            repo.search_similar("vid", [1.0, 0.0], state=EmbeddingState("m1", 3))
+        assert changed.value.found == EmbeddingState("m2", 4)
+
+    def test_no_hits_and_no_state(self):
+        assert self.searched(self.row(None)).search_similar("vid", [1.0, 0.0]) == []
+
+    def test_replica_without_hits_is_not_read_again(self):
+        repo = self.searched(self.row(None))
+
+        with patch("app.repositories.chunk_repository.read_with_fallback") as routed:
+            routed.side_effect = lambda db, video_id, read, missing: read({})
+            repo.search_similar("vid", [1.0, 0.0], state=EmbeddingState("m1", 3))
+        missing = routed.call_args.kwargs["missing"]
+
+        assert missing([self.row(None)]) is False  # the replica has the video, just no hits
+        assert missing([]) is True  # the replica has not replayed the video yet
+        assert missing([self.row(None, version=2)]) is True
@@ -0,0 +1,94 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.database import get_db
+from app.repositories.chunk_repository import ChunkRepository
+from app.services.search_service import group_by_video, search_corpus
+
+
+def make_rows(n):
+    return [
+        {"id": i, "video_id": f"v{i % 3}", "chunk_index": i, "score": 1 - i / 100, "content": f"c{i}"}
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_db] = lambda: MagicMock()
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+class TestSearchService:
+
+    @patch("app.services.search_service.EmbeddingService")
+    @patch("app.services.search_service.VectorStoreService")
+    def test_pagination_requests_one_extra_row(self, mock_store, _embedding):
+        mock_store.return_value.search_all.return_value = make_rows(21)
+
+        result = search_corpus("q", MagicMock(), page=2, page_size=10)
+
+        assert mock_store.return_value.search_all.call_args.args[1] == 21
+        assert [r["id"] for r in result["results"]] == list(range(10, 20))
+        assert result["has_more"] is True
+
+    @patch("app.services.search_service.EmbeddingService")
+    @patch("app.services.search_service.VectorStoreService")
+    def test_last_page(self, mock_store, _embedding):
+        mock_store.return_value.search_all.return_value = make_rows(15)
+        result = search_corpus("q", MagicMock(), page=2, page_size=10)
+        assert len(result["results"]) == 5
+        assert result["has_more"] is False
+
+    def test_page_beyond_limit_rejected(self):
+        with pytest.raises(ValueError):
+            search_corpus("q", MagicMock(), page=100, page_size=50)
+
+    def test_group_by_video_keeps_rank_order(self):
+        groups = group_by_video(make_rows(5))
+        assert [g["video_id"] for g in groups] == ["v0", "v1", "v2"]
+        assert [c["id"] for c in groups[0]["chunks"]] == [0, 3]
+        assert groups[1]["best_score"] == pytest.approx(0.99)
+
+
+class TestCorpusSql:
+
+    def test_filters(self):
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = []
+
+        ChunkRepository(db).search_corpus([1.0], limit=5, language="hi", video_ids=["a", "b"])
+
+        sql, params = str(db.execute.call_args.args[0]), db.execute.call_args.args[1]
+        assert "JOIN videos v" in sql
+        assert "c.video_id = ANY(:video_ids)" in sql
+        assert params["language"] == "hi" and params["video_ids"] == ["a", "b"]
+
+    def test_no_filters(self):
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = []
+        ChunkRepository(db).search_corpus([1.0], limit=5)
+        sql = str(db.execute.call_args.args[0])
+        assert "WHERE" not in sql and "JOIN" not in sql
+
+
+class TestSearchEndpoint:
+
+    @patch("app.api.search.search_corpus")
+    def test_grouped_response(self, mock_search, client):
+        rows = make_rows(2)
+        mock_search.return_value = {
+            "page": 1, "page_size": 10, "has_more": False,
+            "results": rows, "groups": group_by_video(rows),
+        }
+
+        response = client.post("/search/", json={"question": "pricing", "group_by_video": True})
+
+        assert response.status_code == 200
+        assert response.json()["groups"][0]["video_id"] == "v0"
+
+    def test_empty_question_rejected(self, client):
+        assert client.post("/search/", json={"question": ""}).status_code == 422
@@ -0,0 +1,122 @@
+import struct
+import tracemalloc
+
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.repositories.chunk_repository import ChunkRepository, pgcopy_chunk_rows
+from app.services.embedding_service import EmbeddingService
+
+
+def parse_pgcopy(payload: bytes, float_type: str = ">f4"):
+    """Minimal reader of the COPY BINARY stream written by pgcopy_chunk_rows."""
+    assert payload.startswith(b"PGCOPY\n\xff\r\n\x00")
+    pos, rows = 19, []
+    while True:
+        (fields,) = struct.unpack_from(">h", payload, pos)
+        pos += 2
+        if fields == -1:
+            break
+        values = []
+        for _ in range(fields):
+            (length,) = struct.unpack_from(">i", payload, pos)
+            pos += 4
+            values.append(payload[pos:pos + length])
+            pos += length
+        video, index, content, vector = values
+        dim, unused = struct.unpack_from(">hh", vector)
+        rows.append((
+            video.decode(),
+            struct.unpack(">i", index)[0],
+            content.decode(),
+            np.frombuffer(vector[4:], dtype=float_type),
+            dim,
+            unused,
+        ))
+    assert pos == len(payload)
+    return rows
+
+
+# ─── binary COPY payload ──────────────────────────────────────────────────────
+
+class TestPgCopy:
+
+    def test_rows_round_trip(self):
+        matrix = np.array([[0.5, -1.25, 3.0], [1e-3, 0.0, -7.5]], dtype=np.float32)
+
+        rows = parse_pgcopy(pgcopy_chunk_rows("vid", ["héllo", "world"], matrix, sql_type="vector"))
+
+        assert [(r[0], r[1], r[2], r[4], r[5]) for r in rows] == [("vid", 0, "héllo", 3, 0), ("vid", 1, "world", 3, 0)]
+        np.testing.assert_array_equal(np.stack([r[3] for r in rows]), matrix)
+
+    def test_halfvec_uses_float2(self):
+        matrix = np.array([[0.5, -2.0]], dtype=np.float32)
+        rows = parse_pgcopy(pgcopy_chunk_rows("vid", ["a"], matrix, sql_type="halfvec"), float_type=">f2")
+        assert rows[0][3].tolist() == [0.5, -2.0]
+
+    def test_count_mismatch_rejected(self):
+        with pytest.raises(ValueError):
+            pgcopy_chunk_rows("vid", ["a", "b"], np.zeros((1, 3)))
+
+    def test_allocates_little_beyond_payload(self):
+        matrix = np.random.default_rng(0).standard_normal((1000, 384)).astype(np.float32)
+        chunks = ["chunk text"] * 1000
+
+        tracemalloc.start()
+        payload = pgcopy_chunk_rows("vid", chunks, matrix, sql_type="vector")
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # wire-order matrix + row parts + the joined payload; the tolist/text path peaks ~10x higher
+        assert peak < 3 * len(payload) + matrix.nbytes
+
+
+# ─── repository / service handoff ─────────────────────────────────────────────
+
+class TestHandoff:
+
+    def test_psycopg_insert_uses_binary_copy(self):
+        db = MagicMock()
+        db.get_bind.return_value.dialect.driver = "psycopg"
+        cursor = db.connection.return_value.connection.driver_connection.cursor.return_value.__enter__.return_value
+        copy = cursor.copy.return_value.__enter__.return_value
+
+        ChunkRepository(db).bulk_insert("vid", ["a", "b"], np.ones((2, 3), dtype=np.float32))
+
+        assert "FORMAT BINARY" in cursor.copy.call_args.args[0]
+        assert len(parse_pgcopy(copy.write.call_args.args[0])) == 2
+        db.execute.assert_not_called()
+        db.commit.assert_called_once()
+
+    def test_psycopg2_insert_uses_binary_copy(self):
+        db = MagicMock()
+        db.get_bind.return_value.dialect.driver = "psycopg2"
+        cursor = db.connection.return_value.connection.driver_connection.cursor.return_value.__enter__.return_value
+
+        ChunkRepository(db).bulk_insert("vid", ["a", "b"], np.ones((2, 3), dtype=np.float32))
+
+        sql, stream = cursor.copy_expert.call_args.args
+        assert "FORMAT BINARY" in sql
+        assert len(parse_pgcopy(stream.read())) == 2
+        db.execute.assert_not_called()
+        db.commit.assert_called_once()
+
+    def test_other_drivers_fall_back_to_text_literals(self):
+        db = MagicMock()
+        db.get_bind.return_value.dialect.driver = "pg8000"
+
+        ChunkRepository(db).bulk_insert("vid", ["a"], np.array([[1.0, 2.5]], dtype=np.float32))
+
+        params = db.execute.call_args.args[1]
+        assert params[0]["embedding"] == "[1.0,2.5]"
+
+    def test_embedding_service_returns_arrays(self):
+        scheduler = MagicMock()
+        scheduler.embed_bulk.return_value = np.ones((2, 3), dtype=np.float32)
+        scheduler.embed_query.return_value = np.ones(3, dtype=np.float32)
+
+        with patch("app.services.embedding_scheduler.get_scheduler", return_value=scheduler):
+            service = EmbeddingService("model")
+            assert isinstance(service.batch_embed(["a", "b"]), np.ndarray)
+            assert service.embed("q").shape == (3,)
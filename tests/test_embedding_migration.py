@@ -0,0 +1,210 @@
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config import EMBEDDING_DIM
+from app.models.chunk_archive import ChunkArchive
+from app.models.chunk_reembedding import ChunkReembedding
+from app.models.video import video
+from app.repositories.archive_repository import ChunkArchiveRepository
+from app.repositories.memory_chunk_repository import InMemoryChunkRepository
+from app.repositories.reembedding_repository import ChunkReembeddingRepository
+from app.repositories.vector_backend import _StoreBackend
+from app.repositories.video_repository import VideoRepository
+from app.services.embedding_migration_service import EmbeddingMigration
+from app.services.embedding_models import EmbeddingModels, embedding_models
+from app.services.query_cache_service import query_cache
+from app.services.rag_service import retrieve_relevant_chunks
+from app.services.retention_service import RetentionService, unpack
+from app.services.search_service import search_across_models
+from app.services.vector_store_service import VectorStoreService
+
+OLD, NEW = "old-model", "new-model"
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    for model in (video, ChunkArchive, ChunkReembedding):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def backend():
+    return _StoreBackend("memory", InMemoryChunkRepository(precision="float32"))
+
+
+def axis(i):
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    vector[i] = 1.0
+    return vector
+
+
+class FakeModel:
+    """Embeds chunk "c<i>" onto axis i (offset per model), counting the texts it saw."""
+
+    def __init__(self, offset=100, fail_after=None):
+        self.offset = offset
+        self.fail_after = fail_after
+        self.seen = []
+
+    def __call__(self, texts):
+        if self.fail_after is not None and len(self.seen) >= self.fail_after:
+            raise RuntimeError("model went away")
+        self.seen += texts
+        return np.vstack([axis(self.offset + int(t[1:])) if t[0] == "c" else axis(0) for t in texts])
+
+
+def add_video(db, backend, video_id, chunks=3):
+    VideoRepository(db).create_video(video_id, "x", "en")
+    contents = [f"c{i}" for i in range(chunks)]
+    VectorStoreService(db, backend=backend).bulk_insert_chunks(
+        video_id, contents, [axis(i) for i in range(chunks)], model=OLD
+    )
+
+
+def migration(db, backend, embed, **kwargs):
+    return EmbeddingMigration(db, NEW, source=OLD, backend=backend, embed=embed, rate=0, **kwargs)
+
+
+# ─── migration ────────────────────────────────────────────────────────────────
+
+class TestMigration:
+
+    def test_videos_switch_to_new_vectors(self, db, backend):
+        add_video(db, backend, "a")
+        add_video(db, backend, "b", chunks=2)
+
+        result = migration(db, backend, FakeModel()).run()
+
+        assert (result["migrated"], result["failed"], result["remaining"]) == (2, 0, 0)
+        contents, matrix = backend.export_video("a")
+        assert contents == ["c0", "c1", "c2"]
+        np.testing.assert_array_equal(matrix[1], axis(101))
+        assert VideoRepository(db).get_embedding_model("a") == NEW
+        assert ChunkReembeddingRepository(db).stats()["chunks"] == 0
+
+    def test_old_vectors_served_until_fully_staged(self, db, backend):
+        add_video(db, backend, "a", chunks=4)
+        flaky = FakeModel(fail_after=2 + 1)  # the dimension probe, then one batch of two
+
+        assert migration(db, backend, flaky, batch=2).run()["failed"] == 1
+
+        np.testing.assert_array_equal(backend.export_video("a")[1][3], axis(3))
+        assert VideoRepository(db).get_embedding_model("a") == OLD
+        assert ChunkReembeddingRepository(db).staged("a", NEW) == {0, 1}
+
+        resumed = FakeModel()
+        migration(db, backend, resumed, batch=2).run()
+        assert resumed.seen[1:] == ["c2", "c3"]
+        assert VideoRepository(db).get_embedding_model("a") == NEW
+
+    def test_batches_are_rate_limited(self, db, backend):
+        add_video(db, backend, "a", chunks=10)
+        slept = []
+
+        EmbeddingMigration(
+            db, NEW, source=OLD, backend=backend, embed=FakeModel(), batch=5, rate=10,
+            sleep=slept.append, clock=lambda: 0.0
+        ).run()
+
+        assert slept == [0.5, 0.5]
+
+    def test_content_rewritten_meanwhile_is_not_overwritten(self, db, backend):
+        add_video(db, backend, "a")
+        store = VectorStoreService(db, backend=backend)
+        model = FakeModel()
+
+        def embed_while_reingesting(texts):
+            if texts != ["dimension probe"]:
+                store.bulk_insert_chunks("a", ["fresh"], [axis(7)], model=OLD)
+            return model(texts)
+
+        assert migration(db, backend, embed_while_reingesting).run()["failed"] == 1
+        assert backend.export_video("a")[0] == ["fresh"]
+        assert VideoRepository(db).get_embedding_model("a") == OLD
+
+    def test_archived_video_migrated_in_its_archive(self, db, backend):
+        add_video(db, backend, "cold")
+        RetentionService(db, backend).archive("cold")
+
+        migration(db, backend, FakeModel()).run()
+
+        contents, matrix = unpack(ChunkArchiveRepository(db).get("cold"))
+        assert contents == ["c0", "c1", "c2"]
+        np.testing.assert_allclose(matrix[2], axis(102))
+        assert VideoRepository(db).get_embedding_model("cold") == NEW
+
+
+class TestChecks:
+
+    def test_dimension_must_match(self, db, backend):
+        add_video(db, backend, "a")
+        with pytest.raises(ValueError, match="dimensional"):
+            migration(db, backend, lambda texts: np.zeros((len(texts), 8))).run()
+
+    def test_unrecorded_videos_need_a_source(self, db, backend):
+        VideoRepository(db).create_video("legacy", "x", "en")
+        with pytest.raises(ValueError, match="no recorded model"):
+            EmbeddingMigration(db, NEW, source=NEW, backend=backend, embed=FakeModel()).run()
+
+        result = migration(db, backend, FakeModel()).run()
+        assert result["stamped"] == 1
+
+
+# ─── serving across models ────────────────────────────────────────────────────
+
+class TestServing:
+
+    def test_model_lookup_cached_and_invalidated(self, db, backend):
+        add_video(db, backend, "a")
+        models = EmbeddingModels(ttl=60, default=OLD)
+
+        assert models.for_video(db, "a") == OLD
+        VideoRepository(db).set_embedding_model("a", NEW)
+        db.commit()
+        assert models.for_video(db, "a") == OLD
+        models.invalidate("a")
+        assert models.for_video(db, "a") == NEW
+        assert models.for_video(db, "unknown") == OLD
+
+    def test_corpus_search_embeds_per_model(self, db, backend):
+        add_video(db, backend, "a")
+        add_video(db, backend, "b")
+        migration(db, backend, FakeModel()).run(max_videos=1)  # "a" on the new model, "b" still on the old
+
+        def embedder(model):
+            return MagicMock(embed=lambda question: axis(101 if model == NEW else 1))
+
+        with patch("app.services.search_service.EmbeddingService", side_effect=embedder), \
+                patch("app.services.search_service.VectorStoreService", return_value=VectorStoreService(db, backend)), \
+                patch.object(embedding_models, "_in_use", None):
+            rows = search_across_models("q", db, top_k=2)
+
+        assert [(r["video_id"], r["content"]) for r in rows] == [("a", "c1"), ("b", "c1")]
+
+    def test_switch_in_another_process_embeds_the_question_again(self, db, backend):
+        add_video(db, backend, "a")
+        models = EmbeddingModels(ttl=60, default=OLD)
+        models.state(db, "a")  # this worker's cached state, about to go stale
+        migration(db, backend, FakeModel()).run()  # as if run by the CLI: `models` is not told
+        embedded = []
+
+        def embedder(model):
+            embedded.append(model)
+            return MagicMock(embed=lambda question: axis(101 if model == NEW else 1))
+
+        query_cache.clear()
+        with patch("app.services.rag_service.embedding_models", models), \
+                patch("app.services.rag_service.EmbeddingService", side_effect=embedder), \
+                patch("app.services.rag_service.VectorStoreService", return_value=VectorStoreService(db, backend)):
+            chunks = retrieve_relevant_chunks("a", "q", db, top_k=1)
+        query_cache.clear()
+
+        assert embedded == [OLD, NEW]
+        assert chunks == ["c1"]
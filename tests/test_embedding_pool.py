@@ -0,0 +1,133 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from app.services.embedding_pool import EmbeddingPool, EmbeddingPoolBusy, EmbeddingWorkerCrashed
+
+LOADER = "tests.test_embedding_pool:FakeModel"
+DIM = 4
+
+
+class FakeModel:
+    """Loaded inside the worker processes. Special texts simulate failures."""
+
+    def __init__(self, model_name):
+        if model_name == "broken":
+            raise OSError("no such model")
+
+    def encode(self, texts):
+        for text in texts:
+            if text == "crash":
+                os._exit(1)
+            if text.startswith("crash-once:"):
+                marker = text.split(":", 1)[1]
+                if not os.path.exists(marker):
+                    open(marker, "w").close()
+                    os._exit(1)
+            if text == "slow":
+                time.sleep(1.0)
+            if text == "bad":
+                raise ValueError("cannot embed")
+        return np.array([[len(t), os.getpid(), 0, 1] for t in texts], dtype=np.float32)
+
+
+def make_pool(**kwargs):
+    options = dict(workers=1, dim=DIM, max_pending=4, slot_rows=3, timeout=5, loader=LOADER, threads_per_worker=1)
+    options.update(kwargs)
+    return EmbeddingPool("fake", **options)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = make_pool(workers=2)
+    yield pool
+    pool.close()
+
+
+# ─── results ──────────────────────────────────────────────────────────────────
+
+class TestResults:
+
+    def test_encode_returns_rows_in_order(self, pool):
+        texts = ["a", "bb", "ccc", "dddd", "eeeee"]  # spans two slots
+        vectors = pool.encode(texts)
+        assert vectors.dtype == np.float32
+        assert vectors.shape == (5, DIM)
+        assert vectors[:, 0].tolist() == [1, 2, 3, 4, 5]
+
+    def test_work_spread_over_workers(self, pool):
+        futures = [pool.submit(["slow"]) for _ in range(2)]
+        pids = {int(f.result(10)[0, 1]) for f in futures}
+        assert len(pids) == 2
+        assert os.getpid() not in pids
+
+    def test_encode_errors_reach_caller(self, pool):
+        with pytest.raises(RuntimeError, match="cannot embed"):
+            pool.encode(["bad"])
+        assert pool.encode(["ok"])[0, 0] == 2  # worker still serving
+
+    def test_job_larger_than_slot_rejected(self, pool):
+        with pytest.raises(ValueError):
+            pool.submit(["x"] * 4)
+
+    def test_slots_returned_after_use(self, pool):
+        pool.encode(["x"] * 12)
+        assert pool.stats()["in_flight"] == 0
+        assert pool._free.qsize() == pool.max_pending
+
+
+# ─── backpressure and restarts ────────────────────────────────────────────────
+
+class TestSupervision:
+
+    def test_saturated_pool_rejects(self):
+        pool = make_pool(max_pending=1, timeout=0.2)
+        try:
+            running = pool.submit(["slow"])
+            with pytest.raises(EmbeddingPoolBusy):
+                pool.submit(["x"])
+            assert pool.stats()["rejected"] == 1
+            assert running.result(10)[0, 0] == 4
+        finally:
+            pool.close()
+
+    def test_crashed_worker_restarted_and_job_retried(self, tmp_path):
+        pool = make_pool()
+        try:
+            first_pid = int(pool.encode(["warm"])[0, 1])
+            vectors = pool.encode([f"crash-once:{tmp_path / 'marker'}"])
+
+            assert int(vectors[0, 1]) != first_pid
+            stats = pool.stats()
+            assert stats["restarts"] == 1
+            assert stats["alive"] == 1
+        finally:
+            pool.close()
+
+    def test_job_failed_after_repeated_crashes(self):
+        pool = make_pool()
+        try:
+            with pytest.raises(EmbeddingWorkerCrashed):
+                pool.submit(["crash"]).result(30)
+            assert pool.encode(["after"])[0, 0] == 5
+        finally:
+            pool.close()
+
+    def test_model_load_failure_reported(self):
+        states = []
+        pool = EmbeddingPool(
+            "broken", workers=1, dim=DIM, max_pending=1, slot_rows=1, loader=LOADER,
+            threads_per_worker=1, on_state=states.append,
+        )
+        try:
+            deadline = time.time() + 30
+            while "failed" not in states and time.time() < deadline:
+                time.sleep(0.05)
+            assert states[-1] == "failed"
+            with pytest.raises(RuntimeError, match="could not load|No embedding worker"):
+                pool.submit(["x"]).result(5)
+            assert pool.stats()["restarts"] == 0
+        finally:
+            pool.close()
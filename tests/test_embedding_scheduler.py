@@ -0,0 +1,115 @@
+import sys
+import threading
+
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+
+from app.services.embedding_scheduler import BULK, QUERY, EmbeddingScheduler
+
+
+class RecordingEncoder:
+    """encode() stand-in: one row per text, holds the first call until released."""
+
+    def __init__(self, hold_first=True):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        if not hold_first:
+            self.release.set()
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        self.started.set()
+        self.release.wait(5)
+        return np.array([[float(len(t)), 1.0] for t in texts])
+
+
+class TestPriorities:
+
+    def test_query_overtakes_queued_bulk_slices(self):
+        encoder = RecordingEncoder()
+        scheduler = EmbeddingScheduler(encoder, lanes=1, threads=0, bulk_slice=2)
+
+        bulk = threading.Thread(target=scheduler.embed_bulk, args=(["b"] * 8,))
+        bulk.start()
+        encoder.started.wait(5)  # first slice is running, three are queued
+
+        query = scheduler.submit(["question"], QUERY)
+        encoder.release.set()
+        query.result(5)
+        bulk.join(5)
+
+        assert encoder.calls[1] == ["question"]
+        assert len(encoder.calls) == 5
+
+    def test_query_lane_never_blocked_by_bulk(self):
+        encoder = RecordingEncoder()
+        scheduler = EmbeddingScheduler(
+            lambda texts: encoder(texts) if texts[0] == "bulk" else np.ones((1, 2)),
+            lanes=2, query_lanes=1, threads=0,
+        )
+
+        scheduler.submit(["bulk"], BULK)
+        encoder.started.wait(5)  # the only general lane is busy
+
+        assert scheduler.embed_query("question").tolist() == [1.0, 1.0]
+        encoder.release.set()
+
+    def test_query_only_lane_leaves_bulk_queued(self):
+        scheduler = EmbeddingScheduler(MagicMock(), lanes=2, query_lanes=1, threads=0)
+        assert scheduler._next_job(query_only=True) is None
+        scheduler._queues[BULK].append(("job",))
+        assert scheduler._next_job(query_only=True) is None
+        assert scheduler._next_job(query_only=False) == (BULK, ("job",))
+
+
+class TestEmbedding:
+
+    def test_bulk_sliced_and_reassembled_in_order(self):
+        encoder = RecordingEncoder(hold_first=False)
+        scheduler = EmbeddingScheduler(encoder, lanes=2, threads=0, bulk_slice=3)
+
+        texts = ["a" * i for i in range(1, 8)]
+        result = scheduler.embed_bulk(texts)
+
+        assert result[:, 0].tolist() == [float(i) for i in range(1, 8)]
+        assert sorted(len(call) for call in encoder.calls) == [1, 3, 3]
+
+    def test_query_returns_single_vector(self):
+        scheduler = EmbeddingScheduler(RecordingEncoder(hold_first=False), threads=0)
+        assert scheduler.embed_query("four").tolist() == [4.0, 1.0]
+
+    def test_encode_errors_reach_caller(self):
+        scheduler = EmbeddingScheduler(MagicMock(side_effect=RuntimeError("oom")), threads=0)
+        with pytest.raises(RuntimeError, match="oom"):
+            scheduler.embed_query("x")
+        assert scheduler.stats()[QUERY]["completed"] == 1
+
+
+class TestBudget:
+
+    def test_intra_op_threads_split_across_lanes(self, monkeypatch):
+        torch = MagicMock()
+        monkeypatch.setitem(sys.modules, "torch", torch)
+
+        scheduler = EmbeddingScheduler(RecordingEncoder(hold_first=False), lanes=2, threads=6)
+        scheduler.embed_query("x")
+
+        torch.set_num_threads.assert_called_with(3)
+
+    def test_invalid_lane_split(self):
+        with pytest.raises(ValueError):
+            EmbeddingScheduler(MagicMock(), lanes=1, query_lanes=1)
+        with pytest.raises(ValueError):
+            EmbeddingScheduler(MagicMock(), lanes=0)
+
+    def test_stats_expose_allocation(self):
+        scheduler = EmbeddingScheduler(RecordingEncoder(hold_first=False), lanes=3, query_lanes=1, threads=12)
+        scheduler.embed_bulk(["a", "b"])
+        stats = scheduler.stats()
+        assert stats["lanes"] == 3
+        assert stats["query_only_lanes"] == 1
+        assert stats["threads_per_lane"] == 4
+        assert stats[BULK]["completed"] == 1
+        assert stats[QUERY] == {"queued": 0, "running": 0, "completed": 0, "avg_wait_ms": None}
@@ -0,0 +1,166 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.datastructures import Headers
+from unittest.mock import MagicMock, patch
+
+from app.main import app
+from app.database import get_db
+from app.models.video import video
+from app.models.chunk_archive import ChunkArchive
+from app.models.chunk_reembedding import ChunkReembedding
+from app.repositories.memory_chunk_repository import InMemoryChunkRepository
+from app.repositories.vector_backend import _StoreBackend
+from app.repositories.video_repository import ContentVersion, VideoRepository
+from app.services import summary_service
+from app.services.vector_store_service import VectorStoreService
+from app.utils import responses
+from app.utils.http_cache import Validators, is_not_modified
+
+CHANGED = datetime(2026, 3, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    video.__table__.create(engine)
+    ChunkArchive.__table__.create(engine)
+    ChunkReembedding.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_db] = lambda: MagicMock()
+    summary_service._summary_cache.clear()
+    with patch("app.utils.http_cache.VideoRepository") as mock_versions:
+        mock_versions.return_value.get_content_version.return_value = ContentVersion(3, CHANGED)
+        yield TestClient(app)
+    app.dependency_overrides.clear()
+    summary_service._summary_cache.clear()
+
+
+# ─── content version ──────────────────────────────────────────────────────────
+
+class TestContentVersion:
+
+    def test_unknown_video(self, db):
+        assert VideoRepository(db).get_content_version("nope") is None
+
+    def test_new_video_falls_back_to_created_at(self, db):
+        VideoRepository(db).create_video("vid", "encrypted", "en")
+
+        content = VideoRepository(db).get_content_version("vid")
+        assert content.version == 0
+        assert content.updated_at is not None
+
+    def test_bump(self, db):
+        repo = VideoRepository(db)
+        repo.create_video("vid", "encrypted", "en")
+
+        repo.bump_content_version("vid")
+        repo.bump_content_version("vid")
+
+        assert repo.get_content_version("vid").version == 2
+
+    def test_chunk_writes_bump_version(self, db):
+        VideoRepository(db).create_video("vid", "encrypted", "en")
+        service = VectorStoreService(db, backend=_StoreBackend("memory", InMemoryChunkRepository()))
+
+        service.bulk_insert_chunks("vid", ["a", "b"], np.eye(2, dtype=np.float32))
+        assert VideoRepository(db).get_content_version("vid").version == 1
+
+        service.delete_video("vid")
+        assert VideoRepository(db).get_content_version("vid").version == 2
+
+
+# ─── conditional requests ─────────────────────────────────────────────────────
+
+class TestIsNotModified:
+
+    validators = Validators('W/"vid-3-json"', CHANGED)
+
+    @pytest.mark.parametrize("if_none_match, expected", [
+        ('W/"vid-3-json"', True),
+        ('"vid-3-json"', True),
+        ('"other", W/"vid-3-json"', True),
+        ("*", True),
+        ('W/"vid-2-json"', False),
+    ])
+    def test_if_none_match(self, if_none_match, expected):
+        assert is_not_modified(Headers({"if-none-match": if_none_match}), self.validators) is expected
+
+    @pytest.mark.parametrize("since, expected", [
+        ("Sun, 01 Mar 2026 12:00:00 GMT", True),
+        ("Mon, 02 Mar 2026 00:00:00 GMT", True),
+        ("Sat, 28 Feb 2026 00:00:00 GMT", False),
+        ("not a date", False),
+    ])
+    def test_if_modified_since(self, since, expected):
+        assert is_not_modified(Headers({"if-modified-since": since}), self.validators) is expected
+
+    def test_if_none_match_takes_precedence(self):
+        headers = Headers({"if-none-match": '"stale"', "if-modified-since": "Mon, 02 Mar 2026 00:00:00 GMT"})
+        assert is_not_modified(headers, self.validators) is False
+
+
+class TestSummaryCaching:
+
+    @patch("app.services.summary_service.VideoRepository")
+    def test_validators_and_304(self, mock_repo_class, client):
+        mock_repo_class.return_value.get_summary.return_value = '[{"chunk_index": 0, "text": "Intro."}]'
+
+        first = client.get("/summary/vid")
+        assert first.status_code == 200
+        assert first.headers["etag"].startswith('W/"vid-3-')
+        assert first.headers["last-modified"] == "Sun, 01 Mar 2026 12:00:00 GMT"
+        assert "max-age=" in first.headers["cache-control"]
+
+        second = client.get("/summary/vid", headers={"If-None-Match": first.headers["etag"]})
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["etag"] == first.headers["etag"]
+
+        third = client.get("/summary/vid", headers={"If-Modified-Since": first.headers["last-modified"]})
+        assert third.status_code == 304
+
+
+class TestRetrieveCaching:
+
+    @patch("app.api.retrieve_chunks.retrieve_relevant_chunks", return_value=["a", "b"])
+    def test_get_variant_is_cacheable(self, mock_retrieve, client):
+        first = client.get("/retrieve_chunks/vid", params={"question": "what is it", "top_k": 2})
+
+        assert first.status_code == 200
+        assert first.json() == {"video_id": "vid", "chunks": ["a", "b"]}
+        assert first.headers["cache-control"].startswith("public")
+
+        second = client.get(
+            "/retrieve_chunks/vid", params={"question": "what is it", "top_k": 2},
+            headers={"If-None-Match": first.headers["etag"]},
+        )
+        assert second.status_code == 304
+        mock_retrieve.assert_called_once()
+
+    @patch("app.api.retrieve_chunks.retrieve_relevant_chunks", return_value=["a"])
+    def test_unknown_video_not_cached(self, _retrieve, client):
+        with patch("app.utils.http_cache.VideoRepository") as mock_versions:
+            mock_versions.return_value.get_content_version.return_value = None
+            response = client.get("/retrieve_chunks/vid", params={"question": "q"})
+
+        assert response.status_code == 200
+        assert "etag" not in response.headers
+
+    @pytest.mark.skipif(not responses.msgpack_available(), reason="msgpack not installed")
+    @patch("app.api.retrieve_chunks.retrieve_relevant_chunks", return_value=["a"])
+    def test_etag_per_representation(self, _retrieve, client):
+        as_json = client.get("/retrieve_chunks/vid", params={"question": "q"})
+        as_msgpack = client.get("/retrieve_chunks/vid", params={"question": "q"}, headers={"Accept": "application/msgpack"})
+
+        assert as_json.headers["etag"] != as_msgpack.headers["etag"]
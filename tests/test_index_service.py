@@ -0,0 +1,136 @@
+from unittest.mock import MagicMock, patch
+
+from app.services.index_service import IndexManager, plan_index, query_settings
+from app.repositories.chunk_repository import ChunkRepository
+
+
+class TestPlanIndex:
+
+    def test_small_table_uses_exact_scan(self):
+        plan = plan_index(500)
+        assert plan.method is None
+        assert plan.index_name is None
+
+    def test_medium_table_uses_hnsw(self):
+        plan = plan_index(200_000)
+        assert plan.method == "hnsw"
+        assert plan.params == {"m": 16, "ef_construction": 64}
+
+    def test_large_hnsw_gets_bigger_graph(self):
+        assert plan_index(3_000_000).params == {"m": 24, "ef_construction": 128}
+
+    def test_huge_table_uses_ivfflat_sqrt_lists(self):
+        plan = plan_index(16_000_000)
+        assert plan.method == "ivfflat"
+        assert plan.params == {"lists": 4000}
+
+    def test_create_sql_is_concurrent_and_cosine(self):
+        sql = plan_index(200_000).create_sql()
+        assert sql.startswith("CREATE INDEX CONCURRENTLY IF NOT EXISTS chunks_embedding_hnsw_idx")
+        assert "vector_cosine_ops" in sql
+        assert "WITH (m = 16, ef_construction = 64)" in sql
+
+
+class TestBuild:
+
+    def build(self, existing, force=False, locked=True, building=()):
+        engine = MagicMock()
+        conn = engine.connect.return_value.execution_options.return_value.__enter__.return_value
+        conn.execute.return_value.scalar.return_value = locked
+        manager = IndexManager(engine)
+        with patch.object(IndexManager, "plans", return_value=[plan_index(200_000)]), \
+                patch.object(IndexManager, "existing_indexes", return_value=existing), \
+                patch.object(IndexManager, "refresh") as refresh, \
+                patch.object(IndexManager, "_being_built", side_effect=lambda conn, name: name in building):
+            manager.build(force=force)
+        self.refreshed = refresh.call_count
+        return [str(call.args[0]) for call in conn.execute.call_args_list]
+
+    def test_forced_rebuild_keeps_serving_index_until_swap(self):
+        sql = self.build([{"name": "chunks_embedding_hnsw_idx", "valid": True}], force=True)
+
+        steps = [s for s in sql if "advisory" not in s]
+        assert steps[0].startswith("CREATE INDEX CONCURRENTLY IF NOT EXISTS chunks_embedding_hnsw_idx_new")
+        assert steps[1:] == [
+            "DROP INDEX CONCURRENTLY IF EXISTS chunks_embedding_hnsw_idx",
+            "ALTER INDEX chunks_embedding_hnsw_idx_new RENAME TO chunks_embedding_hnsw_idx",
+        ]
+
+    def test_other_process_building_skips(self):
+        sql = self.build([], locked=False)
+        assert not any(s.startswith("CREATE") for s in sql)
+        assert self.refreshed == 1  # still tunes its searches for the index being built elsewhere
+
+    def test_invalid_index_still_being_built_is_left_alone(self):
+        sql = self.build([{"name": "chunks_embedding_hnsw_idx", "valid": False}],
+                         building={"chunks_embedding_hnsw_idx"})
+        assert not any(s.startswith(("DROP", "CREATE")) for s in sql)
+
+    def test_leftover_invalid_index_replaced(self):
+        sql = self.build([{"name": "chunks_embedding_hnsw_idx", "valid": False}])
+        steps = [s for s in sql if "advisory" not in s]
+        assert steps[0] == "DROP INDEX CONCURRENTLY IF EXISTS chunks_embedding_hnsw_idx"
+        assert steps[1].startswith("CREATE INDEX CONCURRENTLY IF NOT EXISTS chunks_embedding_hnsw_idx ")
+
+
+class TestQuerySettings:
+
+    def test_no_index_no_settings(self):
+        assert query_settings(None, 0.99) == {}
+
+    def test_hnsw_ef_search_grows_with_recall(self):
+        low = query_settings("hnsw", 0.8)["hnsw.ef_search"]
+        high = query_settings("hnsw", 0.99)["hnsw.ef_search"]
+        assert low < high
+
+    def test_ivfflat_probes_bounded_by_lists(self):
+        assert query_settings("ivfflat", 1.0, lists=200) == {"ivfflat.probes": 200}
+        assert query_settings("ivfflat", 0.8, lists=200) == {"ivfflat.probes": 2}
+
+    def test_processes_that_never_build_look_the_index_up(self):
+        clock = {"now": 0.0}
+        manager = IndexManager(MagicMock(), refresh_interval=60, clock=lambda: clock["now"])
+        hnsw = [{"name": "chunks_embedding_hnsw_idx", "method": "hnsw", "valid": True, "options": ["m=16"]}]
+
+        with patch.object(IndexManager, "existing_indexes", return_value=hnsw) as existing:
+            assert manager.settings_for(0.99) == {"hnsw.ef_search": 200}
+            manager.settings_for(0.99)
+            clock["now"] = 61.0
+            manager.settings_for(0.99)
+
+        assert existing.call_count == 2
+
+    def test_iterative_scan_only_on_pgvector_0_8(self):
+        manager = IndexManager(MagicMock())
+        manager.current = {"name": "x", "method": "hnsw", "params": {"m": 16}}
+        manager._refreshed_at = 0.0
+        manager.clock = lambda: 1.0
+
+        manager.pgvector_version = (0, 7, 4)
+        assert manager.settings_for(0.99, filtered=True) == {"hnsw.ef_search": 200}
+        manager.pgvector_version = (0, 8, 0)
+        assert manager.settings_for(0.99, filtered=True)["hnsw.iterative_scan"] == "relaxed_order"
+
+    def test_extension_version_parsed(self):
+        engine = MagicMock()
+        engine.connect.return_value.__enter__.return_value.execute.return_value.scalar.return_value = "0.7.4"
+        assert IndexManager(engine).extension_version() == (0, 7, 4)
+
+    def test_manager_settings_follow_current_index(self):
+        manager = IndexManager(MagicMock())
+        assert manager.settings_for(0.99) == {}
+        manager.current = {"name": "x", "method": "hnsw", "params": {"m": 16}}
+        assert manager.settings_for(0.99) == {"hnsw.ef_search": 200}
+
+
+class TestSearchSettings:
+
+    def test_settings_scoped_to_transaction(self):
+        db = MagicMock()
+        db.execute.return_value.fetchall.return_value = []
+
+        ChunkRepository(db).search_similar("vid", [1.0], settings={"hnsw.ef_search": 100})
+
+        first_sql, first_params = str(db.execute.call_args_list[0].args[0]), db.execute.call_args_list[0].args[1]
+        assert "set_config" in first_sql
+        assert first_params == {"name": "hnsw.ef_search", "value": "100"}
@@ -0,0 +1,201 @@
+import threading
+import zlib
+
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+from cryptography.fernet import Fernet
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.chunk_archive import ChunkArchive
+from app.models.chunk_reembedding import ChunkReembedding
+from app.models.video import video
+from app.repositories.memory_chunk_repository import InMemoryChunkRepository
+from app.repositories.vector_backend import _StoreBackend
+from app.repositories.video_repository import VideoRepository
+from app.services.embedding_models import EmbeddingModels
+from app.services.prefetch_service import VideoPrefetcher, decode_transcript
+from app.services.summary_service import SummaryService
+from app.services.vector_store_service import VectorStoreService
+from app.utils import session_store
+
+
+class StoredBackend(_StoreBackend):
+    """A memory store posing as an out-of-process backend, so the prefetcher keeps its matrix."""
+
+    def __init__(self):
+        super().__init__("pgvector", InMemoryChunkRepository(precision="float32"))
+
+
+@pytest.fixture
+def sessions():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    video.__table__.create(engine)
+    ChunkArchive.__table__.create(engine)
+    ChunkReembedding.__table__.create(engine)
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def backend():
+    return StoredBackend()
+
+
+@pytest.fixture
+def prefetcher(sessions, backend):
+    return VideoPrefetcher(session_factory=sessions, backend_factory=lambda db: backend, ttl=60)
+
+
+def unit(*values):
+    vector = np.zeros(8, dtype=np.float32)
+    vector[:len(values)] = values
+    return vector
+
+
+def add_video(sessions, backend, video_id, transcript="hello world"):
+    db = sessions()
+    VideoRepository(db).create_video(video_id, transcript, "en")
+    db.close()
+    backend.insert_batch(video_id, ["north", "east"], [unit(0, 1), unit(1, 0)])
+
+
+# ─── transcript decoding ──────────────────────────────────────────────────────
+
+class TestDecodeTranscript:
+
+    def test_encrypted_compressed_and_plain(self):
+        fernet = Fernet(Fernet.generate_key())
+        with patch("app.services.prefetch_service._fernet", fernet):
+            assert decode_transcript(fernet.encrypt(zlib.compress(b"packed")).decode()) == "packed"
+            assert decode_transcript(fernet.encrypt(b"encrypted").decode()) == "encrypted"
+            assert decode_transcript("plain text") == "plain text"
+
+
+# ─── loading ──────────────────────────────────────────────────────────────────
+
+class TestPrefetch:
+
+    def test_loads_matrix_transcript_and_summary(self, sessions, backend, prefetcher):
+        add_video(sessions, backend, "vid")
+        with patch.object(SummaryService, "get_summary", return_value=[{"text": "hi"}]) as summary:
+            prefetcher.prefetch("vid").result()
+
+        entry = prefetcher.get("vid")
+        assert entry.contents == ["north", "east"]
+        assert entry.transcript == "hello world"
+        assert entry.summary == [{"text": "hi"}]
+        summary.assert_called_once_with("vid")
+
+    def test_users_share_one_load(self, sessions, backend, prefetcher):
+        add_video(sessions, backend, "vid")
+        release = threading.Event()
+        export = backend.export_video
+        backend.export_video = lambda video_id: release.wait(5) and export(video_id)
+
+        with patch.object(session_store, "PREFETCH_ON_ACTIVATE", True), \
+                patch("app.services.prefetch_service.video_prefetcher", prefetcher):
+            for user in ("alice", "bob", "carol"):
+                session_store.set_active_video(user, "vid")
+            pending = prefetcher.prefetch("vid")  # the load still blocked in export
+            release.set()
+            pending.result()
+            session_store.set_active_video("dave", "vid")
+
+        assert prefetcher.stats()["loaded"] == 1
+        assert prefetcher.stats()["deduplicated"] == 4
+
+    def test_unknown_video_not_cached(self, prefetcher):
+        assert prefetcher.prefetch("missing").result() is None
+        assert prefetcher.get("missing") is None
+
+    def test_off_without_workers(self, sessions, backend):
+        assert VideoPrefetcher(session_factory=sessions, workers=0).prefetch("vid") is None
+
+    def test_entries_expire(self, sessions, backend):
+        clock = {"now": 0.0}
+        prefetcher = VideoPrefetcher(
+            session_factory=sessions, backend_factory=lambda db: backend, ttl=60, clock=lambda: clock["now"]
+        )
+        add_video(sessions, backend, "vid")
+        prefetcher.prefetch("vid").result()
+
+        clock["now"] = 61.0
+        assert prefetcher.get("vid") is None
+
+
+# ─── serving from memory ──────────────────────────────────────────────────────
+
+class TestWarmSearch:
+
+    def test_search_needs_no_database(self, sessions, backend, prefetcher):
+        add_video(sessions, backend, "vid")
+        prefetcher.prefetch("vid").result()
+        db, store = MagicMock(), MagicMock()
+        service = VectorStoreService(db, backend=store)
+
+        with patch("app.services.vector_store_service.video_prefetcher", prefetcher):
+            rows = service.search("vid", unit(1, 0.1), top_k=1)
+            streamed = list(service.iter_search("vid", unit(0, 1), top_k=1))
+
+        assert [r["content"] for r in rows] == ["east"]
+        assert rows[0]["score"] == pytest.approx(backend.search("vid", unit(1, 0.1), 1)[0]["score"], abs=1e-5)
+        assert [r["content"] for r in streamed] == ["north"]
+        db.execute.assert_not_called()
+        store.search.assert_not_called()
+
+    def test_cold_search_warms_the_serving_worker(self, sessions, backend, prefetcher):
+        # set_active_video ran in another worker: nothing is warm in this one
+        add_video(sessions, backend, "vid")
+        db = sessions()
+        service = VectorStoreService(db, backend=backend)
+
+        with patch("app.services.vector_store_service.video_prefetcher", prefetcher):
+            service.search("vid", unit(1, 0), top_k=1)
+            prefetcher._executor.shutdown(wait=True)  # the background load
+            with patch.object(backend, "search") as search:
+                rows = service.search("vid", unit(1, 0), top_k=1)
+
+        assert [r["content"] for r in rows] == ["east"]
+        search.assert_not_called()
+        db.close()
+
+    def test_writes_drop_the_warm_copy(self, sessions, backend, prefetcher):
+        add_video(sessions, backend, "vid")
+        prefetcher.prefetch("vid").result()
+        db = sessions()
+        service = VectorStoreService(db, backend=backend)
+
+        with patch("app.services.vector_store_service.video_prefetcher", prefetcher):
+            service.bulk_insert_chunks("vid", ["fresh"], [unit(1, 0)])
+            rows = service.search("vid", unit(1, 0), threshold=-1.0)
+
+        assert [r["content"] for r in rows] == ["fresh"]
+        assert prefetcher.get("vid") is None
+        db.close()
+
+    def test_in_process_backend_keeps_no_copy(self, sessions):
+        backend = _StoreBackend("memory", InMemoryChunkRepository(precision="float32"))
+        prefetcher = VideoPrefetcher(session_factory=sessions, backend_factory=lambda db: backend)
+        add_video(sessions, backend, "vid")
+        prefetcher.prefetch("vid").result()
+
+        assert prefetcher.get("vid").matrix is None
+        assert prefetcher.search("vid", unit(1, 0), 1, 0.0) is None
+
+    def test_write_in_another_process_retires_the_warm_copy(self, sessions, backend, prefetcher):
+        add_video(sessions, backend, "vid")
+        prefetcher.prefetch("vid").result()
+        db = sessions()
+        models = EmbeddingModels(ttl=0)
+        assert prefetcher.search("vid", unit(1, 0), 1, 0.0, models.state(db, "vid")) is not None
+
+        # another worker switches the video's model; nothing in this process hears of it
+        videos = VideoRepository(db)
+        videos.set_embedding_model("vid", "new-model")
+        videos.bump_content_version("vid")
+
+        assert prefetcher.search("vid", unit(1, 0), 1, 0.0, models.state(db, "vid")) is None
+        assert prefetcher.get("vid") is None
+        db.close()
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from app.repositories.memory_chunk_repository import InMemoryChunkRepository
+from app.utils.quantization import quantize, recall_at_k
+
+
+@pytest.fixture
+def corpus():
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((2000, 64)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+class TestQuantize:
+
+    @pytest.mark.parametrize("precision,itemsize", [("float32", 4), ("float16", 2), ("int8", 1)])
+    def test_storage_size(self, corpus, precision, itemsize):
+        assert quantize(corpus, precision).codes.itemsize == itemsize
+
+    def test_unknown_precision(self, corpus):
+        with pytest.raises(ValueError):
+            quantize(corpus, "int4")
+
+    @pytest.mark.parametrize("precision,tolerance", [("float16", 1e-3), ("int8", 2e-2)])
+    def test_scores_close_to_float32(self, corpus, precision, tolerance):
+        query = corpus[0]
+        exact = corpus @ query
+        approx = quantize(corpus, precision).scores(query)
+        assert np.max(np.abs(exact - approx)) < tolerance
+
+    def test_rows_dequantize(self, corpus):
+        matrix = quantize(corpus, "int8")
+        np.testing.assert_allclose(matrix.rows([0, 1]), corpus[:2], atol=1e-2)
+
+    @pytest.mark.parametrize("precision", ["float16", "int8"])
+    def test_recall_at_10(self, corpus, precision):
+        queries = corpus[:50]
+        exact = np.argsort(-(corpus @ queries.T).T, axis=1)[:, :10]
+        matrix = quantize(corpus, precision)
+        approx = np.array([np.argsort(-matrix.scores(q))[:10] for q in queries])
+        assert recall_at_k(exact, approx, 10) >= 0.95
+
+
+class TestInMemoryPrecision:
+
+    @pytest.mark.parametrize("precision", ["float32", "float16", "int8"])
+    def test_search_on_compact_form(self, precision):
+        repo = InMemoryChunkRepository(precision=precision)
+        repo.bulk_insert("vid", ["a", "b", "c"], [[1, 0], [0.8, 0.6], [0, 1]])
+
+        rows = repo.search_similar("vid", [1, 0], top_k=2)
+
+        assert [r["content"] for r in rows] == ["a", "b"]
+        assert rows[0]["score"] == pytest.approx(1.0, abs=1e-2)
+
+    def test_int8_uses_quarter_memory(self):
+        embeddings = np.random.default_rng(1).standard_normal((100, 384))
+        full = InMemoryChunkRepository(precision="float32")
+        small = InMemoryChunkRepository(precision="int8")
+        full.bulk_insert("vid", ["x"] * 100, embeddings)
+        small.bulk_insert("vid", ["x"] * 100, embeddings)
+        assert small.memory_bytes() < full.memory_bytes() / 3
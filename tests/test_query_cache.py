@@ -0,0 +1,87 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.repositories.video_repository import EmbeddingState
+from app.services.query_cache_service import QueryCache, normalize_question, query_cache
+from app.services.rag_service import retrieve_relevant_chunks
+
+
+@pytest.fixture
+def cache():
+    return QueryCache(max_videos=2, max_entries=2, similarity=0.95)
+
+
+class TestNormalize:
+
+    def test_case_whitespace_and_punctuation(self):
+        assert normalize_question("  What is   the MAIN point? ") == "what is the main point"
+
+
+class TestQueryCache:
+
+    def test_exact_hit_on_normalized_text(self, cache):
+        cache.store("vid", "What is the main point?", [1.0, 0.0], 5, ["a", "b"])
+        assert cache.lookup_exact("vid", "what is the main point", 5) == ["a", "b"]
+        assert cache.stats()["exact_hits"] == 1
+
+    def test_smaller_top_k_reuses_prefix(self, cache):
+        cache.store("vid", "q", [1.0, 0.0], 5, ["a", "b", "c"])
+        assert cache.lookup_exact("vid", "q", 2) == ["a", "b"]
+
+    def test_larger_top_k_misses(self, cache):
+        cache.store("vid", "q", [1.0, 0.0], 2, ["a", "b"])
+        assert cache.lookup_exact("vid", "q", 5) is None
+
+    def test_semantic_hit_above_threshold(self, cache):
+        cache.store("vid", "what is the main point", [1.0, 0.0], 5, ["a"])
+        assert cache.lookup_similar("vid", [0.99, 0.05], 5) == ["a"]
+        assert cache.lookup_similar("vid", [0.5, 0.5], 5) is None
+        stats = cache.stats()
+        assert stats["semantic_hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_entries_evicted_lru(self, cache):
+        cache.store("vid", "q1", [1.0, 0.0], 5, ["1"])
+        cache.store("vid", "q2", [0.0, 1.0], 5, ["2"])
+        cache.lookup_exact("vid", "q1", 5)
+        cache.store("vid", "q3", [0.7, 0.7], 5, ["3"])
+        assert cache.lookup_exact("vid", "q2", 5) is None
+        assert cache.lookup_exact("vid", "q1", 5) == ["1"]
+
+    def test_videos_evicted_lru(self, cache):
+        for vid in ("v1", "v2", "v3"):
+            cache.store(vid, "q", [1.0, 0.0], 5, [vid])
+        assert cache.lookup_exact("v1", "q", 5) is None
+        assert cache.lookup_exact("v3", "q", 5) == ["v3"]
+
+    def test_invalidate(self, cache):
+        cache.store("vid", "q", [1.0, 0.0], 5, ["a"])
+        cache.invalidate("vid")
+        assert cache.lookup_exact("vid", "q", 5) is None
+
+    def test_entries_from_another_state_dropped(self, cache):
+        old, switched = EmbeddingState("old-model", 3), EmbeddingState("new-model", 4)
+        cache.store("vid", "q", [1.0, 0.0], 5, ["a"], old)
+
+        assert cache.lookup_similar("vid", [1.0, 0.0], 5, switched) is None
+        assert cache.lookup_exact("vid", "q", 5, old) is None
+
+
+class TestRetrieveUsesCache:
+
+    def test_exact_hit_skips_embedding_and_search(self):
+        query_cache.clear()
+        state = EmbeddingState("model", 0)
+        query_cache.store("vid", "what is it", [1.0, 0.0], 5, ["cached chunk"], state)
+
+        with patch("app.services.rag_service.EmbeddingService") as mock_embedding, \
+             patch("app.services.rag_service.VectorStoreService") as mock_store, \
+             patch("app.services.rag_service.embedding_models") as models:
+            models.state.return_value = state
+            result = retrieve_relevant_chunks("vid", "What is it?", MagicMock(), top_k=5)
+
+        assert result == ["cached chunk"]
+        mock_embedding.assert_not_called()
+        mock_store.assert_not_called()
+        query_cache.clear()
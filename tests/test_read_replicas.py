@@ -0,0 +1,158 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database.replicas import ReplicaRouter, RoutingSession, read_with_fallback, replica_bind
+from app.models.video import video
+from app.repositories.video_repository import VideoRepository
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def primary(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    video.__table__.create(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def replica(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    video.__table__.create(engine)
+    yield engine
+    engine.dispose()
+
+
+def add_video(engine, video_id: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            video.__table__.insert(),
+            {"video_id": video_id, "encrypted_transcript": "x", "language": "en", "content_version": 0}
+        )
+
+
+def make_session(primary, router):
+    return sessionmaker(class_=RoutingSession, bind=primary, router=router)()
+
+
+# ─── router ───────────────────────────────────────────────────────────────────
+
+class TestRouter:
+
+    def test_round_robin_over_healthy_replicas(self, primary, replica):
+        router = ReplicaRouter([replica, primary], lag_probe=lambda engine: 0.0)
+
+        assert [router.replica_for().engine for _ in range(3)] == [replica, primary, replica]
+
+    def test_lagging_replica_skipped(self, replica):
+        lag = {"seconds": 10.0}
+        clock = Clock()
+        router = ReplicaRouter([replica], max_lag=5, check_interval=5, lag_probe=lambda e: lag["seconds"], clock=clock)
+
+        assert router.replica_for() is None
+        lag["seconds"] = 0.5
+        assert router.replica_for() is None  # not probed again within the interval
+        clock.now += 5
+        assert router.replica_for() is not None
+        assert router.stats()["primary_reads"] == 2
+
+    def test_unreachable_replica_skipped(self, replica):
+        def probe(engine):
+            raise ConnectionError("down")
+
+        router = ReplicaRouter([replica], lag_probe=probe)
+        assert router.replica_for() is None
+        assert router.stats()["replicas"][0]["healthy"] is False
+
+    def test_recent_write_stays_on_primary(self, replica):
+        clock = Clock()
+        router = ReplicaRouter([replica], recent_write_window=30, lag_probe=lambda e: 0.0, clock=clock)
+        router.mark_written("abc")
+
+        assert router.replica_for("abc") is None
+        assert router.replica_for("other") is not None
+        clock.now += 30
+        assert router.replica_for("abc") is not None
+
+    def test_no_replicas_means_primary(self, primary):
+        db = make_session(primary, ReplicaRouter([]))
+        assert replica_bind(db, "abc") == {}
+        db.close()
+
+
+# ─── routed reads ─────────────────────────────────────────────────────────────
+
+class TestRoutedReads:
+
+    def test_reads_served_by_replica(self, primary, replica):
+        add_video(replica, "abc")  # only the replica has it: proves where the read went
+        router = ReplicaRouter([replica])
+        db = make_session(primary, router)
+
+        record = VideoRepository(db).get_by_video_id("abc")
+
+        assert record is not None and record.video_id == "abc"
+        assert router.stats()["replicas"][0]["reads"] == 1
+        db.close()
+
+    def test_missing_on_lagging_replica_falls_back_to_primary(self, primary, replica):
+        add_video(primary, "abc")  # ingested by another worker, not replayed yet
+        router = ReplicaRouter([replica])
+        db = make_session(primary, router)
+
+        assert VideoRepository(db).get_by_video_id("abc") is not None
+        assert VideoRepository(db).get_by_video_id("missing") is None
+        assert router.stats()["fallbacks"] == 2
+        db.close()
+
+    def test_own_ingestion_read_from_primary(self, primary, replica):
+        router = ReplicaRouter([replica])
+        db = make_session(primary, router)
+
+        VideoRepository(db).create_video("abc", "x", "en")
+        assert VideoRepository(db).get_by_video_id("abc") is not None
+
+        with replica.connect() as conn:
+            assert conn.execute(text("SELECT count(*) FROM videos")).scalar() == 0
+        assert router.stats()["replicas"][0]["reads"] == 0
+        assert router.stats()["fallbacks"] == 0
+        db.close()
+
+    def test_failing_replica_falls_back_and_is_marked(self, primary, replica):
+        add_video(primary, "abc")
+        router = ReplicaRouter([replica])
+        db = make_session(primary, router)
+        with replica.begin() as conn:
+            conn.execute(text("DROP TABLE videos"))
+
+        assert VideoRepository(db).get_by_video_id("abc") is not None
+        assert router.stats()["replicas"][0]["errors"] == 1
+        assert router.replica_for() is None
+        db.close()
+
+    def test_non_routing_session_uses_primary(self, primary):
+        add_video(primary, "abc")
+        db = sessionmaker(bind=primary)()
+
+        assert read_with_fallback(
+            db, "abc", lambda bind: db.execute(text("SELECT video_id FROM videos"), bind_arguments=bind).scalar()
+        ) == "abc"
+        db.close()
+
+
+class TestMetrics:
+
+    def test_exposed(self):
+        from app.main import app
+
+        body = TestClient(app).get("/metrics/").json()
+        assert "fallbacks" in body["db_replicas"]
@@ -0,0 +1,170 @@
+import asyncio
+import os
+
+import numpy as np
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.responses import Response, StreamingResponse
+
+from app.utils import responses
+from app.utils.compression import CompressionMiddleware
+from app.utils.responses import APIResponse, ContentNegotiationMiddleware, JSON, MSGPACK, negotiate
+
+needs_msgpack = pytest.mark.skipif(not responses.msgpack_available(), reason="msgpack not installed")
+
+CHUNK = "the speaker explains how attention heads route information between tokens " * 6
+
+
+def make_app(**compression) -> FastAPI:
+    app = FastAPI(default_response_class=APIResponse)
+    app.add_middleware(ContentNegotiationMiddleware)
+    app.add_middleware(CompressionMiddleware, **compression)
+
+    @app.get("/chunks")
+    def chunks(n: int = 5):
+        return {"video_id": "abc123", "chunks": [CHUNK] * n}
+
+    @app.get("/scores")
+    def scores():
+        return APIResponse({"scores": np.array([0.5, 0.25], dtype=np.float32)})
+
+    @app.get("/random")
+    def random_bytes():
+        return Response(os.urandom(4096), media_type="application/octet-stream")
+
+    @app.get("/png")
+    def png():
+        return Response(b"\x89PNG" + b"\x00" * 4096, media_type="image/png")
+
+    return app
+
+
+def raw_body(app, path: str, query: str = "") -> bytes:
+    """Response body as sent on the wire (TestClient would decode the gzip)."""
+    messages = []
+    scope = {
+        "type": "http", "method": "GET", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "headers": [(b"accept-encoding", b"gzip")],
+        "http_version": "1.1", "scheme": "http", "server": ("test", 80), "client": ("test", 1),
+        "root_path": "",
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return b"".join(m.get("body", b"") for m in messages if m["type"] == "http.response.body")
+
+
+@pytest.fixture
+def client():
+    return TestClient(make_app())
+
+
+# ─── serialization ────────────────────────────────────────────────────────────
+
+class TestJSON:
+
+    def test_default_response_is_orjson(self, client):
+        response = client.get("/chunks")
+
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == {"video_id": "abc123", "chunks": [CHUNK] * 5}
+
+    def test_numpy_values_serialize(self, client):
+        assert client.get("/scores").json() == {"scores": [0.5, 0.25]}
+
+    def test_render_matches_orjson(self):
+        assert APIResponse({"a": 1}).body == orjson.dumps({"a": 1})
+
+
+# ─── content negotiation ──────────────────────────────────────────────────────
+
+class TestNegotiate:
+
+    @needs_msgpack
+    @pytest.mark.parametrize("accept, expected", [
+        ("", JSON),
+        ("*/*", JSON),
+        ("application/json", JSON),
+        ("application/msgpack", MSGPACK),
+        ("application/x-msgpack", MSGPACK),
+        ("application/json;q=0.5, application/msgpack", MSGPACK),
+        ("application/json, application/msgpack;q=0.5", JSON),
+        ("application/msgpack;q=0", JSON),
+    ])
+    def test_accept_header(self, accept, expected):
+        assert negotiate(accept) == expected
+
+    def test_json_without_msgpack(self, monkeypatch):
+        monkeypatch.setattr(responses, "msgpack", None)
+        assert negotiate("application/msgpack") == JSON
+
+    @needs_msgpack
+    def test_msgpack_response(self, client):
+        response = client.get("/chunks", headers={"Accept": "application/msgpack"})
+
+        assert response.headers["content-type"] == MSGPACK
+        assert "Accept" in response.headers["vary"]
+        assert responses.msgpack.unpackb(response.content) == {"video_id": "abc123", "chunks": [CHUNK] * 5}
+
+    @needs_msgpack
+    def test_msgpack_numpy(self, client):
+        response = client.get("/scores", headers={"Accept": "application/msgpack"})
+        assert responses.msgpack.unpackb(response.content) == {"scores": [0.5, 0.25]}
+
+
+# ─── compression ──────────────────────────────────────────────────────────────
+
+class TestCompression:
+
+    def test_small_response_not_compressed(self, client):
+        response = client.get("/chunks", params={"n": 1}, headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert response.json()["chunks"] == [CHUNK]
+
+    def test_large_response_compressed(self, client):
+        response = client.get("/chunks", params={"n": 20}, headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert int(response.headers["content-length"]) < len(orjson.dumps({"chunks": [CHUNK] * 20})) / 2
+        assert response.json()["chunks"] == [CHUNK] * 20
+
+    def test_uses_fast_level(self):
+        body = raw_body(make_app(compresslevel=1), "/chunks", "n=20")
+        # gzip header byte 8 (XFL) is 4 for the fastest level, 2 for level 9
+        assert body[:2] == b"\x1f\x8b" and body[8] == 4
+
+    def test_incompressible_body_sent_as_is(self, client):
+        response = client.get("/random", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert len(response.content) == 4096
+
+    def test_already_compressed_type_skipped(self, client):
+        response = client.get("/png", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+    def test_stream_compressed_chunk_by_chunk(self):
+        app = make_app()
+
+        @app.get("/stream")
+        def stream():
+            return StreamingResponse(iter([CHUNK.encode()] * 3), media_type="text/plain")
+
+        response = TestClient(app).get("/stream", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.text == CHUNK * 3
+
+    def test_level_zero_disables(self):
+        client = TestClient(make_app(compresslevel=0))
+        response = client.get("/chunks", params={"n": 20}, headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
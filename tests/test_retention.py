@@ -0,0 +1,192 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy import create_engine, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.models.chunk_archive import ChunkArchive
+from app.models.chunk_reembedding import ChunkReembedding
+from app.models.video import video
+from app.repositories.archive_repository import ChunkArchiveRepository
+from app.repositories.memory_chunk_repository import InMemoryChunkRepository
+from app.repositories.vector_backend import _StoreBackend
+from app.repositories.video_repository import VideoRepository
+from app.services.retention_service import AccessTracker, RetentionService, RetentionWorker, pack, unpack
+from app.services.vector_store_service import VectorStoreService
+
+NOW = datetime(2026, 6, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    video.__table__.create(engine)
+    ChunkArchive.__table__.create(engine)
+    ChunkReembedding.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def backend():
+    return _StoreBackend("memory", InMemoryChunkRepository(precision="float32"))
+
+
+def unit(*values):
+    vector = np.zeros(8, dtype=np.float32)
+    vector[:len(values)] = values
+    return vector
+
+
+def add_video(db, backend, video_id, idle_days):
+    VideoRepository(db).create_video(video_id, "x", "en")
+    last_used = NOW - timedelta(days=idle_days)
+    db.execute(update(video).where(video.video_id == video_id).values(created_at=last_used))
+    db.commit()
+    backend.insert_batch(video_id, [f"{video_id} north", f"{video_id} east"], [unit(0, 1), unit(1, 0)])
+
+
+# ─── archive format ───────────────────────────────────────────────────────────
+
+class TestArchiveFormat:
+
+    def test_round_trip(self):
+        matrix = np.random.default_rng(0).standard_normal((5, 8)).astype(np.float32)
+
+        contents, restored = unpack(pack("vid", list("abcde"), matrix, precision="float32"))
+        assert contents == list("abcde")
+        np.testing.assert_array_equal(restored, matrix)
+
+        _, half = unpack(pack("vid", list("abcde"), matrix, precision="float16"))
+        assert half.dtype == np.float32
+        np.testing.assert_allclose(half, matrix, atol=1e-2)
+
+    def test_unknown_precision(self):
+        with pytest.raises(ValueError):
+            pack("vid", ["a"], np.zeros((1, 2)), precision="int8")
+
+
+# ─── access tracking ──────────────────────────────────────────────────────────
+
+class TestAccessTracker:
+
+    def test_flush_moves_last_access_forward_only(self, db, backend):
+        add_video(db, backend, "a", idle_days=0)
+        clock = {"now": NOW}
+        tracker = AccessTracker(clock=lambda: clock["now"])
+
+        tracker.touch("a")
+        assert tracker.flush(db) == 1
+        clock["now"] = NOW - timedelta(days=1)
+        tracker.touch("a")
+        tracker.flush(db)
+
+        stored = db.execute(video.__table__.select()).one()._mapping["last_accessed_at"]
+        assert stored.replace(tzinfo=timezone.utc) == NOW
+        assert tracker.flush(db) == 0
+
+    def test_failed_flush_keeps_pending(self):
+        tracker = AccessTracker()
+        tracker.touch("a")
+        db = MagicMock()
+        db.execute.side_effect = OperationalError("UPDATE", {}, Exception("down"))
+
+        with pytest.raises(OperationalError):
+            tracker.flush(db)
+        assert tracker.stats()["pending"] == 1
+
+
+# ─── sweeps ───────────────────────────────────────────────────────────────────
+
+class TestSweep:
+
+    def test_idle_videos_archived(self, db, backend):
+        add_video(db, backend, "cold", idle_days=120)
+        add_video(db, backend, "warm", idle_days=3)
+
+        result = RetentionService(db, backend, hot_days=90).sweep(now=NOW)
+
+        assert result == {"archived": 1, "deleted": 0}
+        assert backend.export_video("cold") is None
+        assert backend.export_video("warm") is not None
+        assert ChunkArchiveRepository(db).stats()["chunks"] == 2
+
+    def test_size_cap_archives_least_recently_used(self, db, backend):
+        for video_id, idle in (("a", 3), ("b", 2), ("c", 1)):
+            add_video(db, backend, video_id, idle_days=idle)
+
+        RetentionService(db, backend, hot_days=0, max_hot_videos=1).sweep(now=NOW)
+
+        assert [v for v in "abc" if backend.export_video(v) is not None] == ["c"]
+        assert VideoRepository(db).count_hot() == 1
+
+    def test_archived_videos_expire(self, db, backend):
+        add_video(db, backend, "old", idle_days=400)
+        service = RetentionService(db, backend, hot_days=90, archive_days=365)
+
+        assert service.sweep(now=NOW) == {"archived": 1, "deleted": 1}
+        assert VideoRepository(db).get_by_video_id("old") is None
+        assert not ChunkArchiveRepository(db).exists("old")
+
+    def test_second_sweeper_keeps_the_first_archive(self, db, backend):
+        add_video(db, backend, "cold", idle_days=120)
+        first, second = RetentionService(db, backend), RetentionService(db, backend)
+
+        assert first.archive("cold") is True
+        assert second.archive("cold") is False
+
+        contents, _ = unpack(ChunkArchiveRepository(db).get("cold"))
+        assert contents == ["cold north", "cold east"]
+
+    def test_video_claimed_elsewhere_is_skipped(self, backend):
+        db = MagicMock()
+        db.get_bind.return_value.dialect.name = "postgresql"
+        db.execute.return_value.scalar.return_value = False
+
+        assert RetentionService(db, backend).archive("cold") is False
+        assert "pg_try_advisory_xact_lock" in str(db.execute.call_args.args[0])
+        db.add.assert_not_called()
+
+    def test_one_process_sweeps_at_a_time(self):
+        db = MagicMock()
+        bind = db.get_bind.return_value
+        bind.dialect.name = "postgresql"
+        bind.connect.return_value.__enter__.return_value.execute.return_value.scalar.return_value = False
+
+        assert RetentionWorker(session_factory=lambda: db).sweep() == {"skipped": "another process is sweeping"}
+
+    def test_worker_off_when_no_interval(self):
+        assert RetentionWorker(flush_interval=0).start() is False
+
+
+# ─── rehydration ──────────────────────────────────────────────────────────────
+
+class TestRehydration:
+
+    def test_search_restores_archived_video(self, db, backend):
+        add_video(db, backend, "cold", idle_days=120)
+        RetentionService(db, backend, hot_days=90).sweep(now=NOW)
+        service = VectorStoreService(db, backend=backend)
+
+        rows = service.search("cold", unit(1, 0), top_k=1)
+
+        assert [row["content"] for row in rows] == ["cold east"]
+        assert not ChunkArchiveRepository(db).exists("cold")
+        assert list(service.iter_search("cold", unit(0, 1), top_k=1))[0]["content"] == "cold north"
+
+    def test_unknown_video_stays_empty(self, db, backend):
+        assert VectorStoreService(db, backend=backend).search("missing", unit(1, 0)) == []
+
+    def test_new_content_replaces_archive(self, db, backend):
+        add_video(db, backend, "cold", idle_days=120)
+        RetentionService(db, backend, hot_days=90).sweep(now=NOW)
+        service = VectorStoreService(db, backend=backend)
+
+        service.bulk_insert_chunks("cold", ["fresh"], [unit(1, 0)])
+
+        assert not ChunkArchiveRepository(db).exists("cold")
+        assert [r["content"] for r in service.search("cold", unit(1, 0), threshold=-1.0)] == ["fresh"]
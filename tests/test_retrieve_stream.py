@@ -0,0 +1,164 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import MagicMock, patch
+
+from app.main import app
+from app.database import get_db
+from app.repositories.chunk_repository import ChunkRepository
+from app.repositories.memory_chunk_repository import InMemoryChunkRepository
+from app.repositories.vector_backend import get_vector_backend
+from app.repositories.video_repository import EmbeddingState
+from app.services.query_cache_service import query_cache
+from app.services.rag_service import stream_relevant_chunks
+from app.services.vector_store_service import VectorStoreService
+
+
+STATE = EmbeddingState("model", 0)
+
+
+class StreamingBackend:
+    """A backend whose rows materialize one at a time, recording when."""
+
+    name = "streaming"
+    supports_language = False
+
+    def __init__(self, n: int, log: list):
+        self.n = n
+        self.log = log
+
+    def iter_search(self, video_id, query_embedding, top_k=5, threshold=0.0, recall=None):
+        def rows():
+            for i in range(min(self.n, top_k)):
+                self.log.append(("ranked", i))
+                yield {"id": i, "chunk_index": 10 + i, "score": 1.0 - i / 100, "content": f"chunk {i}"}
+        return rows()
+
+
+@pytest.fixture
+def backend():
+    backend = StreamingBackend(n=30, log=[])
+    with patch("app.services.rag_service.EmbeddingService") as mock_embedding, \
+         patch("app.services.rag_service.VectorStoreService", lambda db: VectorStoreService(db, backend=backend)), \
+         patch("app.services.rag_service.embedding_models") as models:
+        mock_embedding.return_value.embed.return_value = np.array([1.0, 0.0], dtype=np.float32)
+        models.state.return_value = STATE
+        query_cache.clear()
+        yield backend
+    query_cache.clear()
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_db] = lambda: MagicMock()
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def post_raw(path: str, payload: dict, log: list) -> None:
+    """Drive the ASGI app directly, logging each body message as it is sent."""
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http", "method": "POST", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "http_version": "1.1", "scheme": "http", "server": ("test", 80), "client": ("test", 1),
+        "root_path": "",
+    }
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.sleep(3600)
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            log.append(("sent", message["body"]))
+
+    asyncio.run(app(scope, receive, send))
+
+
+# ─── service ──────────────────────────────────────────────────────────────────
+
+class TestStreamRelevantChunks:
+
+    def test_events_in_rank_order(self, backend):
+        events = list(stream_relevant_chunks("vid", "what is it", MagicMock(), top_k=3))
+
+        assert [e["rank"] for e in events] == [0, 1, 2]
+        assert [e["chunk_index"] for e in events] == [10, 11, 12]
+        assert events[0]["score"] == pytest.approx(1.0)
+        assert events[2]["content"] == "chunk 2"
+
+    def test_search_runs_before_iteration(self, backend):
+        with patch.object(backend, "iter_search", wraps=backend.iter_search) as spy:
+            stream_relevant_chunks("vid", "what is it", MagicMock(), top_k=3)
+        spy.assert_called_once()
+        assert backend.log == []
+
+    def test_empty_question_fails_eagerly(self, backend):
+        with pytest.raises(ValueError):
+            stream_relevant_chunks("vid", "   ", MagicMock())
+
+    def test_consumed_stream_fills_query_cache(self, backend):
+        list(stream_relevant_chunks("vid", "what is it", MagicMock(), top_k=2))
+        assert query_cache.lookup_exact("vid", "what is it", 2, STATE) == ["chunk 0", "chunk 1"]
+
+
+class TestIterSearch:
+
+    def test_falls_back_to_search_for_in_process_backends(self):
+        store = InMemoryChunkRepository()
+        store.bulk_insert("vid", ["a", "b"], np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32))
+        service = VectorStoreService(MagicMock(), backend=get_vector_backend(name="memory"))
+        service.backend.store = store
+
+        rows = list(service.iter_search("vid", [1.0, 0.0], top_k=2, threshold=-1.0))
+        assert [row["content"] for row in rows] == ["a", "b"]
+
+    def test_pgvector_reads_from_server_side_cursor(self):
+        db = MagicMock()
+        db.execute.return_value = iter([])
+
+        list(ChunkRepository(db).iter_similar("vid", [0.5, 0.25], top_k=50, batch_rows=8))
+
+        options = db.execute.call_args.kwargs["execution_options"]
+        assert options == {"stream_results": True, "yield_per": 8}
+
+
+# ─── API ──────────────────────────────────────────────────────────────────────
+
+class TestStreamEndpoint:
+
+    def test_ndjson_lines(self, backend, client):
+        response = client.post("/retrieve_chunks/stream", json={"video_id": "vid", "question": "q", "top_k": 4})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["rank"] for line in lines] == [0, 1, 2, 3]
+        assert set(lines[0]) == {"rank", "chunk_index", "score", "content"}
+
+    def test_allows_larger_top_k_than_retrieve(self, backend, client):
+        response = client.post("/retrieve_chunks/stream", json={"video_id": "vid", "question": "q", "top_k": 25})
+        assert len(response.text.splitlines()) == 25
+
+        response = client.post("/retrieve_chunks/stream", json={"video_id": "vid", "question": "q", "top_k": 1000})
+        assert response.status_code == 422
+
+    def test_empty_question_is_400(self, backend, client):
+        response = client.post("/retrieve_chunks/stream", json={"video_id": "vid", "question": " "})
+        assert response.status_code == 400
+
+    def test_first_byte_before_results_are_built(self, backend, client):
+        post_raw("/retrieve_chunks/stream", {"video_id": "vid", "question": "q", "top_k": 20}, backend.log)
+
+        first_sent = next(i for i, entry in enumerate(backend.log) if entry[0] == "sent")
+        last_ranked = max(i for i, entry in enumerate(backend.log) if entry[0] == "ranked")
+        assert first_sent < last_ranked
+        assert json.loads(backend.log[first_sent][1].splitlines()[0])["rank"] == 0
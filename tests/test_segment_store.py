@@ -0,0 +1,119 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.repositories.segment_store import SegmentStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SegmentStore(str(tmp_path), dtype="float32")
+
+
+def insert(store, video_id, n=3, dim=4, seed=0):
+    rng = np.random.default_rng(seed)
+    store.bulk_insert(video_id, [f"{video_id} chunk {i} ✓" for i in range(n)], rng.standard_normal((n, dim)))
+
+
+class TestSegmentStore:
+
+    def test_search_returns_ranked_rows_with_content(self, store):
+        store.bulk_insert("vid", ["north", "east", "south"], [[0, 1], [1, 0], [0, -1]])
+
+        rows = store.search_similar("vid", [0.1, 1.0], top_k=2)
+
+        assert [r["content"] for r in rows] == ["north", "east"]
+        assert rows[0]["chunk_index"] == 0
+        assert rows[0]["score"] == pytest.approx(np.cos(np.arctan(0.1)), abs=1e-5)
+
+    def test_video_slice_is_memory_mapped(self, store):
+        insert(store, "vid")
+        matrix = store.video_matrix("vid")
+        assert isinstance(matrix, np.memmap)
+        assert matrix.shape == (3, 4)
+
+    def test_second_process_sees_writes(self, store, tmp_path):
+        reader = SegmentStore(str(tmp_path))
+        insert(store, "vid")
+        assert len(reader.search_similar("vid", np.ones(4), top_k=5, threshold=-1.0)) == 3
+
+    def test_reingestion_replaces_old_rows(self, store):
+        insert(store, "vid", n=3)
+        store.bulk_insert("vid", ["new"], [[1, 0, 0, 0]])
+        rows = store.search_similar("vid", [1, 0, 0, 0], top_k=5)
+        assert [r["content"] for r in rows] == ["new"]
+
+    def test_delete_tombstones_video(self, store):
+        insert(store, "a")
+        insert(store, "b")
+        store.delete_by_video("a")
+        assert store.search_similar("a", np.ones(4)) == []
+        assert store.stats()["dead_rows"] == 3
+
+    def test_compaction_keeps_live_rows_and_drops_files(self, store, tmp_path):
+        for i in range(4):
+            insert(store, f"v{i}", seed=i)
+        store.delete_by_video("v0")
+        before = store.search_similar("v2", np.ones(4), top_k=3, threshold=-1.0)
+
+        assert store.compact(min_segments=2)
+
+        assert store.stats() == {"segments": 1, "videos": 3, "rows": 9, "dead_rows": 0}
+        after = store.search_similar("v2", np.ones(4), top_k=3, threshold=-1.0)
+        assert [(r["content"], r["chunk_index"]) for r in after] == [(r["content"], r["chunk_index"]) for r in before]
+        assert len(list(tmp_path.glob("seg-*.json"))) == 5  # replaced files wait out the grace period
+
+        assert store.compact(min_segments=2, grace_seconds=0) is False
+        assert len(list(tmp_path.glob("seg-*.json"))) == 1
+
+    def test_compaction_merges_only_the_small_tier(self, store):
+        insert(store, "big", n=40)
+        for i in range(4):
+            insert(store, f"v{i}", seed=i)
+        big = store._locations["big"][0].name
+
+        assert store.compact(min_segments=4)
+
+        assert store.stats()["segments"] == 2
+        assert store._locations["big"][0].name == big
+
+    def test_reader_of_the_old_manifest_can_open_retired_files(self, store, tmp_path):
+        for i in range(2):
+            insert(store, f"v{i}", seed=i)
+        reader = SegmentStore(str(tmp_path))
+        manifest = reader._read_manifest()
+
+        store.compact(min_segments=2)
+
+        with patch.object(reader, "_read_manifest", return_value=manifest):
+            reader.refresh()
+        assert len(reader.search_similar("v1", np.ones(4), threshold=-1.0)) == 3
+
+    def test_refresh_rereads_manifest_when_a_segment_is_gone(self, store, tmp_path):
+        for i in range(2):
+            insert(store, f"v{i}", seed=i)
+        reader = SegmentStore(str(tmp_path))
+        stale = reader._read_manifest()
+        store.compact(min_segments=2)
+        store.compact(min_segments=2, grace_seconds=0)
+
+        with patch.object(reader, "_read_manifest", side_effect=[stale, store._read_manifest()]):
+            reader.refresh()
+        assert len(reader.search_similar("v1", np.ones(4), threshold=-1.0)) == 3
+
+    def test_one_process_holds_the_compactor_lease(self, store, tmp_path):
+        other = SegmentStore(str(tmp_path))
+        assert store._holds_compactor_lease()
+        assert not other._holds_compactor_lease()
+        assert store._holds_compactor_lease()
+
+    def test_compaction_skipped_when_not_needed(self, store):
+        insert(store, "vid")
+        assert store.compact() is False
+
+    def test_float16_storage(self, tmp_path):
+        store = SegmentStore(str(tmp_path), dtype="float16")
+        insert(store, "vid")
+        assert store.video_matrix("vid").dtype == np.float16
+        assert len(store.search_similar("vid", np.ones(4), threshold=-1.0)) == 3
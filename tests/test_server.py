@@ -0,0 +1,120 @@
+import os
+import signal
+import sys
+import time
+
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app import server
+from app.utils.process_memory import child_pids, memory_report, parse_smaps_rollup, process_memory
+
+linux_only = pytest.mark.skipif(not os.path.exists("/proc/self/smaps_rollup"), reason="needs /proc smaps_rollup")
+
+
+# ─── thread budget ────────────────────────────────────────────────────────────
+
+class TestTorchThreads:
+
+    def test_even_split_of_cores(self):
+        with patch("app.server.os.cpu_count", return_value=16):
+            assert server.threads_per_worker(4, configured=0) == 4
+            assert server.threads_per_worker(32, configured=0) == 1
+            assert server.threads_per_worker(4, configured=2) == 2
+
+    def test_configures_loaded_torch(self, monkeypatch):
+        torch = MagicMock()
+        monkeypatch.setitem(sys.modules, "torch", torch)
+        monkeypatch.setenv("OMP_NUM_THREADS", "64")
+
+        server.configure_torch_threads(3)
+
+        torch.set_num_threads.assert_called_once_with(3)
+        assert os.environ["OMP_NUM_THREADS"] == "3"
+
+
+# ─── memory report ────────────────────────────────────────────────────────────
+
+class TestMemoryReport:
+
+    def test_parse_smaps_rollup(self):
+        fields = parse_smaps_rollup(
+            "55a3-7fff ---p 00000000 00:00 0   [rollup]\n"
+            "Rss:                1412 kB\n"
+            "Pss:                 454 kB\n"
+            "Shared_Clean:       1272 kB\n"
+            "Private_Dirty:       100 kB\n"
+        )
+        assert fields == {"Rss": 1412 * 1024, "Pss": 454 * 1024, "Shared_Clean": 1272 * 1024, "Private_Dirty": 100 * 1024}
+
+    def test_unknown_process(self):
+        assert process_memory(2 ** 22 + 12345) is None
+
+    @linux_only
+    def test_forked_worker_shares_parent_pages(self):
+        weights = np.ones(64 * 2 ** 20 // 8)  # 64 MiB touched in the "master"
+        read, write = os.pipe()
+
+        pid = os.fork()
+        if pid == 0:
+            os.close(read)
+            float(weights[::512].sum())  # read-only use, like inference
+            os.write(write, b"x")
+            time.sleep(30)
+            os._exit(0)
+
+        try:
+            os.close(write)
+            os.read(read, 1)
+            assert pid in child_pids(os.getpid())
+
+            child = process_memory(pid)
+            assert child["shared"] > 60 * 2 ** 20
+            assert child["uss"] < child["shared"]
+
+            report = memory_report(os.getpid())
+            assert report["saved"] > 30 * 2 ** 20
+        finally:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+
+
+# ─── supervision ──────────────────────────────────────────────────────────────
+
+@linux_only
+class TestMaster:
+
+    def test_crashed_worker_restarted_in_its_slot(self, monkeypatch):
+        monkeypatch.setattr(server, "RESTART_BACKOFF_SECONDS", 0)
+        master = server.Master(2, lambda slot: time.sleep(30))
+        master.start()
+        try:
+            crashed, slot = next(iter(master.children.items()))
+            os.kill(crashed, signal.SIGKILL)
+
+            new_pid = master.supervise_once()
+
+            assert new_pid not in (None, crashed)
+            assert master.children[new_pid] == slot
+            assert len(master.children) == 2
+        finally:
+            master.stop(signal.SIGKILL)
+        assert master.children == {}
+
+    def test_no_restart_while_stopping(self):
+        master = server.Master(1, lambda slot: None)
+        master.stopping = True
+        master.start()
+        assert master.supervise_once() is None
+        assert master.children == {}
+
+
+class TestPreload:
+
+    def test_loads_model_then_freezes_gc(self):
+        with patch("app.services.embedding_service.get_model") as get_model, \
+             patch("app.server.gc") as gc:
+            server.preload()
+        get_model.assert_called_once_with()
+        gc.freeze.assert_called_once_with()
@@ -0,0 +1,101 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import MagicMock, patch
+
+from app.services import embedding_service
+
+ROOT = Path(__file__).resolve().parent.parent
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "2500"))
+DEFERRED_MODULES = ("torch", "sentence_transformers", "transformers", "cryptography", "youtube_transcript_api")
+
+
+def import_times(module: str) -> dict:
+    """Cumulative import time in microseconds per module, from `python -X importtime`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+# ─── import budget ────────────────────────────────────────────────────────────
+
+class TestImportTime:
+
+    @pytest.fixture(scope="class")
+    def times(self):
+        return import_times("app.main")
+
+    def test_app_main_within_budget(self, times):
+        assert times["app.main"] / 1000 < IMPORT_BUDGET_MS
+
+    def test_heavy_modules_deferred(self, times):
+        loaded = sorted({name.split(".")[0] for name in times} & set(DEFERRED_MODULES))
+        assert loaded == []
+
+
+# ─── lazy model loading ───────────────────────────────────────────────────────
+
+@pytest.fixture
+def fresh_models(monkeypatch):
+    monkeypatch.setattr(embedding_service, "_models", {})
+    monkeypatch.setattr(embedding_service, "_model_states", {})
+
+
+class TestModelLoading:
+
+    def test_service_construction_does_not_load(self, fresh_models):
+        embedding_service.EmbeddingService("some-model")
+        assert embedding_service.model_states() == {embedding_service.EMBEDDING_MODEL: "not_loaded"}
+        assert not embedding_service.models_ready()
+
+    def test_model_loaded_once_and_shared(self, fresh_models):
+        with patch("sentence_transformers.SentenceTransformer") as model_cls:
+            first = embedding_service.EmbeddingService().model
+            second = embedding_service.EmbeddingService().model
+
+        assert first is second
+        model_cls.assert_called_once_with(embedding_service.EMBEDDING_MODEL)
+        assert embedding_service.models_ready()
+
+    def test_failed_load_reported(self, fresh_models):
+        with patch("sentence_transformers.SentenceTransformer", side_effect=OSError("offline")):
+            embedding_service.preload_model().join()
+        assert embedding_service.model_states()[embedding_service.EMBEDDING_MODEL] == "failed"
+
+
+# ─── health / readiness ───────────────────────────────────────────────────────
+
+class TestReadiness:
+
+    @pytest.fixture
+    def client(self):
+        from app.main import app
+        return TestClient(app)
+
+    def test_health_always_ok(self, client, fresh_models):
+        assert client.get("/health").json() == {"status": "ok"}
+
+    def test_not_ready_until_model_loaded(self, client, fresh_models):
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["ready"] is False
+
+        embedding_service._models[embedding_service.EMBEDDING_MODEL] = MagicMock()
+        embedding_service._model_states[embedding_service.EMBEDDING_MODEL] = "ready"
+
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json() == {"ready": True, "models": {embedding_service.EMBEDDING_MODEL: "ready"}}
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.database import get_db
+from app.services import summary_service
+from app.services.summary_service import SummaryService, textrank_scores
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    summary_service._summary_cache.clear()
+    yield
+    summary_service._summary_cache.clear()
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_db] = lambda: MagicMock()
+    # no content version: conditional caching is covered in test_http_cache.py
+    with patch("app.utils.http_cache.VideoRepository") as mock_versions:
+        mock_versions.return_value.get_content_version.return_value = None
+        yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+# ─────────────────────────────────────────────
+# Extraction
+# ─────────────────────────────────────────────
+
+class TestExtractKeyPoints:
+
+    def test_empty_input(self):
+        assert SummaryService.extract_key_points([], []) == []
+
+    def test_single_chunk(self):
+        points = SummaryService.extract_key_points(["Only chunk. More text."], [[1.0, 0.0]])
+        assert points == [{"chunk_index": 0, "text": "Only chunk."}]
+
+    def test_outlier_ranks_lowest(self):
+        embeddings = np.array([[1, 0.1], [1, 0], [0.9, 0.1], [0, 1]], dtype=np.float32)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        scores = textrank_scores(embeddings)
+        assert int(np.argmin(scores)) == 3
+
+    def test_redundant_chunks_collapsed_and_ordered(self):
+        chunks = ["a. x", "b. x", "c. x"]
+        embeddings = [[1, 0], [1, 0], [0, 1]]
+        points = SummaryService.extract_key_points(chunks, embeddings, max_points=3)
+        indexes = [p["chunk_index"] for p in points]
+        assert len(indexes) == 2
+        assert indexes == sorted(indexes)
+        assert 2 in indexes
+
+    def test_text_truncated_to_max_words(self):
+        points = SummaryService.extract_key_points(["one two three four five"], [[1, 0]], max_words=3)
+        assert points[0]["text"] == "one two three…"
+
+
+# ─────────────────────────────────────────────
+# Endpoint
+# ─────────────────────────────────────────────
+
+class TestSummaryEndpoint:
+
+    @patch("app.services.summary_service.VideoRepository")
+    def test_served_from_cache_after_first_read(self, mock_repo_class, client):
+        mock_repo_class.return_value.get_summary.return_value = '[{"chunk_index": 0, "text": "Intro."}]'
+
+        first = client.get("/summary/jNQXAC9IVRw")
+        second = client.get("/summary/jNQXAC9IVRw")
+
+        assert first.status_code == 200
+        assert second.json() == {"video_id": "jNQXAC9IVRw", "key_points": [{"chunk_index": 0, "text": "Intro."}]}
+        mock_repo_class.return_value.get_summary.assert_called_once()
+
+    @patch("app.services.summary_service.VideoRepository")
+    def test_missing_summary_returns_404(self, mock_repo_class, client):
+        mock_repo_class.return_value.get_summary.return_value = None
+
+        response = client.get("/summary/jNQXAC9IVRw")
+
+        assert response.status_code == 404
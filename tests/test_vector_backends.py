@@ -0,0 +1,295 @@
+"""
+Conformance and performance suite every VectorBackend must pass.
+
+The process-local backends always run. The pgvector backend runs against
+the configured DATABASE_URL when PGVECTOR_TEST=1 (it writes and removes
+videos prefixed "conformance-").
+"""
+import os
+import time
+
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.repositories.memory_chunk_repository import InMemoryChunkRepository
+from app.repositories.segment_store import SegmentStore
+from app.repositories.sqlite_vector_store import SqliteVectorStore
+from app.repositories.vector_backend import (
+    BACKENDS,
+    PgVectorBackend,
+    VectorBackend,
+    _StoreBackend,
+    get_vector_backend,
+)
+from app.services.vector_store_service import VectorStoreService
+
+PREFIX = "conformance-"
+
+
+class ConformancePgVectorBackend(PgVectorBackend):
+    """Creates the videos row each video's chunks reference (chunks.video_id is a foreign key)."""
+
+    def insert_batch(self, video_id, chunks, embeddings):
+        from sqlalchemy import text
+        self.db.execute(text("""
+            INSERT INTO videos (video_id, encrypted_transcript, language)
+            VALUES (:video_id, '', 'en') ON CONFLICT (video_id) DO NOTHING
+        """), {"video_id": video_id})
+        super().insert_batch(video_id, chunks, embeddings)
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, tmp_path):
+    name = request.param
+    if name == "memory":
+        yield _StoreBackend(name, InMemoryChunkRepository(precision="float32"))
+    elif name == "sqlite":
+        yield _StoreBackend(name, SqliteVectorStore(str(tmp_path / "vectors.sqlite3")))
+    elif name == "segments":
+        yield _StoreBackend(name, SegmentStore(str(tmp_path / "segments"), dtype="float32"))
+    else:
+        if os.getenv("PGVECTOR_TEST") != "1":
+            pytest.skip("set PGVECTOR_TEST=1 to run against DATABASE_URL")
+        from app.database import SessionLocal
+        db = SessionLocal()
+        yield ConformancePgVectorBackend(db)
+        db.rollback()
+        from sqlalchemy import text
+        db.execute(text("DELETE FROM chunks WHERE video_id LIKE :prefix"), {"prefix": PREFIX + "%"})
+        db.execute(text("DELETE FROM videos WHERE video_id LIKE :prefix"), {"prefix": PREFIX + "%"})
+        db.commit()
+        db.close()
+
+
+def unit(*values):
+    vector = np.zeros(384, dtype=np.float32)
+    vector[:len(values)] = values
+    return vector
+
+
+def vid(name):
+    return PREFIX + name
+
+
+# ─── conformance ──────────────────────────────────────────────────────────────
+
+class TestConformance:
+
+    def test_satisfies_protocol(self, backend):
+        assert isinstance(backend, VectorBackend)
+
+    def test_search_ranks_by_cosine(self, backend):
+        backend.insert_batch(vid("a"), ["north", "north-east", "east"], [unit(0, 1), unit(1, 1), unit(1, 0)])
+
+        rows = backend.search(vid("a"), unit(0, 2), top_k=2)
+
+        assert [r["content"] for r in rows] == ["north", "north-east"]
+        assert [r["chunk_index"] for r in rows] == [0, 1]
+        assert rows[0]["score"] == pytest.approx(1.0, abs=1e-3)
+        assert rows[1]["score"] == pytest.approx(np.sqrt(0.5), abs=1e-3)
+        assert {"id", "chunk_index", "score", "content"} <= set(rows[0])
+
+    def test_threshold_applied_before_limit(self, backend):
+        backend.insert_batch(vid("a"), ["north", "north-east", "east"], [unit(0, 1), unit(1, 1), unit(1, 0)])
+        rows = backend.search(vid("a"), unit(0, 1), top_k=3, threshold=0.5)
+        assert [r["content"] for r in rows] == ["north", "north-east"]
+
+    def test_search_is_scoped_to_video(self, backend):
+        backend.insert_batch(vid("a"), ["a0"], [unit(1, 0)])
+        backend.insert_batch(vid("b"), ["b0"], [unit(1, 0)])
+        assert [r["content"] for r in backend.search(vid("a"), unit(1, 0))] == ["a0"]
+        assert backend.search(vid("missing"), unit(1, 0)) == []
+
+    def test_insert_replaces_video(self, backend):
+        backend.insert_batch(vid("a"), ["old-0", "old-1"], [unit(1, 0), unit(0, 1)])
+        backend.insert_batch(vid("a"), ["new"], [unit(1, 0)])
+        rows = backend.search(vid("a"), unit(1, 0), top_k=5, threshold=-1.0)
+        assert [r["content"] for r in rows] == ["new"]
+
+    def test_delete_video(self, backend):
+        backend.insert_batch(vid("a"), ["a0"], [unit(1, 0)])
+        backend.insert_batch(vid("b"), ["b0"], [unit(1, 0)])
+        backend.delete_video(vid("a"))
+        assert backend.search(vid("a"), unit(1, 0)) == []
+        assert len(backend.search(vid("b"), unit(1, 0))) == 1
+
+    def test_export_round_trips(self, backend):
+        backend.insert_batch(vid("a"), ["north", "east"], [unit(0, 1), unit(1, 0)])
+
+        contents, matrix = backend.export_video(vid("a"))
+        backend.delete_video(vid("a"))
+        backend.insert_batch(vid("a"), contents, matrix)
+
+        assert contents == ["north", "east"]
+        assert matrix.shape == (2, 384)
+        assert [r["content"] for r in backend.search(vid("a"), unit(1, 0), top_k=1)] == ["east"]
+        assert backend.export_video(vid("missing")) is None
+
+    def test_search_many_merges_videos(self, backend):
+        backend.insert_batch(vid("a"), ["a-east", "a-north"], [unit(1, 0), unit(0, 1)])
+        backend.insert_batch(vid("b"), ["b-north-east"], [unit(1, 1)])
+
+        rows = backend.search_many(unit(1, 0.1), top_k=2, video_ids=[vid("a"), vid("b")])
+
+        assert [(r["video_id"], r["content"]) for r in rows] == [(vid("a"), "a-east"), (vid("b"), "b-north-east")]
+        assert rows[0]["score"] >= rows[1]["score"]
+
+    def test_search_many_video_filter(self, backend):
+        backend.insert_batch(vid("a"), ["a0"], [unit(1, 0)])
+        backend.insert_batch(vid("b"), ["b0"], [unit(1, 0)])
+        rows = backend.search_many(unit(1, 0), top_k=5, video_ids=[vid("b")])
+        assert [r["video_id"] for r in rows] == [vid("b")]
+
+    def test_mismatched_lengths_rejected(self, backend):
+        with pytest.raises(ValueError):
+            backend.insert_batch(vid("a"), ["only one"], [unit(1, 0), unit(0, 1)])
+
+    def test_stats_count_rows_and_videos(self, backend):
+        before = backend.stats()
+        backend.insert_batch(vid("a"), ["a0", "a1"], [unit(1, 0), unit(0, 1)])
+        backend.insert_batch(vid("b"), ["b0"], [unit(1, 0)])
+        after = backend.stats()
+        assert after["videos"] - before["videos"] == 2
+        assert after["rows"] - before["rows"] == 3
+
+
+# ─── performance ──────────────────────────────────────────────────────────────
+
+VIDEOS, CHUNKS_PER_VIDEO, DIM = 50, 120, 384
+
+
+def corpus(seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((VIDEOS, DIM)).astype(np.float32)
+    for v in range(VIDEOS):
+        yield vid(f"perf-{v}"), centers[v] + 0.6 * rng.standard_normal((CHUNKS_PER_VIDEO, DIM)).astype(np.float32)
+
+
+class TestPerformance:
+    """Generous budgets: catch accidental O(corpus) work per query or per-row round trips."""
+
+    def test_search_latency_and_exactness(self, backend):
+        matrices = {}
+        for video_id, matrix in corpus():
+            backend.insert_batch(video_id, [f"{video_id}:{i}" for i in range(len(matrix))], matrix)
+            matrices[video_id] = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+        rng = np.random.default_rng(1)
+        latencies, hits = [], 0
+        for _ in range(50):
+            video_id = vid(f"perf-{rng.integers(VIDEOS)}")
+            query = rng.standard_normal(DIM).astype(np.float32)
+
+            t0 = time.perf_counter()
+            rows = backend.search(video_id, query, top_k=5, threshold=-1.0)
+            latencies.append(time.perf_counter() - t0)
+
+            exact = np.argsort(-(matrices[video_id] @ (query / np.linalg.norm(query))))[:5]
+            hits += len({r["chunk_index"] for r in rows} & set(exact.tolist()))
+
+        assert np.percentile(latencies, 95) < 0.05
+        assert hits / (50 * 5) >= 0.9
+
+    def test_search_many_latency(self, backend):
+        for video_id, matrix in corpus():
+            backend.insert_batch(video_id, [f"{video_id}:{i}" for i in range(len(matrix))], matrix)
+        video_ids = [vid(f"perf-{v}") for v in range(VIDEOS)]
+
+        rng = np.random.default_rng(2)
+        latencies = []
+        for _ in range(20):
+            t0 = time.perf_counter()
+            rows = backend.search_many(rng.standard_normal(DIM), top_k=10, video_ids=video_ids)
+            latencies.append(time.perf_counter() - t0)
+            assert len(rows) == 10
+
+        assert np.percentile(latencies, 95) < 0.5
+
+
+# ─── selection and service wiring ─────────────────────────────────────────────
+
+class TestSelection:
+
+    def test_pgvector_needs_session(self):
+        with pytest.raises(ValueError):
+            get_vector_backend(None, "pgvector")
+        assert isinstance(get_vector_backend(MagicMock(), "pgvector"), PgVectorBackend)
+
+    def test_unknown_backend_rejected(self):
+        with pytest.raises(ValueError, match="faiss"):
+            get_vector_backend(None, "faiss")
+
+    def test_process_local_store_is_shared(self):
+        first = get_vector_backend(None, "memory")
+        second = get_vector_backend(None, "memory")
+        assert first.store is second.store
+
+
+class TestPgVectorSearch:
+
+    def test_per_video_search_scans_past_other_videos(self):
+        backend = PgVectorBackend(MagicMock())
+
+        with patch("app.repositories.vector_backend.get_index_manager") as manager, \
+                patch("app.repositories.vector_backend.ChunkRepository") as repo:
+            manager.return_value.settings_for.return_value = {"hnsw.iterative_scan": "relaxed_order"}
+            backend.search("vid", unit(1, 0), top_k=3, recall=0.95)
+            backend.iter_search("vid", unit(1, 0), top_k=3, recall=0.95)
+
+        assert manager.return_value.settings_for.call_args_list == [((0.95,), {"filtered": True})] * 2
+        assert repo.return_value.search_similar.call_args.kwargs["settings"] == {"hnsw.iterative_scan": "relaxed_order"}
+        assert repo.return_value.iter_similar.call_args.kwargs["settings"] == {"hnsw.iterative_scan": "relaxed_order"}
+
+
+    def test_binary_corpus_search_skips_chunks_gone_from_the_table(self):
+        from app.repositories.binary_chunk_index import BinaryChunkIndex
+
+        index = BinaryChunkIndex(precision="float32")
+        index.add([1, 2, 3, 4], ["old", "old", "kept", "kept"], [0, 1, 0, 1],
+                  [unit(1, 0), unit(1, 0.1), unit(1, 0.2), unit(1, 0.3)])
+        live = {3: "three", 4: "four"}  # "old" was deleted by another process
+
+        with patch("app.repositories.vector_backend.CORPUS_SEARCH_BACKEND", "binary"), \
+                patch("app.repositories.vector_backend.get_binary_index", return_value=index), \
+                patch("app.repositories.vector_backend.ChunkRepository") as repo:
+            repo.return_value.get_contents.side_effect = lambda ids: {i: live[i] for i in ids if i in live}
+            rows = PgVectorBackend(MagicMock()).search_many(unit(1, 0), top_k=2)
+
+        assert [r["content"] for r in rows] == ["three", "four"]
+        assert len(index) == 2
+
+
+class TestVectorStoreService:
+
+    def test_language_resolved_for_backends_without_it(self):
+        backend = _StoreBackend("memory", InMemoryChunkRepository(precision="float32"))
+        backend.insert_batch("en-video", ["hello"], [unit(1, 0)])
+        backend.insert_batch("de-video", ["hallo"], [unit(1, 0)])
+        service = VectorStoreService(MagicMock(), backend=backend)
+
+        with patch("app.services.vector_store_service.VideoRepository") as repo:
+            repo.return_value.get_ids_by_language.return_value = ["de-video"]
+            rows = service.search_all(unit(1, 0), top_k=5, language="de")
+
+        assert [r["content"] for r in rows] == ["hallo"]
+
+    def test_writes_invalidate_query_cache(self):
+        backend = MagicMock()
+        service = VectorStoreService(MagicMock(), backend=backend)
+        with patch("app.services.vector_store_service.query_cache") as cache:
+            service.bulk_insert_chunks("vid", ["a"], [unit(1, 0)])
+            service.delete_video("vid")
+        assert cache.invalidate.call_count == 2
+        backend.insert_batch.assert_called_once()
+        backend.delete_video.assert_called_once_with("vid")
+
+    def test_build_index_without_ann_index(self):
+        backend = _StoreBackend("memory", InMemoryChunkRepository())
+        assert VectorStoreService(MagicMock(), backend=backend).build_index() is False
+
+    def test_similarity_search_has_no_floor(self):
+        backend = _StoreBackend("memory", InMemoryChunkRepository(precision="float32"))
+        backend.insert_batch("vid", ["opposite"], [unit(-1, 0)])
+        service = VectorStoreService(MagicMock(), backend=backend)
+        assert service.similarity_search("vid", unit(1, 0)) == ["opposite"]